@@ -1,9 +1,20 @@
 # app_utils/fba_data/unit_converter.py
 
+import numpy as np
+
+
+def _round2(value):
+    """保留 2 位小数；同时支持标量与 NumPy 数组 (批量目录计算)"""
+    if isinstance(value, np.ndarray):
+        return np.round(value, 2)
+    return round(value, 2)
+
+
 def convert_inputs(length, width, height, weight, unit_type="inch/lb"):
     """
     统一将输入转换为 inch 和 lb。
     亚马逊 FBA 计费核心均基于英制。
+    参数可以是单个数值，也可以是等长的 NumPy 数组。
     """
     if unit_type == "cm/kg":
         # 转换逻辑
@@ -11,10 +22,10 @@ def convert_inputs(length, width, height, weight, unit_type="inch/lb"):
         # 1 kg ≈ 2.20462 lb
         
         # 我们保留 2 位小数，防止精度溢出导致误判尺寸分段
-        l = round(length / 2.54, 2)
-        w = round(width / 2.54, 2)
-        h = round(height / 2.54, 2)
-        wt = round(weight * 2.20462, 2)
+        l = _round2(length / 2.54)
+        w = _round2(width / 2.54)
+        h = _round2(height / 2.54)
+        wt = _round2(weight * 2.20462)
         
         return l, w, h, wt
         
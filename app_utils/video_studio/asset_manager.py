@@ -13,12 +13,9 @@ import uuid
 import hashlib
 import shutil
 import asyncio
-
-try:
-    import aiofiles
-    AIOFILES_AVAILABLE = True
-except ImportError:
-    AIOFILES_AVAILABLE = False
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Union, BinaryIO
@@ -45,6 +42,10 @@ from .models import TaskStatus
 from .error_handler import VideoStudioErrorHandler
 
 
+# Uploads are written and hashed in chunks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
 class AssetType(Enum):
     """Types of assets supported by the system"""
     IMAGE = "image"
@@ -167,6 +168,13 @@ class AssetManager:
         self._asset_registry: Dict[str, AssetMetadata] = {}
         self._load_asset_registry()
         
+        # Upload writing, hashing and PIL work run in a thread pool (hashlib
+        # and PIL decode/resize/encode release the GIL); each event loop
+        # admits as many uploads as there are workers, the rest wait
+        self.processing_workers = self.config.processing_workers or os.cpu_count() or 1
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._processing_slots = weakref.WeakKeyDictionary()  # event loop -> semaphore
+        
         # Supported formats
         self.supported_image_formats = set(self.config.allowed_image_formats)
         self.supported_video_formats = set(self.config.allowed_video_formats)
@@ -237,6 +245,59 @@ class AssetManager:
                 hash_md5.update(chunk)
         return hash_md5.hexdigest()
     
+    def _write_file(self, file_data: Union[bytes, BinaryIO], file_path: Path) -> str:
+        """
+        Write upload data to disk, hashing each chunk as it is written.
+        
+        Args:
+            file_data: File data (bytes or file-like object)
+            file_path: Destination path
+        
+        Returns:
+            MD5 checksum of the written data
+        """
+        hash_md5 = hashlib.md5()
+        with open(file_path, 'wb') as f:
+            if hasattr(file_data, 'read'):
+                for chunk in iter(lambda: file_data.read(UPLOAD_CHUNK_SIZE), b""):
+                    hash_md5.update(chunk)
+                    f.write(chunk)
+            else:
+                view = memoryview(file_data)
+                for start in range(0, len(view), UPLOAD_CHUNK_SIZE):
+                    chunk = view[start:start + UPLOAD_CHUNK_SIZE]
+                    hash_md5.update(chunk)
+                    f.write(chunk)
+        return hash_md5.hexdigest()
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get the processing thread pool, creating it on first use"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.processing_workers, thread_name_prefix="asset_processing"
+            )
+        return self._executor
+    
+    def _get_processing_slots(self) -> asyncio.Semaphore:
+        """Get the processing semaphore for the running event loop"""
+        loop = asyncio.get_running_loop()
+        slots = self._processing_slots.get(loop)
+        if slots is None:
+            slots = asyncio.Semaphore(self.processing_workers)
+            self._processing_slots[loop] = slots
+        return slots
+    
+    async def _run_in_executor(self, func, *args):
+        """Run a blocking call in the processing thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(func, *args))
+    
+    def close(self) -> None:
+        """Shut down the processing thread pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
     def _get_file_extension(self, filename: str) -> str:
         """Get file extension in lowercase"""
         return Path(filename).suffix.lower().lstrip('.')
@@ -339,31 +400,17 @@ class AssetManager:
                 file_path=str(asset_path)
             )
             
-            # Save file
-            if isinstance(file_data, bytes):
-                if AIOFILES_AVAILABLE:
-                    async with aiofiles.open(asset_path, 'wb') as f:
-                        await f.write(file_data)
-                else:
-                    with open(asset_path, 'wb') as f:
-                        f.write(file_data)
-            else:
-                # For file-like objects
-                with open(asset_path, 'wb') as f:
-                    if hasattr(file_data, 'read'):
-                        shutil.copyfileobj(file_data, f)
-                    else:
-                        f.write(file_data)
-            
-            # Update status
-            metadata.status = AssetStatus.PROCESSING
-            self._asset_registry[asset_id] = metadata
-            
-            # Process image
-            await self._process_image(asset_id, processing_options or ImageProcessingOptions())
+            async with self._get_processing_slots():
+                # Save file, calculating the checksum as it is written
+                metadata.checksum = await self._run_in_executor(self._write_file, file_data, asset_path)
+                
+                # Update status
+                metadata.status = AssetStatus.PROCESSING
+                self._asset_registry[asset_id] = metadata
+                
+                # Process image
+                await self._process_image(asset_id, processing_options or ImageProcessingOptions())
             
-            # Calculate checksum
-            metadata.checksum = self._calculate_checksum(asset_path)
             metadata.status = AssetStatus.READY
             metadata.last_accessed = datetime.now()
             
@@ -405,69 +452,92 @@ class AssetManager:
             raise FileNotFoundError(f"Asset file not found: {asset_path}")
         
         try:
-            # Open and process image
-            with Image.open(asset_path) as img:
-                # Auto-orient based on EXIF data
-                if options.auto_orient:
-                    img = ImageOps.exif_transpose(img)
-                
-                # Store original dimensions
-                metadata.width, metadata.height = img.size
-                
-                # Convert to RGB if necessary
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    # Create white background for transparency
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'P':
-                        img = img.convert('RGBA')
-                    background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                    img = background
-                elif img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # Apply cropping
-                if options.crop:
-                    left, top, right, bottom = options.crop
-                    img = img.crop((left, top, right, bottom))
-                
-                # Apply resizing
-                if options.resize:
-                    target_width, target_height = options.resize
-                    if options.maintain_aspect_ratio:
-                        img.thumbnail((target_width, target_height), Image.Resampling.LANCZOS)
-                    else:
-                        img = img.resize((target_width, target_height), Image.Resampling.LANCZOS)
-                
-                # Save processed image
-                save_format = options.format or metadata.original_filename.split('.')[-1].upper()
-                if save_format.upper() == 'JPG':
-                    save_format = 'JPEG'
-                
-                save_kwargs = {
-                    'format': save_format,
-                    'optimize': options.optimize
-                }
-                
-                if save_format == 'JPEG':
-                    save_kwargs['quality'] = options.quality
-                
-                # Save to processed directory if modifications were made
-                if any([options.resize, options.crop, options.format]):
-                    processed_path = self.base_path / "processed" / f"{asset_id}_processed.{save_format.lower()}"
-                    img.save(processed_path, **save_kwargs)
-                    metadata.file_path = str(processed_path)
-                
-                # Create thumbnail
-                if options.create_thumbnail:
-                    thumbnail_path = self._create_thumbnail(img, asset_id, options.thumbnail_size)
-                    metadata.thumbnail_path = thumbnail_path
-                
-                # Update metadata with final dimensions
-                metadata.width, metadata.height = img.size
-                
+            # Decode, resize and save off the event loop
+            size, processed_path, thumbnail_path = await self._run_in_executor(
+                self._process_image_file, asset_path, asset_id, metadata.original_filename, options
+            )
         except Exception as e:
             self.logger.error(f"Failed to process image {asset_id}: {e}")
             raise RuntimeError(f"Image processing failed: {str(e)}") from e
+        
+        metadata.width, metadata.height = size
+        if processed_path:
+            metadata.file_path = processed_path
+        if thumbnail_path:
+            metadata.thumbnail_path = thumbnail_path
+    
+    def _process_image_file(self, asset_path: Path, asset_id: str, original_filename: str,
+                            options: ImageProcessingOptions) -> Tuple[Tuple[int, int], Optional[str], Optional[str]]:
+        """
+        Process an image file according to options. Runs in the processing pool.
+        
+        Args:
+            asset_path: Path of the uploaded image
+            asset_id: ID of the asset
+            original_filename: Original filename (gives the default save format)
+            options: Processing options
+        
+        Returns:
+            Tuple of (final size, processed image path, thumbnail path); the
+            paths are None when not created
+        """
+        processed_path = None
+        thumbnail_path = None
+        
+        # Open and process image
+        with Image.open(asset_path) as img:
+            # Auto-orient based on EXIF data
+            if options.auto_orient:
+                img = ImageOps.exif_transpose(img)
+            
+            # Convert to RGB if necessary
+            if img.mode in ('RGBA', 'LA', 'P'):
+                # Create white background for transparency
+                background = Image.new('RGB', img.size, (255, 255, 255))
+                if img.mode == 'P':
+                    img = img.convert('RGBA')
+                background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+                img = background
+            elif img.mode != 'RGB':
+                img = img.convert('RGB')
+            
+            # Apply cropping
+            if options.crop:
+                left, top, right, bottom = options.crop
+                img = img.crop((left, top, right, bottom))
+            
+            # Apply resizing
+            if options.resize:
+                target_width, target_height = options.resize
+                if options.maintain_aspect_ratio:
+                    img.thumbnail((target_width, target_height), Image.Resampling.LANCZOS)
+                else:
+                    img = img.resize((target_width, target_height), Image.Resampling.LANCZOS)
+            
+            # Save processed image
+            save_format = options.format or original_filename.split('.')[-1].upper()
+            if save_format.upper() == 'JPG':
+                save_format = 'JPEG'
+            
+            save_kwargs = {
+                'format': save_format,
+                'optimize': options.optimize
+            }
+            
+            if save_format == 'JPEG':
+                save_kwargs['quality'] = options.quality
+            
+            # Save to processed directory if modifications were made
+            if any([options.resize, options.crop, options.format]):
+                processed_file = self.base_path / "processed" / f"{asset_id}_processed.{save_format.lower()}"
+                img.save(processed_file, **save_kwargs)
+                processed_path = str(processed_file)
+            
+            # Create thumbnail
+            if options.create_thumbnail:
+                thumbnail_path = self._create_thumbnail(img, asset_id, options.thumbnail_size)
+            
+            return img.size, processed_path, thumbnail_path
     
     def _create_thumbnail(self, img: Image.Image, asset_id: str, size: Tuple[int, int]) -> str:
         """Create thumbnail for image"""
@@ -749,20 +819,9 @@ class AssetManager:
                 file_path=str(asset_path)
             )
             
-            # Save file
-            if isinstance(file_data, bytes):
-                if AIOFILES_AVAILABLE:
-                    async with aiofiles.open(asset_path, 'wb') as f:
-                        await f.write(file_data)
-                else:
-                    with open(asset_path, 'wb') as f:
-                        f.write(file_data)
-            else:
-                with open(asset_path, 'wb') as f:
-                    if hasattr(file_data, 'read'):
-                        shutil.copyfileobj(file_data, f)
-                    else:
-                        f.write(file_data)
+            # Save file, calculating the checksum as it is written
+            async with self._get_processing_slots():
+                metadata.checksum = await self._run_in_executor(self._write_file, file_data, asset_path)
             
             # Update status
             metadata.status = AssetStatus.PROCESSING
@@ -772,8 +831,6 @@ class AssetManager:
             if CV2_AVAILABLE:
                 await self._extract_video_metadata(asset_id)
             
-            # Calculate checksum
-            metadata.checksum = self._calculate_checksum(asset_path)
             metadata.status = AssetStatus.READY
             metadata.last_accessed = datetime.now()
             
@@ -0,0 +1,349 @@
+"""
+Audio Sync Analysis for Video Studio
+
+This module measures how far an external audio track is out of sync with the
+audio recorded in a video. Both are decoded with pydub, reduced to onset
+envelopes, and compared with FFT-based normalized cross-correlation over
+sliding windows, giving an offset curve from which the overall offset and
+drift are estimated. The curve is then used to render the track aligned to
+the video.
+"""
+
+import subprocess
+import warnings
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+    # pydub warns when ffmpeg is not on PATH; the converter is set before decoding
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        from pydub import AudioSegment
+    PYDUB_AVAILABLE = True
+except ImportError:
+    PYDUB_AVAILABLE = False
+
+from .segment_encoder import _AUDIO_PATTERN, find_ffmpeg, find_ffprobe
+
+
+# Sample rate audio is reduced to before building onset envelopes
+ANALYSIS_SAMPLE_RATE = 16000
+
+# Onset envelope resolution (seconds per envelope sample)
+ENVELOPE_HOP_SECONDS = 0.0025
+
+# Windows whose correlation peak falls below this are left out of the estimate
+MIN_WINDOW_CONFIDENCE = 0.3
+
+
+@dataclass
+class SyncEstimate:
+    """Offset of a track against the video audio, measured over sliding windows"""
+    offset_ms: float  # Median offset; positive when the track plays late
+    drift_ms_per_minute: float  # Change of the offset over time
+    confidence: float  # Mean correlation of the windows used (0.0 - 1.0)
+    # (video time in seconds, offset in ms, correlation) at each window centre
+    curve: List[Tuple[float, float, float]] = field(default_factory=list)
+
+
+@dataclass
+class AlignedTrack:
+    """An audio track to render into the video timeline"""
+    file_path: str
+    start_time: float  # Position in the video (seconds)
+    duration: float  # seconds
+    volume: float = 1.0
+    fade_in: float = 0.0
+    fade_out: float = 0.0
+    # (video time in seconds, offset in ms) to remove, as in SyncEstimate.curve
+    offset_curve: List[Tuple[float, float]] = field(default_factory=list)
+
+
+def _decoder_codec(path: str) -> Optional[str]:
+    """
+    Audio codec to pass to pydub.
+
+    pydub asks ffprobe for the stream layout unless a codec is given, so
+    without ffprobe the codec is read from ffmpeg's input summary instead.
+    """
+    if find_ffprobe():
+        return None
+    result = subprocess.run(
+        [find_ffmpeg(), "-hide_banner", "-nostdin", "-i", path],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    match = _AUDIO_PATTERN.search(result.stderr.decode("utf-8", errors="replace"))
+    if not match:
+        raise ValueError(f"No audio stream in {path}")
+    return match.group(1)
+
+
+def decode_audio(
+    path: str,
+    sample_rate: int = ANALYSIS_SAMPLE_RATE,
+    channels: int = 1,
+    start: Optional[float] = None,
+    duration: Optional[float] = None
+) -> "np.ndarray":
+    """
+    Decode the audio of a media file to float samples.
+
+    Args:
+        path: Audio or video file
+        sample_rate: Output sample rate
+        channels: Output channel count
+        start: Start of the excerpt (seconds)
+        duration: Length of the excerpt (seconds)
+
+    Returns:
+        float32 array of shape (samples, channels) in [-1, 1]
+
+    Raises:
+        RuntimeError: If pydub or ffmpeg is not available
+        ValueError: If the file has no audio stream
+    """
+    if not PYDUB_AVAILABLE:
+        raise RuntimeError("pydub and numpy are required for audio sync analysis")
+    if not find_ffmpeg():
+        raise RuntimeError("ffmpeg is required to decode audio")
+    AudioSegment.converter = find_ffmpeg()
+
+    segment = AudioSegment.from_file(path, codec=_decoder_codec(path), start_second=start, duration=duration)
+    segment = segment.set_channels(channels).set_frame_rate(sample_rate).set_sample_width(2)
+    samples = np.frombuffer(segment.raw_data, dtype=np.int16).astype(np.float32) / 32768.0
+    return samples.reshape(-1, channels)
+
+
+def onset_envelope(samples: "np.ndarray", sample_rate: int = ANALYSIS_SAMPLE_RATE) -> "np.ndarray":
+    """
+    Compute an onset strength envelope.
+
+    The envelope is the half-wave rectified rise of log energy per hop, so
+    it peaks where sounds start regardless of their loudness or timbre. A
+    light Gaussian smoothing rounds the correlation peaks, which lets the
+    peak interpolation resolve offsets finer than one hop.
+
+    Args:
+        samples: Mono samples of shape (samples,) or (samples, 1)
+        sample_rate: Sample rate of samples
+
+    Returns:
+        Envelope with one value per ENVELOPE_HOP_SECONDS
+    """
+    hop = int(round(sample_rate * ENVELOPE_HOP_SECONDS))
+    samples = samples.reshape(-1)
+    frames = samples[:len(samples) // hop * hop].reshape(-1, hop)
+    log_energy = np.log10(np.einsum("ij,ij->i", frames, frames) / hop + 1e-10)
+    onsets = np.maximum(np.diff(log_energy, prepend=log_energy[:1]), 0.0)
+    kernel = np.exp(-0.5 * np.arange(-3, 4) ** 2)
+    return np.convolve(onsets, kernel / kernel.sum(), mode="same").astype(np.float32)
+
+
+def _window_correlation(windows: "np.ndarray", regions: "np.ndarray") -> "np.ndarray":
+    """
+    Normalized cross-correlation of each window against its search region.
+
+    Args:
+        windows: Reference windows of shape (n, w)
+        regions: Search regions of shape (n, w + lags - 1)
+
+    Returns:
+        Correlation coefficients of shape (n, lags); lag k compares the
+        window with regions[:, k:k + w]
+    """
+    width = windows.shape[1]
+    lags = regions.shape[1] - width + 1
+    size = 1 << int(np.ceil(np.log2(regions.shape[1] + width)))
+
+    centred = windows - windows.mean(axis=1, keepdims=True)
+    window_norm = np.sqrt(np.einsum("ij,ij->i", centred, centred))
+
+    spectrum = np.conj(np.fft.rfft(centred, size, axis=1)) * np.fft.rfft(regions, size, axis=1)
+    numerator = np.fft.irfft(spectrum, size, axis=1)[:, :lags]
+
+    # Sliding sums give each lag's region norm after mean removal
+    sums = np.concatenate([np.zeros((len(regions), 1)), np.cumsum(regions, axis=1, dtype=np.float64)], axis=1)
+    squares = np.concatenate(
+        [np.zeros((len(regions), 1)), np.cumsum(regions.astype(np.float64) ** 2, axis=1)], axis=1
+    )
+    region_sum = sums[:, width:width + lags] - sums[:, :lags]
+    region_squares = squares[:, width:width + lags] - squares[:, :lags]
+    region_norm = np.sqrt(np.maximum(region_squares - region_sum ** 2 / width, 0.0))
+
+    denominator = window_norm[:, None] * region_norm
+    return np.where(denominator > 1e-9, numerator / np.maximum(denominator, 1e-9), 0.0)
+
+
+def estimate_sync(
+    reference: "np.ndarray",
+    track: "np.ndarray",
+    track_start: float,
+    window_seconds: float = 8.0,
+    step_seconds: float = 4.0,
+    max_offset_seconds: float = 1.0
+) -> Optional[SyncEstimate]:
+    """
+    Estimate the offset curve of a track against the video audio.
+
+    Args:
+        reference: Onset envelope of the video audio (from time 0)
+        track: Onset envelope of the track
+        track_start: Position of the track in the video (seconds)
+        window_seconds: Length of each comparison window
+        step_seconds: Distance between window starts
+        max_offset_seconds: Largest offset searched in either direction
+
+    Returns:
+        Sync estimate, or None if the track and video audio do not overlap
+    """
+    rate = 1.0 / ENVELOPE_HOP_SECONDS
+    start = int(round(track_start * rate))
+    end = min(len(reference), start + len(track))
+    max_lag = int(round(max_offset_seconds * rate))
+    width = min(int(round(window_seconds * rate)), end - start)
+    if width <= max_lag:
+        return None
+
+    step = max(1, int(round(step_seconds * rate)))
+    window_starts = np.arange(start, end - width + 1, step)
+
+    # The track laid out on the video timeline, padded for the lag search
+    timeline = np.zeros(end + 2 * max_lag + width, dtype=np.float32)
+    placed = track[:end - start]
+    timeline[max_lag + start:max_lag + start + len(placed)] = placed
+
+    index = window_starts[:, None] + np.arange(width)
+    windows = reference[index]
+    regions = timeline[window_starts[:, None] + np.arange(width + 2 * max_lag)]
+
+    correlation = _window_correlation(windows, regions)
+    best = correlation.argmax(axis=1)
+    peaks = correlation[np.arange(len(best)), best]
+
+    # Parabolic interpolation of the peak for sub-hop precision
+    inner = (best > 0) & (best < correlation.shape[1] - 1)
+    shift = np.zeros(len(best))
+    rows = np.nonzero(inner)[0]
+    left = correlation[rows, best[rows] - 1]
+    centre = correlation[rows, best[rows]]
+    right = correlation[rows, best[rows] + 1]
+    curvature = left - 2 * centre + right
+    shift[rows] = np.where(curvature < 0, 0.5 * (left - right) / np.where(curvature < 0, curvature, -1), 0.0)
+
+    offsets_ms = (best + shift - max_lag) * ENVELOPE_HOP_SECONDS * 1000
+    times = (window_starts + width / 2) * ENVELOPE_HOP_SECONDS
+    curve = [(float(t), float(o), float(p)) for t, o, p in zip(times, offsets_ms, peaks)]
+
+    confident = peaks >= MIN_WINDOW_CONFIDENCE
+    if not confident.any():
+        return SyncEstimate(offset_ms=0.0, drift_ms_per_minute=0.0, confidence=float(peaks.max()), curve=curve)
+
+    drift = 0.0
+    if confident.sum() >= 2:
+        slope, _ = np.polyfit(times[confident], offsets_ms[confident], 1, w=peaks[confident])
+        drift = float(slope * 60)
+
+    return SyncEstimate(
+        offset_ms=float(np.median(offsets_ms[confident])),
+        drift_ms_per_minute=drift,
+        confidence=float(peaks[confident].mean()),
+        curve=curve
+    )
+
+
+def reference_envelope(video_path: str, duration: Optional[float] = None) -> "np.ndarray":
+    """
+    Decode the audio recorded in a video and compute its onset envelope.
+
+    Args:
+        video_path: Video whose recorded audio is the sync reference
+        duration: Length decoded from the start (None for all of it)
+
+    Returns:
+        Onset envelope of the video audio
+    """
+    return onset_envelope(decode_audio(video_path, duration=duration))
+
+
+def analyze_track_sync(
+    reference: "np.ndarray",
+    track_path: str,
+    track_start: float,
+    track_duration: float,
+    max_offset_seconds: float = 1.0
+) -> Optional[SyncEstimate]:
+    """
+    Decode an audio track and estimate its sync against the video audio.
+
+    Args:
+        reference: Onset envelope of the video audio (see reference_envelope)
+        track_path: External audio track
+        track_start: Position of the track in the video (seconds)
+        track_duration: Length of the track used (seconds)
+        max_offset_seconds: Largest offset searched in either direction
+
+    Returns:
+        Sync estimate, or None if the audio does not overlap
+    """
+    track = onset_envelope(decode_audio(track_path, duration=track_duration))
+    return estimate_sync(reference, track, track_start, max_offset_seconds=max_offset_seconds)
+
+
+def render_aligned_mix(
+    tracks: List[AlignedTrack],
+    duration: float,
+    output_path: str,
+    sample_rate: int = 48000,
+    channels: int = 2
+) -> None:
+    """
+    Mix tracks onto the video timeline with their offset curves removed.
+
+    Each output sample at video time t reads the track at
+    t - start_time + offset(t), interpolating the offset curve between
+    window centres, so both a constant offset and drift are corrected.
+
+    Args:
+        tracks: Tracks to mix
+        duration: Length of the output (seconds)
+        output_path: WAV file to write
+        sample_rate: Output sample rate
+        channels: Output channel count
+    """
+    length = int(round(duration * sample_rate))
+    mix = np.zeros((length, channels), dtype=np.float32)
+    timeline = np.arange(length) / sample_rate
+
+    for track in tracks:
+        samples = decode_audio(track.file_path, sample_rate, channels, duration=track.duration)
+        if track.offset_curve:
+            curve_times, curve_offsets = np.array(track.offset_curve, dtype=np.float64).T
+            offsets = np.interp(timeline, curve_times, curve_offsets) / 1000
+        else:
+            offsets = 0.0
+        source_time = timeline - track.start_time + offsets
+
+        # Fractional sample positions inside the track
+        position = source_time * sample_rate
+        audible = (position >= 0) & (position <= len(samples) - 1)
+        if not audible.any():
+            continue
+        position = position[audible]
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, len(samples) - 1)
+        fraction = (position - lower)[:, None].astype(np.float32)
+        values = samples[lower] * (1 - fraction) + samples[upper] * fraction
+
+        gain = np.full(len(position), track.volume, dtype=np.float32)
+        track_time = source_time[audible]
+        if track.fade_in > 0:
+            gain *= np.clip(track_time / track.fade_in, 0.0, 1.0)
+        if track.fade_out > 0:
+            gain *= np.clip((track.duration - track_time) / track.fade_out, 0.0, 1.0)
+        mix[audible] += values * gain[:, None]
+
+    pcm = (np.clip(mix, -1.0, 1.0) * 32767).astype(np.int16)
+    AudioSegment(
+        data=pcm.tobytes(), sample_width=2, frame_rate=sample_rate, channels=channels
+    ).export(output_path, format="wav")
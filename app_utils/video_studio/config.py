@@ -61,6 +61,7 @@ class StorageConfig:
     allowed_video_formats: List[str] = field(default_factory=lambda: ["mp4", "mov", "avi"])
     cleanup_interval_hours: int = 24
     max_storage_gb: int = 10
+    processing_workers: int = 0  # Threads for upload writing and image processing (0 = CPU count)
     
     def validate(self) -> bool:
         """Validate storage configuration"""
@@ -74,6 +75,8 @@ class StorageConfig:
             return False
         if self.max_storage_gb <= 0:
             return False
+        if self.processing_workers < 0:
+            return False
         return True
 
 
@@ -110,6 +113,8 @@ class RenderingConfig:
     enable_hardware_acceleration: bool = True
     output_formats: List[str] = field(default_factory=lambda: ["mp4", "mov"])
     compression_quality: str = "high"
+    cpu_budget: int = 0  # Encoder threads shared by concurrent renders (0 = CPU count)
+    max_parallel_encodes: int = 0  # Concurrent ffmpeg jobs (0 = half the CPU budget)
     
     def validate(self) -> bool:
         """Validate rendering configuration"""
@@ -123,6 +128,8 @@ class RenderingConfig:
             return False
         if self.compression_quality not in ["low", "medium", "high"]:
             return False
+        if self.cpu_budget < 0 or self.max_parallel_encodes < 0:
+            return False
         return True
 
 
@@ -6,9 +6,14 @@ including video segment merging, transition effects, and timeline management.
 """
 
 import asyncio
+import functools
 import os
+import shutil
 import tempfile
-from dataclasses import dataclass, field
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
@@ -17,8 +22,16 @@ import json
 
 from .models import VideoConfig, Scene, TaskStatus, VideoQuality, AspectRatio, AudioConfig
 from .config import get_config, RenderingConfig
-from .error_handler import handle_rendering_error, with_video_studio_error_handling
+from .error_handler import VideoStudioErrorType, handle_rendering_error, with_video_studio_error_handling
 from .logging_config import render_logger
+from .audio_sync import (
+    MIN_WINDOW_CONFIDENCE, AlignedTrack, analyze_track_sync, reference_envelope, render_aligned_mix
+)
+from .quality_analyzer import VideoQualityMetrics, analyze_video_quality
+from .segment_encoder import (
+    PIECE_EXTENSION, EncodeParams, OutputVariant, concat_pieces, encode_segment, encode_variants, find_ffmpeg,
+    probe_media, render_transition, run_ffmpeg
+)
 
 
 class TransitionType(Enum):
@@ -95,6 +108,60 @@ class AudioCodec(Enum):
     VORBIS = "vorbis"
 
 
+# ffmpeg xfade transition for each transition type (xfade has no zoom-out; circleopen is the closest reveal)
+XFADE_TRANSITIONS = {
+    TransitionType.FADE: "fade",
+    TransitionType.DISSOLVE: "dissolve",
+    TransitionType.SLIDE_LEFT: "slideleft",
+    TransitionType.SLIDE_RIGHT: "slideright",
+    TransitionType.ZOOM_IN: "zoomin",
+    TransitionType.ZOOM_OUT: "circleopen"
+}
+
+# ffmpeg encoder and probed codec name for each codec
+VIDEO_ENCODERS = {
+    VideoCodec.H264: ("libx264", "h264"),
+    VideoCodec.H265: ("libx265", "hevc"),
+    VideoCodec.VP9: ("libvpx-vp9", "vp9"),
+    VideoCodec.AV1: ("libaom-av1", "av1")
+}
+
+AUDIO_ENCODERS = {
+    AudioCodec.AAC: ("aac", "aac"),
+    AudioCodec.MP3: ("libmp3lame", "mp3"),
+    AudioCodec.OPUS: ("libopus", "opus"),
+    AudioCodec.VORBIS: ("libvorbis", "vorbis")
+}
+
+# Codecs each container can hold; the first entry replaces an unsupported choice
+CONTAINER_CODECS = {
+    VideoFormat.MP4: ([VideoCodec.H264, VideoCodec.H265, VideoCodec.AV1, VideoCodec.VP9],
+                      [AudioCodec.AAC, AudioCodec.MP3, AudioCodec.OPUS]),
+    VideoFormat.MOV: ([VideoCodec.H264, VideoCodec.H265], [AudioCodec.AAC, AudioCodec.MP3]),
+    VideoFormat.AVI: ([VideoCodec.H264], [AudioCodec.MP3, AudioCodec.AAC]),
+    VideoFormat.WEBM: ([VideoCodec.VP9, VideoCodec.AV1], [AudioCodec.OPUS, AudioCodec.VORBIS])
+}
+
+# Constant-quality settings per compression level: x264/x265 CRF and preset, VP9/AV1 CRF (0-63 scale)
+X26X_CRF = {CompressionLevel.LOW: 28, CompressionLevel.MEDIUM: 23, CompressionLevel.HIGH: 20}
+X26X_PRESETS = {
+    CompressionLevel.LOW: "veryfast",
+    CompressionLevel.MEDIUM: "faster",
+    CompressionLevel.HIGH: "medium",
+    CompressionLevel.LOSSLESS: "ultrafast"
+}
+VPX_CRF = {CompressionLevel.LOW: 40, CompressionLevel.MEDIUM: 34, CompressionLevel.HIGH: 30}
+
+# Picture quality references for assess_video_quality
+SHARPNESS_REFERENCE = 100.0  # Laplacian variance of a clearly focused frame
+BLOCKINESS_TOLERANCE = 1.2  # Block-boundary gradient ratio left by healthy encodes
+BLOCKINESS_RANGE = 1.0  # Ratio above the tolerance at which the blocking score reaches zero
+FROZEN_FRAME_WEIGHT = 0.25  # Still images and slideshows are frozen by design, so frozen frames cost little
+
+# Audio sync analysis: largest offset searched
+SYNC_SEARCH_SECONDS = 1.0
+
+
 @dataclass
 class AudioTrack:
     """Represents an audio track for video composition"""
@@ -198,6 +265,7 @@ class QualityControlSettings:
     audio_sync_tolerance_ms: int = 40  # Acceptable sync drift
     enable_auto_correction: bool = True
     quality_threshold: float = 0.8  # 0.0 - 1.0
+    sample_stride: int = 10  # Analyse one frame out of this many
     
     def validate(self) -> bool:
         """Validate quality control settings"""
@@ -213,6 +281,8 @@ class QualityControlSettings:
             return False
         if not (0.0 <= self.quality_threshold <= 1.0):
             return False
+        if self.sample_stride < 1:
+            return False
         return True
 
 
@@ -316,8 +386,10 @@ class QualityAssessment:
     frame_rate_score: float
     audio_quality_score: float
     sync_accuracy_score: float
+    picture_score: float = 1.0  # Sharpness, blocking, black and frozen frames
     issues: List[str] = field(default_factory=list)
     recommendations: List[str] = field(default_factory=list)
+    metrics: Dict[str, Any] = field(default_factory=dict)  # Raw measurements
     
     def is_acceptable(self, threshold: float = 0.8) -> bool:
         """Check if quality meets acceptable threshold"""
@@ -332,8 +404,10 @@ class QualityAssessment:
             "frame_rate_score": self.frame_rate_score,
             "audio_quality_score": self.audio_quality_score,
             "sync_accuracy_score": self.sync_accuracy_score,
+            "picture_score": self.picture_score,
             "issues": self.issues,
-            "recommendations": self.recommendations
+            "recommendations": self.recommendations,
+            "metrics": self.metrics
         }
 
 
@@ -346,6 +420,9 @@ class AudioSyncResult:
     method_used: AudioSyncMethod
     correction_applied: bool = False
     correction_offset_ms: float = 0.0
+    drift_ms_per_minute: float = 0.0  # Change of the offset over the track
+    # Measured offset per analysis window: (video time in seconds, offset in ms, confidence)
+    offset_curve: List[Tuple[float, float, float]] = field(default_factory=list)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert sync result to dictionary"""
@@ -355,7 +432,9 @@ class AudioSyncResult:
             "confidence": self.confidence,
             "method_used": self.method_used.value,
             "correction_applied": self.correction_applied,
-            "correction_offset_ms": self.correction_offset_ms
+            "correction_offset_ms": self.correction_offset_ms,
+            "drift_ms_per_minute": self.drift_ms_per_minute,
+            "offset_curve": [list(point) for point in self.offset_curve]
         }
 
 
@@ -548,16 +627,20 @@ class FormatConverter:
         input_path: str,
         output_base_path: str,
         formats: List[VideoFormat],
-        base_settings: RenderSettings
+        base_settings: RenderSettings,
+        threads: int = 1
     ) -> Dict[VideoFormat, str]:
         """
         Convert video to multiple formats simultaneously.
         
+        The input is decoded once for all formats (see render_variants).
+        
         Args:
             input_path: Path to input video
             output_base_path: Base path for output files (without extension)
             formats: List of target formats
             base_settings: Base render settings
+            threads: Encoder threads for the conversion
             
         Returns:
             Dictionary mapping formats to output file paths
@@ -567,21 +650,14 @@ class FormatConverter:
         try:
             render_logger.info(f"Converting to {len(formats)} formats")
             
-            for fmt in formats:
-                output_path = f"{output_base_path}.{fmt.value}"
-                
-                conversion_settings = FormatConversionSettings(
-                    target_format=fmt,
-                    video_codec=self._get_optimal_codec_for_format(fmt),
-                    preserve_quality=True,
-                    enable_fast_start=True
-                )
-                
-                success = await self.convert_to_format(
-                    input_path, output_path, conversion_settings
-                )
-                
-                if success:
+            outputs = [
+                (f"{output_base_path}.{fmt.value}", replace(base_settings, output_format=fmt))
+                for fmt in formats
+            ]
+            written = set(await self.render_variants(input_path, outputs, threads))
+            
+            for fmt, (output_path, _) in zip(formats, outputs):
+                if output_path in written:
                     results[fmt] = output_path
                     render_logger.debug(f"Successfully converted to {fmt.value}")
                 else:
@@ -593,6 +669,158 @@ class FormatConverter:
             render_logger.error(f"Multi-format conversion failed: {e}")
             return {}
     
+    async def render_variants(
+        self,
+        input_path: str,
+        outputs: List[Tuple[str, RenderSettings]],
+        threads: int = 1
+    ) -> List[str]:
+        """
+        Encode several outputs of one video in a single pass.
+        
+        The input is decoded once and fanned out to one encoder per distinct
+        encoding; outputs that only differ in container share an encoder.
+        If the combined pass fails, the outputs are retried one at a time so
+        a single unsupported encoding does not fail the others.
+        
+        Args:
+            input_path: Path to input video
+            outputs: (output path, render settings) for each output
+            threads: Encoder threads for the pass
+            
+        Returns:
+            Paths of the outputs that were written
+        """
+        if not find_ffmpeg():
+            # Without ffmpeg every output is a copy of the input
+            render_logger.warning("ffmpeg not available, copying input to each output")
+            for output_path, _ in outputs:
+                shutil.copy2(input_path, output_path)
+            return [output_path for output_path, _ in outputs]
+        
+        info = await probe_media(input_path)
+        if info is None:
+            render_logger.error(f"Input has no readable video stream: {input_path}")
+            return []
+        
+        variants = []
+        for output_path, settings in outputs:
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+            
+            # Trim to the platform duration limit
+            max_duration = settings.platform_settings.max_duration_seconds if settings.platform_settings else None
+            if max_duration and max_duration < info.duration:
+                render_logger.debug(f"Trimming {output_path} to platform limit of {max_duration}s")
+            else:
+                max_duration = None
+            
+            variants.append(OutputVariant(
+                path=output_path,
+                container=settings.output_format.value,
+                params=self.build_encode_params(settings),
+                duration=float(max_duration) if max_duration else None
+            ))
+        
+        success, error = await encode_variants(input_path, variants, info.duration, info.has_audio, threads)
+        if success:
+            return [variant.path for variant in variants]
+        
+        if len(variants) == 1:
+            render_logger.error(f"Failed to encode {variants[0].path}: {error.strip()}")
+            return []
+        
+        render_logger.warning(f"Single-pass encode of {len(variants)} outputs failed, encoding them separately: "
+                              f"{error.strip()}")
+        written = []
+        for variant in variants:
+            success, error = await encode_variants(input_path, [variant], info.duration, info.has_audio, threads)
+            if success:
+                written.append(variant.path)
+            else:
+                render_logger.error(f"Failed to encode {variant.path}: {error.strip()}")
+        return written
+    
+    def _select_codecs(self, settings: RenderSettings) -> Tuple[VideoCodec, AudioCodec]:
+        """Choose codecs from the platform settings, falling back to ones the container supports"""
+        if settings.platform_settings:
+            video_codec = settings.platform_settings.video_codec
+            audio_codec = settings.platform_settings.audio_codec
+        else:
+            video_codec = self._get_optimal_codec_for_format(settings.output_format)
+            audio_codec = AudioCodec.AAC
+        
+        video_codecs, audio_codecs = CONTAINER_CODECS[settings.output_format]
+        if video_codec not in video_codecs:
+            video_codec = video_codecs[0]
+        if audio_codec not in audio_codecs:
+            audio_codec = audio_codecs[0]
+        return video_codec, audio_codec
+    
+    def build_encode_params(self, settings: RenderSettings) -> EncodeParams:
+        """
+        Map render settings to the ffmpeg encoding used for every piece.
+        
+        Args:
+            settings: Render settings
+            
+        Returns:
+            Encoding parameters
+        """
+        video_codec, audio_codec = self._select_codecs(settings)
+        video_encoder, video_codec_name = VIDEO_ENCODERS[video_codec]
+        compression = settings.compression
+        bitrate = settings.video_bitrate
+        
+        if video_codec in (VideoCodec.H264, VideoCodec.H265):
+            video_options = ["-preset", X26X_PRESETS[compression]]
+            x265_params = ["log-level=error"]
+            if compression == CompressionLevel.LOSSLESS:
+                if video_codec == VideoCodec.H264:
+                    video_options += ["-qp", "0"]
+                else:
+                    x265_params.append("lossless=1")
+            else:
+                video_options += ["-crf", str(X26X_CRF[compression])]
+                if bitrate:
+                    # Capped constant quality
+                    video_options += ["-maxrate", f"{bitrate}k", "-bufsize", f"{bitrate * 2}k"]
+            if video_codec == VideoCodec.H265:
+                video_options += ["-x265-params", ":".join(x265_params)]
+                if settings.output_format in (VideoFormat.MP4, VideoFormat.MOV):
+                    video_options += ["-tag:v", "hvc1"]
+        else:
+            if video_codec == VideoCodec.VP9:
+                video_options = ["-deadline", "good", "-cpu-used", "4", "-row-mt", "1"]
+                lossless_options = ["-lossless", "1"]
+            else:
+                video_options = ["-cpu-used", "6", "-row-mt", "1"]
+                lossless_options = ["-aom-params", "lossless=1"]
+            if compression == CompressionLevel.LOSSLESS:
+                video_options += lossless_options
+            else:
+                # Constrained quality when a bitrate is set, constant quality otherwise
+                video_options += ["-crf", str(VPX_CRF[compression]), "-b:v", f"{bitrate}k" if bitrate else "0"]
+        
+        if settings.audio_enabled:
+            audio_encoder, audio_codec_name = AUDIO_ENCODERS[audio_codec]
+            audio_options = ("-b:a", f"{settings.audio_bitrate}k")
+        else:
+            audio_encoder = audio_codec_name = None
+            audio_options = ()
+        
+        width, height = settings.get_resolution()
+        return EncodeParams(
+            width=width,
+            height=height,
+            fps=settings.fps,
+            video_encoder=video_encoder,
+            video_codec=video_codec_name,
+            video_options=tuple(video_options),
+            audio_encoder=audio_encoder,
+            audio_codec=audio_codec_name,
+            audio_options=audio_options
+        )
+    
     def _get_optimal_codec_for_format(self, format: VideoFormat) -> VideoCodec:
         """Get optimal video codec for a given format"""
         codec_mapping = {
@@ -604,6 +832,49 @@ class FormatConverter:
         return codec_mapping.get(format, VideoCodec.H264)
 
 
+def plan_transitions(
+    segments: List[VideoSegment],
+    lengths: List[int],
+    fps: int
+) -> List[Tuple[TransitionType, int]]:
+    """
+    Plan the transition window between each pair of consecutive segments.
+    
+    A boundary gets a transition when either side requests one or when the
+    segments overlap on the timeline (an overlap without a requested type is
+    dissolved). The window is the timeline overlap if there is one, otherwise
+    the requested transition duration, and never more than half of either
+    segment.
+    
+    Args:
+        segments: Segments sorted by start time
+        lengths: Usable length of each segment in frames
+        fps: Output frame rate
+        
+    Returns:
+        (transition type, window length in frames) for each boundary
+    """
+    plans = []
+    for index in range(len(segments) - 1):
+        previous, following = segments[index], segments[index + 1]
+        overlap = previous.start_time + previous.duration - following.start_time
+        
+        if previous.transition_out != TransitionType.NONE:
+            transition, window = previous.transition_out, previous.transition_duration
+        elif following.transition_in != TransitionType.NONE:
+            transition, window = following.transition_in, following.transition_duration
+        else:
+            transition, window = TransitionType.DISSOLVE, 0.0
+        
+        if overlap > 0:
+            window = overlap
+        
+        frames = min(int(round(window * fps)), lengths[index] // 2, lengths[index + 1] // 2)
+        plans.append((transition, frames) if frames > 0 else (TransitionType.NONE, 0))
+    
+    return plans
+
+
 class RenderPipeline:
     """
     Main class for video rendering and composition pipeline.
@@ -617,15 +888,58 @@ class RenderPipeline:
         self.config = config or get_config().rendering
         self.temp_dir = tempfile.mkdtemp(prefix="video_render_")
         self.progress_callbacks: List[callable] = []
-        self.is_rendering = False
-        self.current_task_id: Optional[str] = None
         self.quality_assessments: Dict[str, QualityAssessment] = {}
         self.sync_results: Dict[str, AudioSyncResult] = {}
         self.format_converter = FormatConverter(self.temp_dir)
         self.platform_optimizer = PlatformOptimizer()
         
+        # Concurrent renders share one encoder CPU budget
+        self.cpu_budget = self.config.cpu_budget or os.cpu_count() or 1
+        self.max_parallel_encodes = self.config.max_parallel_encodes or max(1, self.cpu_budget // 2)
+        self.threads_per_encode = max(1, self.cpu_budget // self.max_parallel_encodes)
+        self._active_renders: Dict[str, Optional[str]] = {}
+        self._encode_slots = weakref.WeakKeyDictionary()  # event loop -> semaphore
+        self._quality_executor: Optional[ProcessPoolExecutor] = None
+        
         render_logger.info(f"Initialized RenderPipeline with temp directory: {self.temp_dir}")
     
+    @property
+    def is_rendering(self) -> bool:
+        """Whether any render is in progress"""
+        return bool(self._active_renders)
+    
+    @property
+    def current_task_id(self) -> Optional[str]:
+        """Task ID of the most recently started render still in progress"""
+        return next(reversed(self._active_renders.values()), None)
+    
+    @property
+    def active_render_count(self) -> int:
+        """Number of renders in progress"""
+        return len(self._active_renders)
+    
+    def _get_encode_slots(self) -> asyncio.Semaphore:
+        """Get the encode semaphore for the running event loop"""
+        loop = asyncio.get_running_loop()
+        slots = self._encode_slots.get(loop)
+        if slots is None:
+            slots = asyncio.Semaphore(self.max_parallel_encodes)
+            self._encode_slots[loop] = slots
+        return slots
+    
+    def _get_quality_executor(self) -> ProcessPoolExecutor:
+        """Get the worker processes shared by all quality assessments"""
+        if self._quality_executor is None:
+            self._quality_executor = ProcessPoolExecutor(max_workers=self.max_parallel_encodes)
+        return self._quality_executor
+    
+    def _shutdown_quality_executor(self) -> None:
+        """Stop the quality assessment workers"""
+        executor = getattr(self, "_quality_executor", None)
+        if executor is not None:
+            self._quality_executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+    
     def add_progress_callback(self, callback: callable) -> None:
         """Add a callback function to receive progress updates"""
         self.progress_callbacks.append(callback)
@@ -643,7 +957,7 @@ class RenderPipeline:
             except Exception as e:
                 render_logger.warning(f"Progress callback failed: {e}")
     
-    @with_video_studio_error_handling
+    @with_video_studio_error_handling(VideoStudioErrorType.RENDERING_ERROR)
     async def compose_video_segments(
         self,
         segments: List[VideoSegment],
@@ -663,12 +977,9 @@ class RenderPipeline:
         Returns:
             bool: True if composition was successful, False otherwise
         """
-        if self.is_rendering:
-            render_logger.warning("Render pipeline is already busy")
-            return False
-        
-        self.is_rendering = True
-        self.current_task_id = task_id
+        render_dir = tempfile.mkdtemp(prefix="render_", dir=self.temp_dir)
+        render_id = os.path.basename(render_dir)
+        self._active_renders[render_id] = task_id
         
         try:
             render_logger.info(f"Starting video composition with {len(segments)} segments")
@@ -711,25 +1022,10 @@ class RenderPipeline:
             progress.progress_percent = 10.0
             self._notify_progress(progress)
             
-            # Process each segment with transitions
-            processed_segments = []
-            for i, segment in enumerate(sorted_segments):
-                render_logger.info(f"Processing segment {i+1}/{len(sorted_segments)}: {segment.segment_id}")
-                
-                progress.current_segment = segment.segment_id
-                progress.completed_segments = i
-                progress.progress_percent = 10.0 + (i / len(sorted_segments)) * 60.0
-                self._notify_progress(progress)
-                
-                processed_segment = await self._process_segment_with_transitions(
-                    segment, settings, i, len(sorted_segments)
-                )
-                
-                if processed_segment:
-                    processed_segments.append(processed_segment)
-                else:
-                    render_logger.error(f"Failed to process segment: {segment.segment_id}")
-                    return False
+            # Encode segments and transitions concurrently
+            pieces = await self._process_segments(sorted_segments, settings, render_dir, progress)
+            if pieces is None:
+                return False
             
             # Progress update
             progress.current_step = "Merging segments"
@@ -738,7 +1034,9 @@ class RenderPipeline:
             self._notify_progress(progress)
             
             # Merge all processed segments
-            success = await self._merge_segments(processed_segments, output_path, settings)
+            success = await self._merge_segments(
+                [piece for piece, _ in pieces], output_path, settings, [duration for _, duration in pieces]
+            )
             
             if success:
                 progress.current_step = "Finalizing output"
@@ -768,7 +1066,6 @@ class RenderPipeline:
                             )
                             
                             if success:
-                                import shutil
                                 shutil.move(temp_output, output_path)
                             else:
                                 render_logger.warning("Quality optimization failed, using original output")
@@ -790,8 +1087,8 @@ class RenderPipeline:
             render_logger.error(f"Video composition failed with error: {e}")
             return False
         finally:
-            self.is_rendering = False
-            self.current_task_id = None
+            self._active_renders.pop(render_id, None)
+            shutil.rmtree(render_dir, ignore_errors=True)
     
     def _create_timeline(self, segments: List[VideoSegment]) -> Optional[Dict[str, Any]]:
         """
@@ -854,98 +1151,205 @@ class RenderPipeline:
         
         return timeline
     
-    async def _process_segment_with_transitions(
+    async def _prepare_segment_input(
         self,
         segment: VideoSegment,
         settings: RenderSettings,
         segment_index: int,
-        total_segments: int
-    ) -> Optional[str]:
+        render_dir: str
+    ) -> str:
         """
-        Process a single video segment with transition effects and audio sync.
+        Apply audio sync corrections to a segment before encoding.
         
         Args:
-            segment: Video segment to process
+            segment: Video segment to prepare
             settings: Render settings
             segment_index: Index of this segment in the sequence
-            total_segments: Total number of segments
+            render_dir: Working directory of the current render
             
         Returns:
-            Path to processed segment file or None if failed
+            Path to the file to encode (the sync-corrected copy or the original)
         """
-        try:
-            render_logger.debug(f"Processing segment {segment.segment_id} with transitions and audio sync")
-            
-            # Create output path for processed segment
-            processed_path = os.path.join(
-                self.temp_dir,
-                f"processed_{segment_index:03d}_{segment.segment_id}.{settings.output_format.value}"
-            )
+        if not (segment.audio_tracks and settings.audio_enabled):
+            return segment.file_path
+        
+        render_logger.debug(f"Processing {len(segment.audio_tracks)} audio tracks for segment {segment.segment_id}")
+        
+        # Analyze audio sync for each track
+        sync_results = await self.analyze_audio_sync(
+            segment.file_path,
+            segment.audio_tracks,
+            settings.audio_sync_method,
+            settings.quality_control.audio_sync_tolerance_ms
+        )
+        
+        # Apply sync corrections if needed
+        sync_corrected_path = os.path.join(
+            render_dir,
+            f"sync_{segment_index:03d}{os.path.splitext(segment.file_path)[1]}"
+        )
+        sync_success = await self.correct_audio_sync(
+            segment.file_path,
+            segment.audio_tracks,
+            sync_results,
+            sync_corrected_path
+        )
+        
+        if sync_success:
+            return sync_corrected_path
+        
+        render_logger.warning(f"Audio sync correction failed for {segment.segment_id}")
+        return segment.file_path
+    
+    async def _process_segments(
+        self,
+        segments: List[VideoSegment],
+        settings: RenderSettings,
+        render_dir: str,
+        progress: RenderProgress
+    ) -> Optional[List[Tuple[str, float]]]:
+        """
+        Encode all segments and their transitions concurrently.
+        
+        Every segment body and every transition window becomes one piece
+        encoded with the same parameters, so the pieces can be joined by
+        stream copy. Transitions are rendered over their window only.
+        
+        Args:
+            segments: Segments sorted by start time
+            settings: Render settings
+            render_dir: Working directory of the current render
+            progress: Progress object updated as pieces complete
             
-            # Process audio tracks if present
-            if segment.audio_tracks and settings.audio_enabled:
-                render_logger.debug(f"Processing {len(segment.audio_tracks)} audio tracks for segment")
-                
-                # Analyze audio sync for each track
-                sync_results = await self.analyze_audio_sync(
-                    segment.file_path, 
-                    segment.audio_tracks, 
-                    settings.audio_sync_method
+        Returns:
+            (piece path, duration in seconds) in playback order, or None if failed
+        """
+        input_paths = await asyncio.gather(*(
+            self._prepare_segment_input(segment, settings, i, render_dir)
+            for i, segment in enumerate(segments)
+        ))
+        
+        if not find_ffmpeg():
+            render_logger.warning("ffmpeg not available, passing segments through without encoding")
+            pieces = []
+            for i, (segment, input_path) in enumerate(zip(segments, input_paths)):
+                piece_path = os.path.join(
+                    render_dir, f"processed_{i:03d}_{segment.segment_id}.{settings.output_format.value}"
                 )
+                shutil.copy2(input_path, piece_path)
+                pieces.append((piece_path, segment.duration))
+            return pieces
+        
+        infos = await asyncio.gather(*(probe_media(path) for path in input_paths))
+        for segment, info in zip(segments, infos):
+            if info is None:
+                render_logger.error(f"Segment {segment.segment_id} has no readable video stream")
+                return None
+        
+        params = self.format_converter.build_encode_params(settings)
+        fps = params.fps
+        
+        # Usable length of each segment in whole output frames
+        lengths = []
+        for segment, info in zip(segments, infos):
+            seconds = min(segment.duration, info.duration) if info.duration > 0 else segment.duration
+            lengths.append(max(1, int(seconds * fps)))
+        
+        transitions = plan_transitions(segments, lengths, fps)
+        
+        # (piece path, frames, segment id, job factory) in playback order
+        jobs = []
+        for i, segment in enumerate(segments):
+            head = transitions[i - 1][1] if i > 0 else 0
+            tail = transitions[i][1] if i < len(transitions) else 0
+            body = lengths[i] - head - tail
+            
+            if body > 0:
+                piece_path = os.path.join(render_dir, f"processed_{i:03d}_{segment.segment_id}.{PIECE_EXTENSION}")
+                jobs.append((piece_path, body, segment.segment_id, functools.partial(
+                    encode_segment, input_paths[i], piece_path, params,
+                    head / fps, body / fps, infos[i].has_audio, self.threads_per_encode
+                )))
+            
+            if tail > 0:
+                piece_path = os.path.join(render_dir, f"transition_{i:03d}_{segment.segment_id}.{PIECE_EXTENSION}")
+                jobs.append((piece_path, tail, segment.segment_id, functools.partial(
+                    render_transition, input_paths[i], (lengths[i] - tail) / fps, input_paths[i + 1], 0.0,
+                    tail / fps, XFADE_TRANSITIONS[transitions[i][0]], piece_path, params,
+                    infos[i].has_audio, infos[i + 1].has_audio, self.threads_per_encode
+                )))
+        
+        render_logger.info(f"Encoding {len(jobs)} pieces for {len(segments)} segments "
+                          f"({sum(1 for t, _ in transitions if t != TransitionType.NONE)} transitions)")
+        
+        if not await self._run_encode_jobs(jobs, progress):
+            return None
+        
+        return [(piece_path, frames / fps) for piece_path, frames, _, _ in jobs]
+    
+    async def _run_encode_jobs(self, jobs: List[Tuple], progress: RenderProgress) -> bool:
+        """
+        Run encode jobs within the shared CPU budget, stopping at the first failure.
+        
+        Args:
+            jobs: (piece path, frames, segment id, job factory) tuples
+            progress: Progress object updated as jobs complete
+            
+        Returns:
+            bool: True if every job succeeded
+        """
+        slots = self._get_encode_slots()
+        remaining = {}
+        for _, _, segment_id, _ in jobs:
+            remaining[segment_id] = remaining.get(segment_id, 0) + 1
+        
+        async def run(job):
+            async with slots:
+                return job, await job[3]()
+        
+        tasks = [asyncio.create_task(run(job)) for job in jobs]
+        try:
+            for completed, next_result in enumerate(asyncio.as_completed(tasks), start=1):
+                job, (success, error) = await next_result
+                piece_path, _, segment_id, _ = job
                 
-                # Apply sync corrections if needed
-                sync_corrected_path = processed_path + ".sync_corrected"
-                sync_success = await self.correct_audio_sync(
-                    segment.file_path,
-                    segment.audio_tracks,
-                    sync_results,
-                    sync_corrected_path
-                )
+                if not success:
+                    render_logger.error(f"Failed to encode {os.path.basename(piece_path)}: {error.strip()}")
+                    return False
                 
-                if sync_success:
-                    # Use sync-corrected version as input for further processing
-                    input_path = sync_corrected_path
-                else:
-                    render_logger.warning(f"Audio sync correction failed for {segment.segment_id}")
-                    input_path = segment.file_path
-            else:
-                input_path = segment.file_path
-            
-            # Apply transitions and effects
-            # For now, simulate processing with a delay
-            # In a real implementation, this would use FFmpeg or similar
-            await asyncio.sleep(0.5)  # Simulate processing time
-            
-            # Copy processed file to final location (placeholder)
-            # In real implementation, apply transitions and effects here
-            import shutil
-            shutil.copy2(input_path, processed_path)
-            
-            # Clean up temporary sync-corrected file if it exists
-            sync_corrected_path = processed_path + ".sync_corrected"
-            if os.path.exists(sync_corrected_path):
-                os.remove(sync_corrected_path)
+                remaining[segment_id] -= 1
+                progress.current_segment = segment_id
+                progress.completed_segments = sum(1 for count in remaining.values() if count == 0)
+                progress.progress_percent = 10.0 + (completed / len(jobs)) * 60.0
+                self._notify_progress(progress)
             
-            render_logger.debug(f"Processed segment saved to: {processed_path}")
-            return processed_path
+            return True
             
-        except Exception as e:
-            render_logger.error(f"Failed to process segment {segment.segment_id}: {e}")
-            return None
+        finally:
+            # Stop the remaining jobs after a failure (kills their ffmpeg processes)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
     
     async def _merge_segments(
         self,
         processed_segments: List[str],
         output_path: str,
-        settings: RenderSettings
+        settings: RenderSettings,
+        durations: Optional[List[float]] = None
     ) -> bool:
         """
         Merge processed video segments into final output.
         
+        Segments are joined with the concat demuxer. Streams are copied when
+        all segments share the same codec parameters, otherwise the joined
+        stream is re-encoded.
+        
         Args:
             processed_segments: List of paths to processed segment files
             output_path: Path for final output video
             settings: Render settings
+            durations: Nominal duration of each segment (seconds)
             
         Returns:
             bool: True if merge was successful
@@ -954,19 +1358,37 @@ class RenderPipeline:
             render_logger.info(f"Merging {len(processed_segments)} segments into: {output_path}")
             
             # Ensure output directory exists
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
             
-            # For now, simulate merging with a delay
-            # In a real implementation, this would use FFmpeg to concatenate videos
-            await asyncio.sleep(1.0)  # Simulate merging time
+            if not find_ffmpeg():
+                # Without ffmpeg the first segment stands in for the final output
+                if processed_segments:
+                    shutil.copy2(processed_segments[0], output_path)
+                render_logger.warning("ffmpeg not available, output contains the first segment only")
+                return True
             
-            # Copy first segment as placeholder for final output
-            # In real implementation, properly merge all segments
-            if processed_segments:
-                import shutil
-                shutil.copy2(processed_segments[0], output_path)
+            infos = await asyncio.gather(*(probe_media(path) for path in processed_segments))
+            signatures = {info.stream_signature() if info else None for info in infos}
+            stream_copy = len(signatures) == 1 and None not in signatures
+            
+            if stream_copy:
+                success, error = await concat_pieces(
+                    processed_segments, output_path, settings.output_format.value, durations
+                )
+            else:
+                render_logger.info("Segment codec parameters differ, re-encoding during merge")
+                async with self._get_encode_slots():
+                    success, error = await concat_pieces(
+                        processed_segments, output_path, settings.output_format.value, durations,
+                        self.format_converter.build_encode_params(settings), self.threads_per_encode
+                    )
+            
+            if not success:
+                render_logger.error(f"Failed to merge segments: {error.strip()}")
+                return False
             
-            render_logger.info(f"Segments merged successfully to: {output_path}")
+            render_logger.info(f"Segments merged successfully to: {output_path} "
+                              f"({'stream copy' if stream_copy else 're-encoded'})")
             return True
             
         except Exception as e:
@@ -1062,42 +1484,68 @@ class RenderPipeline:
             render_logger.error(f"Failed to estimate render time: {e}")
             return None
     
-    @with_video_studio_error_handling
+    @with_video_studio_error_handling(VideoStudioErrorType.RENDERING_ERROR)
     async def analyze_audio_sync(
         self,
         video_path: str,
         audio_tracks: List[AudioTrack],
-        method: AudioSyncMethod = AudioSyncMethod.TIMECODE
+        method: AudioSyncMethod = AudioSyncMethod.TIMECODE,
+        tolerance_ms: Optional[float] = None
     ) -> List[AudioSyncResult]:
         """
         Analyze audio-video synchronization for multiple audio tracks.
         
+        Waveform analysis and frame alignment compare each track with the
+        audio recorded in the video, so the video audio is decoded once and
+        shared by all tracks. Timecode sync trusts the track positions.
+        
         Args:
             video_path: Path to the video file
             audio_tracks: List of audio tracks to analyze
             method: Synchronization analysis method
+            tolerance_ms: Largest offset still counted as synchronized
+                (defaults to QualityControlSettings.audio_sync_tolerance_ms)
             
         Returns:
             List of sync analysis results for each audio track
         """
         results = []
+        if tolerance_ms is None:
+            tolerance_ms = QualityControlSettings().audio_sync_tolerance_ms
         
         try:
             render_logger.info(f"Analyzing audio sync for {len(audio_tracks)} tracks using {method.value}")
             
+            reference = None
+            frame_ms = 0.0
+            if audio_tracks and method in (AudioSyncMethod.WAVEFORM_ANALYSIS, AudioSyncMethod.FRAME_ALIGNMENT):
+                duration = max(track.start_time + track.duration for track in audio_tracks) + SYNC_SEARCH_SECONDS
+                loop = asyncio.get_running_loop()
+                try:
+                    reference = await loop.run_in_executor(None, reference_envelope, video_path, duration)
+                except Exception as e:
+                    render_logger.warning(f"Cannot decode reference audio of {video_path}: {e}")
+                
+                if method == AudioSyncMethod.FRAME_ALIGNMENT:
+                    info = await probe_media(video_path)
+                    if info and info.fps:
+                        frame_ms = 1000.0 / info.fps
+            
             for i, track in enumerate(audio_tracks):
                 render_logger.debug(f"Analyzing sync for track {i+1}: {track.track_id}")
                 
-                # Simulate sync analysis based on method
-                sync_result = await self._analyze_single_track_sync(video_path, track, method)
+                sync_result = await self._analyze_single_track_sync(
+                    video_path, track, method, tolerance_ms, reference, frame_ms
+                )
                 results.append(sync_result)
                 
                 # Store result for later reference
                 self.sync_results[track.track_id] = sync_result
                 
                 render_logger.debug(f"Sync analysis complete for {track.track_id}: "
-                                  f"offset={sync_result.sync_offset_ms}ms, "
-                                  f"confidence={sync_result.confidence}")
+                                  f"offset={sync_result.sync_offset_ms:.1f}ms, "
+                                  f"drift={sync_result.drift_ms_per_minute:.1f}ms/min, "
+                                  f"confidence={sync_result.confidence:.2f}")
             
             return results
             
@@ -1109,7 +1557,10 @@ class RenderPipeline:
         self,
         video_path: str,
         audio_track: AudioTrack,
-        method: AudioSyncMethod
+        method: AudioSyncMethod,
+        tolerance_ms: float,
+        reference: Optional[Any] = None,
+        frame_ms: float = 0.0
     ) -> AudioSyncResult:
         """
         Analyze synchronization for a single audio track.
@@ -1118,44 +1569,60 @@ class RenderPipeline:
             video_path: Path to the video file
             audio_track: Audio track to analyze
             method: Analysis method to use
+            tolerance_ms: Largest offset still counted as synchronized
+            reference: Onset envelope of the video audio (waveform and frame methods)
+            frame_ms: Video frame duration that frame alignment rounds offsets to
             
         Returns:
             Sync analysis result
         """
         try:
-            # Simulate different sync analysis methods
+            drift = 0.0
+            curve: List[Tuple[float, float, float]] = []
+            
             if method == AudioSyncMethod.TIMECODE:
-                # Simulate timecode-based sync analysis
-                await asyncio.sleep(0.2)
-                sync_offset = 0.0  # Perfect sync in simulation
-                confidence = 0.95
-                
-            elif method == AudioSyncMethod.WAVEFORM_ANALYSIS:
-                # Simulate waveform analysis
-                await asyncio.sleep(0.5)
-                sync_offset = -15.0  # Slight delay detected
-                confidence = 0.88
-                
-            elif method == AudioSyncMethod.FRAME_ALIGNMENT:
-                # Simulate frame-based alignment
-                await asyncio.sleep(0.3)
-                sync_offset = 8.0  # Slight advance detected
-                confidence = 0.92
+                # Track positions come from the timeline, which is taken as exact
+                sync_offset = 0.0
+                confidence = 1.0
                 
-            else:  # MANUAL_OFFSET
+            elif method == AudioSyncMethod.MANUAL_OFFSET:
                 # Use manual offset from track configuration
                 sync_offset = audio_track.sync_offset * 1000  # Convert to ms
                 confidence = 1.0
+                
+            else:
+                if reference is None:
+                    raise ValueError(f"No reference audio in {video_path}")
+                
+                loop = asyncio.get_running_loop()
+                estimate = await loop.run_in_executor(None, functools.partial(
+                    analyze_track_sync, reference, audio_track.file_path,
+                    audio_track.start_time, audio_track.duration, SYNC_SEARCH_SECONDS
+                ))
+                if estimate is None:
+                    raise ValueError(f"Track {audio_track.track_id} does not overlap the video audio")
+                
+                sync_offset = estimate.offset_ms
+                confidence = estimate.confidence
+                drift = estimate.drift_ms_per_minute
+                curve = estimate.curve
+                
+                if method == AudioSyncMethod.FRAME_ALIGNMENT and frame_ms:
+                    # Corrections can only move the track by whole video frames
+                    sync_offset = round(sync_offset / frame_ms) * frame_ms
+                    curve = [(time, round(offset / frame_ms) * frame_ms, score) for time, offset, score in curve]
             
-            # Determine if sync is acceptable
-            tolerance_ms = 40  # Default tolerance
-            is_synchronized = abs(sync_offset) <= tolerance_ms
+            # Sync must hold over the whole track, not only on average
+            offsets = [offset for _, offset, score in curve if score >= MIN_WINDOW_CONFIDENCE] or [sync_offset]
+            is_synchronized = max(abs(offset) for offset in offsets) <= tolerance_ms
             
             return AudioSyncResult(
                 is_synchronized=is_synchronized,
                 sync_offset_ms=sync_offset,
                 confidence=confidence,
-                method_used=method
+                method_used=method,
+                drift_ms_per_minute=drift,
+                offset_curve=curve
             )
             
         except Exception as e:
@@ -1167,7 +1634,7 @@ class RenderPipeline:
                 method_used=method
             )
     
-    @with_video_studio_error_handling
+    @with_video_studio_error_handling(VideoStudioErrorType.RENDERING_ERROR)
     async def correct_audio_sync(
         self,
         video_path: str,
@@ -1178,6 +1645,13 @@ class RenderPipeline:
         """
         Apply audio synchronization corrections to video.
         
+        All tracks are mixed onto the video timeline and the mix replaces the
+        audio recorded in the video, whether or not any track needs
+        correcting: the recorded audio is only the reference that sync is
+        measured against. Tracks that need correcting have their measured
+        offset curves removed (so drift is corrected as well as a constant
+        offset). The video stream is copied.
+        
         Args:
             video_path: Path to input video
             audio_tracks: List of audio tracks
@@ -1195,22 +1669,60 @@ class RenderPipeline:
                 if not result.is_synchronized and result.confidence > 0.7:
                     corrections_needed.append((track, result))
             
-            if not corrections_needed:
-                render_logger.info("No audio sync corrections needed")
-                # Copy original file if no corrections needed
-                import shutil
-                shutil.copy2(video_path, output_path)
-                return True
+            if corrections_needed:
+                render_logger.info(f"Applying corrections to {len(corrections_needed)} audio tracks")
+            else:
+                render_logger.info("No audio sync corrections needed, mixing tracks as placed")
             
-            render_logger.info(f"Applying corrections to {len(corrections_needed)} audio tracks")
+            info = await probe_media(video_path)
+            if not info or not info.duration:
+                render_logger.error(f"Cannot read duration of {video_path}")
+                return False
             
-            # Simulate applying corrections
-            await asyncio.sleep(1.0)
+            corrections = {track.track_id: result for track, result in corrections_needed}
+            aligned = []
+            for track in audio_tracks:
+                result = corrections.get(track.track_id)
+                if result and result.offset_curve:
+                    curve = [(time, offset) for time, offset, _ in result.offset_curve]
+                elif result:
+                    curve = [(0.0, result.sync_offset_ms)]
+                else:
+                    curve = []
+                aligned.append(AlignedTrack(
+                    file_path=track.file_path,
+                    start_time=track.start_time,
+                    duration=track.duration,
+                    volume=track.volume,
+                    fade_in=track.fade_in,
+                    fade_out=track.fade_out,
+                    offset_curve=curve
+                ))
             
-            # In real implementation, use FFmpeg to apply sync corrections
-            # For now, copy original and mark corrections as applied
-            import shutil
-            shutil.copy2(video_path, output_path)
+            try:
+                container = VideoFormat(Path(output_path).suffix.lstrip(".").lower())
+            except ValueError:
+                container = VideoFormat.MP4
+            audio_encoder = AUDIO_ENCODERS[CONTAINER_CODECS[container][1][0]][0]
+            
+            mix_path = os.path.splitext(output_path)[0] + "_mix.wav"
+            loop = asyncio.get_running_loop()
+            try:
+                async with self._get_encode_slots():
+                    await loop.run_in_executor(None, render_aligned_mix, aligned, info.duration, mix_path)
+                    ok, error = await run_ffmpeg([
+                        "-i", video_path, "-i", mix_path,
+                        "-map", "0:v:0", "-map", "1:a:0",
+                        "-c:v", "copy", "-c:a", audio_encoder, "-shortest",
+                        output_path
+                    ])
+            finally:
+                if os.path.exists(mix_path):
+                    os.remove(mix_path)
+            
+            if not ok:
+                render_logger.error(f"Muxing corrected audio failed: {error}")
+                return False
             
             # Update sync results to reflect corrections
             for track, result in corrections_needed:
@@ -1225,7 +1737,7 @@ class RenderPipeline:
             render_logger.error(f"Audio sync correction failed: {e}")
             return False
     
-    @with_video_studio_error_handling
+    @with_video_studio_error_handling(VideoStudioErrorType.RENDERING_ERROR)
     async def assess_video_quality(
         self,
         video_path: str,
@@ -1234,6 +1746,10 @@ class RenderPipeline:
         """
         Assess video quality against specified settings and standards.
         
+        Picture metrics come from every Nth frame
+        (quality_control.sample_stride), analysed in a worker process of the
+        pipeline's quality executor.
+        
         Args:
             video_path: Path to video file to assess
             settings: Render settings for quality comparison
@@ -1244,49 +1760,96 @@ class RenderPipeline:
         try:
             render_logger.info(f"Assessing video quality: {video_path}")
             
-            # Simulate quality analysis
-            await asyncio.sleep(0.8)
+            quality_control = settings.quality_control
+            
+            # Decode and analyse sampled frames off the event loop, within the encoder CPU budget
+            loop = asyncio.get_running_loop()
+            async with self._get_encode_slots():
+                try:
+                    metrics: VideoQualityMetrics = await loop.run_in_executor(
+                        self._get_quality_executor(), analyze_video_quality, video_path, quality_control.sample_stride
+                    )
+                except BrokenProcessPool:
+                    # A crashed worker breaks the whole pool; start a fresh one for later assessments
+                    self._shutdown_quality_executor()
+                    raise
+            media_info = await probe_media(video_path)
             
-            # In real implementation, analyze actual video properties
-            # For simulation, generate realistic quality scores
+            issues = []
+            recommendations = []
             
             # Resolution assessment
-            target_resolution = settings.get_resolution()
-            resolution_score = 0.95  # Simulate high resolution quality
+            target_width, target_height = settings.get_resolution()
+            resolution_score = min(1.0, (metrics.width * metrics.height) / (target_width * target_height))
+            min_width, min_height = quality_control.min_resolution
+            if metrics.width * metrics.height < min_width * min_height:
+                resolution_score = min(resolution_score, 0.5)
+                issues.append(f"Resolution {metrics.width}x{metrics.height} below minimum {min_width}x{min_height}")
+                recommendations.append("Render at a higher output quality")
+            elif resolution_score < 1.0:
+                issues.append(f"Resolution {metrics.width}x{metrics.height} below target {target_width}x{target_height}")
+                recommendations.append("Check the source segments and scaling settings")
             
             # Bitrate assessment
-            bitrate_score = 0.88  # Simulate good bitrate quality
+            if metrics.bitrate_kbps < quality_control.min_bitrate_kbps:
+                bitrate_score = metrics.bitrate_kbps / quality_control.min_bitrate_kbps
+                issues.append("Video bitrate below optimal level")
+                recommendations.append("Increase video bitrate for better quality")
+            elif metrics.bitrate_kbps > quality_control.max_bitrate_kbps:
+                bitrate_score = quality_control.max_bitrate_kbps / metrics.bitrate_kbps
+                issues.append("Video bitrate above maximum")
+                recommendations.append("Use stronger compression to reduce file size")
+            else:
+                bitrate_score = 1.0
             
             # Frame rate assessment
-            frame_rate_score = 0.92  # Simulate good frame rate
+            frame_rate_score = min(1.0, metrics.fps / settings.fps) if settings.fps else 1.0
+            if metrics.fps < quality_control.min_fps:
+                issues.append(f"Frame rate {metrics.fps:.1f} below minimum {quality_control.min_fps}")
+                recommendations.append("Render at a higher frame rate")
             
             # Audio quality assessment
-            audio_quality_score = 0.90 if settings.audio_enabled else 1.0
-            
-            # Sync accuracy assessment
-            sync_accuracy_score = 0.94  # Simulate good sync
+            audio_quality_score = 1.0
+            if settings.audio_enabled and media_info is not None:
+                if not media_info.has_audio:
+                    audio_quality_score = 0.0
+                    issues.append("Audio track missing")
+                    recommendations.append("Check audio tracks of the source segments")
+                elif media_info.sample_rate < 44100:
+                    audio_quality_score = media_info.sample_rate / 48000
+                    issues.append("Audio quality could be improved")
+                    recommendations.append("Use higher audio bitrate or better compression")
+            
+            # Sync is corrected per segment before encoding; the output has nothing left to measure
+            sync_accuracy_score = 1.0
+            
+            # Picture assessment from sampled frames
+            sharpness_score = min(1.0, metrics.sharpness / SHARPNESS_REFERENCE)
+            blockiness_score = min(1.0, max(0.0, 1.0 - (metrics.blockiness - BLOCKINESS_TOLERANCE) / BLOCKINESS_RANGE))
+            picture_score = min(
+                sharpness_score,
+                blockiness_score,
+                1.0 - metrics.black_frame_ratio,
+                1.0 - FROZEN_FRAME_WEIGHT * metrics.frozen_frame_ratio
+            )
+            if sharpness_score < 0.5:
+                issues.append("Video appears blurry")
+                recommendations.append("Use higher-resolution sources or less aggressive compression")
+            if blockiness_score < 0.8:
+                issues.append("Compression blocking artifacts detected")
+                recommendations.append("Increase video bitrate for better quality")
+            if metrics.black_frame_ratio > 0.1:
+                issues.append(f"{metrics.black_frame_ratio:.0%} of sampled frames are black")
+                recommendations.append("Check segments for missing or failed renders")
+            if metrics.frozen_frame_ratio > 0.1:
+                issues.append(f"{metrics.frozen_frame_ratio:.0%} of sampled frames are frozen")
+                recommendations.append("Check segments for stalled or still-image content")
             
             # Calculate overall score
-            scores = [resolution_score, bitrate_score, frame_rate_score, 
-                     audio_quality_score, sync_accuracy_score]
+            scores = [resolution_score, bitrate_score, frame_rate_score,
+                     audio_quality_score, sync_accuracy_score, picture_score]
             overall_score = sum(scores) / len(scores)
             
-            # Generate issues and recommendations
-            issues = []
-            recommendations = []
-            
-            if bitrate_score < 0.8:
-                issues.append("Video bitrate below optimal level")
-                recommendations.append("Increase video bitrate for better quality")
-            
-            if audio_quality_score < 0.8:
-                issues.append("Audio quality could be improved")
-                recommendations.append("Use higher audio bitrate or better compression")
-            
-            if sync_accuracy_score < 0.9:
-                issues.append("Minor audio-video sync drift detected")
-                recommendations.append("Apply sync correction during rendering")
-            
             assessment = QualityAssessment(
                 overall_score=overall_score,
                 resolution_score=resolution_score,
@@ -1294,14 +1857,17 @@ class RenderPipeline:
                 frame_rate_score=frame_rate_score,
                 audio_quality_score=audio_quality_score,
                 sync_accuracy_score=sync_accuracy_score,
+                picture_score=picture_score,
                 issues=issues,
-                recommendations=recommendations
+                recommendations=list(dict.fromkeys(recommendations)),
+                metrics=metrics.to_dict()
             )
             
             # Store assessment for later reference
             self.quality_assessments[video_path] = assessment
             
-            render_logger.info(f"Quality assessment complete: overall score {overall_score:.2f}")
+            render_logger.info(f"Quality assessment complete: overall score {overall_score:.2f} "
+                              f"({metrics.sampled_frames} frames sampled in {metrics.analysis_seconds:.1f}s)")
             return assessment
             
         except Exception as e:
@@ -1317,7 +1883,7 @@ class RenderPipeline:
                 recommendations=["Retry quality assessment"]
             )
     
-    @with_video_studio_error_handling
+    @with_video_studio_error_handling(VideoStudioErrorType.RENDERING_ERROR)
     async def optimize_video_quality(
         self,
         input_path: str,
@@ -1379,7 +1945,7 @@ class RenderPipeline:
         """Get stored sync result for an audio track"""
         return self.sync_results.get(track_id)
     
-    @with_video_studio_error_handling
+    @with_video_studio_error_handling(VideoStudioErrorType.RENDERING_ERROR)
     async def generate_multi_format_output(
         self,
         input_path: str,
@@ -1403,14 +1969,14 @@ class RenderPipeline:
             if not settings.enable_multi_format_output:
                 # Single format output
                 output_path = f"{output_base_path}.{settings.output_format.value}"
-                import shutil
                 shutil.copy2(input_path, output_path)
                 return {settings.output_format: output_path}
             
-            # Multi-format conversion
-            results = await self.format_converter.convert_to_multiple_formats(
-                input_path, output_base_path, settings.output_formats, settings
-            )
+            # Multi-format conversion, decoding the input once
+            async with self._get_encode_slots():
+                results = await self.format_converter.convert_to_multiple_formats(
+                    input_path, output_base_path, settings.output_formats, settings, self.threads_per_encode
+                )
             
             render_logger.info(f"Multi-format generation completed: {len(results)} formats")
             return results
@@ -1419,7 +1985,7 @@ class RenderPipeline:
             render_logger.error(f"Multi-format output generation failed: {e}")
             return {}
     
-    @with_video_studio_error_handling
+    @with_video_studio_error_handling(VideoStudioErrorType.RENDERING_ERROR)
     async def optimize_for_platform(
         self,
         input_path: str,
@@ -1447,50 +2013,28 @@ class RenderPipeline:
                 base_settings, platform
             )
             
-            # Apply platform-specific optimizations
-            if optimized_settings.platform_settings:
-                platform_config = optimized_settings.platform_settings
-                
-                # Check file size constraints
-                if platform_config.max_file_size_mb:
-                    # In real implementation, check and compress if needed
-                    render_logger.debug(f"Platform max file size: {platform_config.max_file_size_mb}MB")
-                
-                # Check duration constraints
-                if platform_config.max_duration_seconds:
-                    # In real implementation, trim if needed
-                    render_logger.debug(f"Platform max duration: {platform_config.max_duration_seconds}s")
-                
-                # Apply codec and quality settings
-                conversion_settings = FormatConversionSettings(
-                    target_format=base_settings.output_format,
-                    video_codec=platform_config.video_codec,
-                    audio_codec=platform_config.audio_codec,
-                    preserve_quality=True,
-                    enable_fast_start=True
-                )
-                
-                success = await self.format_converter.convert_to_format(
-                    input_path, output_path, conversion_settings
+            platform_config = optimized_settings.platform_settings
+            if platform_config.max_file_size_mb:
+                render_logger.debug(f"Platform max file size: {platform_config.max_file_size_mb}MB")
+            
+            # Apply codec, quality and duration settings
+            async with self._get_encode_slots():
+                written = await self.format_converter.render_variants(
+                    input_path, [(output_path, optimized_settings)], self.threads_per_encode
                 )
-                
-                if success:
-                    render_logger.info(f"Platform optimization completed for {platform.value}")
-                    return True
-                else:
-                    render_logger.error(f"Platform optimization failed for {platform.value}")
-                    return False
-            else:
-                # No specific optimization needed, copy original
-                import shutil
-                shutil.copy2(input_path, output_path)
+            
+            if written:
+                render_logger.info(f"Platform optimization completed for {platform.value}")
                 return True
+            else:
+                render_logger.error(f"Platform optimization failed for {platform.value}")
+                return False
             
         except Exception as e:
             render_logger.error(f"Platform optimization failed: {e}")
             return False
     
-    @with_video_studio_error_handling
+    @with_video_studio_error_handling(VideoStudioErrorType.RENDERING_ERROR)
     async def batch_platform_optimization(
         self,
         input_path: str,
@@ -1501,6 +2045,9 @@ class RenderPipeline:
         """
         Optimize video for multiple platforms simultaneously.
         
+        The input is decoded once and encoded for every platform in a single
+        pass, instead of once per platform as with optimize_for_platform.
+        
         Args:
             input_path: Path to input video
             output_base_path: Base path for output files
@@ -1515,14 +2062,20 @@ class RenderPipeline:
         try:
             render_logger.info(f"Batch optimization for {len(platforms)} platforms")
             
-            for platform in platforms:
-                platform_output = f"{output_base_path}_{platform.value}.{base_settings.output_format.value}"
-                
-                success = await self.optimize_for_platform(
-                    input_path, platform_output, platform, base_settings
+            outputs = [
+                (
+                    f"{output_base_path}_{platform.value}.{base_settings.output_format.value}",
+                    self.platform_optimizer.optimize_for_platform(base_settings, platform)
                 )
-                
-                if success:
+                for platform in platforms
+            ]
+            async with self._get_encode_slots():
+                written = set(await self.format_converter.render_variants(
+                    input_path, outputs, self.threads_per_encode
+                ))
+            
+            for platform, (platform_output, _) in zip(platforms, outputs):
+                if platform_output in written:
                     results[platform] = platform_output
                     render_logger.debug(f"Successfully optimized for {platform.value}")
                 else:
@@ -1600,6 +2153,7 @@ class RenderPipeline:
     
     def __del__(self):
         """Cleanup when object is destroyed"""
+        self._shutdown_quality_executor()
         self.cleanup_temp_files()
 
 
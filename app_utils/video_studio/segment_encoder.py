@@ -0,0 +1,540 @@
+"""
+FFmpeg Segment Encoding for Video Studio
+
+This module runs the ffmpeg jobs behind the render pipeline: media probing,
+segment normalisation, transition rendering over the transition window only,
+concat-demuxer merging with stream copy, and single-decode fan-out encoding
+of format and platform variants.
+"""
+
+import asyncio
+import json
+import os
+import re
+import shutil
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .logging_config import render_logger
+
+try:
+    import imageio_ffmpeg
+    IMAGEIO_FFMPEG_AVAILABLE = True
+except ImportError:
+    IMAGEIO_FFMPEG_AVAILABLE = False
+
+
+# Muxer names for the supported output containers
+CONTAINER_MUXERS = {
+    "mp4": "mp4",
+    "mov": "mov",
+    "avi": "avi",
+    "webm": "webm"
+}
+
+# Intermediate pieces use Matroska, which accepts every supported codec
+PIECE_EXTENSION = "mkv"
+
+_binary_cache = {}
+
+
+def _find_binary(name: str) -> Optional[str]:
+    """Locate an ffmpeg tool on PATH, caching the result"""
+    if name not in _binary_cache:
+        path = shutil.which(name)
+        if not path and name == "ffmpeg" and IMAGEIO_FFMPEG_AVAILABLE:
+            # moviepy ships ffmpeg through imageio-ffmpeg
+            try:
+                path = imageio_ffmpeg.get_ffmpeg_exe()
+            except Exception:
+                path = None
+        _binary_cache[name] = path
+    return _binary_cache[name]
+
+
+def find_ffmpeg() -> Optional[str]:
+    """Get the ffmpeg executable, or None when ffmpeg is not installed"""
+    return _find_binary("ffmpeg")
+
+
+def find_ffprobe() -> Optional[str]:
+    """Get the ffprobe executable, or None when only ffmpeg is available"""
+    return _find_binary("ffprobe")
+
+
+@dataclass
+class MediaInfo:
+    """Stream parameters of a media file"""
+    duration: float
+    width: int = 0
+    height: int = 0
+    fps: float = 0.0
+    video_codec: Optional[str] = None
+    pix_fmt: Optional[str] = None
+    has_audio: bool = False
+    audio_codec: Optional[str] = None
+    sample_rate: int = 0
+    channels: int = 0
+
+    def stream_signature(self) -> Tuple:
+        """Codec parameters that must match for stream-copy concatenation"""
+        return (
+            self.video_codec, self.width, self.height, round(self.fps, 3), self.pix_fmt,
+            self.audio_codec, self.sample_rate, self.channels
+        )
+
+
+@dataclass(frozen=True)
+class EncodeParams:
+    """Target encoding shared by every piece of one render"""
+    width: int
+    height: int
+    fps: int
+    video_encoder: str  # ffmpeg encoder name, e.g. libx264
+    video_codec: str    # Codec name as reported by probing, e.g. h264
+    video_options: Tuple[str, ...] = ()
+    audio_encoder: Optional[str] = None  # None renders without audio
+    audio_codec: Optional[str] = None
+    audio_options: Tuple[str, ...] = ()
+    sample_rate: int = 48000
+    channels: int = 2
+    pix_fmt: str = "yuv420p"
+
+    def video_filter(self) -> str:
+        """Filter chain that letterboxes any input to the target frame"""
+        return (
+            f"scale={self.width}:{self.height}:force_original_aspect_ratio=decrease,"
+            f"pad={self.width}:{self.height}:(ow-iw)/2:(oh-ih)/2,setsar=1,"
+            f"fps={self.fps},format={self.pix_fmt}"
+        )
+
+    def audio_filter(self) -> str:
+        """Filter chain that converts any input to the target sample layout"""
+        layout = "mono" if self.channels == 1 else "stereo"
+        return f"aresample={self.sample_rate},aformat=channel_layouts={layout}"
+
+    def silence_source(self) -> str:
+        """lavfi source for segments without an audio stream"""
+        layout = "mono" if self.channels == 1 else "stereo"
+        return f"anullsrc=r={self.sample_rate}:cl={layout}"
+
+    def output_args(self, threads: int) -> List[str]:
+        """Encoder arguments for one piece"""
+        args = ["-c:v", self.video_encoder, *self.video_options, "-pix_fmt", self.pix_fmt, "-threads", str(threads)]
+        if self.audio_encoder:
+            args += [
+                "-c:a", self.audio_encoder, *self.audio_options,
+                "-ar", str(self.sample_rate), "-ac", str(self.channels)
+            ]
+        else:
+            args.append("-an")
+        return args
+
+    def length_args(self, duration: float) -> List[str]:
+        """Output limits that cut a piece to a whole number of frames"""
+        return ["-frames:v", str(max(1, round(duration * self.fps))), "-t", f"{duration:.6f}"]
+
+    def stream_signature(self) -> Tuple:
+        """Codec parameters produced by this encoding, comparable with MediaInfo"""
+        if self.audio_encoder:
+            audio = (self.audio_codec, self.sample_rate, self.channels)
+        else:
+            audio = (None, 0, 0)
+        return (self.video_codec, self.width, self.height, round(float(self.fps), 3), self.pix_fmt) + audio
+
+
+@dataclass(frozen=True)
+class OutputVariant:
+    """One output of a single-decode fan-out encode"""
+    path: str
+    container: str  # Output container (file extension)
+    params: EncodeParams
+    duration: Optional[float] = None  # Trim to this length (seconds), None keeps the whole source
+
+
+def _muxer_options(container: str) -> List[Tuple[str, str]]:
+    """Muxer name and options for an output container"""
+    options = [("f", CONTAINER_MUXERS.get(container, container))]
+    if container in ("mp4", "mov"):
+        options.append(("movflags", "+faststart"))
+    return options
+
+
+def _escape_tee_path(path: str) -> str:
+    """Escape characters the tee muxer treats as separators"""
+    return re.sub(r"([\\|\[\]])", r"\\\1", path)
+
+
+async def run_ffmpeg(args: Sequence[str]) -> Tuple[bool, str]:
+    """
+    Run ffmpeg and wait for it to finish.
+
+    The process is killed if the awaiting task is cancelled.
+
+    Args:
+        args: Arguments after the executable
+
+    Returns:
+        Tuple of (success, error output)
+    """
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        return False, "ffmpeg not available"
+
+    process = await asyncio.create_subprocess_exec(
+        ffmpeg, "-hide_banner", "-nostdin", "-y", "-loglevel", "error", *args,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        _, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+
+    return process.returncode == 0, stderr.decode("utf-8", errors="replace")[-2000:]
+
+
+async def probe_media(path: str) -> Optional[MediaInfo]:
+    """
+    Read stream parameters of a media file.
+
+    Uses ffprobe when installed, otherwise parses the stream summary that
+    ffmpeg prints for its input.
+
+    Args:
+        path: Path to the media file
+
+    Returns:
+        Media information, or None if the file has no readable video stream
+    """
+    try:
+        if find_ffprobe():
+            return await _probe_with_ffprobe(path)
+        if find_ffmpeg():
+            return await _probe_with_ffmpeg(path)
+    except Exception as e:
+        render_logger.warning(f"Failed to probe {path}: {e}")
+    return None
+
+
+async def _probe_with_ffprobe(path: str) -> Optional[MediaInfo]:
+    """Probe with ffprobe JSON output"""
+    process = await asyncio.create_subprocess_exec(
+        find_ffprobe(), "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL
+    )
+    stdout, _ = await process.communicate()
+    if process.returncode != 0:
+        return None
+
+    data = json.loads(stdout or b"{}")
+    streams = data.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    if video is None:
+        return None
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+
+    numerator, _, denominator = video.get("avg_frame_rate", "0/1").partition("/")
+    fps = float(numerator) / float(denominator) if float(denominator or 0) else 0.0
+
+    info = MediaInfo(
+        duration=float(data.get("format", {}).get("duration") or video.get("duration") or 0.0),
+        width=int(video.get("width", 0)),
+        height=int(video.get("height", 0)),
+        fps=fps,
+        video_codec=video.get("codec_name"),
+        pix_fmt=video.get("pix_fmt")
+    )
+    if audio is not None:
+        info.has_audio = True
+        info.audio_codec = audio.get("codec_name")
+        info.sample_rate = int(audio.get("sample_rate", 0))
+        info.channels = int(audio.get("channels", 0))
+    return info
+
+
+_DURATION_PATTERN = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+_VIDEO_PATTERN = re.compile(r"Stream #\d+:\d+.*?: Video: (\w+)[^,]*, (\w+)")
+_SIZE_PATTERN = re.compile(r", (\d{2,5})x(\d{2,5})")
+_FPS_PATTERN = re.compile(r"([\d.]+) fps")
+_AUDIO_PATTERN = re.compile(r"Stream #\d+:\d+.*?: Audio: (\w+).*?(\d+) Hz, ([^,]+)")
+_CHANNEL_LAYOUTS = {"mono": 1, "stereo": 2, "2.1": 3, "quad": 4, "5.0": 5, "5.1": 6, "7.1": 8}
+
+
+async def _probe_with_ffmpeg(path: str) -> Optional[MediaInfo]:
+    """Probe by parsing the input summary of `ffmpeg -i`"""
+    process = await asyncio.create_subprocess_exec(
+        find_ffmpeg(), "-hide_banner", "-nostdin", "-i", path,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+    _, stderr = await process.communicate()
+    output = stderr.decode("utf-8", errors="replace")
+
+    video_line = next((line for line in output.splitlines() if _VIDEO_PATTERN.search(line)), None)
+    if video_line is None:
+        return None
+
+    video_match = _VIDEO_PATTERN.search(video_line)
+    size_match = _SIZE_PATTERN.search(video_line)
+    fps_match = _FPS_PATTERN.search(video_line)
+    duration_match = _DURATION_PATTERN.search(output)
+
+    info = MediaInfo(
+        duration=(int(duration_match.group(1)) * 3600 + int(duration_match.group(2)) * 60
+                  + float(duration_match.group(3))) if duration_match else 0.0,
+        width=int(size_match.group(1)) if size_match else 0,
+        height=int(size_match.group(2)) if size_match else 0,
+        fps=float(fps_match.group(1)) if fps_match else 0.0,
+        video_codec=video_match.group(1),
+        pix_fmt=video_match.group(2)
+    )
+
+    audio_match = _AUDIO_PATTERN.search(output)
+    if audio_match:
+        layout = audio_match.group(3).split("(")[0].strip()
+        channels_match = re.match(r"(\d+) channels", layout)
+        info.has_audio = True
+        info.audio_codec = audio_match.group(1)
+        info.sample_rate = int(audio_match.group(2))
+        info.channels = int(channels_match.group(1)) if channels_match else _CHANNEL_LAYOUTS.get(layout, 2)
+    return info
+
+
+async def encode_segment(
+    source: str,
+    output: str,
+    params: EncodeParams,
+    start: float,
+    duration: float,
+    has_audio: bool,
+    threads: int = 1
+) -> Tuple[bool, str]:
+    """
+    Transcode one window of a source file to the target encoding.
+
+    Args:
+        source: Input media file
+        output: Output piece path
+        params: Target encoding
+        start: Window start within the source (seconds)
+        duration: Window length (seconds)
+        has_audio: Whether the source has an audio stream (silence is generated otherwise)
+        threads: Encoder threads for this job
+
+    Returns:
+        Tuple of (success, error output)
+    """
+    length = f"{duration:.6f}"
+    args = ["-ss", f"{start:.6f}", "-t", length, "-i", source]
+    maps = ["-map", "0:v:0"]
+    filters = ["-vf", params.video_filter()]
+
+    if params.audio_encoder:
+        if has_audio:
+            maps += ["-map", "0:a:0"]
+            filters += ["-af", params.audio_filter()]
+        else:
+            args += ["-f", "lavfi", "-t", length, "-i", params.silence_source()]
+            maps += ["-map", "1:a:0"]
+
+    return await run_ffmpeg(
+        args + maps + filters + params.output_args(threads) + params.length_args(duration) + [output]
+    )
+
+
+async def render_transition(
+    first: str,
+    first_start: float,
+    second: str,
+    second_start: float,
+    duration: float,
+    transition: str,
+    output: str,
+    params: EncodeParams,
+    first_has_audio: bool,
+    second_has_audio: bool,
+    threads: int = 1
+) -> Tuple[bool, str]:
+    """
+    Render a transition between two sources over the transition window only.
+
+    Args:
+        first: Outgoing source file
+        first_start: Start of the window within the outgoing source (seconds)
+        second: Incoming source file
+        second_start: Start of the window within the incoming source (seconds)
+        duration: Window length (seconds)
+        transition: ffmpeg xfade transition name
+        output: Output piece path
+        params: Target encoding
+        first_has_audio: Whether the outgoing source has audio
+        second_has_audio: Whether the incoming source has audio
+        threads: Encoder threads for this job
+
+    Returns:
+        Tuple of (success, error output)
+    """
+    length = f"{duration:.6f}"
+    args = [
+        "-ss", f"{first_start:.6f}", "-t", length, "-i", first,
+        "-ss", f"{second_start:.6f}", "-t", length, "-i", second
+    ]
+    video_filter = params.video_filter()
+    graph = [
+        f"[0:v]{video_filter},settb=AVTB[v0]",
+        f"[1:v]{video_filter},settb=AVTB[v1]",
+        f"[v0][v1]xfade=transition={transition}:duration={length}:offset=0[v]"
+    ]
+    maps = ["-map", "[v]"]
+
+    if params.audio_encoder:
+        next_input = 2
+        for index, has_audio in enumerate((first_has_audio, second_has_audio)):
+            if has_audio:
+                source_label = f"[{index}:a]"
+            else:
+                args += ["-f", "lavfi", "-t", length, "-i", params.silence_source()]
+                source_label = f"[{next_input}:a]"
+                next_input += 1
+            # acrossfade needs both inputs to cover the whole window; seeking
+            # can leave a source a few samples short
+            graph.append(
+                f"{source_label}{params.audio_filter()},asetpts=PTS-STARTPTS,"
+                f"apad=whole_dur={length},atrim=duration={length}[a{index}]"
+            )
+        graph.append(f"[a0][a1]acrossfade=d={length}[a]")
+        maps += ["-map", "[a]"]
+
+    return await run_ffmpeg(
+        args + ["-filter_complex", ";".join(graph)] + maps + params.output_args(threads)
+        + params.length_args(duration) + [output]
+    )
+
+
+async def concat_pieces(
+    pieces: List[str],
+    output: str,
+    container: str,
+    durations: Optional[List[float]] = None,
+    params: Optional[EncodeParams] = None,
+    threads: int = 1
+) -> Tuple[bool, str]:
+    """
+    Join pieces with the concat demuxer.
+
+    Streams are copied when no params are given; otherwise the joined
+    stream is re-encoded to params.
+
+    Args:
+        pieces: Piece files in playback order
+        output: Output file path
+        container: Output container (file extension)
+        durations: Nominal piece durations; pins each piece's offset so that
+            encoder padding (e.g. AAC priming) does not accumulate as drift
+        params: Target encoding for re-encoding, None for stream copy
+        threads: Encoder threads when re-encoding
+
+    Returns:
+        Tuple of (success, error output)
+    """
+    list_path = f"{output}.concat.txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        for index, piece in enumerate(pieces):
+            escaped = os.path.abspath(piece).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+            if durations:
+                f.write(f"duration {durations[index]:.6f}\n")
+
+    args = ["-f", "concat", "-safe", "0", "-i", list_path]
+    if params is None:
+        args += ["-map", "0", "-c", "copy"]
+    else:
+        args += ["-vf", params.video_filter()]
+        if params.audio_encoder:
+            args += ["-af", params.audio_filter()]
+        args += params.output_args(threads)
+
+    if container in ("mp4", "mov"):
+        args += ["-movflags", "+faststart"]
+    args += ["-f", CONTAINER_MUXERS.get(container, container), output]
+
+    try:
+        return await run_ffmpeg(args)
+    finally:
+        try:
+            os.remove(list_path)
+        except OSError:
+            pass
+
+
+async def encode_variants(
+    source: str,
+    variants: List[OutputVariant],
+    duration: float,
+    has_audio: bool,
+    threads: int = 1
+) -> Tuple[bool, str]:
+    """
+    Encode several variants of one source in a single ffmpeg pass.
+
+    The source is decoded once and split into one filter chain and encoder
+    per distinct encoding. Variants that share an encoding (e.g. the same
+    stream in mp4 and mov) are encoded once and written by the tee muxer.
+
+    Args:
+        source: Input media file
+        variants: Outputs to produce
+        duration: Length of the source (seconds)
+        has_audio: Whether the source has an audio stream (silence is generated otherwise)
+        threads: Encoder threads for the pass, divided among the distinct encodings
+
+    Returns:
+        Tuple of (success, error output)
+    """
+    groups: Dict[Tuple[EncodeParams, Optional[float]], List[OutputVariant]] = {}
+    for variant in variants:
+        groups.setdefault((variant.params, variant.duration), []).append(variant)
+    encodings = list(groups)
+    threads_per_encoding = max(1, threads // len(encodings))
+
+    args = ["-i", source]
+    audio_indices = [index for index, (params, _) in enumerate(encodings) if params.audio_encoder]
+    silent = bool(audio_indices) and not has_audio
+    if silent:
+        args += ["-f", "lavfi", "-t", f"{duration:.6f}", "-i", "anullsrc"]
+
+    graph = [f"[0:v]split={len(encodings)}" + "".join(f"[vs{index}]" for index in range(len(encodings)))]
+    graph += [f"[vs{index}]{params.video_filter()}[v{index}]" for index, (params, _) in enumerate(encodings)]
+    if audio_indices:
+        graph.append(f"[{1 if silent else 0}:a]asplit={len(audio_indices)}"
+                     + "".join(f"[as{index}]" for index in audio_indices))
+        graph += [f"[as{index}]{encodings[index][0].audio_filter()}[a{index}]" for index in audio_indices]
+    args += ["-filter_complex", ";".join(graph)]
+
+    for index, (params, length) in enumerate(encodings):
+        args += ["-map", f"[v{index}]"]
+        if params.audio_encoder:
+            args += ["-map", f"[a{index}]"]
+        args += params.output_args(threads_per_encoding)
+        if length is not None:
+            args += params.length_args(length)
+        elif silent:
+            args += ["-t", f"{duration:.6f}"]
+
+        outputs = groups[(params, length)]
+        if len(outputs) == 1:
+            for name, value in _muxer_options(outputs[0].container):
+                args += [f"-{name}", value]
+            args.append(outputs[0].path)
+        else:
+            slaves = []
+            for output in outputs:
+                options = ":".join(f"{name}={value}" for name, value in _muxer_options(output.container))
+                slaves.append(f"[{options}]{_escape_tee_path(output.path)}")
+            args += ["-f", "tee", "|".join(slaves)]
+
+    return await run_ffmpeg(args)
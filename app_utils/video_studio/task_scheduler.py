@@ -36,6 +36,7 @@ class ScheduledTask:
     estimated_duration: Optional[float] = None
     dependencies: Set[str] = field(default_factory=set)
     resource_requirements: Dict[str, Any] = field(default_factory=dict)
+    sequence: int = 0  # Arrival order, used as the FIFO tie-breaker
     
     def __lt__(self, other: 'ScheduledTask') -> bool:
         """Comparison for priority queue (higher priority first)."""
@@ -134,10 +135,20 @@ class TaskScheduler:
         self.strategy = strategy
         self.resource_manager = resource_manager or ResourceManager()
         
-        # Task queues by priority
-        self._priority_queues: Dict[TaskPriority, List[ScheduledTask]] = {
-            priority: [] for priority in TaskPriority
+        # Task queues by priority (arrival order within each level)
+        self._priority_queues: Dict[TaskPriority, deque] = {
+            priority: deque() for priority in TaskPriority
         }
+        # Arrival order across all priorities (FIFO strategy)
+        self._arrival_queue: deque = deque()
+        # Min-heap of (estimated_duration, sequence, task) (shortest job first strategy)
+        self._duration_heap: List[Tuple[float, int, ScheduledTask]] = []
+        
+        # Live queued tasks; queue entries not in here are stale (lazy deletion)
+        self._queued_tasks: Dict[str, ScheduledTask] = {}
+        self._queue_counts: Dict[TaskPriority, int] = {priority: 0 for priority in TaskPriority}
+        self._stale_entries = 0
+        self._sequence = 0
         
         # Round-robin state for priority queues
         self._round_robin_index = 0
@@ -145,8 +156,10 @@ class TaskScheduler:
         
         # Active tasks and dependencies
         self._active_tasks: Dict[str, asyncio.Task] = {}
+        self._running_tasks: Dict[str, ScheduledTask] = {}
+        self._blocked_tasks: Dict[str, ScheduledTask] = {}
         self._task_dependencies: Dict[str, Set[str]] = {}
-        self._dependency_waiters: Dict[str, List[str]] = defaultdict(list)
+        self._dependency_waiters: Dict[str, Set[str]] = defaultdict(set)
         
         # Task execution callbacks
         self._task_processors: List[Callable] = []
@@ -190,20 +203,19 @@ class TaskScheduler:
             resource_requirements: Resource requirements for the task
             
         Returns:
-            True if task was scheduled successfully
+            True if task was scheduled successfully, False if the task ID is
+            already queued, waiting for dependencies or running
         """
+        # A second entry under the same ID would corrupt the queue counters
+        if (task_id in self._queued_tasks or
+                task_id in self._blocked_tasks or
+                task_id in self._active_tasks):
+            self.logger.warning(f"Task {task_id} is already scheduled")
+            return False
+        
         dependencies = dependencies or set()
         resource_requirements = resource_requirements or {}
         
-        # Check if dependencies are satisfied
-        unsatisfied_deps = self._check_dependencies(dependencies)
-        if unsatisfied_deps:
-            self._task_dependencies[task_id] = dependencies
-            for dep_id in unsatisfied_deps:
-                self._dependency_waiters[dep_id].append(task_id)
-            self.logger.info(f"Task {task_id} waiting for dependencies: {unsatisfied_deps}")
-            return True
-        
         # Create scheduled task
         scheduled_task = ScheduledTask(
             task_id=task_id,
@@ -214,34 +226,20 @@ class TaskScheduler:
             resource_requirements=resource_requirements
         )
         
-        # Add to appropriate queue based on strategy
-        if self.strategy == SchedulingStrategy.SHORTEST_JOB_FIRST and estimated_duration:
-            # Insert in order of estimated duration
-            queue = self._priority_queues[priority]
-            inserted = False
-            for i, existing_task in enumerate(queue):
-                if (existing_task.estimated_duration is None or 
-                    estimated_duration < existing_task.estimated_duration):
-                    queue.insert(i, scheduled_task)
-                    inserted = True
-                    break
-            if not inserted:
-                queue.append(scheduled_task)
-        else:
-            # Add to priority queue
-            if self.strategy == SchedulingStrategy.PRIORITY:
-                heapq.heappush(self._priority_queues[priority], scheduled_task)
-            else:
-                self._priority_queues[priority].append(scheduled_task)
-        
-        # Track timing
-        self._task_timings[task_id] = {'scheduled_at': datetime.now()}
+        # Park the task until its dependencies complete
+        unsatisfied_deps = self._check_dependencies(dependencies)
+        if unsatisfied_deps:
+            self._blocked_tasks[task_id] = scheduled_task
+            self._task_dependencies[task_id] = unsatisfied_deps
+            for dep_id in unsatisfied_deps:
+                self._dependency_waiters[dep_id].add(task_id)
+            self.logger.info(f"Task {task_id} waiting for dependencies: {unsatisfied_deps}")
+            return True
         
-        self._stats['tasks_scheduled'] += 1
-        self.logger.info(f"Scheduled task {task_id} with priority {priority.name}")
+        self._enqueue(scheduled_task)
         
         # Try to start processing immediately
-        await self._try_start_next_task()
+        await self._start_available_tasks()
         
         return True
     
@@ -257,21 +255,39 @@ class TaskScheduler:
             self.logger.info(f"Cancelled running task {task_id}")
             return True
         
-        # Check if task is in queues
-        for priority_queue in self._priority_queues.values():
-            for i, scheduled_task in enumerate(priority_queue):
-                if scheduled_task.task_id == task_id:
-                    priority_queue.pop(i)
-                    self.logger.info(f"Cancelled queued task {task_id}")
-                    return True
+        # Queued task: drop it from the live index, its queue entries go stale
+        scheduled_task = self._queued_tasks.pop(task_id, None)
+        if scheduled_task is not None:
+            self._queue_counts[scheduled_task.priority] -= 1
+            self._stale_entries += 1
+            self._task_timings.pop(task_id, None)
+            self._compact_queues()
+            self.logger.info(f"Cancelled queued task {task_id}")
+            await self._handle_task_completion(task_id)
+            await self._start_available_tasks()
+            return True
+        
+        # Task still waiting for dependencies
+        if task_id in self._blocked_tasks:
+            self._blocked_tasks.pop(task_id)
+            for dep_id in self._task_dependencies.pop(task_id, set()):
+                waiters = self._dependency_waiters.get(dep_id)
+                if waiters is not None:
+                    waiters.discard(task_id)
+                    if not waiters:
+                        del self._dependency_waiters[dep_id]
+            self.logger.info(f"Cancelled blocked task {task_id}")
+            await self._handle_task_completion(task_id)
+            await self._start_available_tasks()
+            return True
         
         return False
     
     async def get_queue_status(self) -> Dict[str, Any]:
         """Get current queue status and statistics."""
         queue_sizes = {
-            priority.name: len(queue) 
-            for priority, queue in self._priority_queues.items()
+            priority.name: count
+            for priority, count in self._queue_counts.items()
         }
         
         total_queued = sum(queue_sizes.values())
@@ -281,6 +297,7 @@ class TaskScheduler:
             'queue_sizes': queue_sizes,
             'total_queued': total_queued,
             'active_tasks': active_count,
+            'blocked_tasks': len(self._blocked_tasks),
             'max_concurrent': self.max_concurrent_tasks,
             'strategy': self.strategy.value,
             'resource_usage': self.resource_manager.get_resource_usage(),
@@ -297,15 +314,96 @@ class TaskScheduler:
         if not next_task:
             return False
         
-        # Check resource availability
+        # Check resource availability; keep the task at the head of its queue
         if not await self.resource_manager.acquire_resources(next_task.resource_requirements):
             self.logger.debug(f"Insufficient resources for task {next_task.task_id}")
+            self._insert(next_task, front=True)
             return False
         
         # Start the task
         await self._start_task(next_task)
         return True
     
+    async def _start_available_tasks(self) -> None:
+        """Start queued tasks until concurrency, resources or the queue run out."""
+        while await self._try_start_next_task():
+            pass
+    
+    def _enqueue(self, scheduled_task: ScheduledTask) -> None:
+        """Queue a newly ready task."""
+        self._sequence += 1
+        scheduled_task.sequence = self._sequence
+        self._insert(scheduled_task)
+        
+        # Track timing
+        self._task_timings[scheduled_task.task_id] = {'scheduled_at': datetime.now()}
+        
+        self._stats['tasks_scheduled'] += 1
+        self.logger.info(f"Scheduled task {scheduled_task.task_id} with priority {scheduled_task.priority.name}")
+    
+    def _insert(self, scheduled_task: ScheduledTask, front: bool = False) -> None:
+        """
+        Add a task to the queue structures used by the current strategy.
+        
+        Args:
+            scheduled_task: Task to queue
+            front: Put a task that could not start back at the head of its queue
+        """
+        self._queued_tasks[scheduled_task.task_id] = scheduled_task
+        self._queue_counts[scheduled_task.priority] += 1
+        
+        if self.strategy == SchedulingStrategy.FIFO:
+            queue = self._arrival_queue
+        elif (self.strategy == SchedulingStrategy.SHORTEST_JOB_FIRST and
+              scheduled_task.estimated_duration is not None):
+            heapq.heappush(
+                self._duration_heap,
+                (scheduled_task.estimated_duration, scheduled_task.sequence, scheduled_task)
+            )
+            return
+        else:
+            queue = self._priority_queues[scheduled_task.priority]
+        
+        if front:
+            queue.appendleft(scheduled_task)
+        else:
+            queue.append(scheduled_task)
+    
+    def _is_live(self, scheduled_task: ScheduledTask) -> bool:
+        """Whether a queue entry still refers to a queued task (not cancelled or re-added)."""
+        return self._queued_tasks.get(scheduled_task.task_id) is scheduled_task
+    
+    def _claim(self, scheduled_task: ScheduledTask) -> ScheduledTask:
+        """Remove a popped task from the live index."""
+        del self._queued_tasks[scheduled_task.task_id]
+        self._queue_counts[scheduled_task.priority] -= 1
+        return scheduled_task
+    
+    def _pop_live(self, queue: deque) -> Optional[ScheduledTask]:
+        """Pop the first live task from a deque, discarding stale entries."""
+        while queue:
+            scheduled_task = queue.popleft()
+            if self._is_live(scheduled_task):
+                return self._claim(scheduled_task)
+            self._stale_entries -= 1
+        return None
+    
+    def _compact_queues(self) -> None:
+        """Rebuild the queues once stale entries outnumber live ones."""
+        if self._stale_entries < 1024 or self._stale_entries < len(self._queued_tasks):
+            return
+        
+        self._priority_queues = {priority: deque() for priority in TaskPriority}
+        self._arrival_queue = deque()
+        self._duration_heap = []
+        
+        live_tasks = sorted(self._queued_tasks.values(), key=lambda task: task.sequence)
+        self._queued_tasks = {}
+        self._queue_counts = {priority: 0 for priority in TaskPriority}
+        self._stale_entries = 0
+        for scheduled_task in live_tasks:
+            self._insert(scheduled_task)
+    
     def _get_next_task(self) -> Optional[ScheduledTask]:
         """Get the next task to execute based on scheduling strategy."""
         if self.strategy == SchedulingStrategy.FIFO:
@@ -321,31 +419,15 @@ class TaskScheduler:
     
     def _get_fifo_task(self) -> Optional[ScheduledTask]:
         """Get next task using FIFO strategy."""
-        earliest_task = None
-        earliest_time = None
-        source_queue = None
-        
-        for priority, queue in self._priority_queues.items():
-            if queue:
-                task = queue[0]
-                if earliest_time is None or task.created_at < earliest_time:
-                    earliest_task = task
-                    earliest_time = task.created_at
-                    source_queue = queue
-        
-        if earliest_task and source_queue is not None:
-            source_queue.pop(0)
-            return earliest_task
-        
-        return None
+        return self._pop_live(self._arrival_queue)
     
     def _get_priority_task(self) -> Optional[ScheduledTask]:
         """Get next task using priority strategy."""
         for priority in reversed(TaskPriority):  # Highest priority first
-            queue = self._priority_queues[priority]
-            if queue:
-                if isinstance(queue, list) and queue:
-                    return heapq.heappop(queue) if len(queue) > 1 else queue.pop(0)
+            if self._queue_counts[priority]:
+                scheduled_task = self._pop_live(self._priority_queues[priority])
+                if scheduled_task is not None:
+                    return scheduled_task
         return None
     
     def _get_round_robin_task(self) -> Optional[ScheduledTask]:
@@ -355,9 +437,10 @@ class TaskScheduler:
             priority = self._priority_order[self._round_robin_index]
             self._round_robin_index = (self._round_robin_index + 1) % len(TaskPriority)
             
-            queue = self._priority_queues[priority]
-            if queue:
-                return queue.pop(0)
+            if self._queue_counts[priority]:
+                scheduled_task = self._pop_live(self._priority_queues[priority])
+                if scheduled_task is not None:
+                    return scheduled_task
             
             attempts += 1
         
@@ -365,21 +448,11 @@ class TaskScheduler:
     
     def _get_shortest_job_task(self) -> Optional[ScheduledTask]:
         """Get next task using shortest job first strategy."""
-        shortest_task = None
-        shortest_duration = None
-        source_queue = None
-        
-        for priority, queue in self._priority_queues.items():
-            for task in queue:
-                if task.estimated_duration is not None:
-                    if shortest_duration is None or task.estimated_duration < shortest_duration:
-                        shortest_task = task
-                        shortest_duration = task.estimated_duration
-                        source_queue = queue
-        
-        if shortest_task and source_queue is not None:
-            source_queue.remove(shortest_task)
-            return shortest_task
+        while self._duration_heap:
+            _, _, scheduled_task = heapq.heappop(self._duration_heap)
+            if self._is_live(scheduled_task):
+                return self._claim(scheduled_task)
+            self._stale_entries -= 1
         
         # Fallback to priority if no estimated durations
         return self._get_priority_task()
@@ -395,6 +468,7 @@ class TaskScheduler:
         # Create and start the task
         async_task = asyncio.create_task(self._execute_task(scheduled_task))
         self._active_tasks[task_id] = async_task
+        self._running_tasks[task_id] = scheduled_task
         
         self.logger.info(f"Started executing task {task_id}")
     
@@ -441,40 +515,40 @@ class TaskScheduler:
             await self._release_task_resources(task_id)
             await self._handle_task_completion(task_id)
             
-            # Try to start next task
-            await self._try_start_next_task()
+            # Try to start next tasks (completion may have released dependents)
+            await self._start_available_tasks()
     
     async def _release_task_resources(self, task_id: str) -> None:
         """Release resources allocated to a task."""
-        # Find the task's resource requirements
-        for priority_queue in self._priority_queues.values():
-            for task in priority_queue:
-                if task.task_id == task_id:
-                    await self.resource_manager.release_resources(task.resource_requirements)
-                    return
+        scheduled_task = self._running_tasks.pop(task_id, None)
+        if scheduled_task is not None:
+            await self.resource_manager.release_resources(scheduled_task.resource_requirements)
     
     async def _handle_task_completion(self, completed_task_id: str) -> None:
         """Handle completion of a task and check for dependent tasks."""
-        # Check if any tasks were waiting for this one
-        waiting_tasks = self._dependency_waiters.pop(completed_task_id, [])
+        # Wake only the tasks that were waiting for this one
+        waiting_tasks = self._dependency_waiters.pop(completed_task_id, set())
         
         for waiting_task_id in waiting_tasks:
             dependencies = self._task_dependencies.get(waiting_task_id, set())
             dependencies.discard(completed_task_id)
             
-            # If all dependencies are satisfied, schedule the task
+            # If all dependencies are satisfied, queue the parked task
             if not dependencies:
                 self._task_dependencies.pop(waiting_task_id, None)
-                # The task should already be created, just need to move it to active scheduling
-                self.logger.info(f"Dependencies satisfied for task {waiting_task_id}")
+                scheduled_task = self._blocked_tasks.pop(waiting_task_id, None)
+                if scheduled_task is not None:
+                    self.logger.info(f"Dependencies satisfied for task {waiting_task_id}")
+                    self._enqueue(scheduled_task)
     
     def _check_dependencies(self, dependencies: Set[str]) -> Set[str]:
         """Check which dependencies are not yet satisfied."""
         unsatisfied = set()
         for dep_id in dependencies:
-            # Check if dependency is still active or queued
-            if (dep_id in self._active_tasks or 
-                any(task.task_id == dep_id for queue in self._priority_queues.values() for task in queue)):
+            # Check if dependency is still active, queued or itself waiting
+            if (dep_id in self._active_tasks or
+                    dep_id in self._queued_tasks or
+                    dep_id in self._blocked_tasks):
                 unsatisfied.add(dep_id)
         return unsatisfied
     
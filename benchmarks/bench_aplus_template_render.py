@@ -0,0 +1,93 @@
+"""
+A+ 模板引擎渲染基准测试：批量渲染与小幅文本修改后的重渲染
+
+用法:
+    python benchmarks/bench_aplus_template_render.py --rounds 20
+    python benchmarks/bench_aplus_template_render.py --no-cache
+"""
+
+import argparse
+import io
+import logging
+import os
+import sys
+import time
+
+from PIL import Image
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from services.aplus_studio.models import MaterialSet, MaterialType, ModuleType, UploadedFile
+from services.aplus_studio.template_engine import TemplateEngine
+
+MODULE_TYPES = (
+    ModuleType.PRODUCT_OVERVIEW,
+    ModuleType.PROBLEM_SOLUTION,
+    ModuleType.FEATURE_ANALYSIS,
+    ModuleType.SPECIFICATION_COMPARISON,
+    ModuleType.INSTALLATION_GUIDE,
+)
+
+
+def make_materials(title, image_size=(1600, 1200)):
+    """构造一张产品图 + 若干文本的素材集合"""
+    buffer = io.BytesIO()
+    Image.new('RGB', image_size, (40, 120, 200)).save(buffer, format='PNG')
+    product_image = UploadedFile(
+        filename="product.png",
+        file_type=MaterialType.IMAGE,
+        file_size=buffer.tell(),
+        content=buffer.getvalue()
+    )
+    text_inputs = [
+        title,
+        "Durable stainless steel construction built to last for years of daily use",
+        "Ergonomic handle with a soft grip that stays comfortable during long sessions",
+        "Dishwasher safe parts make cleanup quick and easy after every single use",
+        "Compact design that fits neatly into drawers cabinets and travel bags",
+    ]
+    return MaterialSet(images=[product_image], text_inputs=text_inputs)
+
+
+def timed_renders(engine, materials_list):
+    start = time.perf_counter()
+    failures = 0
+    for materials in materials_list:
+        for module_type in MODULE_TYPES:
+            result = engine.render_module(module_type, materials)
+            if result.image_data is None:
+                failures += 1
+    elapsed = time.perf_counter() - start
+    return elapsed, len(materials_list) * len(MODULE_TYPES), failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=20, help="每种场景的渲染轮数")
+    parser.add_argument("--no-cache", action="store_true", help="关闭引擎级缓存 (画布快照/缩放图片)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    engine = TemplateEngine(enable_cache=not args.no_cache)
+
+    base = make_materials("Premium Kitchen Knife Set")
+    scenarios = [
+        ("首次渲染", [base]),
+        ("相同素材重渲染", [base] * args.rounds),
+        ("修改标题后重渲染", [
+            MaterialSet(images=base.images, text_inputs=[f"Premium Kitchen Knife Set v{i}"] + base.text_inputs[1:])
+            for i in range(args.rounds)
+        ]),
+    ]
+
+    print(f"cache={'off' if args.no_cache else 'on'} modules={len(MODULE_TYPES)} rounds={args.rounds}")
+    for name, materials_list in scenarios:
+        elapsed, renders, failures = timed_renders(engine, materials_list)
+        print(f"{name:<12} renders={renders:<5} total={elapsed:8.3f}s "
+              f"per_render={elapsed / renders * 1000:8.2f}ms failures={failures}")
+
+
+if __name__ == "__main__":
+    main()
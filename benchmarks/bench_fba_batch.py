@@ -0,0 +1,91 @@
+"""
+FBA 费用计算基准测试：逐条 FBACalculator vs 向量化 FBABatchCalculator
+
+用法:
+    python benchmarks/bench_fba_batch.py --rows 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from services.fba_logic.calculator import FBACalculator
+from services.fba_logic.batch_calculator import calculate_catalog, PRODUCT_CLASSES
+
+
+def make_catalog(rows, seed=0):
+    """生成随机 SKU 目录 (混合标准件与大件)"""
+    rng = np.random.default_rng(seed)
+    length = np.round(rng.uniform(0.5, 80, rows), 2)
+    width = np.round(rng.uniform(0.5, 40, rows), 2)
+    height = np.round(rng.uniform(0.1, 30, rows), 2)
+    small = rng.random(rows) < 0.7
+    length[small] /= 5
+    width[small] /= 5
+    height[small] /= 5
+    weight = np.round(rng.exponential(4, rows), 2)
+    price = np.round(rng.uniform(3, 120, rows), 2)
+    category = rng.choice(PRODUCT_CLASSES, rows)
+    low_inv_days = rng.integers(0, 60, rows)
+    return length, width, height, weight, price, category, low_inv_days
+
+
+def run_scalar(catalog, season):
+    length, width, height, weight, price, category, low_inv_days = catalog
+    results = []
+    for i in range(len(length)):
+        calc = FBACalculator(length[i], width[i], height[i], weight[i])
+        results.append(calc.calculate_total_cost(
+            season=season,
+            low_inv_days=int(low_inv_days[i]),
+            price=float(price[i]),
+            is_apparel=category[i] == "Apparel",
+            is_dangerous=category[i] == "Dangerous"
+        ))
+    return results
+
+
+def run_batch(catalog, season):
+    length, width, height, weight, price, category, low_inv_days = catalog
+    return calculate_catalog(length, width, height, weight, price=price, category=category,
+                             season=season, low_inv_days=low_inv_days,
+                             is_apparel=category == "Apparel", is_dangerous=category == "Dangerous")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FBA 批量费用计算基准测试")
+    parser.add_argument("--rows", type=int, default=200000, help="SKU 数量")
+    parser.add_argument("--season", default="Jan-Sep", choices=["Jan-Sep", "Oct-Dec"])
+    args = parser.parse_args()
+
+    catalog = make_catalog(args.rows)
+
+    start = time.perf_counter()
+    scalar_results = run_scalar(catalog, args.season)
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_results = run_batch(catalog, args.season)
+    batch_time = time.perf_counter() - start
+
+    mismatches = sum(
+        1 for i, row in enumerate(scalar_results)
+        if any(row[key] != batch_results[key][i] for key in row)
+    )
+
+    print(f"rows:        {args.rows}")
+    print(f"scalar:      {scalar_time:.3f}s ({args.rows / scalar_time:,.0f} rows/s)")
+    print(f"vectorized:  {batch_time:.3f}s ({args.rows / batch_time:,.0f} rows/s)")
+    print(f"speedup:     {scalar_time / batch_time:.1f}x")
+    print(f"mismatches:  {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+渲染管线多平台输出基准测试：逐平台转码 vs 单次解码扇出
+
+用法:
+    python benchmarks/bench_render_platform_fanout.py --duration 10 --repeat 3
+    python benchmarks/bench_render_platform_fanout.py --input master.mp4
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app_utils.video_studio.logging_config import render_logger
+from app_utils.video_studio.render_pipeline import CompressionLevel, Platform, RenderPipeline, RenderSettings
+from app_utils.video_studio.segment_encoder import find_ffmpeg
+
+PLATFORMS = [Platform.YOUTUBE, Platform.INSTAGRAM, Platform.TIKTOK, Platform.FACEBOOK, Platform.TWITTER]
+
+
+def make_master(path, duration):
+    """生成 1080p 带音频的测试母版"""
+    subprocess.run([
+        find_ffmpeg(), "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size=1920x1080:rate=30:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+        "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest", path
+    ], check=True)
+
+
+async def per_platform(pipeline, master, output_dir, settings):
+    """旧流程：每个平台单独解码、单独转码"""
+    results = {}
+    for platform in PLATFORMS:
+        output_path = os.path.join(output_dir, f"loop_{platform.value}.mp4")
+        if await pipeline.optimize_for_platform(master, output_path, platform, settings):
+            results[platform] = output_path
+    return results
+
+
+async def fan_out(pipeline, master, output_dir, settings):
+    """新流程：解码一次，所有平台在同一遍中编码"""
+    return await pipeline.batch_platform_optimization(
+        master, os.path.join(output_dir, "batch"), PLATFORMS, settings
+    )
+
+
+def timed(pipeline, mode, master, output_dir, settings, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = asyncio.run(mode(pipeline, master, output_dir, settings))
+        elapsed = time.perf_counter() - start
+        if len(results) != len(PLATFORMS):
+            raise RuntimeError(f"{mode.__name__} produced {len(results)}/{len(PLATFORMS)} outputs")
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="渲染管线多平台输出基准测试")
+    parser.add_argument("--input", help="母版视频 (默认生成 1080p 测试视频)")
+    parser.add_argument("--duration", type=float, default=10.0, help="生成母版的时长 (秒)")
+    parser.add_argument("--repeat", type=int, default=3, help="每种模式重复次数，取最快一次")
+    parser.add_argument("--compression", choices=[c.value for c in CompressionLevel], default="low",
+                        help="压缩等级 (决定编码预设)")
+    args = parser.parse_args()
+
+    if not find_ffmpeg():
+        print("ffmpeg 不可用 (需要 PATH 中的 ffmpeg 或 imageio-ffmpeg)")
+        sys.exit(1)
+
+    render_logger.set_level("WARNING")
+
+    work_dir = tempfile.mkdtemp(prefix="bench_fanout_")
+    try:
+        master = args.input
+        if not master:
+            master = os.path.join(work_dir, "master.mp4")
+            make_master(master, args.duration)
+
+        pipeline = RenderPipeline()
+        settings = RenderSettings(compression=CompressionLevel(args.compression))
+        print(f"母版: {master}")
+        print(f"平台: {', '.join(p.value for p in PLATFORMS)}")
+        print(f"编码并发槽位: {pipeline.max_parallel_encodes}, 每槽线程: {pipeline.threads_per_encode}")
+
+        loop_time = timed(pipeline, per_platform, master, work_dir, settings, args.repeat)
+        fan_out_time = timed(pipeline, fan_out, master, work_dir, settings, args.repeat)
+        print(f"  逐平台转码:   {loop_time:.2f}s")
+        print(f"  单次解码扇出: {fan_out_time:.2f}s ({loop_time / fan_out_time:.2f}x)")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
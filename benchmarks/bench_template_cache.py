@@ -0,0 +1,83 @@
+"""
+模板工具缓存基准测试：旧版 JSON 文件缓存 vs SQLite 缓存
+
+用法:
+    python benchmarks/bench_template_cache.py --entries 1000 --reads 20000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.path.join(ROOT_DIR, "templates")
+if TEMPLATES_DIR not in sys.path:
+    sys.path.insert(0, TEMPLATES_DIR)
+
+from tools.performance.performance_optimizer import CacheManager
+
+
+def make_value(i):
+    """模拟缓存的模板结构数据"""
+    return {
+        "id": f"template_{i}",
+        "directories": ["desktop", "mobile", "docs"],
+        "files": ["template.json", "README.md", "preview.jpg"],
+        "tags": [f"tag{i % 17}", f"tag{i % 31}"],
+        "description": "模板结构缓存" * 8,
+    }
+
+
+def run(backend, entries, reads, max_size_mb, seed=0):
+    cache_dir = Path(tempfile.mkdtemp(prefix=f"cache_bench_{backend}_"))
+    try:
+        cache = CacheManager(cache_dir, max_size_mb=max_size_mb, backend=backend)
+
+        start = time.perf_counter()
+        for i in range(entries):
+            cache.set(f"key_{i}", make_value(i), ttl=3600)
+        cache.flush()
+        write_time = time.perf_counter() - start
+
+        rng = random.Random(seed)
+        keys = [f"key_{rng.randrange(entries * 2)}" for _ in range(reads)]
+        start = time.perf_counter()
+        for key in keys:
+            cache.get(key)
+        cache.flush()
+        read_time = time.perf_counter() - start
+
+        stats = cache.get_stats()
+        cache.close()
+        return write_time, read_time, stats
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模板工具缓存基准测试")
+    parser.add_argument("--entries", type=int, default=1000, help="写入条目数")
+    parser.add_argument("--reads", type=int, default=20000, help="随机读取次数 (约一半未命中)")
+    parser.add_argument("--max-size-mb", type=int, default=100, help="缓存大小上限")
+    args = parser.parse_args()
+
+    results = {}
+    for backend in ("json", "sqlite"):
+        results[backend] = run(backend, args.entries, args.reads, args.max_size_mb)
+        write_time, read_time, stats = results[backend]
+        print(f"[{backend}]")
+        print(f"  set:       {write_time:.3f}s ({args.entries / write_time:,.0f} ops/s)")
+        print(f"  get:       {read_time:.3f}s ({args.reads / read_time:,.0f} ops/s)")
+        print(f"  hit rate:  {stats['hit_rate']:.1%}  evictions: {stats['evictions']}")
+
+    print(f"set speedup: {results['json'][0] / results['sqlite'][0]:.1f}x")
+    print(f"get speedup: {results['json'][1] / results['sqlite'][1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+模板库 CLI 冷启动基准测试：常用命令的启动耗时与导入的重量级模块
+
+每次在新进程中以 -X importtime 运行 CLI，统计墙钟时间、导入总耗时，
+并列出被导入的重量级依赖 (PIL/numpy 等)。
+
+用法:
+    python benchmarks/bench_template_cli_startup.py --runs 10
+    python benchmarks/bench_template_cli_startup.py --command "list" --command "search demo"
+"""
+
+import argparse
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI_PATH = os.path.join(ROOT_DIR, "templates", "tools", "cli", "template_cli.py")
+
+DEFAULT_COMMANDS = ("--help", "list", "search demo", "validate --help")
+HEAVY_MODULES = ("PIL", "numpy", "pandas", "cv2", "jsonschema", "yaml")
+
+
+def run_once(python, cli_path, args, cwd):
+    """运行一次 CLI，返回 (墙钟秒数, 导入总微秒数, 导入的重量级模块集合, 退出码)"""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [python, "-X", "importtime", cli_path] + args,
+        cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    elapsed = time.perf_counter() - start
+
+    import_us = 0
+    heavy = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, self_us, _, module = line.replace("import time:", "|", 1).split("|")
+        try:
+            import_us += int(self_us.strip())
+        except ValueError:
+            continue
+        top_level = module.strip().split(".")[0]
+        if top_level in HEAVY_MODULES:
+            heavy.add(top_level)
+    return elapsed, import_us, heavy, proc.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10, help="每个命令的运行次数")
+    parser.add_argument("--command", action="append", help="要测试的命令 (可重复，默认测试常用命令)")
+    parser.add_argument("--cli", default=CLI_PATH, help="CLI 脚本路径")
+    parser.add_argument("--python", default=sys.executable, help="Python 解释器")
+    args = parser.parse_args()
+
+    commands = args.command or list(DEFAULT_COMMANDS)
+    print(f"cli={args.cli} runs={args.runs}")
+    print(f"{'command':<20} {'median_ms':>10} {'min_ms':>8} {'imports_ms':>11} {'exit':>5}  heavy_modules")
+    for command in commands:
+        wall_times = []
+        import_times = []
+        heavy = set()
+        returncode = 0
+        for _ in range(args.runs):
+            elapsed, import_us, loaded, returncode = run_once(args.python, args.cli, shlex.split(command), ROOT_DIR)
+            wall_times.append(elapsed)
+            import_times.append(import_us)
+            heavy |= loaded
+        print(f"{command:<20} {statistics.median(wall_times) * 1000:>10.1f} {min(wall_times) * 1000:>8.1f} "
+              f"{statistics.median(import_times) / 1000:>11.1f} {returncode:>5}  {','.join(sorted(heavy)) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
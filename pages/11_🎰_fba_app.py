@@ -1,6 +1,7 @@
 import streamlit as st
 import sys
 import os
+import zipfile
 
 # --- 路径环境设置 ---
 current_script_path = os.path.abspath(__file__)
@@ -11,15 +12,36 @@ if root_dir not in sys.path:
 
 try:
     from services.fba_logic.calculator import FBACalculator
+    from services.fba_logic.batch_calculator import iter_catalog_file, detect_file_format, REQUIRED_COLUMNS
+    from services.fba_logic.catalog_report import CatalogReport, sweep_stale_reports
     from app_utils.fba_data.unit_converter import convert_inputs, get_display_unit
 except ImportError as e:
     st.error(f"❌ 核心模块导入失败: {e}")
     st.stop()
 
+# 批量目录模式：每块行数 & 页面预览行数
+CATALOG_CHUNK_ROWS = 20000
+CATALOG_PREVIEW_ROWS = 200
+
+# 目录文件缺列、损坏或改了扩展名时的异常，统一显示为"文件处理失败"
+CATALOG_FILE_ERRORS = (ValueError, KeyError, ImportError, zipfile.BadZipFile)
+try:
+    from openpyxl.utils.exceptions import InvalidFileException
+    CATALOG_FILE_ERRORS += (InvalidFileException,)
+except ImportError:
+    pass
+
 def show_fba_calculator():
     st.title("📦 亚马逊 FBA 智能计算器 (2025版)")
     st.markdown("基于最新规则：尺寸分段、低库存费、仓储费自动测算")
     
+    with st.sidebar:
+        calc_mode = st.radio("计算模式", ["单个商品", "批量目录"], horizontal=True)
+    
+    if calc_mode == "批量目录":
+        show_catalog_calculator()
+        return
+    
     # --- 侧边栏：输入区域 ---
     with st.sidebar:
         st.header("1. 产品参数输入")
@@ -131,6 +153,126 @@ def show_fba_calculator():
     else:
         st.success("✅ 完美！当前包装已是最优状态，暂无优化建议。")
 
+def show_catalog_calculator():
+    """批量目录模式：上传 CSV / Excel，按块流式计算并导出费用报表"""
+    with st.sidebar:
+        st.header("1. 目录参数")
+        unit_mode = st.radio("文件中的单位", ["inch/lb", "cm/kg"], horizontal=True, key="catalog_unit")
+        season = st.selectbox("当前季节", ["Jan-Sep", "Oct-Dec"], index=0, key="catalog_season")
+        default_price = st.number_input("默认售价 ($)", value=19.99, key="catalog_default_price",
+                                        help="文件中没有 price 列或价格为空时使用")
+
+    st.subheader("📂 批量目录计算")
+    st.markdown(
+        f"上传包含 `{', '.join(REQUIRED_COLUMNS)}` 列的 CSV / Excel 文件，"
+        "可选列 `price`、`category` (Standard / Apparel / Dangerous)、`low_inv_days`。"
+        f"文件按每 {CATALOG_CHUNK_ROWS:,} 行分块流式计算，内存占用与文件行数无关。"
+    )
+
+    uploaded = st.file_uploader("上传库存文件", type=["csv", "xlsx", "xlsm"])
+    if uploaded is None:
+        return
+
+    params = (uploaded.file_id, unit_mode, season, default_price)
+    report = st.session_state.get("fba_catalog_report")
+
+    if st.button("🚀 开始批量计算", type="primary"):
+        # 新报表替换旧报表时立即删除旧的临时文件；会话结束时报表对象被回收，文件随之删除
+        if report:
+            report.remove()
+        report = _run_catalog_job(uploaded, unit_mode, season, default_price)
+        if report:
+            report.params = params
+        st.session_state["fba_catalog_report"] = report
+
+    if report and report.params == params:
+        _show_catalog_report(report)
+
+
+def _run_catalog_job(uploaded, unit_mode, season, default_price):
+    """逐块计算并把结果压缩写入临时报表，页面上只保留汇总与预览"""
+    file_format = detect_file_format(uploaded.name)
+    progress = st.progress(0.0, text="准备读取文件...")
+    live_metrics = st.empty()
+
+    # 清理异常结束的会话遗留的报表
+    sweep_stale_reports()
+    report = CatalogReport(uploaded.name, preview_rows=CATALOG_PREVIEW_ROWS)
+
+    uploaded.seek(0)
+    try:
+        chunks = iter_catalog_file(uploaded, chunksize=CATALOG_CHUNK_ROWS, season=season,
+                                   file_format=file_format, unit_type=unit_mode,
+                                   default_price=default_price)
+        for chunk in chunks:
+            report.add_chunk(chunk)
+
+            # 进度：CSV 按已读取字节估算，Excel 只显示已处理行数
+            text = f"已处理 {report.rows:,} 行"
+            if file_format == "csv" and uploaded.size:
+                progress.progress(min(uploaded.tell() / uploaded.size, 1.0), text=text)
+            else:
+                progress.progress(0.5, text=text)
+            with live_metrics.container():
+                c1, c2 = st.columns(2)
+                c1.metric("已处理 SKU", f"{report.rows:,}")
+                c2.metric("累计 FBA 总成本", f"${report.fee_totals['total']:,.2f}")
+        report.close()
+    except CATALOG_FILE_ERRORS as e:
+        progress.empty()
+        live_metrics.empty()
+        report.remove()
+        st.error(f"❌ 文件处理失败: {e}")
+        return None
+
+    progress.progress(1.0, text=f"✅ 完成，共 {report.rows:,} 行")
+    live_metrics.empty()
+    return report
+
+
+def _show_catalog_report(report):
+    """展示批量计算结果汇总，并提供报表下载"""
+    st.divider()
+    st.subheader("📊 目录计算结果")
+
+    rows = report.rows
+    totals = report.fee_totals
+    c1, c2, c3 = st.columns(3)
+    c1.metric("SKU 数量", f"{rows:,}")
+    c2.metric("配送费合计", f"${totals['fulfillment_fee']:,.2f}")
+    c3.metric("平均单件 FBA 成本", f"${(totals['total'] / rows if rows else 0):.2f}")
+    if report.rate_missing:
+        st.warning(f"⚠️ {report.rate_missing:,} 行未找到对应的费率配置，配送费按 0 计算，"
+                   "报表中 `rate_missing` 列已标记。")
+
+    col_tier, col_fee = st.columns([1, 1])
+    with col_tier:
+        st.write("尺寸分段分布：")
+        st.bar_chart(report.tier_counts)
+    with col_fee:
+        st.write("各项费用合计：")
+        st.markdown(f"""
+        * **配送费 (Fulfillment):** `${totals['fulfillment_fee']:,.2f}`
+        * **月度仓储费 (Storage):** `${totals['storage_fee']:,.2f}`
+        * **低库存水平费:** `${totals['low_inventory_fee']:,.2f}`
+        * ---
+        * **FBA 总成本:** **`${totals['total']:,.2f}`**
+        """)
+
+    if report.preview is not None:
+        st.write(f"前 {min(rows, CATALOG_PREVIEW_ROWS)} 行预览：")
+        st.dataframe(report.preview, use_container_width=True)
+
+    if report.truncated:
+        st.warning(f"⚠️ 报表超过 {report.max_bytes // 1024 // 1024}MB 上限，下载文件只包含前 "
+                   f"{report.written_rows:,} 行；以上汇总覆盖全部 {rows:,} 行。")
+
+    # 报表为 gzip 压缩且有大小上限，下载时读入内存的数据量有界
+    if os.path.exists(report.path):
+        st.download_button(f"📥 下载费用报表 (CSV.GZ, {report.size() / 1024 / 1024:.1f}MB)",
+                           data=report.read_bytes(), file_name=report.file_name,
+                           mime="application/gzip", on_click="ignore")
+
 # 只要在您的主入口文件 (如 main.py) 导入并调用 show_fba_calculator() 即可
 if __name__ == "__main__":
     show_fba_calculator()
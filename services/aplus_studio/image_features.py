@@ -0,0 +1,324 @@
+"""
+Image Feature Extraction for A+ Studio system.
+
+Shared, NumPy-vectorized visual features (dominant colors, brightness and
+saturation distributions, histogram statistics) used by the visual SOP
+processor and the validation service. Features are computed lazily once per
+image and the computed values are cached by content hash; decoded images are
+not kept in the cache.
+"""
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# 颜色量化步长 (每通道 8 级)
+QUANTIZE_STEP = 32
+
+
+def quantized_dominant_colors(pixels: np.ndarray, num_colors: int = 5,
+                              step: int = QUANTIZE_STEP) -> List[Tuple[int, int, int]]:
+    """按量化后颜色出现频率取主要颜色
+
+    频率相同的颜色按首次出现的先后排序 (与逐像素计数的结果一致)。
+
+    Args:
+        pixels: (N, 3) uint8 RGB 像素
+        num_colors: 返回颜色数量
+        step: 量化步长
+
+    Returns:
+        RGB 颜色列表
+    """
+    if len(pixels) == 0:
+        return []
+
+    levels = 256 // step
+    quantized = pixels.astype(np.int32) // step
+    codes = (quantized[:, 0] * levels + quantized[:, 1]) * levels + quantized[:, 2]
+    unique_codes, first_index, counts = np.unique(codes, return_index=True, return_counts=True)
+
+    order = np.lexsort((first_index, -counts))[:num_colors]
+    colors = []
+    for code in unique_codes[order]:
+        r, rest = divmod(int(code), levels * levels)
+        g, b = divmod(rest, levels)
+        colors.append((r * step, g * step, b * step))
+    return colors
+
+
+def kmeans_palette(pixels: np.ndarray, num_colors: int = 5, iterations: int = 10,
+                   seed: int = 0) -> List[Tuple[int, int, int]]:
+    """k-means 调色板 (按簇大小降序)
+
+    Args:
+        pixels: (N, 3) uint8 RGB 像素
+        num_colors: 簇数量
+        iterations: 迭代次数
+        seed: 初始中心的随机种子
+
+    Returns:
+        RGB 颜色列表
+    """
+    if len(pixels) == 0:
+        return []
+
+    data = pixels.astype(np.float32)
+    k = min(num_colors, len(np.unique(pixels, axis=0)))
+    rng = np.random.default_rng(seed)
+    centers = data[rng.choice(len(data), size=k, replace=False)]
+
+    labels = np.zeros(len(data), dtype=np.int64)
+    for _ in range(iterations):
+        # |x - c|^2 = |x|^2 - 2x·c + |c|^2，省去 (N, k, 3) 中间数组
+        distances = (data * data).sum(axis=1)[:, None] - 2 * data @ centers.T + (centers * centers).sum(axis=1)
+        labels = distances.argmin(axis=1)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, data)
+        sizes = np.bincount(labels, minlength=k)
+        non_empty = sizes > 0
+        centers[non_empty] = sums[non_empty] / sizes[non_empty, None]
+
+    sizes = np.bincount(labels, minlength=k)
+    order = np.argsort(-sizes, kind='stable')
+    return [tuple(int(round(c)) for c in centers[i]) for i in order if sizes[i] > 0]
+
+
+def saturation_values(pixels: np.ndarray) -> np.ndarray:
+    """HSV 饱和度 (与 colorsys.rgb_to_hsv 逐像素计算结果一致)
+
+    Args:
+        pixels: (N, 3) uint8 RGB 像素
+
+    Returns:
+        (N,) 饱和度数组，取值 0-1
+    """
+    rgb = pixels.astype(np.float64) / 255
+    max_c = rgb.max(axis=1)
+    min_c = rgb.min(axis=1)
+    saturation = np.zeros(len(rgb))
+    colored = max_c != min_c
+    saturation[colored] = (max_c[colored] - min_c[colored]) / max_c[colored]
+    return saturation
+
+
+def band_fractions(values: np.ndarray, low: float, high: float) -> Dict[str, float]:
+    """统计低/中/高三段占比 (low <= 中 < high)"""
+    total = len(values)
+    if total == 0:
+        return {'low': 0.0, 'mid': 0.0, 'high': 0.0}
+
+    low_count = int(np.count_nonzero(values < low))
+    high_count = int(np.count_nonzero(values >= high))
+    return {
+        'low': low_count / total,
+        'mid': (total - low_count - high_count) / total,
+        'high': high_count / total
+    }
+
+
+def histogram_stats(histogram: List[int]) -> Tuple[float, float]:
+    """灰度直方图的均值与标准差 (0-255 刻度)
+
+    Returns:
+        (mean, std)；空直方图返回 (0.0, 0.0)
+    """
+    counts = np.asarray(histogram, dtype=np.float64)
+    total = counts.sum()
+    if total == 0:
+        return 0.0, 0.0
+
+    levels = np.arange(len(counts), dtype=np.float64)
+    mean = float((levels * counts).sum() / total)
+    variance = float((counts * (levels - mean) ** 2).sum() / total)
+    return mean, variance ** 0.5
+
+
+class ImageFeatures:
+    """单张图片的视觉特征 (按需计算)
+
+    计算结果保存在 memo 中。经由 ImageFeatureCache 取得时，memo 按图片内容
+    哈希共享，缓存中只保留计算结果；解码后的图片只在本对象存活期间保留。
+    """
+
+    def __init__(self, image: Optional[Image.Image] = None, image_data: Optional[bytes] = None,
+                 memo: Optional[Dict[tuple, object]] = None, lock: Optional[threading.RLock] = None):
+        """
+        Args:
+            image: 已解码的图片 (与 image_data 二选一)
+            image_data: 图片字节数据，首次需要像素时才解码
+            memo: 共享的特征结果
+            lock: 保护 memo 的锁 (可重入：派生特征在计算时会读取其它缓存特征)
+        """
+        self._image = image
+        self._image_data = image_data
+        self._rgb: Optional[Image.Image] = None
+        self._memo: Dict[tuple, object] = {} if memo is None else memo
+        self._lock = lock or threading.RLock()
+
+    @classmethod
+    def from_bytes(cls, image_data: bytes) -> 'ImageFeatures':
+        """从图片字节数据创建"""
+        return cls(image_data=image_data)
+
+    @property
+    def image(self) -> Image.Image:
+        """原始图片 (按需解码)"""
+        if self._image is None:
+            image = Image.open(io.BytesIO(self._image_data))
+            image.load()
+            self._image = image
+        return self._image
+
+    @property
+    def rgb_image(self) -> Image.Image:
+        """RGB 模式的图片"""
+        if self._rgb is None:
+            self._rgb = self.image if self.image.mode == 'RGB' else self.image.convert('RGB')
+        return self._rgb
+
+    def dominant_colors(self, sample_size: int = 150, num_colors: int = 5,
+                        method: str = 'histogram', resize_first: bool = False) -> List[Tuple[int, int, int]]:
+        """主要颜色
+
+        Args:
+            sample_size: 缩放到 sample_size x sample_size 后再统计
+            num_colors: 返回颜色数量
+            method: 'histogram' 量化频率统计 / 'kmeans' k-means 聚类
+            resize_first: 先缩放原图再转 RGB (否则先转 RGB 再缩放)。
+                P / RGBA 等模式下两种顺序的结果不同，由调用方沿用各自原有的顺序
+
+        Returns:
+            RGB 颜色列表
+        """
+        def compute():
+            if resize_first:
+                sample = self.image.resize((sample_size, sample_size))
+                if sample.mode != 'RGB':
+                    sample = sample.convert('RGB')
+            else:
+                sample = self.rgb_image.resize((sample_size, sample_size))
+            pixels = np.asarray(sample, dtype=np.uint8).reshape(-1, 3)
+            if method == 'kmeans':
+                return kmeans_palette(pixels, num_colors)
+            return quantized_dominant_colors(pixels, num_colors)
+
+        key = ('dominant_colors', sample_size, num_colors, method, resize_first)
+        return list(self._cached(key, compute))
+
+    def gray_histogram(self, from_rgb: bool = False) -> List[int]:
+        """灰度直方图 (256 级)
+
+        Args:
+            from_rgb: 由 RGB 图转灰度 (否则由原图直接转灰度)
+        """
+        def compute():
+            source = self.rgb_image if from_rgb else self.image
+            return source.convert('L').histogram()
+
+        return self._cached(('gray_histogram', from_rgb), compute)
+
+    def brightness_distribution(self, from_rgb: bool = False) -> Dict[str, float]:
+        """亮度分布：低 (<85) / 中 / 高 (>=170) 像素占比
+
+        Args:
+            from_rgb: 由 RGB 图转灰度统计 (否则由原图直接转灰度)
+        """
+        def compute():
+            counts = np.asarray(self.gray_histogram(from_rgb), dtype=np.int64)
+            total = int(counts.sum())
+            if total == 0:
+                return {'low': 0.0, 'mid': 0.0, 'high': 0.0}
+            return {
+                'low': int(counts[:85].sum()) / total,
+                'mid': int(counts[85:170].sum()) / total,
+                'high': int(counts[170:].sum()) / total
+            }
+
+        return dict(self._cached(('brightness_distribution', from_rgb), compute))
+
+    def saturation_levels(self, sample_every: int = 100) -> Dict[str, float]:
+        """饱和度分布：低 (<0.3) / 中 / 高 (>=0.7) 占比
+
+        Args:
+            sample_every: 每隔多少个像素采样一次
+        """
+        def compute():
+            pixels = np.asarray(self.rgb_image, dtype=np.uint8).reshape(-1, 3)[::sample_every]
+            return band_fractions(saturation_values(pixels), 0.3, 0.7)
+
+        return dict(self._cached(('saturation_levels', sample_every), compute))
+
+    def brightness_stats(self) -> Dict[str, float]:
+        """平均亮度与亮度标准差 (0-1 刻度，由原图直接转灰度)"""
+        def compute():
+            histogram = self.gray_histogram()
+            if sum(histogram) == 0:
+                return {'mean': 0.5, 'std': 0.0}
+            mean, std = histogram_stats(histogram)
+            return {'mean': mean / 255.0, 'std': std / 255.0}
+
+        return dict(self._cached(('brightness_stats',), compute))
+
+    def _cached(self, key: tuple, compute):
+        with self._lock:
+            if key not in self._memo:
+                self._memo[key] = compute()
+            return self._memo[key]
+
+
+class ImageFeatureCache:
+    """按图片内容哈希缓存特征计算结果 (LRU)
+
+    只缓存计算出的特征值，不缓存解码后的图片：get() 每次返回新的
+    ImageFeatures，它与同一内容的其它实例共享结果，需要像素时才解码。
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        # 内容哈希 -> (特征结果, 结果锁)
+        self._entries: 'OrderedDict[str, Tuple[Dict[tuple, object], threading.RLock]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, image_data: bytes) -> ImageFeatures:
+        """取得图片特征；同一内容的特征只计算一次"""
+        key = hashlib.sha256(image_data).hexdigest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                entry = ({}, threading.RLock())
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        memo, lock = entry
+        return ImageFeatures(image_data=image_data, memo=memo, lock=lock)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# 全局特征缓存
+_feature_cache = ImageFeatureCache()
+
+
+def get_image_features(image_data: bytes) -> ImageFeatures:
+    """获取图片特征 (全局缓存)"""
+    return _feature_cache.get(image_data)
+
+
+def get_feature_cache() -> ImageFeatureCache:
+    """获取全局特征缓存"""
+    return _feature_cache
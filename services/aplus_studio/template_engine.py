@@ -19,6 +19,8 @@ from dataclasses import dataclass, asdict
 from enum import Enum
 import hashlib
 import threading
+from collections import OrderedDict
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
 import io
 
@@ -30,6 +32,88 @@ from .text_service import TextLanguage, APlusTextService
 
 logger = logging.getLogger(__name__)
 
+# 进程级缓存容量
+FONT_CACHE_SIZE = 128
+TEXT_LAYOUT_CACHE_SIZE = 4096
+
+# 文本测量用的画板 (测量不依赖目标画布)
+_MEASURE_DRAW = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def load_font(family: str, size: int):
+    """
+    加载字体（进程级LRU缓存，键为 (字体族, 字号)）
+    
+    依次尝试 "<family>.ttf" 和 family 本身，都失败时使用默认字体。
+    """
+    for candidate in (f"{family}.ttf", family):
+        try:
+            return ImageFont.truetype(candidate, size)
+        except Exception:
+            continue
+    return ImageFont.load_default()
+
+
+@lru_cache(maxsize=TEXT_LAYOUT_CACHE_SIZE)
+def measure_text_width(text: str, font) -> int:
+    """测量文本宽度（缓存）"""
+    bbox = _MEASURE_DRAW.textbbox((0, 0), text, font=font)
+    return bbox[2] - bbox[0]
+
+
+@lru_cache(maxsize=TEXT_LAYOUT_CACHE_SIZE)
+def wrap_words(text: str, font, max_width: int) -> Tuple[str, ...]:
+    """按单词换行（缓存）"""
+    words = text.split()
+    lines = []
+    current_line = []
+    
+    for word in words:
+        test_line = ' '.join(current_line + [word])
+        text_width = measure_text_width(test_line, font)
+        
+        if text_width <= max_width:
+            current_line.append(word)
+        else:
+            if current_line:
+                lines.append(' '.join(current_line))
+                current_line = [word]
+            else:
+                # 单词太长，强制换行
+                lines.append(word)
+    
+    if current_line:
+        lines.append(' '.join(current_line))
+    
+    return tuple(lines)
+
+
+@lru_cache(maxsize=TEXT_LAYOUT_CACHE_SIZE)
+def wrap_chars(text: str, font, max_width: int) -> Tuple[str, ...]:
+    """按字符换行（亚洲语言，缓存）"""
+    lines = []
+    current_line = ""
+    
+    for char in text:
+        test_line = current_line + char
+        text_width = measure_text_width(test_line, font)
+        
+        if text_width <= max_width:
+            current_line = test_line
+        else:
+            if current_line:
+                lines.append(current_line)
+                current_line = char
+            else:
+                # 单个字符太宽，强制添加
+                lines.append(char)
+    
+    if current_line:
+        lines.append(current_line)
+    
+    return tuple(lines)
+
 
 class LayoutType(Enum):
     """布局类型枚举"""
@@ -170,6 +254,12 @@ class TemplateEngine:
         self._render_cache: Dict[str, bytes] = {}
         self._cache_lock = threading.RLock()
         
+        # 画布缓存：已渲染元素前缀的签名 -> 画布快照（在每个z_index层结束处保存）
+        self._canvas_cache: "OrderedDict[tuple, Image.Image]" = OrderedDict()
+        self._canvas_cache_size = max(1, cache_size // 4)
+        # 缩放后的素材图片：(内容摘要, 尺寸) -> RGB图像
+        self._resized_image_cache: "OrderedDict[tuple, Image.Image]" = OrderedDict()
+        
         # 模板配置
         self._module_templates: Dict[ModuleType, List[TemplateConfig]] = {}
         self._default_configs: Dict[ModuleType, TemplateConfig] = {}
@@ -194,6 +284,7 @@ class TemplateEngine:
             'total_renders': 0,
             'cache_hits': 0,
             'cache_misses': 0,
+            'canvas_reuses': 0,  # 复用画布快照 (只重绘上层元素) 的次数
             'average_render_time': 0.0,
             'compliance_failures': 0,
             'language_distribution': {}  # 语言使用统计
@@ -922,29 +1013,167 @@ class TemplateEngine:
             config = layout.template_config
             canvas_width, canvas_height = config.canvas_size
             
-            # 创建画布
-            image = Image.new('RGB', (canvas_width, canvas_height), config.background_color)
-            draw = ImageDraw.Draw(image)
-            
             # 按z_index排序元素
             sorted_elements = sorted(layout.content_elements, key=lambda x: x.z_index)
             
-            # 渲染每个元素
-            for element in sorted_elements:
-                self._render_element(image, draw, element, materials)
+            # 布局内容完全相同时直接复用编码结果
+            signatures = [self._element_signature(element, materials) for element in sorted_elements]
+            base_key = (config.canvas_size, config.background_color)
+            render_key = hashlib.sha1(repr(base_key + tuple(signatures)).encode('utf-8')).hexdigest()
+            cached_data = self._get_cached_render(render_key)
+            if cached_data is not None:
+                return cached_data
+            
+            # 复用与本次渲染前缀相同的画布快照（例如只修改了上层文本时复用底层图片）
+            image, start = self._restore_canvas(base_key, sorted_elements, signatures)
+            if image is None:
+                image = Image.new('RGB', (canvas_width, canvas_height), config.background_color)
+            draw = ImageDraw.Draw(image)
+            
+            # 渲染剩余元素，每个z_index层结束时保存快照（最后一层由编码结果缓存覆盖）
+            for index in range(start, len(sorted_elements)):
+                self._render_element(image, draw, sorted_elements[index], materials)
+                if index + 1 < len(sorted_elements) and self._is_layer_end(sorted_elements, index + 1):
+                    self._store_canvas(base_key + tuple(signatures[:index + 1]), image)
             
             # 转换为字节数据
             img_buffer = io.BytesIO()
             image.save(img_buffer, format='PNG', optimize=True, dpi=(72, 72))
             img_buffer.seek(0)
             
-            return img_buffer.getvalue()
+            image_data = img_buffer.getvalue()
+            self._store_render(render_key, image_data)
+            return image_data
             
         except Exception as e:
             logger.error(f"Failed to render layout: {str(e)}")
             # 返回错误图像
             return self._create_error_image(config.canvas_size, str(e))
     
+    def _element_signature(self, element: ContentElement, materials: MaterialSet) -> tuple:
+        """元素签名（决定元素渲染结果的全部输入）"""
+        content = element.content
+        if element.element_type == "image":
+            if not isinstance(content, UploadedFile):
+                content = materials.images[0] if materials.images else None
+            content = self._image_source_key(content)
+        else:
+            content = repr(content)
+        
+        style = tuple(sorted((key, repr(value)) for key, value in (element.style or {}).items()))
+        return (element.element_type, content, element.position, element.size, style, element.z_index)
+    
+    def _image_source_key(self, source: Optional[UploadedFile]) -> Optional[tuple]:
+        """素材图片的缓存键（按内容摘要）"""
+        if source is None:
+            return None
+        data = source.content
+        if isinstance(data, (bytes, bytearray)):
+            return ('sha1', hashlib.sha1(data).hexdigest())
+        if isinstance(data, str):
+            # 文件路径：带上修改时间和大小，文件被替换后不会命中旧缓存
+            try:
+                stat = os.stat(data)
+            except OSError:
+                return ('unknown', data)
+            return ('path', data, stat.st_mtime_ns, stat.st_size)
+        if isinstance(data, Image.Image):
+            # 内存中的图像对象按像素内容摘要（对象标识在回收后会被复用）
+            return ('pixels', data.mode, data.size, hashlib.sha1(data.tobytes()).hexdigest())
+        return ('unknown', type(data).__name__)
+    
+    def _is_layer_end(self, sorted_elements: List[ContentElement], position: int) -> bool:
+        """position 处是否为一个z_index层的结束"""
+        return (position == len(sorted_elements) or
+                sorted_elements[position].z_index != sorted_elements[position - 1].z_index)
+    
+    def _get_cached_render(self, render_key: str) -> Optional[bytes]:
+        """获取缓存的渲染结果"""
+        if not self.enable_cache:
+            return None
+        
+        with self._cache_lock:
+            image_data = self._render_cache.pop(render_key, None)
+            if image_data is None:
+                self._render_stats['cache_misses'] += 1
+                return None
+            # 重新插入，保持最近使用的在末尾
+            self._render_cache[render_key] = image_data
+            self._render_stats['cache_hits'] += 1
+            return image_data
+    
+    def _store_render(self, render_key: str, image_data: bytes):
+        """缓存渲染结果"""
+        if not self.enable_cache:
+            return
+        
+        with self._cache_lock:
+            self._render_cache[render_key] = image_data
+            while len(self._render_cache) > self.cache_size:
+                self._render_cache.pop(next(iter(self._render_cache)))
+    
+    def _restore_canvas(self, base_key: tuple, sorted_elements: List[ContentElement],
+                        signatures: List[tuple]) -> Tuple[Optional[Image.Image], int]:
+        """查找最长的可复用画布快照，返回 (画布副本, 已渲染元素数)"""
+        if not self.enable_cache:
+            return None, 0
+        
+        with self._cache_lock:
+            for position in range(len(sorted_elements), -1, -1):
+                if position and not self._is_layer_end(sorted_elements, position):
+                    continue
+                key = base_key + tuple(signatures[:position])
+                snapshot = self._canvas_cache.get(key)
+                if snapshot is not None:
+                    self._canvas_cache.move_to_end(key)
+                    # 快照只省去部分绘制，单独计数，不计入渲染缓存命中
+                    self._render_stats['canvas_reuses'] += 1
+                    return snapshot.copy(), position
+        return None, 0
+    
+    def _store_canvas(self, key: tuple, image: Image.Image):
+        """保存画布快照"""
+        if not self.enable_cache:
+            return
+        
+        with self._cache_lock:
+            self._canvas_cache[key] = image.copy()
+            self._canvas_cache.move_to_end(key)
+            while len(self._canvas_cache) > self._canvas_cache_size:
+                self._canvas_cache.popitem(last=False)
+    
+    def _get_resized_image(self, source: UploadedFile, size: Tuple[int, int]) -> Image.Image:
+        """解码并缩放素材图片（按内容摘要和尺寸缓存）"""
+        source_key = self._image_source_key(source)
+        cacheable = self.enable_cache and source_key[0] != 'unknown'
+        key = (source_key, size)
+        
+        if cacheable:
+            with self._cache_lock:
+                resized_image = self._resized_image_cache.get(key)
+                if resized_image is not None:
+                    self._resized_image_cache.move_to_end(key)
+                    return resized_image
+        
+        data = source.content
+        if isinstance(data, Image.Image):
+            resized_image = data.resize(size, Image.Resampling.LANCZOS)
+        else:
+            # 从路径或字节解码，缩放后立即关闭源文件
+            with Image.open(data if isinstance(data, str) else io.BytesIO(data)) as source_image:
+                resized_image = source_image.resize(size, Image.Resampling.LANCZOS)
+        
+        # 确保图像模式兼容
+        if resized_image.mode != 'RGB':
+            resized_image = resized_image.convert('RGB')
+        
+        if cacheable:
+            with self._cache_lock:
+                self._resized_image_cache[key] = resized_image
+                while len(self._resized_image_cache) > self.cache_size:
+                    self._resized_image_cache.popitem(last=False)
+        return resized_image
+    
     def _render_element(self, image: Image.Image, draw: ImageDraw.Draw, 
                        element: ContentElement, materials: MaterialSet):
         """渲染单个元素"""
@@ -967,14 +1196,9 @@ class TemplateEngine:
             width, height = element.size
             style = element.style or {}
             
-            # 获取字体
+            # 获取字体（缓存）
             font_size = style.get('font_size', 14)
-            try:
-                # 尝试使用系统字体
-                font = ImageFont.truetype("arial.ttf", font_size)
-            except:
-                # 使用默认字体
-                font = ImageFont.load_default()
+            font = load_font("arial", font_size)
             
             # 获取文本颜色
             text_color = style.get('color', '#000000')
@@ -993,12 +1217,10 @@ class TemplateEngine:
                 
                 # 计算x位置
                 if align == 'center':
-                    bbox = draw.textbbox((0, 0), line, font=font)
-                    text_width = bbox[2] - bbox[0]
+                    text_width = measure_text_width(line, font)
                     line_x = x + (width - text_width) // 2
                 elif align == 'right':
-                    bbox = draw.textbbox((0, 0), line, font=font)
-                    text_width = bbox[2] - bbox[0]
+                    text_width = measure_text_width(line, font)
                     line_x = x + width - text_width
                 else:  # left
                     line_x = x
@@ -1015,25 +1237,18 @@ class TemplateEngine:
             x, y = element.position
             width, height = element.size
             
-            # 获取图像数据
+            # 获取图像素材
             if isinstance(element.content, UploadedFile):
-                image_data = element.content.file_content
+                source = element.content
             else:
                 # 如果是其他类型，尝试从materials中找到对应图像
                 if materials.images:
-                    image_data = materials.images[0].file_content
+                    source = materials.images[0]
                 else:
                     return  # 没有图像数据
             
-            # 加载图像
-            source_image = Image.open(io.BytesIO(image_data))
-            
-            # 调整图像大小
-            resized_image = source_image.resize((width, height), Image.Resampling.LANCZOS)
-            
-            # 确保图像模式兼容
-            if resized_image.mode != 'RGB':
-                resized_image = resized_image.convert('RGB')
+            # 加载并缩放图像（缓存）
+            resized_image = self._get_resized_image(source, (width, height))
             
             # 粘贴到画布
             canvas.paste(resized_image, (x, y))
@@ -1066,10 +1281,7 @@ class TemplateEngine:
                 if element.content and str(element.content).strip():
                     text = str(element.content)
                     font_size = style.get('font_size', 14)
-                    try:
-                        font = ImageFont.truetype("arial.ttf", font_size)
-                    except:
-                        font = ImageFont.load_default()
+                    font = load_font("arial", font_size)
                     
                     bbox = draw.textbbox((0, 0), text, font=font)
                     text_width = bbox[2] - bbox[0]
@@ -1105,29 +1317,7 @@ class TemplateEngine:
     def _wrap_text(self, text: str, font, max_width: int) -> List[str]:
         """文本换行"""
         try:
-            words = text.split()
-            lines = []
-            current_line = []
-            
-            for word in words:
-                test_line = ' '.join(current_line + [word])
-                bbox = ImageDraw.Draw(Image.new('RGB', (1, 1))).textbbox((0, 0), test_line, font=font)
-                text_width = bbox[2] - bbox[0]
-                
-                if text_width <= max_width:
-                    current_line.append(word)
-                else:
-                    if current_line:
-                        lines.append(' '.join(current_line))
-                        current_line = [word]
-                    else:
-                        # 单词太长，强制换行
-                        lines.append(word)
-            
-            if current_line:
-                lines.append(' '.join(current_line))
-            
-            return lines
+            return list(wrap_words(text, font, max_width))
             
         except Exception as e:
             logger.error(f"Failed to wrap text: {str(e)}")
@@ -1257,10 +1447,7 @@ class TemplateEngine:
             draw = ImageDraw.Draw(image)
             
             # 绘制错误信息
-            try:
-                font = ImageFont.truetype("arial.ttf", 16)
-            except:
-                font = ImageFont.load_default()
+            font = load_font("arial", 16)
             
             # 绘制边框
             draw.rectangle([10, 10, width-10, height-10], outline='#FF0000', width=2)
@@ -1468,6 +1655,8 @@ class TemplateEngine:
             with self._cache_lock:
                 self._template_cache.clear()
                 self._render_cache.clear()
+                self._canvas_cache.clear()
+                self._resized_image_cache.clear()
                 logger.info("Template engine cache cleared")
                 
         except Exception as e:
@@ -1619,16 +1808,8 @@ class TemplateEngine:
             font_size = style.get('font_size', 14)
             font_family = self._get_language_font(language)
             
-            try:
-                # 尝试使用语言特定字体
-                font = ImageFont.truetype(f"{font_family}.ttf", font_size)
-            except:
-                try:
-                    # 尝试系统字体
-                    font = ImageFont.truetype(font_family, font_size)
-                except:
-                    # 使用默认字体
-                    font = ImageFont.load_default()
+            # 语言特定字体 -> 系统字体 -> 默认字体（缓存）
+            font = load_font(font_family, font_size)
             
             # 获取文本颜色
             text_color = style.get('color', '#000000')
@@ -1658,12 +1839,10 @@ class TemplateEngine:
                 
                 # 计算x位置
                 if align == 'center':
-                    bbox = draw.textbbox((0, 0), line, font=font)
-                    text_width = bbox[2] - bbox[0]
+                    text_width = measure_text_width(line, font)
                     line_x = x + (width - text_width) // 2
                 elif align == 'right':
-                    bbox = draw.textbbox((0, 0), line, font=font)
-                    text_width = bbox[2] - bbox[0]
+                    text_width = measure_text_width(line, font)
                     line_x = x + width - text_width
                 else:  # left
                     line_x = x
@@ -1679,28 +1858,7 @@ class TemplateEngine:
     def _wrap_text_asian(self, text: str, font, max_width: int) -> List[str]:
         """亚洲语言文本换行"""
         try:
-            lines = []
-            current_line = ""
-            
-            for char in text:
-                test_line = current_line + char
-                bbox = ImageDraw.Draw(Image.new('RGB', (1, 1))).textbbox((0, 0), test_line, font=font)
-                text_width = bbox[2] - bbox[0]
-                
-                if text_width <= max_width:
-                    current_line = test_line
-                else:
-                    if current_line:
-                        lines.append(current_line)
-                        current_line = char
-                    else:
-                        # 单个字符太宽，强制添加
-                        lines.append(char)
-            
-            if current_line:
-                lines.append(current_line)
-            
-            return lines
+            return list(wrap_chars(text, font, max_width))
             
         except Exception as e:
             logger.error(f"Failed to wrap Asian text: {str(e)}")
@@ -14,6 +14,7 @@ from .models import (
     ValidationResult, ValidationStatus, GenerationResult, 
     VisualStyle, APLUS_IMAGE_SPECS
 )
+from .image_features import ImageFeatures, get_image_features, histogram_stats
 
 
 class ValidationService:
@@ -120,17 +121,10 @@ class ValidationService:
         """计算对比度评分"""
         try:
             # 简化的对比度计算：基于直方图的标准差
-            total_pixels = sum(histogram)
-            if total_pixels == 0:
+            if sum(histogram) == 0:
                 return 0.0
             
-            # 计算加权平均值
-            weighted_sum = sum(i * count for i, count in enumerate(histogram))
-            mean = weighted_sum / total_pixels
-            
-            # 计算标准差
-            variance = sum(count * (i - mean) ** 2 for i, count in enumerate(histogram)) / total_pixels
-            std_dev = variance ** 0.5
+            _, std_dev = histogram_stats(histogram)
             
             # 归一化到0-1范围
             contrast_score = min(std_dev / 128.0, 1.0)
@@ -252,19 +246,20 @@ class ValidationService:
     def _extract_visual_features(self, image_data: bytes) -> Dict[str, Any]:
         """提取图片的视觉特征"""
         try:
-            image = Image.open(io.BytesIO(image_data))
+            # 同一图片内容只解码、分析一次 (按内容哈希缓存)
+            image_features = get_image_features(image_data)
             
             features = {}
             
             # 提取主要颜色
-            features["dominant_colors"] = self._get_dominant_colors(image)
+            features["dominant_colors"] = image_features.dominant_colors(sample_size=100, resize_first=True)
             
             # 分析亮度分布
-            features["brightness_distribution"] = self._analyze_brightness(image)
+            features["brightness_distribution"] = image_features.brightness_stats()
             
             # 分析对比度
             features["contrast_level"] = self._calculate_contrast_score(
-                image.convert('L').histogram()
+                image_features.gray_histogram()
             )
             
             return features
@@ -275,28 +270,7 @@ class ValidationService:
     def _get_dominant_colors(self, image: Image.Image, num_colors: int = 5) -> List[tuple]:
         """获取图片的主要颜色"""
         try:
-            # 缩小图片以提高处理速度
-            small_image = image.resize((100, 100))
-            
-            # 转换为RGB
-            if small_image.mode != 'RGB':
-                small_image = small_image.convert('RGB')
-            
-            # 获取所有像素颜色
-            pixels = list(small_image.getdata())
-            
-            # 简化的颜色聚类（实际应该使用更复杂的算法）
-            color_counts = {}
-            for pixel in pixels:
-                # 量化颜色以减少变化
-                quantized = tuple(c // 32 * 32 for c in pixel)
-                color_counts[quantized] = color_counts.get(quantized, 0) + 1
-            
-            # 获取最常见的颜色
-            sorted_colors = sorted(color_counts.items(), key=lambda x: x[1], reverse=True)
-            dominant_colors = [color for color, count in sorted_colors[:num_colors]]
-            
-            return dominant_colors
+            return ImageFeatures(image).dominant_colors(sample_size=100, num_colors=num_colors, resize_first=True)
             
         except Exception:
             return [(128, 128, 128)]  # 默认灰色
@@ -304,25 +278,7 @@ class ValidationService:
     def _analyze_brightness(self, image: Image.Image) -> Dict[str, float]:
         """分析图片亮度分布"""
         try:
-            gray_image = image.convert('L')
-            histogram = gray_image.histogram()
-            
-            total_pixels = sum(histogram)
-            if total_pixels == 0:
-                return {"mean": 0.5, "std": 0.0}
-            
-            # 计算平均亮度
-            weighted_sum = sum(i * count for i, count in enumerate(histogram))
-            mean_brightness = weighted_sum / total_pixels / 255.0
-            
-            # 计算亮度标准差
-            variance = sum(count * (i/255.0 - mean_brightness) ** 2 for i, count in enumerate(histogram)) / total_pixels
-            std_brightness = variance ** 0.5
-            
-            return {
-                "mean": mean_brightness,
-                "std": std_brightness
-            }
+            return ImageFeatures(image).brightness_stats()
             
         except Exception:
             return {"mean": 0.5, "std": 0.2}
@@ -9,12 +9,14 @@ import colorsys
 import math
 from typing import List, Dict, Tuple, Optional, Any
 from dataclasses import dataclass
+import numpy as np
 from PIL import Image
 
 from .models import (
     VisualStyle, ModuleType, GenerationResult, AnalysisResult,
     ValidationResult, ValidationStatus
 )
+from .image_features import ImageFeatures, get_image_features, quantized_dominant_colors
 
 
 @dataclass
@@ -327,25 +329,21 @@ class VisualSOPProcessor:
     def _analyze_image_visual_features(self, image_data: bytes) -> ColorAnalysis:
         """分析图片的视觉特征"""
         try:
-            # 将字节数据转换为PIL图像
-            import io
-            image = Image.open(io.BytesIO(image_data))
-            
-            # 转换为RGB模式
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
+            # 同一图片内容只解码、分析一次 (按内容哈希缓存)
+            features = get_image_features(image_data)
             
             # 提取主要颜色
-            dominant_colors = self._extract_dominant_colors(image)
+            # 先转 RGB 再缩放，亮度也由 RGB 图统计 (与原实现一致)
+            dominant_colors = features.dominant_colors(sample_size=150)
             
             # 计算色彩和谐度
             harmony_score = self._calculate_color_harmony(dominant_colors)
             
             # 分析亮度分布
-            brightness_dist = self._analyze_brightness_distribution(image)
+            brightness_dist = features.brightness_distribution(from_rgb=True)
             
             # 分析饱和度水平
-            saturation_levels = self._analyze_saturation_levels(image)
+            saturation_levels = features.saturation_levels()
             
             # 估算色温
             color_temp = self._estimate_color_temperature(dominant_colors)
@@ -370,38 +368,12 @@ class VisualSOPProcessor:
     
     def _extract_dominant_colors(self, image: Image.Image, num_colors: int = 5) -> List[Tuple[int, int, int]]:
         """提取图像的主要颜色"""
-        # 缩小图像以提高处理速度
-        image = image.resize((150, 150))
-        
-        # 转换为RGB模式
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # 获取所有像素
-        pixels = list(image.getdata())
-        
-        # 使用简化方法提取主要颜色
-        return self._simple_dominant_colors(pixels, num_colors)
+        return ImageFeatures(image).dominant_colors(sample_size=150, num_colors=num_colors, resize_first=True)
     
     def _simple_dominant_colors(self, pixels: List[Tuple[int, int, int]], num_colors: int) -> List[Tuple[int, int, int]]:
-        """简化的主要颜色提取方法"""
-        # 量化颜色空间
-        quantized_pixels = []
-        for r, g, b in pixels:
-            # 将颜色量化到32的倍数
-            quantized = ((r // 32) * 32, (g // 32) * 32, (b // 32) * 32)
-            quantized_pixels.append(quantized)
-        
-        # 统计颜色频率
-        color_counts = {}
-        for color in quantized_pixels:
-            color_counts[color] = color_counts.get(color, 0) + 1
-        
-        # 按频率排序
-        sorted_colors = sorted(color_counts.items(), key=lambda x: x[1], reverse=True)
-        
-        # 返回前N个颜色
-        return [color for color, count in sorted_colors[:num_colors]]
+        """简化的主要颜色提取方法（量化到32的倍数后按频率排序）"""
+        pixel_array = np.asarray(pixels, dtype=np.uint8).reshape(-1, 3)
+        return quantized_dominant_colors(pixel_array, num_colors)
     
     def _calculate_color_harmony(self, colors: List[Tuple[int, int, int]]) -> float:
         """计算色彩和谐度"""
@@ -449,49 +421,11 @@ class VisualSOPProcessor:
     
     def _analyze_brightness_distribution(self, image: Image.Image) -> Dict[str, float]:
         """分析亮度分布"""
-        # 转换为灰度图像
-        gray = image.convert('L')
-        pixels = list(gray.getdata())
-        
-        # 计算亮度分布
-        low_count = sum(1 for p in pixels if p < 85)
-        mid_count = sum(1 for p in pixels if 85 <= p < 170)
-        high_count = sum(1 for p in pixels if p >= 170)
-        
-        total = len(pixels)
-        
-        return {
-            'low': low_count / total,
-            'mid': mid_count / total,
-            'high': high_count / total
-        }
+        return ImageFeatures(image).brightness_distribution()
     
     def _analyze_saturation_levels(self, image: Image.Image) -> Dict[str, float]:
         """分析饱和度水平"""
-        # 转换为RGB模式
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        pixels = list(image.getdata())
-        
-        saturations = []
-        # 采样以提高速度
-        for i in range(0, len(pixels), 100):
-            pixel = pixels[i]
-            hsv = colorsys.rgb_to_hsv(pixel[0]/255, pixel[1]/255, pixel[2]/255)
-            saturations.append(hsv[1])
-        
-        low_count = sum(1 for s in saturations if s < 0.3)
-        mid_count = sum(1 for s in saturations if 0.3 <= s < 0.7)
-        high_count = sum(1 for s in saturations if s >= 0.7)
-        
-        total = len(saturations)
-        
-        return {
-            'low': low_count / total,
-            'mid': mid_count / total,
-            'high': high_count / total
-        }
+        return ImageFeatures(image).saturation_levels()
     
     def _estimate_color_temperature(self, colors: List[Tuple[int, int, int]]) -> float:
         """估算色温"""
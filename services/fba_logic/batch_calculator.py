@@ -0,0 +1,417 @@
+import sys
+import os
+
+import numpy as np
+
+# 路径设置（确保可以导入 app_utils）
+current_file_path = os.path.abspath(__file__)
+services_dir = os.path.dirname(current_file_path)
+root_dir = os.path.dirname(os.path.dirname(services_dir))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+try:
+    from app_utils.fba_data.config import SIZE_TIERS, DIM_DIVISOR, STORAGE_FEES
+except ImportError as e:
+    raise ImportError(f"无法导入 FBA 配置模块: {e}. 请检查 app_utils/fba_data/config.py 文件是否存在且语法正确。")
+
+from app_utils.fba_data.unit_converter import convert_inputs
+from services.fba_logic.rate_index import RATE_INDEX
+
+# 尺寸分段编码顺序 (与 FBACalculator.get_size_tier 的判定顺序一致)
+TIER_NAMES = (
+    "Small Standard",
+    "Large Standard",
+    "Small Bulky",
+    "Medium Bulky",
+    "Large Bulky",
+    "Special Oversize",
+)
+
+# 商品类型 (category 列的合法取值)
+PRODUCT_CLASSES = ("Standard", "Apparel", "Dangerous")
+
+# 价格段 (FULFILLMENT_FEES 第二层键)
+PRICE_BANDS = ("Under_10", "Price_10_50", "Over_50")
+
+# 输出列顺序 (与 FBACalculator.calculate_total_cost 的结果逐项对应)
+RESULT_COLUMNS = (
+    "size_tier",
+    "billable_weight",
+    "fulfillment_fee",
+    "storage_fee",
+    "low_inventory_fee",
+    "total",
+)
+
+# 附加标记列：该行的 (季节, 价格段, 类型) 在费率配置中不存在。
+# 与 FBACalculator 相同，这些行的配送费为 0，size_tier 为错误信息。
+FLAG_COLUMNS = (
+    "rate_missing",
+)
+
+# 季节参数映射：与 FBACalculator.calculate_fulfillment_fee 保持一致
+SEASON_MAPPING = {
+    "Jan-Sep": "Off-Peak",
+    "Oct-Dec": "Peak"
+}
+
+
+def _as_array(value, size, dtype=float):
+    """把标量或序列统一广播成长度为 size 的一维数组"""
+    arr = np.asarray(value, dtype=dtype)
+    if arr.ndim == 0:
+        return np.full(size, arr.item(), dtype=dtype)
+    return arr.reshape(-1)
+
+
+class FBABatchCalculator:
+    """
+    FBACalculator 的向量化版本：一次处理整个 SKU 目录。
+
+    所有尺寸/重量参数均为等长数组 (inch / lb)，计算规则与 FBACalculator
+    逐条保持一致，输出结果逐项相同。与 FBACalculator 一样，category 只做
+    记录，商品类型由 is_apparel / is_dangerous 参数决定。
+    """
+
+    def __init__(self, length, width, height, weight_lb, category="Standard"):
+        self.l = np.asarray(length, dtype=float).reshape(-1)
+        self.size = self.l.shape[0]
+        self.w = _as_array(width, self.size)
+        self.h = _as_array(height, self.size)
+        self.weight = _as_array(weight_lb, self.size)
+        self.category = _as_array(category, self.size, dtype=object)
+
+        # 排序边长 (长 > 宽 > 高)
+        dims = np.sort(np.stack([self.l, self.w, self.h], axis=1), axis=1)[:, ::-1]
+        self.longest, self.median, self.shortest = dims[:, 0], dims[:, 1], dims[:, 2]
+        self.girth_len = self.longest + 2 * (self.median + self.shortest)
+        self.volume_ft3 = (self.l * self.w * self.h) / 1728  # 转化为立方英尺
+
+    def get_dim_weight(self):
+        """计算体积重"""
+        return (self.l * self.w * self.h) / DIM_DIVISOR
+
+    def get_billable_weight(self):
+        """计费重量：实重与体积重取较大值"""
+        return np.maximum(self.weight, self.get_dim_weight())
+
+    def get_size_tier_codes(self):
+        """
+        判定尺寸分段，返回 TIER_NAMES 中的下标数组。
+        从最大分段开始逐级覆盖，最终每行保留满足条件的最小分段。
+        """
+        billable_weight = self.get_billable_weight()
+        codes = np.full(self.size, TIER_NAMES.index("Special Oversize"), dtype=np.int8)
+
+        lb = SIZE_TIERS["Large Bulky"]
+        mask = (billable_weight <= lb["max_weight"]) & (self.girth_len <= lb["length_girth"])
+        codes[mask] = TIER_NAMES.index("Large Bulky")
+
+        for name in ("Medium Bulky", "Small Bulky"):
+            t = SIZE_TIERS[name]
+            mask = ((billable_weight <= t["max_weight"]) &
+                    (self.longest <= t["max_longest"]) &
+                    (self.median <= t["max_median"]) &
+                    (self.shortest <= t["max_shortest"]) &
+                    (self.girth_len <= t["length_girth"]))
+            codes[mask] = TIER_NAMES.index(name)
+
+        ls = SIZE_TIERS["Large Standard"]
+        mask = ((billable_weight <= ls["max_weight"]) &
+                (self.longest <= ls["max_longest"]) &
+                (self.median <= ls["max_median"]) &
+                (self.shortest <= ls["max_shortest"]))
+        codes[mask] = TIER_NAMES.index("Large Standard")
+
+        # Small Standard 按实重判断 (与 FBACalculator 一致)
+        ss = SIZE_TIERS["Small Standard"]
+        mask = ((self.weight <= ss["max_weight"]) &
+                (self.longest <= ss["max_longest"]) &
+                (self.median <= ss["max_median"]) &
+                (self.shortest <= ss["max_shortest"]))
+        codes[mask] = TIER_NAMES.index("Small Standard")
+
+        return codes
+
+    def get_size_tier(self):
+        """判定尺寸分段，返回分段名称数组"""
+        return np.asarray(TIER_NAMES, dtype=object)[self.get_size_tier_codes()]
+
+    def _resolve_product_class(self, is_apparel, is_dangerous):
+        """确定每行的商品类型 (PRODUCT_CLASSES 下标)，危险品优先于服装"""
+        apparel = _as_array(is_apparel, self.size, dtype=bool)
+        dangerous = _as_array(is_dangerous, self.size, dtype=bool)
+
+        class_codes = np.zeros(self.size, dtype=np.int8)
+        class_codes[apparel] = PRODUCT_CLASSES.index("Apparel")
+        class_codes[dangerous] = PRODUCT_CLASSES.index("Dangerous")
+        return class_codes
+
+    def _resolve_price_band(self, price, fulfillment_season):
+        """确定每行的价格段 (PRICE_BANDS 下标)"""
+        band_codes = np.full(self.size, PRICE_BANDS.index("Price_10_50"), dtype=np.int8)
+        band_codes[price < 10] = PRICE_BANDS.index("Under_10")
+        if RATE_INDEX.has_price_band(fulfillment_season, "Over_50"):
+            band_codes[price > 50] = PRICE_BANDS.index("Over_50")
+        return band_codes
+
+    def calculate_fulfillment_fee(self, price=None, is_apparel=False, is_dangerous=False, season="Off-Peak"):
+        """
+        计算基础配送费 (向量化)
+        返回 (fee 数组, 计费重量数组, 尺寸分段数组)。
+        price 为 None 或某行为 NaN 时，该行使用旧版默认费率表 (Price_10_50 / Standard)。
+        费率路径缺失的行配送费为 0，尺寸分段为错误信息 (与 FBACalculator 相同)。
+        """
+        fees, billable_weight, tiers, _ = self._fulfillment_fee(price, is_apparel, is_dangerous, season)
+        return fees, billable_weight, tiers
+
+    def _fulfillment_fee(self, price, is_apparel, is_dangerous, season):
+        """calculate_fulfillment_fee 的实现，额外返回费率路径缺失的行掩码"""
+        tier_codes = self.get_size_tier_codes()
+        billable_weight = self.get_billable_weight()
+        fulfillment_season = SEASON_MAPPING.get(season, season)
+
+        price = _as_array(np.nan if price is None else price, self.size)
+        legacy = np.isnan(price)
+        band_codes = self._resolve_price_band(price, fulfillment_season)
+        class_codes = self._resolve_product_class(is_apparel, is_dangerous)
+        band_codes[legacy] = PRICE_BANDS.index("Price_10_50")
+        class_codes[legacy] = PRODUCT_CLASSES.index("Standard")
+
+        # 按 (价格段, 类型, 分段, 是否旧逻辑) 组合成整数分组键，每组一次性查表
+        group_keys = ((band_codes.astype(np.int32) * len(PRODUCT_CLASSES) + class_codes) * len(TIER_NAMES) + tier_codes) * 2 + legacy
+        fees = np.zeros(self.size, dtype=float)
+        tiers = np.asarray(TIER_NAMES, dtype=object)[tier_codes]
+        rate_missing = np.zeros(self.size, dtype=bool)
+
+        for key in np.unique(group_keys):
+            rows = np.nonzero(group_keys == key)[0]
+            rest, is_legacy = divmod(int(key), 2)
+            rest, tier_code = divmod(rest, len(TIER_NAMES))
+            band_code, class_code = divmod(rest, len(PRODUCT_CLASSES))
+            price_band, prod_type, tier = PRICE_BANDS[band_code], PRODUCT_CLASSES[class_code], TIER_NAMES[tier_code]
+            if not is_legacy and not RATE_INDEX.has_path(fulfillment_season, price_band, prod_type):
+                # 与 FBACalculator 相同：费用为 0，尺寸分段位置返回错误信息
+                rate_missing[rows] = True
+                tiers[rows] = f"未找到费率配置: {fulfillment_season}-{price_band}-{prod_type}-{tier} (KeyError)"
+                continue
+            rate_card = RATE_INDEX.get(fulfillment_season, price_band, prod_type, tier)
+            fees[rows] = _apply_rate_card(rate_card, billable_weight[rows], legacy=bool(is_legacy))
+
+        return fees, billable_weight, tiers, rate_missing
+
+    def calculate_total_cost(self, season="Jan-Sep", low_inv_days=None, price=None, is_apparel=False, is_dangerous=False):
+        """高级计算：包含仓储和附加费 (向量化，返回 RESULT_COLUMNS + FLAG_COLUMNS 的列字典)"""
+        fba_fee, billable_weight, tiers, rate_missing = self._fulfillment_fee(
+            price, is_apparel, is_dangerous, season
+        )
+
+        # 1. 仓储费 (与 FBACalculator 相同，按分段名称是否含 "Standard" 判断)
+        is_standard = np.array(["Standard" in tier for tier in tiers], dtype=bool)
+        storage_rate = np.where(is_standard, STORAGE_FEES[season]["Standard"], STORAGE_FEES[season]["Oversize"])
+        storage_fee = self.volume_ft3 * storage_rate
+
+        # 2. 低库存费 (与 FBACalculator 相同的简化逻辑)
+        low_inv_fee = np.zeros(self.size, dtype=float)
+        if low_inv_days is not None:
+            days = _as_array(low_inv_days, self.size)
+            low_inv_fee[(days != 0) & (days < 28)] = 0.32
+
+        return {
+            "size_tier": tiers,
+            "billable_weight": billable_weight,
+            "fulfillment_fee": fba_fee,
+            "storage_fee": storage_fee,
+            "low_inventory_fee": low_inv_fee,
+            "total": fba_fee + storage_fee + low_inv_fee,
+            "rate_missing": rate_missing
+        }
+
+
+def _apply_rate_card(rate_card, billable_weight, legacy=False):
+    """
+    对一组计费重量匹配重量档位 (rate_card 为 RATE_INDEX 中的已编译费率卡)。
+    档位上限已是前缀最大值，找到第一个"上限重量"大于等于计费重量的档位可直接二分。
+    legacy=True 时复现 FBACalculator 无价格分支的行为 (只认 fee 字段)。
+    """
+    fees = np.zeros(billable_weight.shape[0], dtype=float)
+    if not len(rate_card):
+        return fees
+
+    brackets = rate_card.brackets
+    bracket_index = np.searchsorted(np.asarray(rate_card.max_weights, dtype=float), billable_weight, side="left")
+    overflow = bracket_index >= len(brackets)
+
+    for i, bracket in enumerate(brackets):
+        rows = bracket_index == i
+        if not rows.any():
+            continue
+        if "fee" in bracket:
+            fees[rows] = bracket["fee"]
+        elif "formula" in bracket and not legacy:
+            fees[rows] = _apply_formula(bracket["formula"], billable_weight[rows], strict=False)
+
+    # 超过所有档位的最大值：沿用最后一个档位的规则
+    if overflow.any():
+        last_bracket = brackets[-1]
+        if "formula" in last_bracket and not legacy:
+            fees[overflow] = _apply_formula(last_bracket["formula"], billable_weight[overflow], strict=True)
+        else:
+            fees[overflow] = last_bracket.get("fee", 0)
+
+    return fees
+
+
+def _apply_formula(f, billable_weight, strict):
+    """公式档位：起步价 + 向上取整的续重单位费用"""
+    excess_weight = billable_weight - f["base_weight"]
+    fees = f["base_fee"] + np.ceil(excess_weight / f["unit_step"]) * f["unit_fee"]
+    if strict:
+        return fees
+    return np.where(billable_weight > f["base_weight"], fees, float(f["base_fee"]))
+
+
+def category_flags(category):
+    """把目录文件的 category 取值转换成 FBACalculator 的 (is_apparel, is_dangerous) 参数"""
+    category = np.asarray(category, dtype=object)
+    return category == "Apparel", category == "Dangerous"
+
+
+def calculate_catalog(length, width, height, weight_lb, price=None, category="Standard",
+                      season="Jan-Sep", low_inv_days=None, is_apparel=False, is_dangerous=False):
+    """
+    一次向量化计算整个目录的费用，返回 RESULT_COLUMNS + FLAG_COLUMNS 对应的列字典。
+    与 FBACalculator 一样，category 不影响费用；商品类型由 is_apparel / is_dangerous 决定。
+    """
+    calc = FBABatchCalculator(length, width, height, weight_lb, category=category)
+    return calc.calculate_total_cost(
+        season=season,
+        low_inv_days=low_inv_days,
+        price=price,
+        is_apparel=is_apparel,
+        is_dangerous=is_dangerous
+    )
+
+
+# 目录文件的必需列
+REQUIRED_COLUMNS = ("length", "width", "height", "weight")
+
+EXCEL_SUFFIXES = (".xlsx", ".xlsm")
+PARQUET_SUFFIXES = (".parquet", ".pq")
+
+
+def detect_file_format(source):
+    """根据文件名后缀判断目录文件格式 (csv / excel / parquet)"""
+    name = str(getattr(source, "name", source)).lower()
+    if name.endswith(PARQUET_SUFFIXES):
+        return "parquet"
+    if name.endswith(EXCEL_SUFFIXES):
+        return "excel"
+    return "csv"
+
+
+def iter_catalog_chunks(source, chunksize=50000, file_format=None):
+    """
+    按块读取 CSV / Excel / Parquet 目录文件，每次产出一个 pandas.DataFrame。
+    任一时刻内存中只保留一个块。
+    """
+    import pandas as pd
+
+    if file_format is None:
+        file_format = detect_file_format(source)
+
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(source)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    elif file_format == "excel":
+        yield from _iter_excel_chunks(source, chunksize)
+    else:
+        yield from pd.read_csv(source, chunksize=chunksize)
+
+
+def _iter_excel_chunks(source, chunksize):
+    """openpyxl 只读模式逐行读取第一个工作表"""
+    import pandas as pd
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise ImportError(f"读取 Excel 需要安装 openpyxl: {e}")
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+        buffer = []
+        for row in rows:
+            if all(cell is None for cell in row):
+                continue
+            buffer.append(row[:len(header)])
+            if len(buffer) >= chunksize:
+                yield pd.DataFrame(buffer, columns=header)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header)
+    finally:
+        workbook.close()
+
+
+def iter_catalog_file(source, chunksize=50000, season="Jan-Sep", file_format=None,
+                      column_map=None, low_inv_days=None, unit_type="inch/lb", default_price=None):
+    """
+    流式读取目录文件，按块计算费用。
+
+    每次产出一个 pandas.DataFrame：原始列 + RESULT_COLUMNS。
+    必需列：length, width, height, weight；可选列：price, category, low_inv_days。
+    category 列 (Standard / Apparel / Dangerous) 对应单个商品模式的服装 / 危险品勾选项。
+    column_map 可将文件中的列名映射到上述标准列名。
+    """
+    for chunk in iter_catalog_chunks(source, chunksize=chunksize, file_format=file_format):
+        if column_map:
+            chunk = chunk.rename(columns=column_map)
+        yield append_fee_columns(chunk, season=season, low_inv_days=low_inv_days,
+                                 unit_type=unit_type, default_price=default_price)
+
+
+def append_fee_columns(frame, season="Jan-Sep", low_inv_days=None, unit_type="inch/lb", default_price=None):
+    """
+    为一个 DataFrame 块追加费用结果列。
+    尺寸/重量先经过 convert_inputs 统一成 inch / lb。
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"目录文件缺少必需列: {', '.join(missing)}")
+
+    if "price" in frame.columns:
+        price = frame["price"].to_numpy(dtype=float)
+        if default_price is not None:
+            price = np.where(np.isnan(price), default_price, price)
+    else:
+        price = default_price
+    category = frame["category"].fillna("Standard").to_numpy(dtype=object) if "category" in frame.columns else "Standard"
+    is_apparel, is_dangerous = category_flags(category)
+    if "low_inv_days" in frame.columns:
+        low_inv_days = frame["low_inv_days"].fillna(0).to_numpy(dtype=float)
+
+    length, width, height, weight = convert_inputs(
+        frame["length"].to_numpy(dtype=float),
+        frame["width"].to_numpy(dtype=float),
+        frame["height"].to_numpy(dtype=float),
+        frame["weight"].to_numpy(dtype=float),
+        unit_type
+    )
+    result = calculate_catalog(
+        length, width, height, weight,
+        price=price,
+        category=category,
+        season=season,
+        low_inv_days=low_inv_days,
+        is_apparel=is_apparel,
+        is_dangerous=is_dangerous
+    )
+    frame = frame.copy()
+    for column in RESULT_COLUMNS + FLAG_COLUMNS:
+        frame[column] = result[column]
+    return frame
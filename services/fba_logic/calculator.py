@@ -11,10 +11,13 @@ if root_dir not in sys.path:
 
 # 引入第一步建立的数据
 try:
-    from app_utils.fba_data.config import SIZE_TIERS, DIM_DIVISOR, FULFILLMENT_FEES, STORAGE_FEES, LOW_INVENTORY_FEES
+    from app_utils.fba_data.config import SIZE_TIERS, DIM_DIVISOR, STORAGE_FEES, LOW_INVENTORY_FEES
 except ImportError as e:
     raise ImportError(f"无法导入 FBA 配置模块: {e}. 请检查 app_utils/fba_data/config.py 文件是否存在且语法正确。")
 
+# 费率卡已编译索引 (导入时加载，config.py 变化时自动重建)
+from services.fba_logic.rate_index import RATE_INDEX
+
 class FBACalculator:
     def __init__(self, length, width, height, weight_lb, category="Standard"):
         self.l = float(length)
@@ -125,24 +128,17 @@ class FBACalculator:
         
         # 如果没有提供价格，使用默认逻辑（旧版本兼容）
         if price is None:
-            # 使用默认费率表查找
-            try:
-                rate_card = FULFILLMENT_FEES.get(fulfillment_season, {}).get("Price_10_50", {}).get("Standard", {}).get(tier, [])
-            except (KeyError, AttributeError):
-                return 0, billable_weight, tier
+            # 使用默认费率表查找 (已编译索引，二分定位档位)
+            rate_card = RATE_INDEX.get(fulfillment_season, "Price_10_50", "Standard", tier)
             
             final_fee = 0
-            found_bracket = False
-            
-            for bracket in rate_card:
-                if billable_weight <= bracket.get("max_weight", float('inf')):
-                    found_bracket = True
-                    if "fee" in bracket:
-                        final_fee = bracket["fee"]
-                    break
+            _, bracket = rate_card.find_bracket(billable_weight)
             
-            if not found_bracket and rate_card:
-                final_fee = rate_card[-1].get("fee", 0)
+            if bracket is not None:
+                if "fee" in bracket:
+                    final_fee = bracket["fee"]
+            elif len(rate_card):
+                final_fee = rate_card.brackets[-1].get("fee", 0)
             
             return final_fee, billable_weight, tier
         
@@ -151,7 +147,7 @@ class FBACalculator:
             price_tier = "Under_10"
         elif price > 50:
             # 如果配置里没填 Over_50，通常默认使用 Price_10_50 的费率
-            price_tier = "Over_50" if "Over_50" in FULFILLMENT_FEES.get(fulfillment_season, {}).keys() else "Price_10_50"
+            price_tier = "Over_50" if RATE_INDEX.has_price_band(fulfillment_season, "Over_50") else "Price_10_50"
         else:
             price_tier = "Price_10_50"
             
@@ -163,56 +159,49 @@ class FBACalculator:
         else:
             prod_type = "Standard"
             
-        # 3. 逐层查找费率表
-        # 路径: 季节 -> 价格段 -> 类型 -> 尺寸
-        try:
-            rate_card = FULFILLMENT_FEES[fulfillment_season][price_tier][prod_type].get(tier, [])
-        except KeyError as e:
+        # 3. 查找已编译的费率卡
+        # 键: (季节, 价格段, 类型, 尺寸)
+        if not RATE_INDEX.has_path(fulfillment_season, price_tier, prod_type):
             # 如果找不到具体的 key，尝试回退到标准逻辑或报错
-            error_msg = f"未找到费率配置: {fulfillment_season}-{price_tier}-{prod_type}-{tier} (KeyError: {str(e)})"
+            error_msg = f"未找到费率配置: {fulfillment_season}-{price_tier}-{prod_type}-{tier} (KeyError)"
             return 0, billable_weight, error_msg
+        rate_card = RATE_INDEX.get(fulfillment_season, price_tier, prod_type, tier)
             
-        # 4. 匹配重量档位
+        # 4. 匹配重量档位：二分找到第一个"上限重量"大于等于"当前计费重量"的档位
         final_fee = 0
-        found_bracket = False
+        _, bracket = rate_card.find_bracket(billable_weight)
         
-        for bracket in rate_card:
-            # 找到第一个"上限重量"大于等于"当前计费重量"的档位
-            if billable_weight <= bracket["max_weight"]:
-                found_bracket = True
-                
-                # 情况 A: 简单固定费率 (Old logic)
-                if "fee" in bracket:
-                    final_fee = bracket["fee"]
+        if bracket is not None:
+            # 情况 A: 简单固定费率 (Old logic)
+            if "fee" in bracket:
+                final_fee = bracket["fee"]
+            
+            # 情况 B: 复杂公式计算 (New logic)
+            elif "formula" in bracket:
+                f = bracket["formula"]
+                base_fee = f["base_fee"]
+                base_weight = f["base_weight"]
+                unit_fee = f["unit_fee"]
+                unit_step = f["unit_step"]
                 
-                # 情况 B: 复杂公式计算 (New logic)
-                elif "formula" in bracket:
-                    f = bracket["formula"]
-                    base_fee = f["base_fee"]
-                    base_weight = f["base_weight"]
-                    unit_fee = f["unit_fee"]
-                    unit_step = f["unit_step"]
+                # 只有当重量超过起步重时才计算增量
+                if billable_weight > base_weight:
+                    # 计算超出的重量
+                    excess_weight = billable_weight - base_weight
                     
-                    # 只有当重量超过起步重时才计算增量
-                    if billable_weight > base_weight:
-                        # 计算超出的重量
-                        excess_weight = billable_weight - base_weight
-                        
-                        # 计算有多少个计费单位 (比如每 4oz 一个单位，即 0.25lb)
-                        # 亚马逊规则通常是"向上取整"：不足4oz按4oz算
-                        units = math.ceil(excess_weight / unit_step)
-                        
-                        final_fee = base_fee + (units * unit_fee)
-                    else:
-                        # 如果虽然落在这个档位，但重量没超过起步重 (极少见，但逻辑上要闭环)
-                        final_fee = base_fee
-                
-                break # 找到后立即停止循环
+                    # 计算有多少个计费单位 (比如每 4oz 一个单位，即 0.25lb)
+                    # 亚马逊规则通常是"向上取整"：不足4oz按4oz算
+                    units = math.ceil(excess_weight / unit_step)
+                    
+                    final_fee = base_fee + (units * unit_fee)
+                else:
+                    # 如果虽然落在这个档位，但重量没超过起步重 (极少见，但逻辑上要闭环)
+                    final_fee = base_fee
         
         # 5. 如果超过了所有档位的最大值 (Over max_weight)
-        if not found_bracket and rate_card:
+        elif len(rate_card):
             # 取最后一个档位的规则继续算，通常超大件的最后一个档位 max_weight 会设得很大
-            last_bracket = rate_card[-1]
+            last_bracket = rate_card.brackets[-1]
             if "formula" in last_bracket:
                 # 复用上面的公式逻辑
                 f = last_bracket["formula"]
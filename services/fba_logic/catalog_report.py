@@ -0,0 +1,121 @@
+import glob
+import gzip
+import io
+import os
+import tempfile
+import time
+import weakref
+
+# 报表文件名前缀 / 后缀 (用于清理遗留的临时文件)
+REPORT_PREFIX = "fba_report_"
+REPORT_SUFFIX = ".csv.gz"
+
+# 压缩后报表大小上限：超过后不再写入后续行 (汇总仍覆盖全部行)
+REPORT_MAX_BYTES = 50 * 1024 * 1024
+
+# 超过该时长的遗留报表在下次计算时清理 (会话异常结束时的兜底)
+REPORT_MAX_AGE_SECONDS = 6 * 3600
+
+# 报表汇总的费用列
+FEE_COLUMNS = ("fulfillment_fee", "storage_fee", "low_inventory_fee", "total")
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def sweep_stale_reports(directory=None, max_age_seconds=REPORT_MAX_AGE_SECONDS):
+    """删除超过 max_age_seconds 未修改的遗留报表，返回删除数量"""
+    directory = directory or tempfile.gettempdir()
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for path in glob.glob(os.path.join(directory, f"{REPORT_PREFIX}*{REPORT_SUFFIX}")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+class CatalogReport:
+    """
+    批量目录计算的结果报表。
+
+    结果块逐个以 gzip 压缩的 CSV 追加写入临时文件，内存中只保留行数、
+    分段计数、费用合计和前几行预览。压缩后的文件超过 max_bytes 时停止
+    写入后续行 (最多超出一个块)，并标记 truncated，因此下载时读入内存的
+    数据量有上限。
+
+    临时文件在 remove() 时删除；对象被回收 (例如 Streamlit 会话结束、
+    session_state 被释放) 时也会自动删除。
+    """
+
+    def __init__(self, source_name, max_bytes=REPORT_MAX_BYTES, preview_rows=200, directory=None):
+        fd, self.path = tempfile.mkstemp(prefix=REPORT_PREFIX, suffix=REPORT_SUFFIX, dir=directory)
+        self._finalizer = weakref.finalize(self, _remove_file, self.path)
+
+        self.file_name = f"{os.path.splitext(os.path.basename(source_name))[0]}_fba_fees{REPORT_SUFFIX}"
+        self.max_bytes = max_bytes
+        self.preview_rows = preview_rows
+        self.rows = 0
+        self.written_rows = 0
+        self.truncated = False
+        self.rate_missing = 0
+        self.tier_counts = {}
+        self.fee_totals = {column: 0.0 for column in FEE_COLUMNS}
+        self.preview = None
+        self.params = None
+
+        self._raw = os.fdopen(fd, "wb")
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        self._text = io.TextIOWrapper(self._gzip, encoding="utf-8-sig", newline="")
+
+    def add_chunk(self, chunk):
+        """合并一个结果块 (append_fee_columns 的输出) 到汇总，并在上限内写入报表"""
+        self.rows += len(chunk)
+        if "rate_missing" in chunk.columns:
+            self.rate_missing += int(chunk["rate_missing"].sum())
+        for tier, count in chunk["size_tier"].value_counts().items():
+            self.tier_counts[tier] = self.tier_counts.get(tier, 0) + int(count)
+        for column in FEE_COLUMNS:
+            self.fee_totals[column] += float(chunk[column].sum())
+        if self.preview is None:
+            self.preview = chunk.head(self.preview_rows)
+
+        if self.truncated or self._text is None:
+            return
+        chunk.to_csv(self._text, header=self.written_rows == 0, index=False)
+        self.written_rows += len(chunk)
+        self._text.flush()
+        if self._raw.tell() >= self.max_bytes:
+            self.truncated = True
+
+    def close(self):
+        """结束写入 (写出 gzip 尾部)；可重复调用"""
+        if self._text is not None:
+            self._text.close()
+            self._raw.close()
+            self._text = None
+
+    def size(self):
+        """报表文件的字节数"""
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def read_bytes(self):
+        """读取压缩后的报表 (大小不超过 max_bytes 加一个块)"""
+        self.close()
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def remove(self):
+        """关闭并删除临时文件"""
+        self.close()
+        self._finalizer()
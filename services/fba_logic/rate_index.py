@@ -0,0 +1,172 @@
+import bisect
+import hashlib
+import json
+import os
+import sys
+
+# 路径设置（确保可以导入 app_utils）
+current_file_path = os.path.abspath(__file__)
+services_dir = os.path.dirname(current_file_path)
+root_dir = os.path.dirname(os.path.dirname(services_dir))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+try:
+    from app_utils.fba_data import config as fba_config
+except ImportError as e:
+    raise ImportError(f"无法导入 FBA 配置模块: {e}. 请检查 app_utils/fba_data/config.py 文件是否存在且语法正确。")
+
+# 编译格式版本：结构变化时递增，旧缓存自动失效
+INDEX_FORMAT_VERSION = 1
+
+# 磁盘缓存位置 (与 config.py 同目录)
+CONFIG_PATH = os.path.abspath(fba_config.__file__)
+CACHE_PATH = os.path.join(os.path.dirname(CONFIG_PATH), ".rate_index.json")
+
+
+class RateCard:
+    """
+    一个 (季节, 价格段, 商品类型, 尺寸分段) 的已编译费率卡。
+
+    max_weights 为各档位上限的前缀最大值 (单调不减)，
+    因此"第一个上限 >= 计费重量的档位"可以直接二分查找。
+    """
+
+    __slots__ = ("max_weights", "brackets")
+
+    def __init__(self, max_weights, brackets):
+        self.max_weights = max_weights
+        self.brackets = brackets
+
+    def __len__(self):
+        return len(self.brackets)
+
+    def find_bracket(self, billable_weight):
+        """返回 (档位下标, 档位)；超过所有档位时返回 (None, None)"""
+        index = bisect.bisect_left(self.max_weights, billable_weight)
+        if index >= len(self.brackets):
+            return None, None
+        return index, self.brackets[index]
+
+
+def _config_fingerprint():
+    """config.py 内容哈希，用于判断缓存是否过期"""
+    with open(CONFIG_PATH, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def compile_rate_cards(fulfillment_fees=None):
+    """
+    将嵌套的 FULFILLMENT_FEES 编译成扁平表：
+    {(season, price_band, product_class, tier): RateCard}
+    """
+    if fulfillment_fees is None:
+        fulfillment_fees = fba_config.FULFILLMENT_FEES
+
+    cards = {}
+    for season, bands in fulfillment_fees.items():
+        for price_band, classes in (bands or {}).items():
+            for prod_type, tiers in (classes or {}).items():
+                for tier, brackets in (tiers or {}).items():
+                    brackets = tuple(brackets or ())
+                    max_weights = []
+                    running_max = float('-inf')
+                    for bracket in brackets:
+                        running_max = max(running_max, bracket.get("max_weight", float('inf')))
+                        max_weights.append(running_max)
+                    cards[(season, price_band, prod_type, tier)] = RateCard(tuple(max_weights), brackets)
+    return cards
+
+
+class RateCardIndex:
+    """
+    FULFILLMENT_FEES 的查找索引。
+
+    导入时编译一次，并以 JSON 形式缓存到磁盘；
+    只有 config.py 内容发生变化时才重新编译。
+    """
+
+    def __init__(self, cache_path=CACHE_PATH):
+        self.cache_path = cache_path
+        self.cards = None
+        self.rate_paths = None
+        self.price_bands = None
+        self.fingerprint = None
+        self.load()
+
+    def load(self):
+        """加载磁盘缓存；缓存缺失或过期时重新编译"""
+        self.fingerprint = _config_fingerprint()
+        cached = self._read_cache()
+        if cached is not None:
+            self.cards = cached
+        else:
+            self.cards = compile_rate_cards()
+            self._write_cache()
+        # (季节, 价格段, 商品类型) 路径集合，用于区分"路径不存在"与"分段无费率"
+        self.rate_paths = set()
+        self.price_bands = set()
+        for season, bands in fba_config.FULFILLMENT_FEES.items():
+            for price_band, classes in (bands or {}).items():
+                self.price_bands.add((season, price_band))
+                for prod_type in (classes or {}):
+                    self.rate_paths.add((season, price_band, prod_type))
+
+    def _read_cache(self):
+        # 导入时执行，任何读取或格式错误都只退回重新编译，不能让模块导入失败
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            if (not isinstance(payload, dict) or
+                    payload.get("version") != INDEX_FORMAT_VERSION or
+                    payload.get("fingerprint") != self.fingerprint):
+                return None
+            cards = {}
+            for season, price_band, prod_type, tier, max_weights, brackets in payload["cards"]:
+                cards[(season, price_band, prod_type, tier)] = RateCard(
+                    tuple(float(weight) for weight in max_weights),
+                    tuple(dict(bracket) for bracket in brackets)
+                )
+            return cards
+        except Exception:
+            return None
+
+    def _write_cache(self):
+        payload = {
+            "version": INDEX_FORMAT_VERSION,
+            "fingerprint": self.fingerprint,
+            # JSON 对象的键只能是字符串，费率卡按 [季节, 价格段, 类型, 分段, 上限, 档位] 存成列表
+            "cards": [
+                [*key, list(card.max_weights), list(card.brackets)]
+                for key, card in self.cards.items()
+            ]
+        }
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except (OSError, TypeError, ValueError):
+            # 只读文件系统等情况下仅使用内存索引
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def has_path(self, season, price_band, prod_type):
+        """季节 -> 价格段 -> 类型 这一路径是否存在于配置中"""
+        return (season, price_band, prod_type) in self.rate_paths
+
+    def has_price_band(self, season, price_band):
+        """该季节下是否配置了此价格段"""
+        return (season, price_band) in self.price_bands
+
+    def get(self, season, price_band, prod_type, tier):
+        """取得费率卡；不存在时返回空卡"""
+        return self.cards.get((season, price_band, prod_type, tier), EMPTY_RATE_CARD)
+
+
+EMPTY_RATE_CARD = RateCard((), ())
+
+# 模块级单例：导入时编译 / 加载
+RATE_INDEX = RateCardIndex()
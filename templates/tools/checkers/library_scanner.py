@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+模板库扫描引擎
+按模板目录并行执行检查任务，并按目录指纹缓存结果，只重新计算发生变化的模板
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 缓存格式版本：结构变化时递增，旧缓存自动失效
+SCAN_CACHE_VERSION = 1
+
+# 少于该数量的待计算模板直接在当前进程执行 (进程池启动开销更大)
+MIN_PARALLEL_TEMPLATES = 4
+
+
+def list_template_dirs(templates_root: Path) -> List[Path]:
+    """列出模板库中的全部模板目录 (分类目录/模板目录，跳过 config)
+
+    Args:
+        templates_root: 模板库根目录
+
+    Returns:
+        模板目录列表 (按路径排序)
+    """
+    template_dirs = []
+    for category_dir in sorted(templates_root.iterdir()):
+        if category_dir.is_dir() and category_dir.name != "config" and not category_dir.name.startswith("."):
+            for template_dir in sorted(category_dir.iterdir()):
+                if template_dir.is_dir():
+                    template_dirs.append(template_dir)
+    return template_dirs
+
+
+def directory_fingerprint(template_dir: Path) -> str:
+    """计算模板目录指纹
+
+    只使用 stat 信息 (相对路径、大小、mtime)，不读取文件内容；
+    任一文件或子目录增删改都会改变指纹。
+
+    Args:
+        template_dir: 模板目录
+
+    Returns:
+        十六进制指纹
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    root = os.path.abspath(template_dir)
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names.sort()
+        rel_dir = os.path.relpath(dir_path, root)
+        hasher.update(f"D{rel_dir}\0".encode("utf-8", "surrogateescape"))
+        for file_name in sorted(file_names):
+            try:
+                stat_result = os.stat(os.path.join(dir_path, file_name))
+            except OSError:
+                continue
+            hasher.update(
+                f"F{file_name}\0{stat_result.st_size}\0{stat_result.st_mtime_ns}\0".encode("utf-8", "surrogateescape")
+            )
+    return hasher.hexdigest()
+
+
+class LibraryScanner:
+    """模板库扫描引擎
+
+    对每个模板目录执行 task(template_dir) 并返回 {模板路径: 结果}。
+    结果按 (任务名, 模板路径) 缓存在模板库根目录的 .<任务名>_scan_cache.json 中，
+    目录指纹不变的模板直接复用缓存；其余模板分发到进程池并行计算。
+    task 必须是可 pickle 的模块级函数，结果必须是可 JSON 序列化的数据
+    (dict/list/str/数字)，由调用方转换回自己的数据类。
+    """
+
+    def __init__(self, templates_root: Path, max_workers: Optional[int] = None, use_cache: bool = True):
+        """初始化扫描引擎
+
+        Args:
+            templates_root: 模板库根目录
+            max_workers: 进程池大小 (默认 CPU 核数，1 表示串行)
+            use_cache: 是否使用结果缓存
+        """
+        self.templates_root = Path(templates_root)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.use_cache = use_cache
+
+        # 最近一次扫描的统计
+        self.last_scan_stats: Dict[str, int] = {}
+
+    def cache_path(self, task_name: str) -> Path:
+        """任务结果缓存文件路径"""
+        return self.templates_root / f".{task_name}_scan_cache.json"
+
+    def scan(self, task_name: str, task: Callable[[str], Any], task_version: str = "1",
+             template_dirs: Optional[List[Path]] = None,
+             progress_callback: Optional[Callable[[int, int, str], None]] = None) -> Dict[str, Any]:
+        """扫描模板库
+
+        Args:
+            task_name: 任务名 (决定缓存文件)
+            task: 模块级函数，参数为模板目录路径字符串
+            task_version: 任务版本，检查逻辑变化时修改以使缓存失效
+            template_dirs: 要扫描的模板目录 (默认为整个模板库)
+            progress_callback: 进度回调 (当前序号, 总数, 模板名)
+
+        Returns:
+            {模板路径: 任务结果}；执行失败的模板不包含在内
+        """
+        full_scan = template_dirs is None
+        if full_scan:
+            template_dirs = list_template_dirs(self.templates_root)
+
+        cached = self._load_cache(task_name, task_version) if self.use_cache else {}
+        entries: Dict[str, Tuple[str, Any]] = {}
+        pending: List[Tuple[str, str]] = []
+
+        for template_dir in template_dirs:
+            key = str(template_dir)
+            fingerprint = directory_fingerprint(template_dir)
+            entry = cached.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                entries[key] = entry
+            else:
+                pending.append((key, fingerprint))
+
+        total = len(template_dirs)
+        done = len(entries)
+        if progress_callback and done:
+            progress_callback(done, total, "")
+
+        for key, fingerprint, result in self._run(task, pending):
+            done += 1
+            if progress_callback:
+                progress_callback(done, total, Path(key).name)
+            if result is not None:
+                entries[key] = (fingerprint, result)
+
+        self.last_scan_stats = {
+            "templates": total,
+            "cached": total - len(pending),
+            "computed": len(pending)
+        }
+
+        if self.use_cache:
+            if full_scan:
+                # 全库扫描时顺带清除已删除模板的缓存
+                if pending or len(entries) != len(cached):
+                    self._save_cache(task_name, task_version, entries)
+            elif pending:
+                # 部分扫描只合并本次结果
+                self._save_cache(task_name, task_version, {**cached, **entries})
+
+        return {str(template_dir): entries[str(template_dir)][1]
+                for template_dir in template_dirs if str(template_dir) in entries}
+
+    def _run(self, task: Callable[[str], Any], pending: List[Tuple[str, str]]):
+        """执行待计算的模板，逐个产出 (模板路径, 指纹, 结果)；失败的结果为 None"""
+        if len(pending) < MIN_PARALLEL_TEMPLATES or self.max_workers <= 1:
+            for key, fingerprint in pending:
+                yield key, fingerprint, _call_task(task, key)
+            return
+
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(pending))) as executor:
+            futures = {executor.submit(_call_task, task, key): (key, fingerprint) for key, fingerprint in pending}
+            for future in as_completed(futures):
+                key, fingerprint = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # 结果无法回传 (如不可 pickle) 等进程池错误
+                    print(f"扫描模板失败 {key}: {e}")
+                    result = None
+                yield key, fingerprint, result
+
+    def _load_cache(self, task_name: str, task_version: str) -> Dict[str, Tuple[str, Any]]:
+        """加载任务缓存；缺失、损坏或版本不一致时返回空缓存"""
+        try:
+            with open(self.cache_path(task_name), "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if (not isinstance(payload, dict) or
+                payload.get("version") != SCAN_CACHE_VERSION or
+                payload.get("task_version") != task_version):
+            return {}
+        entries = payload.get("entries")
+        if not isinstance(entries, dict):
+            return {}
+        # JSON 没有元组，(指纹, 结果) 以二元列表保存
+        return {key: (entry[0], entry[1]) for key, entry in entries.items()
+                if isinstance(entry, list) and len(entry) == 2}
+
+    def _save_cache(self, task_name: str, task_version: str, entries: Dict[str, Tuple[str, Any]]):
+        """写回任务缓存 (原子替换)"""
+        payload = {
+            "version": SCAN_CACHE_VERSION,
+            "task_version": task_version,
+            "entries": entries
+        }
+        cache_path = self.cache_path(task_name)
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, cache_path)
+        except (OSError, TypeError, ValueError):
+            # 只读目录等情况下不缓存
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def clear_cache(self, task_name: str):
+        """删除任务缓存"""
+        try:
+            self.cache_path(task_name).unlink()
+        except OSError:
+            pass
+
+
+def _call_task(task: Callable[[str], Any], template_dir: str) -> Any:
+    """执行单个模板任务，异常时打印并返回 None"""
+    try:
+        return task(template_dir)
+    except Exception as e:
+        print(f"扫描模板失败 {template_dir}: {e}")
+        return None
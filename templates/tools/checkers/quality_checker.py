@@ -9,7 +9,7 @@ import sys
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from enum import Enum
 import click
 from rich.console import Console
@@ -22,9 +22,13 @@ from validators.structure_validator import StructureValidator
 from validators.config_validator import ConfigValidator
 from validators.image_validator import ImageValidator
 from models.validation import ValidationResult, ValidationError, ValidationLevel, ValidationCategory
+from checkers.library_scanner import LibraryScanner
 
 console = Console()
 
+# 质量检查任务版本：检查规则变化时递增，使模板库扫描缓存失效
+QUALITY_SCAN_VERSION = "1"
+
 
 class QualityLevel(Enum):
     """质量等级"""
@@ -236,39 +240,26 @@ class QualityChecker:
             fix_suggestions=fix_suggestions
         )
     
-    def check_templates_batch(self, templates_root: Path, progress_callback=None) -> Dict[str, QualityReport]:
+    def check_templates_batch(self, templates_root: Path, progress_callback=None,
+                              max_workers: Optional[int] = None, use_cache: bool = True) -> Dict[str, QualityReport]:
         """批量检查模板质量
         
+        模板目录分发到进程池并行检查；目录指纹 (文件路径/大小/mtime) 未变化的模板
+        直接复用上次的报告。
+        
         Args:
             templates_root: 模板根目录
             progress_callback: 进度回调函数
+            max_workers: 并行进程数 (默认 CPU 核数)
+            use_cache: 是否复用未变化模板的检查结果
             
         Returns:
             {模板路径: 质量报告}
         """
-        reports = {}
-        
-        # 查找所有模板目录
-        template_dirs = []
-        for category_dir in templates_root.iterdir():
-            if category_dir.is_dir() and category_dir.name != "config":
-                for template_dir in category_dir.iterdir():
-                    if template_dir.is_dir():
-                        template_dirs.append(template_dir)
-        
-        total_templates = len(template_dirs)
-        
-        for i, template_dir in enumerate(template_dirs):
-            if progress_callback:
-                progress_callback(i, total_templates, template_dir.name)
-            
-            try:
-                report = self.check_template_quality(template_dir)
-                reports[str(template_dir)] = report
-            except Exception as e:
-                console.print(f"[red]检查模板 {template_dir} 时发生错误: {e}[/red]")
-        
-        return reports
+        scanner = LibraryScanner(templates_root, max_workers=max_workers, use_cache=use_cache)
+        results = scanner.scan("quality", _check_template_task, QUALITY_SCAN_VERSION,
+                               progress_callback=progress_callback)
+        return {path: _report_from_data(data) for path, data in results.items()}
     
     def _check_completeness(self, template_path: Path) -> Tuple[float, List[ValidationError]]:
         """检查模板完整性"""
@@ -633,6 +624,76 @@ class QualityChecker:
         }
 
 
+# 进程池中复用的检查器实例
+_worker_checker: Optional[QualityChecker] = None
+
+
+def _check_template_task(template_dir: str) -> Dict[str, Any]:
+    """模板库扫描任务：检查单个模板，返回可 JSON 序列化的报告数据"""
+    global _worker_checker
+    if _worker_checker is None:
+        _worker_checker = QualityChecker()
+    return _report_to_data(_worker_checker.check_template_quality(Path(template_dir)))
+
+
+def _report_to_data(report: QualityReport) -> Dict[str, Any]:
+    """质量报告 -> 扫描缓存数据 (完整保留验证错误，可无损还原)"""
+    result = report.validation_result
+    metrics = asdict(report.metrics)
+    metrics["quality_level"] = report.metrics.quality_level.value
+    return {
+        "template_path": report.template_path,
+        "template_id": report.template_id,
+        "template_name": report.template_name,
+        "metrics": metrics,
+        "validation_result": {
+            "is_valid": result.is_valid,
+            "errors": [error.to_dict() for error in result.errors],
+            "warnings": [warning.to_dict() for warning in result.warnings],
+            "info": [info.to_dict() for info in result.info],
+            "total_checks": result.total_checks,
+            "passed_checks": result.passed_checks,
+            "failed_checks": result.failed_checks,
+            "validation_time": result.validation_time.isoformat(),
+            "duration_ms": result.duration_ms
+        },
+        "fix_suggestions": [suggestion.to_dict() for suggestion in report.fix_suggestions],
+        "generated_at": report.generated_at.isoformat(),
+        "checker_version": report.checker_version
+    }
+
+
+def _report_from_data(data: Dict[str, Any]) -> QualityReport:
+    """扫描缓存数据 -> 质量报告"""
+    result = data["validation_result"]
+    metrics = dict(data["metrics"], quality_level=QualityLevel(data["metrics"]["quality_level"]))
+    return QualityReport(
+        template_path=data["template_path"],
+        template_id=data["template_id"],
+        template_name=data["template_name"],
+        metrics=QualityMetrics(**metrics),
+        validation_result=ValidationResult(
+            is_valid=result["is_valid"],
+            errors=[ValidationError(**error) for error in result["errors"]],
+            warnings=[ValidationError(**warning) for warning in result["warnings"]],
+            info=[ValidationError(**info) for info in result["info"]],
+            total_checks=result["total_checks"],
+            passed_checks=result["passed_checks"],
+            failed_checks=result["failed_checks"],
+            validation_time=datetime.fromisoformat(result["validation_time"]),
+            duration_ms=result["duration_ms"]
+        ),
+        fix_suggestions=[
+            FixSuggestion(**dict(suggestion,
+                                 severity=ValidationLevel(suggestion["severity"]),
+                                 category=ValidationCategory(suggestion["category"])))
+            for suggestion in data["fix_suggestions"]
+        ],
+        generated_at=datetime.fromisoformat(data["generated_at"]),
+        checker_version=data["checker_version"]
+    )
+
+
 @click.command()
 @click.argument('paths', nargs=-1, type=click.Path(exists=True, path_type=Path))
 @click.option('--output', '-o', type=click.Path(path_type=Path), help='输出报告文件路径')
@@ -640,8 +701,11 @@ class QualityChecker:
 @click.option('--detailed', '-d', is_flag=True, help='显示详细检查结果')
 @click.option('--summary-only', '-s', is_flag=True, help='只显示摘要统计')
 @click.option('--min-score', type=float, help='最低质量分数过滤')
+@click.option('--jobs', '-j', type=int, default=None, help='批量检查的并行进程数 (默认CPU核数)')
+@click.option('--no-cache', is_flag=True, help='忽略缓存，重新检查所有模板')
 def main(paths: tuple[Path, ...], output: Optional[Path], format: str, 
-         detailed: bool, summary_only: bool, min_score: Optional[float]):
+         detailed: bool, summary_only: bool, min_score: Optional[float],
+         jobs: Optional[int], no_cache: bool):
     """模板质量检查工具
     
     PATHS: 要检查的模板目录或模板库根目录
@@ -662,7 +726,8 @@ def main(paths: tuple[Path, ...], output: Optional[Path], format: str,
                 def progress_callback(current, total, template_name):
                     progress.update(task, completed=current, total=total, description=f"检查 {template_name}")
                 
-                reports = checker.check_templates_batch(path, progress_callback)
+                reports = checker.check_templates_batch(path, progress_callback,
+                                                        max_workers=jobs, use_cache=not no_cache)
                 all_reports.update(reports)
                 
             else:
@@ -10,7 +10,7 @@ import csv
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from collections import defaultdict, Counter
 import click
 from rich.console import Console
@@ -19,8 +19,14 @@ from rich.progress import Progress
 from rich.panel import Panel
 from rich.columns import Columns
 
+sys.path.append(str(Path(__file__).parent.parent))
+from checkers.library_scanner import LibraryScanner
+
 console = Console()
 
+# 统计任务版本：统计字段变化时递增，使模板库扫描缓存失效
+STATISTICS_SCAN_VERSION = "1"
+
 
 @dataclass
 class TemplateStats:
@@ -112,8 +118,15 @@ class LibraryStats:
 class StatisticsReporter:
     """统计报告生成器"""
     
-    def __init__(self):
-        """初始化统计报告生成器"""
+    def __init__(self, max_workers: Optional[int] = None, use_cache: bool = True):
+        """初始化统计报告生成器
+        
+        Args:
+            max_workers: 扫描模板库的并行进程数 (默认CPU核数)
+            use_cache: 是否复用未变化模板的统计结果
+        """
+        self.max_workers = max_workers
+        self.use_cache = use_cache
         self.quality_levels = {
             "excellent": (90, 100),
             "good": (80, 89),
@@ -177,6 +190,25 @@ class StatisticsReporter:
             updated_at=updated_at
         )
     
+    def collect_templates_statistics(self, templates_root: Path, template_dirs: Optional[List[Path]] = None,
+                                     progress_callback=None) -> Dict[str, TemplateStats]:
+        """并行收集多个模板的统计信息 (目录未变化的模板复用缓存)
+        
+        Args:
+            templates_root: 模板库根目录
+            template_dirs: 要统计的模板目录 (默认为整个模板库)
+            progress_callback: 进度回调 (当前序号, 总数, 模板名)
+            
+        Returns:
+            {模板路径: 模板统计信息}
+        """
+        scanner = LibraryScanner(templates_root, max_workers=self.max_workers, use_cache=self.use_cache)
+        results = scanner.scan("statistics", _collect_template_task, STATISTICS_SCAN_VERSION,
+                               template_dirs=template_dirs, progress_callback=progress_callback)
+        
+        # 重新构造数据类，派生字段 (days_since_update) 按当前日期计算
+        return {path: TemplateStats(**data) for path, data in results.items()}
+    
     def collect_library_statistics(self, templates_root: Path, include_quality: bool = False) -> LibraryStats:
         """收集整个模板库的统计信息
         
@@ -191,51 +223,39 @@ class StatisticsReporter:
         template_stats_list = []
         category_stats = {}
         
-        # 遍历所有模板
+        # 并行收集所有模板
         with Progress() as progress:
-            # 先统计总数
-            total_templates = sum(1 for category_dir in templates_root.iterdir() 
-                                if category_dir.is_dir() and category_dir.name != "config"
-                                for template_dir in category_dir.iterdir() 
-                                if template_dir.is_dir())
+            task = progress.add_task("收集统计信息", total=None)
             
-            task = progress.add_task("收集统计信息", total=total_templates)
+            def progress_callback(current, total, template_name):
+                progress.update(task, completed=current, total=total)
             
-            for category_dir in templates_root.iterdir():
-                if category_dir.is_dir() and category_dir.name != "config":
-                    category_name = category_dir.name
-                    
-                    for template_dir in category_dir.iterdir():
-                        if template_dir.is_dir():
-                            try:
-                                template_stats = self.collect_template_statistics(template_dir)
-                                template_stats_list.append(template_stats)
-                                
-                                # 更新分类统计
-                                if category_name not in category_stats:
-                                    category_stats[category_name] = CategoryStats(category_name)
-                                
-                                cat_stats = category_stats[category_name]
-                                cat_stats.template_count += 1
-                                cat_stats.total_size_mb += template_stats.total_size_mb
-                                
-                                # 更新状态分布
-                                status = template_stats.status
-                                cat_stats.status_distribution[status] = cat_stats.status_distribution.get(status, 0) + 1
-                                
-                                # 更新质量分布
-                                quality_level = self._get_quality_level(template_stats.quality_score)
-                                cat_stats.quality_distribution[quality_level] = cat_stats.quality_distribution.get(quality_level, 0) + 1
-                                
-                                # 更新最新时间
-                                if template_stats.updated_at:
-                                    if not cat_stats.latest_update or template_stats.updated_at > cat_stats.latest_update:
-                                        cat_stats.latest_update = template_stats.updated_at
-                                
-                                progress.update(task, advance=1)
-                                
-                            except Exception as e:
-                                console.print(f"[yellow]警告: 处理模板 {template_dir} 时出错: {e}[/yellow]")
+            all_stats = self.collect_templates_statistics(templates_root, progress_callback=progress_callback)
+        
+        for template_path, template_stats in all_stats.items():
+            category_name = Path(template_path).parent.name
+            template_stats_list.append(template_stats)
+            
+            # 更新分类统计
+            if category_name not in category_stats:
+                category_stats[category_name] = CategoryStats(category_name)
+            
+            cat_stats = category_stats[category_name]
+            cat_stats.template_count += 1
+            cat_stats.total_size_mb += template_stats.total_size_mb
+            
+            # 更新状态分布
+            status = template_stats.status
+            cat_stats.status_distribution[status] = cat_stats.status_distribution.get(status, 0) + 1
+            
+            # 更新质量分布
+            quality_level = self._get_quality_level(template_stats.quality_score)
+            cat_stats.quality_distribution[quality_level] = cat_stats.quality_distribution.get(quality_level, 0) + 1
+            
+            # 更新最新时间
+            if template_stats.updated_at:
+                if not cat_stats.latest_update or template_stats.updated_at > cat_stats.latest_update:
+                    cat_stats.latest_update = template_stats.updated_at
         
         # 计算整体统计
         library_stats.total_templates = len(template_stats_list)
@@ -298,15 +318,8 @@ class StatisticsReporter:
         if not category_dir.exists():
             return f"分类不存在: {category}"
         
-        template_stats_list = []
-        
-        for template_dir in category_dir.iterdir():
-            if template_dir.is_dir():
-                try:
-                    template_stats = self.collect_template_statistics(template_dir)
-                    template_stats_list.append(template_stats)
-                except Exception as e:
-                    console.print(f"[yellow]警告: 处理模板 {template_dir} 时出错: {e}[/yellow]")
+        template_dirs = sorted(template_dir for template_dir in category_dir.iterdir() if template_dir.is_dir())
+        template_stats_list = list(self.collect_templates_statistics(templates_root, template_dirs).values())
         
         return self._generate_category_table_report(category, template_stats_list)
     
@@ -395,32 +408,23 @@ class StatisticsReporter:
         output_lines.append(",".join(headers))
         
         # 收集所有模板数据
-        for category_dir in templates_root.iterdir():
-            if category_dir.is_dir() and category_dir.name != "config":
-                for template_dir in category_dir.iterdir():
-                    if template_dir.is_dir():
-                        try:
-                            template_stats = self.collect_template_statistics(template_dir)
-                            
-                            row = [
-                                template_stats.template_id,
-                                template_stats.template_name,
-                                template_stats.category,
-                                template_stats.status,
-                                template_stats.version,
-                                str(template_stats.total_files),
-                                str(template_stats.image_files),
-                                str(template_stats.config_files),
-                                str(template_stats.doc_files),
-                                str(template_stats.total_size_mb),
-                                str(template_stats.quality_score),
-                                template_stats.created_at or "",
-                                template_stats.updated_at or ""
-                            ]
-                            output_lines.append(",".join(f'"{item}"' for item in row))
-                            
-                        except Exception as e:
-                            console.print(f"[yellow]警告: 处理模板 {template_dir} 时出错: {e}[/yellow]")
+        for template_stats in self.collect_templates_statistics(templates_root).values():
+            row = [
+                template_stats.template_id,
+                template_stats.template_name,
+                template_stats.category,
+                template_stats.status,
+                template_stats.version,
+                str(template_stats.total_files),
+                str(template_stats.image_files),
+                str(template_stats.config_files),
+                str(template_stats.doc_files),
+                str(template_stats.total_size_mb),
+                str(template_stats.quality_score),
+                template_stats.created_at or "",
+                template_stats.updated_at or ""
+            ]
+            output_lines.append(",".join(f'"{item}"' for item in row))
         
         return "\n".join(output_lines)
     
@@ -558,6 +562,11 @@ class StatisticsReporter:
         return f"分类 {category} 报告已显示"
 
 
+def _collect_template_task(template_dir: str) -> Dict[str, Any]:
+    """模板库扫描任务：收集单个模板的统计信息，返回可 JSON 序列化的字段字典"""
+    return asdict(StatisticsReporter().collect_template_statistics(Path(template_dir)))
+
+
 @click.command()
 @click.argument('paths', nargs=-1, type=click.Path(exists=True, path_type=Path))
 @click.option('--output', '-o', type=click.Path(path_type=Path), help='输出文件路径')
@@ -565,8 +574,10 @@ class StatisticsReporter:
               default='table', help='输出格式')
 @click.option('--category', '-c', help='指定分类生成报告')
 @click.option('--export-csv', is_flag=True, help='导出CSV格式数据')
+@click.option('--jobs', '-j', type=int, default=None, help='并行进程数 (默认CPU核数)')
+@click.option('--no-cache', is_flag=True, help='忽略缓存，重新统计所有模板')
 def main(paths: tuple[Path, ...], output: Optional[Path], format: str, 
-         category: Optional[str], export_csv: bool):
+         category: Optional[str], export_csv: bool, jobs: Optional[int], no_cache: bool):
     """统计报告生成工具
     
     PATHS: 模板库根目录路径
@@ -575,7 +586,7 @@ def main(paths: tuple[Path, ...], output: Optional[Path], format: str,
         console.print("[red]错误: 请指定模板库根目录路径[/red]")
         sys.exit(1)
     
-    reporter = StatisticsReporter()
+    reporter = StatisticsReporter(max_workers=jobs, use_cache=not no_cache)
     
     for path in paths:
         if category:
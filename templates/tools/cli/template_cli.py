@@ -2,14 +2,20 @@
 """
 模板库管理CLI工具
 提供模板创建、管理、验证等功能的命令行接口
+
+各命令的依赖 (生成器、管理器、验证器、检查器等) 在命令内部导入，
+避免 list/search 等轻量命令在启动时加载 PIL 等重量级模块。
 """
 
+from __future__ import annotations
+
 import sys
 import json
+import time
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, TYPE_CHECKING
 import click
 from rich.console import Console
 from rich.table import Table
@@ -25,23 +31,15 @@ try:
     
     # 导入配置
     from config import (
-        TEMPLATES_ROOT, TEMPLATES_BY_CATEGORY, TEMPLATES_CONFIG, 
-        TEMPLATES_INDEX, get_template_path, ensure_directories
+        TEMPLATES_ROOT, TEMPLATES_CONFIG, TEMPLATES_INDEX, 
+        TEMPLATE_REGISTRY, get_template_path, ensure_directories
     )
     
-    from generators.template_generator import TemplateGenerator
-    from managers.config_manager import ConfigManager
-    from managers.version_controller import VersionController
-    from managers.migration_tool import MigrationTool, MigrationFilter, MigrationMode, ConflictResolution
-    from validators.structure_validator import StructureValidator
-    from validators.config_validator import ConfigValidator
-    from validators.image_validator import ImageValidator
-    from checkers.quality_checker import QualityChecker
-    from checkers.documentation_generator import DocumentationGenerator
-    from checkers.statistics_reporter import StatisticsReporter
-    from models.template import TemplateType, TemplateStatus
-    from models.search import SearchQuery, SearchOperator, SortField, SortOrder
-    from models.operations import BatchOperation, OperationType
+    # 仅用于类型注解
+    if TYPE_CHECKING:
+        from managers.config_manager import ConfigManager
+        from models.search import SearchQuery, SortField, SortOrder
+        from models.operations import BatchOperation
     
     # 确保目录存在
     ensure_directories()
@@ -87,6 +85,10 @@ def create(name: Optional[str], template_id: Optional[str], category: Optional[s
            interactive: bool, dry_run: bool):
     """创建新模板"""
     try:
+        from generators.template_generator import TemplateGenerator
+        from managers.config_manager import ConfigManager
+        from models.template import TemplateType
+        
         # 使用配置中的模板根目录
         if not TEMPLATES_ROOT.exists():
             console.print("[red]错误: 模板根目录不存在[/red]")
@@ -192,6 +194,8 @@ def list_templates(category: Optional[str], status: Optional[str], template_type
                   filters: tuple):
     """列出模板"""
     try:
+        from models.search import SearchQuery, SortField, SortOrder
+        
         # 获取模板根目录
         templates_root = Path("templates")
         if not templates_root.exists():
@@ -201,8 +205,8 @@ def list_templates(category: Optional[str], status: Optional[str], template_type
         # 构建搜索查询
         query = SearchQuery(
             page_size=limit,
-            sort_by=SortField(sort_by.upper()),
-            sort_order=SortOrder(sort_order.upper())
+            sort_by=SortField(sort_by),
+            sort_order=SortOrder(sort_order)
         )
         
         # 添加过滤条件
@@ -255,6 +259,8 @@ def search(query: str, category: Optional[str], tags: Optional[str],
           format: str, fuzzy: bool, case_sensitive: bool):
     """搜索模板"""
     try:
+        from models.search import SearchQuery, SortField
+        
         # 获取模板根目录
         templates_root = Path("templates")
         if not templates_root.exists():
@@ -460,17 +466,31 @@ def find_similar(template_id: str, limit: int):
 
 
 @cli.command()
-@click.argument('template_name')
+@click.argument('template_name', required=False)
 @click.option('--verbose', '-v', is_flag=True, help='显示详细信息')
 @click.option('--validate-structure', is_flag=True, default=True, help='验证目录结构')
 @click.option('--validate-config', is_flag=True, default=True, help='验证配置文件')
 @click.option('--validate-images', is_flag=True, default=True, help='验证图片尺寸')
 @click.option('--auto-fix', is_flag=True, help='自动修复可修复的问题')
-@click.option('--batch', is_flag=True, help='批量验证所有模板')
-def validate(template_name: str, verbose: bool, validate_structure: bool, 
-            validate_config: bool, validate_images: bool, auto_fix: bool, batch: bool):
+@click.option('--batch', '--all', 'batch', is_flag=True, help='批量验证所有模板')
+@click.option('--jobs', '-j', type=int, default=None, help='批量验证的并行进程数 (默认CPU核数)')
+@click.option('--format', '-f', 'output_format', type=click.Choice(['text', 'json']), default='text',
+              help='批量验证的输出格式')
+@click.option('--output', '-o', type=click.Path(path_type=Path), help='批量验证报告 (JSON) 输出文件')
+def validate(template_name: Optional[str], verbose: bool, validate_structure: bool, 
+            validate_config: bool, validate_images: bool, auto_fix: bool, batch: bool,
+            jobs: Optional[int], output_format: str, output: Optional[Path]):
     """验证模板"""
+    if not batch and not template_name:
+        console.print("[red]错误: 请指定模板名称，或使用 --all 批量验证所有模板[/red]")
+        sys.exit(1)
+    
     try:
+        from validators.structure_validator import StructureValidator
+        from validators.config_validator import ConfigValidator
+        from validators.image_validator import ImageValidator
+        from validators.image_probe import ImageProbeCache
+        
         # 获取模板根目录
         templates_root = Path("templates")
         if not templates_root.exists():
@@ -484,9 +504,10 @@ def validate(template_name: str, verbose: bool, validate_structure: bool,
         
         if batch:
             # 批量验证所有模板
-            _batch_validate_templates(templates_root, structure_validator, config_validator, 
-                                     image_validator, validate_structure, validate_config, 
-                                     validate_images, verbose)
+            invalid_count = _batch_validate_templates(templates_root, validate_structure, validate_config,
+                                                      validate_images, verbose, jobs, output_format, output)
+            if invalid_count:
+                sys.exit(1)
         else:
             # 验证单个模板
             template_path = _find_template_path(templates_root, template_name)
@@ -500,6 +521,8 @@ def validate(template_name: str, verbose: bool, validate_structure: bool,
             
             all_valid = True
             all_errors = []
+            # 配置验证和图片验证共享图片探测结果，每个图片文件只打开一次
+            image_probes = ImageProbeCache(decode=True) if validate_images else None
             
             # 结构验证
             if validate_structure:
@@ -535,7 +558,7 @@ def validate(template_name: str, verbose: bool, validate_structure: bool,
                     task = progress.add_task("验证配置文件...", total=None)
                     
                     config_path = template_path / "template.json"
-                    is_valid, errors = config_validator.validate_config(config_path)
+                    is_valid, errors = config_validator.validate_config(config_path, image_probes)
                     
                     if is_valid:
                         progress.update(task, description="[green]✓ 配置文件验证通过[/green]")
@@ -557,7 +580,7 @@ def validate(template_name: str, verbose: bool, validate_structure: bool,
                 ) as progress:
                     task = progress.add_task("验证图片尺寸...", total=None)
                     
-                    image_results = image_validator.validate_template_images(template_path)
+                    image_results = image_validator.validate_template_images(template_path, image_probes)
                     
                     image_errors = []
                     for img_path, (is_valid, errors) in image_results.items():
@@ -693,6 +716,9 @@ def batch(operation: str, targets: Optional[str], filters: tuple, to_category: O
           status: Optional[str], dry_run: bool, confirm: bool):
     """批量操作模板"""
     try:
+        from models.search import SearchQuery
+        from models.operations import BatchOperation, OperationType
+        
         templates_root = Path("templates")
         if not templates_root.exists():
             console.print("[red]错误: 模板根目录不存在[/red]")
@@ -958,6 +984,8 @@ def _calculate_relevance(template_data: Dict[str, Any], query: SearchQuery) -> f
 
 def _sort_templates(templates: List[Dict[str, Any]], sort_by: SortField, sort_order: SortOrder) -> List[Dict[str, Any]]:
     """排序模板"""
+    from models.search import SortField, SortOrder
+    
     reverse = sort_order == SortOrder.DESC
     
     if sort_by == SortField.NAME:
@@ -1101,85 +1129,101 @@ def _find_template_path(templates_root: Path, template_name: str) -> Optional[Pa
     return None
 
 
-def _batch_validate_templates(templates_root: Path, structure_validator, config_validator, 
-                             image_validator, validate_structure: bool, validate_config: bool, 
-                             validate_images: bool, verbose: bool):
-    """批量验证所有模板"""
+def _batch_validate_templates(templates_root: Path, validate_structure: bool, validate_config: bool,
+                              validate_images: bool, verbose: bool, jobs: Optional[int] = None,
+                              output_format: str = 'text', output: Optional[Path] = None) -> int:
+    """批量验证所有模板
+    
+    模板分发到进程池并行验证，文本格式下按完成顺序逐个输出结果；
+    JSON 格式输出按模板路径排序的完整报告，供 CI 使用。
+    
+    Returns:
+        无效模板数量
+    """
+    from validators.validation_pipeline import ValidationPipeline
+    
     by_category_dir = templates_root / "by_category"
+    json_output = output_format == 'json'
     
     if not by_category_dir.exists():
-        console.print("[red]错误: 模板分类目录不存在[/red]")
-        return
+        # 无法验证任何模板，CI 中必须失败
+        if json_output:
+            click.echo(json.dumps({"error": f"模板分类目录不存在: {by_category_dir}"}, ensure_ascii=False), err=True)
+        else:
+            console.print("[red]错误: 模板分类目录不存在[/red]")
+        sys.exit(1)
     
     all_templates = []
-    for category_dir in by_category_dir.iterdir():
+    for category_dir in sorted(by_category_dir.iterdir()):
         if category_dir.is_dir():
-            for template_dir in category_dir.iterdir():
+            for template_dir in sorted(category_dir.iterdir()):
                 if template_dir.is_dir():
                     all_templates.append(template_dir)
     
     if not all_templates:
-        console.print("[yellow]没有找到模板[/yellow]")
-        return
-    
-    console.print(f"[green]批量验证 {len(all_templates)} 个模板[/green]\n")
+        if not json_output:
+            console.print("[yellow]没有找到模板[/yellow]")
     
-    valid_count = 0
-    invalid_count = 0
+    pipeline = ValidationPipeline(validate_structure, validate_config, validate_images, max_workers=jobs)
+    results = []
+    start_time = time.perf_counter()
     
-    with Progress(console=console) as progress:
-        task = progress.add_task("验证模板...", total=len(all_templates))
+    if json_output:
+        results = pipeline.validate_all(all_templates)
+    elif all_templates:
+        console.print(f"[green]批量验证 {len(all_templates)} 个模板[/green]\n")
         
-        for template_dir in all_templates:
-            template_name = template_dir.name
-            all_valid = True
-            all_errors = []
+        with Progress(console=console) as progress:
+            task = progress.add_task("验证模板...", total=len(all_templates))
             
-            # 结构验证
-            if validate_structure:
-                is_valid, errors = structure_validator.validate_template_directory(
-                    template_dir, validate_images=False, validate_config=False
-                )
-                if not is_valid:
-                    all_valid = False
-                    all_errors.extend(errors)
-            
-            # 配置验证
-            if validate_config:
-                config_path = template_dir / "template.json"
-                is_valid, errors = config_validator.validate_config(config_path)
-                if not is_valid:
-                    all_valid = False
-                    all_errors.extend(errors)
-            
-            # 图片验证
-            if validate_images:
-                image_results = image_validator.validate_template_images(template_dir)
-                for img_path, (is_valid, errors) in image_results.items():
-                    if not is_valid:
-                        all_valid = False
-                        all_errors.extend(errors)
-            
-            if all_valid:
-                valid_count += 1
-                if verbose:
-                    console.print(f"[green]✓[/green] {template_name}")
-            else:
-                invalid_count += 1
-                console.print(f"[red]✗[/red] {template_name} ({len(all_errors)} 个问题)")
-                if verbose:
-                    for error in all_errors[:3]:  # 只显示前3个错误
-                        console.print(f"    [red]•[/red] {error}")
-                    if len(all_errors) > 3:
-                        console.print(f"    [dim]... 还有 {len(all_errors) - 3} 个问题[/dim]")
-            
-            progress.advance(task)
+            # 按完成顺序输出结果
+            for result in pipeline.iter_validate(all_templates):
+                results.append(result)
+                all_errors = result.errors
+                
+                if result.is_valid:
+                    if verbose:
+                        console.print(f"[green]✓[/green] {result.template_name}")
+                else:
+                    console.print(f"[red]✗[/red] {result.template_name} ({len(all_errors)} 个问题)")
+                    if verbose:
+                        for error in all_errors[:3]:  # 只显示前3个错误
+                            console.print(f"    [red]•[/red] {error}")
+                        if len(all_errors) > 3:
+                            console.print(f"    [dim]... 还有 {len(all_errors) - 3} 个问题[/dim]")
+                
+                progress.advance(task)
+    
+    valid_count = sum(1 for result in results if result.is_valid)
+    invalid_count = len(results) - valid_count
+    
+    if json_output or output:
+        output_data = {
+            "summary": {
+                "total": len(results),
+                "valid": valid_count,
+                "invalid": invalid_count,
+                "jobs": pipeline.max_workers,
+                "duration_seconds": round(time.perf_counter() - start_time, 3)
+            },
+            "results": [result.to_dict() for result in sorted(results, key=lambda r: r.template_path)]
+        }
+        
+        if output:
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump(output_data, f, ensure_ascii=False, indent=2)
+            console.print(f"[green]验证报告已保存到: {output}[/green]")
+        else:
+            print(json.dumps(output_data, ensure_ascii=False, indent=2))
     
-    # 显示统计结果
-    console.print(f"\n[bold]验证完成:[/bold]")
-    console.print(f"  [green]有效模板: {valid_count}[/green]")
-    console.print(f"  [red]无效模板: {invalid_count}[/red]")
-    console.print(f"  [cyan]总计: {len(all_templates)}[/cyan]")
+    if not json_output and all_templates:
+        # 显示统计结果
+        console.print(f"\n[bold]验证完成:[/bold]")
+        console.print(f"  [green]有效模板: {valid_count}[/green]")
+        console.print(f"  [red]无效模板: {invalid_count}[/red]")
+        console.print(f"  [cyan]总计: {len(all_templates)}[/cyan]")
+    
+    return invalid_count
 
 
 def _auto_fix_issues(template_path: Path, errors: List[str]):
@@ -1435,7 +1479,7 @@ def _execute_batch_operation(templates_root: Path, batch_op: BatchOperation,
     from engines.batch_engine import BatchEngine
     
     # 创建批量操作引擎
-    batch_engine = BatchEngine(TEMPLATES_BY_CATEGORY, TEMPLATES_CONFIG)
+    batch_engine = BatchEngine(TEMPLATES_ROOT, TEMPLATES_CONFIG, TEMPLATE_REGISTRY)
     
     # 设置操作参数
     if operation == "move" and to_category:
@@ -1530,6 +1574,12 @@ def list_categories(parent: Optional[str], format: str, show_stats: bool):
             console.print_json(data=data)
         
         if show_stats:
+            # 模板数来自引用索引 (增量同步，只重新读取变化的模板配置)；
+            # 只读命令不写回索引文件
+            templates_root = Path("templates")
+            if templates_root.exists():
+                from managers.reference_manager import ReferenceManager
+                organizer = ReferenceManager(templates_root, config_root, persist_index=False).category_organizer
             stats = organizer.get_statistics()
             _display_category_stats(stats)
             
@@ -2065,6 +2115,12 @@ def _display_category_stats(stats: Dict[str, Any]):
     table.add_row("结构有效性", "✓ 有效" if stats['tree_valid'] else "✗ 无效")
     
     console.print(table)
+    
+    template_counts = {cat_id: count for cat_id, count in stats.get('template_counts', {}).items() if count}
+    if template_counts:
+        console.print("\n[bold]模板数 (含子分类):[/bold]")
+        for cat_id, count in sorted(template_counts.items(), key=lambda x: x[1], reverse=True)[:10]:
+            console.print(f"  {cat_id}: {count}")
 
 
 def _display_reference_stats(stats: Dict[str, Any]):
@@ -2150,6 +2206,8 @@ def quality_check(paths: tuple[Path, ...], output: Optional[Path], format: str,
             sys.exit(1)
     
     try:
+        from checkers.quality_checker import QualityChecker
+        
         checker = QualityChecker()
         all_reports = {}
         
@@ -2269,6 +2327,8 @@ def generate_docs(paths: tuple[Path, ...], output: Optional[Path], format: str,
     PATHS: 模板目录或模板库根目录路径
     """
     try:
+        from checkers.documentation_generator import DocumentationGenerator
+        
         generator = DocumentationGenerator()
         
         if type == "api":
@@ -2345,6 +2405,8 @@ def statistics_report(paths: tuple[Path, ...], output: Optional[Path], format: s
             sys.exit(1)
     
     try:
+        from checkers.statistics_reporter import StatisticsReporter
+        
         reporter = StatisticsReporter()
         
         for path in paths:
@@ -2391,6 +2453,8 @@ def fix_issues(template_path: Path, auto: bool, dry_run: bool):
     TEMPLATE_PATH: 模板目录路径
     """
     try:
+        from checkers.quality_checker import QualityChecker
+        
         checker = QualityChecker()
         
         # 检查模板质量
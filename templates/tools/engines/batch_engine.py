@@ -18,6 +18,13 @@ from ..models.operations import (
     BatchOperation, BatchResult, OperationResult, OperationType, OperationStatus
 )
 from ..models.search import SearchQuery
+from .path_index import TemplatePathIndex
+from ..performance.metrics_registry import MetricsRegistry, get_metrics_registry
+
+# 批量操作指标名 (按 operation / status 标签区分)
+BATCH_DURATION_METRIC = "template_tools_batch_duration_ms"
+BATCH_ITEM_DURATION_METRIC = "template_tools_batch_item_duration_ms"
+BATCH_ITEMS_METRIC = "template_tools_batch_items_total"
 
 
 class ProgressTracker:
@@ -81,19 +88,36 @@ class ProgressTracker:
 class BatchEngine:
     """批量操作引擎"""
     
-    def __init__(self, templates_root: Path, config_root: Path):
+    def __init__(self, templates_root: Path, config_root: Path, registry_path: Optional[Path] = None,
+                 metrics_registry: Optional[MetricsRegistry] = None):
         """初始化批量操作引擎
         
         Args:
             templates_root: 模板根目录
             config_root: 配置根目录
+            registry_path: 模板注册表路径 (默认 templates_root/index/template_registry.json)
+            metrics_registry: 指标注册表 (默认全局注册表)
         """
         self.templates_root = templates_root
         self.config_root = config_root
         
+        # 模板ID -> 路径索引
+        if registry_path is None:
+            registry_path = templates_root / "index" / "template_registry.json"
+        self.path_index = TemplatePathIndex(templates_root, registry_path)
+        
+        # 批量操作耗时与条目计数
+        self.metrics_registry = metrics_registry or get_metrics_registry()
+        self.metrics_registry.describe(BATCH_DURATION_METRIC, "整批操作耗时 (毫秒)")
+        self.metrics_registry.describe(BATCH_ITEM_DURATION_METRIC, "批量操作中单个模板的处理耗时 (毫秒)")
+        self.metrics_registry.describe(BATCH_ITEMS_METRIC, "批量操作处理的模板数")
+        
         # 操作历史
         self.operation_history: List[BatchResult] = []
         
+        # 模板变更监听器: listener(event_type, template_path)，event_type 为 created/modified/deleted
+        self._change_listeners: List[Callable[[str, Path], None]] = []
+        
         # 默认配置
         self.default_max_workers = 4
         self.default_timeout = 300
@@ -111,6 +135,7 @@ class BatchEngine:
         """
         # 创建结果对象
         batch_result = BatchResult(batch_operation=batch_op)
+        start_time = time.perf_counter()
         
         # 创建进度跟踪器
         progress_tracker = ProgressTracker(len(batch_op.targets))
@@ -149,6 +174,15 @@ class BatchEngine:
                     error_result.mark_failed(f"批量操作失败: {e}")
                     batch_result.add_result(error_result)
         
+        # 整批操作结束后统一写回路径索引
+        self.path_index.save()
+        
+        self.metrics_registry.observe(
+            BATCH_DURATION_METRIC,
+            (time.perf_counter() - start_time) * 1000,
+            {'operation': batch_op.operation_type.value, 'status': batch_result.overall_status.value}
+        )
+        
         # 添加到历史记录
         self.operation_history.append(batch_result)
         
@@ -259,6 +293,29 @@ class BatchEngine:
         
         return total_time
     
+    def add_change_listener(self, listener: Callable[[str, Path], None]):
+        """注册模板变更监听器 (如 ReferenceManager.on_template_changed)
+        
+        每个模板目录被创建、修改或删除后回调一次。
+        
+        Args:
+            listener: 回调函数 listener(event_type, template_path)
+        """
+        self._change_listeners.append(listener)
+    
+    def remove_change_listener(self, listener: Callable[[str, Path], None]):
+        """注销模板变更监听器"""
+        if listener in self._change_listeners:
+            self._change_listeners.remove(listener)
+    
+    def _notify_change(self, event_type: str, template_path: Path):
+        """通知模板变更 (监听器异常不影响批量操作结果)"""
+        for listener in list(self._change_listeners):
+            try:
+                listener(event_type, template_path)
+            except Exception as e:
+                print(f"模板变更监听器执行失败: {e}")
+    
     def get_operation_history(self, limit: int = 10) -> List[BatchResult]:
         """获取操作历史
         
@@ -307,6 +364,8 @@ class BatchEngine:
                 
                 # 删除模板目录
                 shutil.rmtree(template_path)
+                self.path_index.unregister(template_path)
+                self._notify_change('deleted', template_path)
                 
                 result.mark_success(f"成功删除模板: {template_id}")
                 
@@ -358,6 +417,11 @@ class BatchEngine:
                 if config_path.exists():
                     self._update_template_category(config_path, target_category)
                 
+                self.path_index.unregister(template_path)
+                self.path_index.register(target_path)
+                self._notify_change('deleted', template_path)
+                self._notify_change('created', target_path)
+                
                 result.mark_success(f"成功移动模板到分类: {target_category}")
                 
             except Exception as e:
@@ -412,6 +476,9 @@ class BatchEngine:
                 if config_path.exists():
                     self._update_copied_template_config(config_path, new_name, target_category)
                 
+                self.path_index.register(target_path)
+                self._notify_change('created', target_path)
+                
                 result.mark_success(f"成功复制模板: {new_name}")
                 
             except Exception as e:
@@ -472,6 +539,7 @@ class BatchEngine:
                 # 保存配置
                 with open(config_path, 'w', encoding='utf-8') as f:
                     json.dump(config_data, f, ensure_ascii=False, indent=2)
+                self._notify_change('modified', template_path)
                 
                 result.mark_success(f"成功更新字段: {', '.join(updated_fields)}")
                 
@@ -552,6 +620,8 @@ class BatchEngine:
                                   batch_result: BatchResult, progress_tracker: ProgressTracker, 
                                   max_workers: int = 1):
         """执行并行操作"""
+        operation_func = self._measure_item(operation_func, batch_result.batch_operation.operation_type.value)
+        
         if max_workers <= 1:
             # 串行执行
             for target in targets:
@@ -582,31 +652,27 @@ class BatchEngine:
                         batch_result.add_result(error_result)
                         progress_tracker.update(1, False)
     
+    def _measure_item(self, operation_func: Callable[[str], OperationResult],
+                      operation: str) -> Callable[[str], OperationResult]:
+        """包装单个模板的操作函数，记录耗时和结果计数"""
+        def measured(target: str) -> OperationResult:
+            start_time = time.perf_counter()
+            status = 'error'
+            try:
+                result = operation_func(target)
+                status = 'success' if result.success else 'failed'
+                return result
+            finally:
+                self.metrics_registry.observe(
+                    BATCH_ITEM_DURATION_METRIC, (time.perf_counter() - start_time) * 1000, {'operation': operation}
+                )
+                self.metrics_registry.inc(BATCH_ITEMS_METRIC, 1, {'operation': operation, 'status': status})
+        
+        return measured
+    
     def _find_template_path(self, template_id: str) -> Optional[Path]:
-        """查找模板路径"""
-        by_category_dir = self.templates_root / "by_category"
-        
-        if by_category_dir.exists():
-            for category_dir in by_category_dir.iterdir():
-                if category_dir.is_dir():
-                    for template_dir in category_dir.iterdir():
-                        if template_dir.is_dir():
-                            # 检查目录名
-                            if template_dir.name == template_id:
-                                return template_dir
-                            
-                            # 检查配置文件中的ID
-                            config_path = template_dir / "template.json"
-                            if config_path.exists():
-                                try:
-                                    with open(config_path, 'r', encoding='utf-8') as f:
-                                        config_data = json.load(f)
-                                        if config_data.get('id') == template_id:
-                                            return template_dir
-                                except Exception:
-                                    continue
-        
-        return None
+        """查找模板路径 (按模板ID或目录名，经由路径索引)"""
+        return self.path_index.resolve(template_id)
     
     def _update_template_category(self, config_path: Path, new_category: str):
         """更新模板分类"""
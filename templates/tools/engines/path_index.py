@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+模板路径索引
+维护 模板ID -> 模板目录 的持久化映射 (保存在 template_registry.json 中)，
+通过分类目录的修改时间检测过期，只重新扫描发生变化的分类
+"""
+
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Any
+
+
+class TemplatePathIndex:
+    """模板ID到路径的索引"""
+
+    def __init__(self, templates_root: Path, registry_path: Path):
+        """初始化路径索引
+
+        Args:
+            templates_root: 模板根目录 (包含 by_category 子目录)
+            registry_path: 注册表文件路径
+        """
+        self.templates_root = templates_root
+        self.by_category_dir = templates_root / "by_category"
+        self.registry_path = registry_path
+
+        self.lock = threading.RLock()
+        self.dirty = False
+
+        # 模板ID -> {"path": 相对路径, "category": 分类, "dir_name": 目录名}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # 目录名 -> 模板ID (兼容按目录名查找)
+        self.dir_names: Dict[str, str] = {}
+        # 相对目录 -> 修改时间 (by_category 及各分类目录)
+        self.directory_mtimes: Dict[str, float] = {}
+        # 上次保存后移除的模板ID (保存时从注册表中删掉，其余记录合并保留)
+        self.removed_ids: Set[str] = set()
+
+        self._load()
+
+    def resolve(self, template_id: str) -> Optional[Path]:
+        """查找模板目录
+
+        先检查目录修改时间并增量刷新，再查映射；映射中的路径
+        已经不存在时只重新扫描该条目所在的分类。未知ID直接返回 None，
+        不会触发全量扫描 (目录修改时间检测不到的改动，例如只修改了
+        template.json 中的 id，需要调用方显式 rebuild)。
+
+        Args:
+            template_id: 模板ID 或目录名
+
+        Returns:
+            模板目录，不存在时返回 None
+        """
+        with self.lock:
+            self.refresh()
+
+            path = self._lookup(template_id)
+            if path is None or path.is_dir():
+                return path
+
+            category = self._entry(template_id)["category"]
+            if (self.by_category_dir / category).is_dir():
+                self._scan_category(category)
+            else:
+                self._drop_category(category)
+            self.dirty = True
+
+            path = self._lookup(template_id)
+            return path if path is not None and path.is_dir() else None
+
+    def refresh(self) -> bool:
+        """检测过期并增量刷新
+
+        Returns:
+            是否发生了刷新
+        """
+        with self.lock:
+            changed = self._stale_categories()
+            if changed is None:
+                return False
+
+            current_categories = self._list_categories()
+            for category in set(self._indexed_categories()) - set(current_categories):
+                self._drop_category(category)
+            for category in changed:
+                if category in current_categories:
+                    self._scan_category(category)
+
+            self._record_mtime(self.by_category_dir)
+            self.dirty = True
+            return True
+
+    def rebuild(self):
+        """全量重建索引"""
+        with self.lock:
+            self.removed_ids.update(self.entries)
+            self.entries = {}
+            self.dir_names = {}
+            self.directory_mtimes = {}
+            for category in self._list_categories():
+                self._scan_category(category)
+            self._record_mtime(self.by_category_dir)
+            self.dirty = True
+
+    def register(self, template_path: Path):
+        """登记新建或移动后的模板目录
+
+        同时记录所在分类目录的修改时间，本进程自己的改动不会被判为过期。
+
+        Args:
+            template_path: 模板目录
+        """
+        with self.lock:
+            template_id = self._read_template_id(template_path)
+            self._remove_entry(template_id)
+            self._add_entry(template_id, template_path)
+            self._record_mtime(template_path.parent)
+            self._record_mtime(self.by_category_dir)
+            self.dirty = True
+
+    def unregister(self, template_path: Path):
+        """注销已删除或已移走的模板目录
+
+        Args:
+            template_path: 模板原来的目录
+        """
+        with self.lock:
+            relative_path = self._relative(template_path)
+            for template_id in [tid for tid, entry in self.entries.items() if entry["path"] == relative_path]:
+                self._remove_entry(template_id)
+            self._record_mtime(template_path.parent)
+            self.dirty = True
+
+    def template_ids(self) -> List[str]:
+        """全部模板ID"""
+        with self.lock:
+            self.refresh()
+            return list(self.entries.keys())
+
+    def save(self):
+        """把映射合并写回注册表
+
+        以磁盘上的注册表为准：只删除本索引移除过的模板、更新本索引
+        知道的模板，其它记录 (包括其它进程在此期间登记的模板) 和字段保持不变。
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+
+            registry = self._read_registry()
+            now = datetime.now().isoformat()
+
+            templates = dict(registry.get("templates", {}))
+            for template_id in self.removed_ids:
+                templates.pop(template_id, None)
+            for template_id, entry in self.entries.items():
+                record = dict(templates.get(template_id, {}))
+                record.update(entry)
+                templates[template_id] = record
+
+            by_category: Dict[str, int] = {}
+            for record in templates.values():
+                category = record.get("category", "")
+                by_category[category] = by_category.get(category, 0) + 1
+
+            registry["last_updated"] = now
+            registry["total_templates"] = len(templates)
+            registry["templates"] = templates
+            registry.setdefault("statistics", {})["by_category"] = by_category
+            registry["path_index"] = {
+                "updated_at": now,
+                "directory_mtimes": self.directory_mtimes
+            }
+
+            try:
+                self.registry_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.registry_path.with_suffix(".json.tmp")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(registry, f, ensure_ascii=False, indent=2)
+                tmp_path.replace(self.registry_path)
+                self.dirty = False
+                self.removed_ids.clear()
+            except Exception as e:
+                print(f"保存模板注册表失败: {e}")
+
+    def _load(self):
+        """从注册表加载映射"""
+        registry = self._read_registry()
+        path_index = registry.get("path_index", {})
+
+        for template_id, record in registry.get("templates", {}).items():
+            if "path" in record:
+                self.entries[template_id] = {
+                    "path": record["path"],
+                    "category": record.get("category", ""),
+                    "dir_name": record.get("dir_name", Path(record["path"]).name)
+                }
+                self.dir_names[self.entries[template_id]["dir_name"]] = template_id
+
+        self.directory_mtimes = dict(path_index.get("directory_mtimes", {}))
+
+    def _read_registry(self) -> Dict[str, Any]:
+        if not self.registry_path.exists():
+            return {"version": "1.0.0", "templates": {}}
+        try:
+            with open(self.registry_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"加载模板注册表失败: {e}")
+            return {"version": "1.0.0", "templates": {}}
+
+    def _entry(self, template_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(template_id)
+        if entry is None and template_id in self.dir_names:
+            entry = self.entries.get(self.dir_names[template_id])
+        return entry
+
+    def _lookup(self, template_id: str) -> Optional[Path]:
+        entry = self._entry(template_id)
+        if entry is None:
+            return None
+        return self.templates_root / entry["path"]
+
+    def _stale_categories(self) -> Optional[List[str]]:
+        """返回修改时间发生变化的分类；全部未变化时返回 None"""
+        if not self.by_category_dir.exists():
+            return [] if self.entries else None
+
+        changed = []
+        root_changed = self._mtime(self.by_category_dir) != self.directory_mtimes.get(self._relative(self.by_category_dir))
+        for category in self._list_categories():
+            category_dir = self.by_category_dir / category
+            if self._mtime(category_dir) != self.directory_mtimes.get(self._relative(category_dir)):
+                changed.append(category)
+
+        if not changed and not root_changed:
+            return None
+        return changed
+
+    def _list_categories(self) -> List[str]:
+        if not self.by_category_dir.exists():
+            return []
+        return [entry.name for entry in self.by_category_dir.iterdir() if entry.is_dir()]
+
+    def _indexed_categories(self) -> List[str]:
+        return list({entry["category"] for entry in self.entries.values()})
+
+    def _scan_category(self, category: str):
+        """重新扫描一个分类目录"""
+        self._drop_category(category)
+        category_dir = self.by_category_dir / category
+        for template_dir in category_dir.iterdir():
+            if not template_dir.is_dir():
+                continue
+            template_id = self._read_template_id(template_dir)
+            self._add_entry(template_id, template_dir)
+        self._record_mtime(category_dir)
+
+    def _drop_category(self, category: str):
+        for template_id in [tid for tid, entry in self.entries.items() if entry["category"] == category]:
+            self._remove_entry(template_id)
+        self.directory_mtimes.pop(self._relative(self.by_category_dir / category), None)
+
+    def _read_template_id(self, template_dir: Path) -> str:
+        """模板ID：优先取 template.json 中的 id，否则使用目录名"""
+        config_path = template_dir / "template.json"
+        if config_path.exists():
+            try:
+                with open(config_path, 'r', encoding='utf-8') as f:
+                    return json.load(f).get('id') or template_dir.name
+            except Exception:
+                pass
+        return template_dir.name
+
+    def _add_entry(self, template_id: str, template_path: Path):
+        self.entries[template_id] = {
+            "path": self._relative(template_path),
+            "category": template_path.parent.name,
+            "dir_name": template_path.name
+        }
+        self.dir_names[template_path.name] = template_id
+        self.removed_ids.discard(template_id)
+
+    def _remove_entry(self, template_id: str):
+        entry = self.entries.pop(template_id, None)
+        if entry is None:
+            return
+        self.removed_ids.add(template_id)
+        if self.dir_names.get(entry["dir_name"]) == template_id:
+            del self.dir_names[entry["dir_name"]]
+
+    def _record_mtime(self, directory: Path):
+        if directory.exists():
+            self.directory_mtimes[self._relative(directory)] = self._mtime(directory)
+
+    def _relative(self, path: Path) -> str:
+        try:
+            return path.relative_to(self.templates_root).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    @staticmethod
+    def _mtime(path: Path) -> Optional[float]:
+        try:
+            return path.stat().st_mtime
+        except OSError:
+            return None
@@ -11,10 +11,11 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
-import difflib
 
 from ..models.search import SearchQuery, SearchResults, SearchResult, SortField, SortOrder
 from ..models.template import Template
+from .text_index import InvertedIndex, tokenize_query
+from .suggest_index import SuggestionIndex
 
 
 @dataclass
@@ -62,9 +63,18 @@ class SearchEngine:
         # 加载索引
         self.search_index = self._load_search_index()
         
+        # 全文倒排索引 (内存中维护，随模板索引增量更新)
+        self.text_index = InvertedIndex()
+        self.text_index.build(self.search_index.templates)
+        
+        # 建议索引 (三元组近似词 + 前缀树补全，随标签/关键词/分类增量更新)
+        self.suggest_index = SuggestionIndex()
+        self._rebuild_suggest_index()
+        
         # 搜索配置
         self.fuzzy_threshold = 0.6  # 模糊匹配阈值
         self.max_suggestions = 10   # 最大建议数量
+        self.max_fuzzy_expansions = 5  # 每个查询词的模糊近似词数量
         
     def search(self, query: SearchQuery) -> SearchResults:
         """执行搜索
@@ -80,14 +90,19 @@ class SearchEngine:
         # 创建结果对象
         results = SearchResults(query=query)
         
+        # 文本匹配只做一次，候选筛选与相关性打分共用
+        text_matches = None
+        if query.query_text:
+            text_matches = self._match_text(query.query_text, query.fuzzy_search, query.case_sensitive)
+        
         # 获取候选模板
-        candidates = self._get_search_candidates(query)
+        candidates = self._get_search_candidates(query, text_matches)
         
         # 应用过滤条件
         filtered_candidates = self._apply_filters(candidates, query)
         
         # 计算相关性分数
-        scored_candidates = self._calculate_relevance_scores(filtered_candidates, query)
+        scored_candidates = self._calculate_relevance_scores(filtered_candidates, query, text_matches)
         
         # 排序
         sorted_candidates = self._sort_results(scored_candidates, query.sort_by, query.sort_order)
@@ -254,6 +269,8 @@ class SearchEngine:
             
             # 保存索引
             self.search_index = new_index
+            self.text_index.build(new_index.templates)
+            self._rebuild_suggest_index()
             self._save_search_index()
             
             return True
@@ -279,12 +296,14 @@ class SearchEngine:
             # 添加新索引
             index_data = self._create_index_entry(template_data, None)
             self.search_index.templates[template_id] = index_data
+            self.text_index.add_document(template_id, index_data)
             
             # 更新分类索引
             category = template_data.get('category', '')
             if category:
                 if category not in self.search_index.categories:
                     self.search_index.categories[category] = []
+                    self.suggest_index.add(category, "categories")
                 if template_id not in self.search_index.categories[category]:
                     self.search_index.categories[category].append(template_id)
             
@@ -292,6 +311,7 @@ class SearchEngine:
             for tag in template_data.get('tags', []):
                 if tag not in self.search_index.tags:
                     self.search_index.tags[tag] = []
+                    self.suggest_index.add(tag, "tags")
                 if template_id not in self.search_index.tags[tag]:
                     self.search_index.tags[tag].append(template_id)
             
@@ -299,6 +319,7 @@ class SearchEngine:
             for keyword in template_data.get('keywords', []):
                 if keyword not in self.search_index.keywords:
                     self.search_index.keywords[keyword] = []
+                    self.suggest_index.add(keyword, "keywords")
                 if template_id not in self.search_index.keywords[keyword]:
                     self.search_index.keywords[keyword].append(template_id)
             
@@ -343,12 +364,19 @@ class SearchEngine:
             "total_categories": len(self.search_index.categories),
             "total_tags": len(self.search_index.tags),
             "total_keywords": len(self.search_index.keywords),
+            "total_terms": len(self.text_index.postings),
             "last_updated": self.search_index.last_updated.isoformat() if self.search_index.last_updated else None,
             "index_version": self.search_index.version
         }
     
-    def _get_search_candidates(self, query: SearchQuery) -> List[Dict[str, Any]]:
-        """获取搜索候选项"""
+    def _get_search_candidates(self, query: SearchQuery,
+                               text_matches: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+        """获取搜索候选项
+        
+        Args:
+            query: 搜索查询
+            text_matches: 已计算的文本匹配结果 (为 None 时现场计算)
+        """
         if query.is_empty():
             # 返回所有模板
             return list(self.search_index.templates.values())
@@ -357,7 +385,8 @@ class SearchEngine:
         
         # 文本搜索
         if query.query_text:
-            text_matches = self._search_by_text(query.query_text, query.fuzzy_search, query.case_sensitive)
+            if text_matches is None:
+                text_matches = self._match_text(query.query_text, query.fuzzy_search, query.case_sensitive)
             candidates.update(text_matches)
         
         # 分类搜索
@@ -394,36 +423,64 @@ class SearchEngine:
         # 转换为模板数据
         return [self.search_index.templates[tid] for tid in candidates if tid in self.search_index.templates]
     
-    def _search_by_text(self, text: str, fuzzy: bool, case_sensitive: bool) -> List[str]:
-        """按文本搜索"""
-        matches = []
-        search_text = text if case_sensitive else text.lower()
+    def _match_text(self, text: str, fuzzy: bool, case_sensitive: bool = False) -> Dict[str, List[str]]:
+        """按文本匹配模板 (倒排索引)
         
-        for template_id, template_data in self.search_index.templates.items():
-            # 构建搜索内容
-            searchable_fields = [
-                template_data.get('name', ''),
-                template_data.get('description', ''),
-                ' '.join(template_data.get('tags', [])),
-                ' '.join(template_data.get('keywords', []))
-            ]
-            
-            searchable_content = ' '.join(searchable_fields)
-            if not case_sensitive:
-                searchable_content = searchable_content.lower()
-            
-            # 检查匹配
-            if fuzzy:
-                # 模糊匹配
-                similarity = difflib.SequenceMatcher(None, search_text, searchable_content).ratio()
-                if similarity >= self.fuzzy_threshold:
-                    matches.append(template_id)
-            else:
-                # 精确匹配
-                if search_text in searchable_content:
-                    matches.append(template_id)
-        
-        return matches
+        精确模式保持原有语义：查询原文是名称、描述、标签、关键词拼接文本
+        的子串 (不区分大小写时按小写比较)。倒排索引只负责筛出候选模板，
+        再逐个按原文校验。模糊模式命中任一查询词即可，并为索引中不存在的
+        查询词补充拼写相近的词项。
+        
+        Args:
+            text: 查询文本
+            fuzzy: 是否模糊匹配
+            case_sensitive: 是否区分大小写
+            
+        Returns:
+            模板ID -> 命中的索引词项列表 (用于 BM25F 打分)
+        """
+        if fuzzy:
+            matches = self.text_index.match(text, require_all=False, extra_terms=self._get_fuzzy_expansions(text))
+        else:
+            matches = self.text_index.substring_matches(text)
+            if matches is None:
+                # 查询中没有可索引的词 (如纯标点)，只能逐个校验
+                matches = {template_id: [] for template_id in self.search_index.templates}
+        
+        if fuzzy and not case_sensitive:
+            return matches
+        
+        # 索引不区分大小写且按词切分，最终按原文校验子串
+        search_text = text if case_sensitive else text.lower()
+        verified = {}
+        for template_id, terms in matches.items():
+            content = self._get_searchable_content(self.search_index.templates.get(template_id, {}))
+            if search_text in (content if case_sensitive else content.lower()):
+                verified[template_id] = terms
+        return verified
+    
+    def _get_fuzzy_expansions(self, text: str) -> Dict[str, List[str]]:
+        """为索引中没有的查询词找拼写相近的词项"""
+        expansions = {}
+        for query_term in tokenize_query(text):
+            if query_term in self.text_index.postings or self.text_index.expand_prefix(query_term):
+                continue
+            close_terms = self.text_index.similar_terms(
+                query_term, limit=self.max_fuzzy_expansions, cutoff=self.fuzzy_threshold
+            )
+            if close_terms:
+                expansions[query_term] = close_terms
+        return expansions
+    
+    def _get_searchable_content(self, template_data: Dict[str, Any]) -> str:
+        """拼接参与文本搜索的字段"""
+        searchable_fields = [
+            template_data.get('name', ''),
+            template_data.get('description', ''),
+            ' '.join(template_data.get('tags', [])),
+            ' '.join(template_data.get('keywords', []))
+        ]
+        return ' '.join(searchable_fields)
     
     def _apply_filters(self, candidates: List[Dict[str, Any]], query: SearchQuery) -> List[Dict[str, Any]]:
         """应用过滤条件"""
@@ -476,57 +533,32 @@ class SearchEngine:
         
         return filtered
     
-    def _calculate_relevance_scores(self, candidates: List[Dict[str, Any]], query: SearchQuery) -> List[Tuple[Dict[str, Any], float]]:
+    def _calculate_relevance_scores(self, candidates: List[Dict[str, Any]], query: SearchQuery,
+                                    text_matches: Optional[Dict[str, List[str]]] = None) -> List[Tuple[Dict[str, Any], float]]:
         """计算相关性分数"""
         scored = []
         
+        # 文本相关性：倒排索引上的 BM25F 分数 (字段权重见 text_index.DEFAULT_FIELD_BOOSTS)
+        text_scores = {}
+        if query.query_text:
+            if text_matches is None:
+                text_matches = self._match_text(query.query_text, query.fuzzy_search, query.case_sensitive)
+            text_scores = self.text_index.score(text_matches)
+        
         for template_data in candidates:
-            score = self._calculate_relevance_score(template_data, query)
+            text_score = text_scores.get(template_data.get('id', ''), 0.0)
+            score = self._calculate_relevance_score(template_data, query, text_score)
             scored.append((template_data, score))
         
         return scored
     
-    def _calculate_relevance_score(self, template_data: Dict[str, Any], query: SearchQuery) -> float:
+    def _calculate_relevance_score(self, template_data: Dict[str, Any], query: SearchQuery, text_score: float = 0.0) -> float:
         """计算单个模板的相关性分数"""
         if not query.query_text:
             return 1.0
         
-        score = 0.0
-        search_text = query.query_text.lower()
-        
-        # 名称匹配 (权重: 10)
-        name = template_data.get('name', '').lower()
-        if search_text in name:
-            if search_text == name:
-                score += 20.0  # 完全匹配
-            else:
-                score += 10.0  # 部分匹配
-        
-        # 描述匹配 (权重: 5)
-        description = template_data.get('description', '').lower()
-        if search_text in description:
-            score += 5.0
-        
-        # 标签匹配 (权重: 8)
-        for tag in template_data.get('tags', []):
-            if search_text in tag.lower():
-                if search_text == tag.lower():
-                    score += 8.0  # 完全匹配
-                else:
-                    score += 4.0  # 部分匹配
-        
-        # 关键词匹配 (权重: 6)
-        for keyword in template_data.get('keywords', []):
-            if search_text in keyword.lower():
-                if search_text == keyword.lower():
-                    score += 6.0  # 完全匹配
-                else:
-                    score += 3.0  # 部分匹配
-        
-        # 分类匹配 (权重: 4)
-        category = template_data.get('category', '').lower()
-        if search_text in category:
-            score += 4.0
+        # BM25F 文本分数
+        score = text_score
         
         # 质量分数加权 (权重: 0.1)
         quality_score = template_data.get('quality_score', 0)
@@ -611,41 +643,35 @@ class SearchEngine:
         
         return highlights
     
-    def _generate_suggestions(self, query_text: str) -> List[str]:
-        """生成搜索建议"""
-        suggestions = []
-        
-        # 从标签中生成建议
-        for tag in self.search_index.tags.keys():
-            if query_text.lower() in tag.lower() and tag not in suggestions:
-                suggestions.append(tag)
+    def get_autocomplete(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        """输入联想 (标签、关键词、分类的前缀补全)
         
-        # 从关键词中生成建议
-        for keyword in self.search_index.keywords.keys():
-            if query_text.lower() in keyword.lower() and keyword not in suggestions:
-                suggestions.append(keyword)
-        
-        # 从分类中生成建议
-        for category in self.search_index.categories.keys():
-            if query_text.lower() in category.lower() and category not in suggestions:
-                suggestions.append(category)
-        
-        return suggestions[:self.max_suggestions]
+        Args:
+            prefix: 已输入的前缀
+            limit: 返回数量，默认 max_suggestions
+            
+        Returns:
+            补全候选列表
+        """
+        if not prefix:
+            return []
+        return self.suggest_index.complete(prefix, limit or self.max_suggestions)
+    
+    def _generate_suggestions(self, query_text: str) -> List[str]:
+        """生成搜索建议 (前缀匹配优先，不足时补充标签、关键词、分类中的子串匹配)"""
+        return self.suggest_index.suggest(query_text, self.max_suggestions)
     
     def _generate_did_you_mean(self, query_text: str) -> Optional[str]:
-        """生成"你是否想要"建议"""
-        all_terms = list(self.search_index.tags.keys()) + list(self.search_index.keywords.keys())
-        
-        best_match = None
-        best_ratio = 0.0
-        
-        for term in all_terms:
-            ratio = difflib.SequenceMatcher(None, query_text.lower(), term.lower()).ratio()
-            if ratio > best_ratio and ratio > 0.6:
-                best_ratio = ratio
-                best_match = term
-        
-        return best_match
+        """生成"你是否想要"建议 (三元组索引筛选候选，再计算相似度)"""
+        return self.suggest_index.did_you_mean(query_text, cutoff=self.fuzzy_threshold)
+    
+    def _rebuild_suggest_index(self):
+        """从标签、关键词、分类索引全量重建建议索引"""
+        self.suggest_index.build({
+            "tags": self.search_index.tags.keys(),
+            "keywords": self.search_index.keywords.keys(),
+            "categories": self.search_index.categories.keys()
+        })
     
     def _generate_facets(self, candidates: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
         """生成分面统计"""
@@ -730,6 +756,11 @@ class SearchEngine:
                         tag_data = json.load(f)
                         index.tags = tag_data.get('tags', {})
                 
+                # 关键词索引没有单独的文件，从模板条目还原
+                for template_id, entry in index.templates.items():
+                    for keyword in entry.get('keywords', []):
+                        index.keywords.setdefault(keyword, []).append(template_id)
+                
                 return index
                 
             except Exception as e:
@@ -833,6 +864,9 @@ class SearchEngine:
     
     def _remove_template_from_index(self, template_id: str):
         """从索引中移除模板"""
+        # 从全文索引移除
+        self.text_index.remove_document(template_id)
+        
         # 从主索引移除
         if template_id in self.search_index.templates:
             template_data = self.search_index.templates[template_id]
@@ -845,6 +879,7 @@ class SearchEngine:
                     self.search_index.categories[category].remove(template_id)
                 if not self.search_index.categories[category]:
                     del self.search_index.categories[category]
+                    self.suggest_index.remove(category, "categories")
             
             # 从标签索引移除
             for tag in template_data.get('tags', []):
@@ -853,6 +888,7 @@ class SearchEngine:
                         self.search_index.tags[tag].remove(template_id)
                     if not self.search_index.tags[tag]:
                         del self.search_index.tags[tag]
+                        self.suggest_index.remove(tag, "tags")
             
             # 从关键词索引移除
             for keyword in template_data.get('keywords', []):
@@ -860,4 +896,5 @@ class SearchEngine:
                     if template_id in self.search_index.keywords[keyword]:
                         self.search_index.keywords[keyword].remove(template_id)
                     if not self.search_index.keywords[keyword]:
-                        del self.search_index.keywords[keyword]
\ No newline at end of file
+                        del self.search_index.keywords[keyword]
+                        self.suggest_index.remove(keyword, "keywords")
\ No newline at end of file
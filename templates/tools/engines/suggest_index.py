@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+搜索建议索引
+提供三元组 (trigram) 近似词查找和前缀树自动补全，
+用于"你是否想要"、搜索建议和模板浏览器的输入联想
+"""
+
+import difflib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+def trigrams(term: str) -> Set[str]:
+    """生成带边界填充的三元组集合
+
+    Args:
+        term: 词项 (调用方负责大小写归一)
+
+    Returns:
+        三元组集合
+    """
+    padded = f"$${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """三元组倒排索引
+
+    先用共享三元组数量筛出少量候选词，再只对候选词计算
+    difflib 相似度，避免每次查询都扫描整个词表。
+    """
+
+    def __init__(self, max_candidates: int = 32):
+        """初始化三元组索引
+
+        Args:
+            max_candidates: 进入精确相似度计算的候选词数量上限
+        """
+        self.max_candidates = max_candidates
+        self.grams: Dict[str, Set[str]] = defaultdict(set)
+        self.terms: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self.terms
+
+    def add(self, term: str):
+        """添加词项"""
+        if not term or term in self.terms:
+            return
+        self.terms.add(term)
+        for gram in trigrams(term):
+            self.grams[gram].add(term)
+
+    def remove(self, term: str):
+        """移除词项"""
+        if term not in self.terms:
+            return
+        self.terms.discard(term)
+        for gram in trigrams(term):
+            bucket = self.grams.get(gram)
+            if bucket is None:
+                continue
+            bucket.discard(term)
+            if not bucket:
+                del self.grams[gram]
+
+    def containing(self, fragment: str) -> List[str]:
+        """返回包含 fragment 子串的全部词项
+
+        长度 >= 3 的片段先求其内部三元组对应词集的交集，再逐个校验；
+        更短的片段没有可用的三元组，直接扫描词表。
+
+        Args:
+            fragment: 子串 (调用方负责大小写归一)
+
+        Returns:
+            词项列表
+        """
+        if len(fragment) < 3:
+            return [term for term in self.terms if fragment in term]
+
+        buckets = sorted(
+            (self.grams.get(fragment[i:i + 3], set()) for i in range(len(fragment) - 2)),
+            key=len
+        )
+        candidates = set(buckets[0]).intersection(*buckets[1:])
+        return [term for term in candidates if fragment in term]
+
+    def candidates(self, term: str) -> List[str]:
+        """按共享三元组的 Dice 系数取前 max_candidates 个候选词"""
+        query_grams = trigrams(term)
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in query_grams:
+            for candidate in self.grams.get(gram, ()):
+                shared[candidate] += 1
+
+        def dice(candidate: str) -> float:
+            return 2.0 * shared[candidate] / (len(query_grams) + len(candidate) + 2)
+
+        return sorted(shared, key=lambda candidate: (-dice(candidate), candidate))[:self.max_candidates]
+
+    def similar(self, term: str, limit: int = 5, cutoff: float = 0.6) -> List[Tuple[str, float]]:
+        """查找相似词
+
+        Args:
+            term: 查询词
+            limit: 返回数量
+            cutoff: difflib 相似度下限
+
+        Returns:
+            (词项, 相似度) 列表，按相似度降序
+        """
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(term)
+        scored = []
+        for candidate in self.candidates(term):
+            matcher.set_seq1(candidate)
+            if matcher.real_quick_ratio() < cutoff or matcher.quick_ratio() < cutoff:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= cutoff:
+                scored.append((candidate, ratio))
+
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+
+class _TrieNode:
+    __slots__ = ("children", "values")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.values: Set[str] = set()
+
+
+class PrefixTrie:
+    """前缀树
+
+    键统一小写，节点上保存原始写法；同一个值可以挂在多个键下
+    (整词以及其中每个单词的开头)，使 "modern" 也能补全出 "tech modern"。
+    """
+
+    def __init__(self):
+        self.root = _TrieNode()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def insert(self, value: str):
+        """插入值"""
+        inserted = False
+        for key in self._keys(value):
+            node = self.root
+            for char in key:
+                node = node.children.setdefault(char, _TrieNode())
+            if value not in node.values:
+                node.values.add(value)
+                inserted = True
+        if inserted:
+            self.size += 1
+
+    def remove(self, value: str):
+        """移除值，并剪掉空分支"""
+        removed = False
+        for key in self._keys(value):
+            path = [self.root]
+            for char in key:
+                node = path[-1].children.get(char)
+                if node is None:
+                    break
+                path.append(node)
+            else:
+                if value in path[-1].values:
+                    path[-1].values.discard(value)
+                    removed = True
+                for depth in range(len(key), 0, -1):
+                    node = path[depth]
+                    if node.values or node.children:
+                        break
+                    del path[depth - 1].children[key[depth - 1]]
+        if removed:
+            self.size -= 1
+
+    def complete(self, prefix: str, limit: int = 10) -> List[str]:
+        """按前缀补全
+
+        Args:
+            prefix: 输入前缀
+            limit: 返回数量
+
+        Returns:
+            匹配的值，较短的键优先，同层按字母序
+        """
+        node = self.root
+        for char in prefix.lower():
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        results: List[str] = []
+        seen: Set[str] = set()
+        level = [node]
+        while level and len(results) < limit:
+            next_level = []
+            for current in level:
+                for value in sorted(current.values):
+                    if value not in seen:
+                        seen.add(value)
+                        results.append(value)
+                        if len(results) >= limit:
+                            return results
+                next_level.extend(current.children[char] for char in sorted(current.children))
+            level = next_level
+        return results
+
+    def _keys(self, value: str) -> Iterable[str]:
+        """值的全部索引键：整体，以及每个单词开始处的后缀"""
+        lowered = value.lower()
+        keys = {lowered}
+        for position in range(1, len(lowered)):
+            if lowered[position - 1] in " -_/" and lowered[position] not in " -_/":
+                keys.add(lowered[position:])
+        return keys
+
+
+class SuggestionIndex:
+    """按来源 (tags / keywords / categories) 维护的建议索引"""
+
+    SOURCES = ("tags", "keywords", "categories")
+
+    def __init__(self):
+        self.tries: Dict[str, PrefixTrie] = {source: PrefixTrie() for source in self.SOURCES}
+        self.trigram_index = TrigramIndex()
+        # 小写词 -> {原始写法: 引用来源集合}，用于近似词还原原始写法
+        self.spellings: Dict[str, Dict[str, Set[str]]] = defaultdict(dict)
+        # 分类不进三元组索引，数量少，子串匹配直接扫描
+        self.categories: Set[str] = set()
+
+    def build(self, vocabularies: Dict[str, Iterable[str]]):
+        """全量构建
+
+        Args:
+            vocabularies: 来源 -> 词表
+        """
+        self.__init__()
+        for source, terms in vocabularies.items():
+            for term in terms:
+                self.add(term, source)
+
+    def add(self, term: str, source: str):
+        """登记一个词 (增量)"""
+        if not term or source not in self.tries:
+            return
+        self.tries[source].insert(term)
+        if source == "categories":
+            self.categories.add(term)
+            return
+        lowered = term.lower()
+        self.spellings[lowered].setdefault(term, set()).add(source)
+        self.trigram_index.add(lowered)
+
+    def remove(self, term: str, source: str):
+        """注销一个词 (增量)"""
+        if not term or source not in self.tries:
+            return
+        self.tries[source].remove(term)
+        if source == "categories":
+            self.categories.discard(term)
+            return
+        lowered = term.lower()
+        spellings = self.spellings.get(lowered)
+        if not spellings or term not in spellings:
+            return
+        spellings[term].discard(source)
+        if not spellings[term]:
+            del spellings[term]
+        if not spellings:
+            del self.spellings[lowered]
+            self.trigram_index.remove(lowered)
+
+    def complete(self, prefix: str, limit: int = 10) -> List[str]:
+        """自动补全：依次取标签、关键词、分类"""
+        results: List[str] = []
+        for source in self.SOURCES:
+            for term in self.tries[source].complete(prefix, limit):
+                if term not in results:
+                    results.append(term)
+                    if len(results) >= limit:
+                        return results
+        return results
+
+    def containing(self, fragment: str, source: str) -> List[str]:
+        """某来源中包含 fragment (不区分大小写) 的词，返回原始写法，按字母序"""
+        lowered = fragment.lower()
+        if source == "categories":
+            return sorted(category for category in self.categories if lowered in category.lower())
+        return sorted(
+            term
+            for match in self.trigram_index.containing(lowered)
+            for term, sources in self.spellings[match].items()
+            if source in sources
+        )
+
+    def suggest(self, text: str, limit: int = 10) -> List[str]:
+        """搜索建议：先取前缀补全，不足 limit 时按来源补充子串匹配 (如 "tech" -> "biotech")"""
+        results = self.complete(text, limit)
+        for source in self.SOURCES:
+            if len(results) >= limit:
+                break
+            for term in self.containing(text, source):
+                if term not in results:
+                    results.append(term)
+                    if len(results) >= limit:
+                        break
+        return results
+
+    def similar(self, text: str, limit: int = 5, cutoff: float = 0.6) -> List[str]:
+        """近似词 (标签和关键词)，返回原始写法"""
+        results = []
+        for lowered, _ in self.trigram_index.similar(text.lower(), limit=limit, cutoff=cutoff):
+            results.append(sorted(self.spellings[lowered])[0])
+        return results
+
+    def did_you_mean(self, text: str, cutoff: float = 0.6) -> Optional[str]:
+        """最接近的一个词"""
+        matches = self.similar(text, limit=1, cutoff=cutoff)
+        return matches[0] if matches else None
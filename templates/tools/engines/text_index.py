@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+全文倒排索引
+为模板文本搜索提供分词、倒排表维护和 BM25F 相关性打分
+"""
+
+import bisect
+import heapq
+import math
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .suggest_index import TrigramIndex
+
+
+# 字段权重 (BM25F 字段加权)
+DEFAULT_FIELD_BOOSTS: Dict[str, float] = {
+    "name": 3.0,
+    "tags": 2.0,
+    "keywords": 1.5,
+    "category": 1.2,
+    "description": 1.0,
+}
+
+# 拉丁字母/数字单词 与 连续中日韩字符
+_TOKEN_PATTERN = re.compile(r"[0-9a-z]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+")
+_CJK_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+
+
+def tokenize(text: str) -> List[str]:
+    """索引分词
+
+    拉丁文本按单词切分；中日韩文本同时产出单字和相邻双字，
+    这样任意长度的中文查询都能通过双字组合匹配子串。
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        词项列表 (已转小写)
+    """
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(text.lower()):
+        if _CJK_PATTERN.match(run):
+            tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def tokenize_query(text: str) -> List[str]:
+    """查询分词
+
+    中文片段只取双字 (单个汉字时取单字)，避免单字把结果集放得过宽。
+
+    Args:
+        text: 查询文本
+
+    Returns:
+        去重后的查询词项 (保持原顺序)
+    """
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(text.lower()):
+        if _CJK_PATTERN.match(run) and len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return list(dict.fromkeys(tokens))
+
+
+class InvertedIndex:
+    """带字段权重的倒排索引
+
+    postings: 词项 -> {模板ID: {字段: 词频}}
+    有序词表用于前缀展开 (二分定位前缀区间)。新增词项先插入一个小的
+    有序缓冲区，删除的词项只做标记，缓冲区或删除标记超过约 sqrt(V)
+    时才合并回主词表，单次增删的摊还代价为 O(sqrt(V)) 而不是 O(V)。
+    """
+
+    def __init__(self, field_boosts: Optional[Dict[str, float]] = None, k1: float = 1.2, b: float = 0.75,
+                 max_prefix_expansions: int = 64):
+        """初始化倒排索引
+
+        Args:
+            field_boosts: 字段权重
+            k1: BM25 词频饱和参数
+            b: BM25 长度归一化参数
+            max_prefix_expansions: 单个查询词前缀展开的词项上限
+        """
+        self.field_boosts = dict(field_boosts or DEFAULT_FIELD_BOOSTS)
+        self.k1 = k1
+        self.b = b
+        self.max_prefix_expansions = max_prefix_expansions
+
+        self.postings: Dict[str, Dict[str, Dict[str, int]]] = defaultdict(dict)
+        self.doc_terms: Dict[str, Set[str]] = {}
+        self.field_lengths: Dict[str, Dict[str, int]] = {}
+        self.total_field_lengths: Dict[str, int] = defaultdict(int)
+        self._sorted_terms: List[str] = []  # 有序主词表 (可能含已删除的词项)
+        self._recent_terms: List[str] = []  # 最近新增词项的有序缓冲区
+        self._stale_terms: Set[str] = set()  # 已删除但仍留在词表中的词项
+        self.vocabulary_trigrams = TrigramIndex()
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    def __contains__(self, template_id: str) -> bool:
+        return template_id in self.doc_terms
+
+    def build(self, documents: Dict[str, Dict]):
+        """从索引条目全量构建
+
+        Args:
+            documents: 模板ID -> 索引条目 (含 name/description/tags/keywords/category)
+        """
+        self.postings = defaultdict(dict)
+        self.doc_terms = {}
+        self.field_lengths = {}
+        self.total_field_lengths = defaultdict(int)
+
+        for template_id, entry in documents.items():
+            self._add(template_id, entry)
+
+        self._sorted_terms = sorted(self.postings)
+        self._recent_terms = []
+        self._stale_terms = set()
+        self.vocabulary_trigrams = TrigramIndex()
+        for term in self._sorted_terms:
+            self.vocabulary_trigrams.add(term)
+
+    @property
+    def vocabulary(self) -> List[str]:
+        """有序词表 (会先合并缓冲区和删除标记)"""
+        self._compact()
+        return self._sorted_terms
+
+    def add_document(self, template_id: str, entry: Dict):
+        """添加或替换单个模板
+
+        Args:
+            template_id: 模板ID
+            entry: 索引条目
+        """
+        if template_id in self.doc_terms:
+            self.remove_document(template_id)
+
+        _, new_terms = self._add(template_id, entry)
+        for term in new_terms:
+            if term in self._stale_terms:
+                # 删除后又重新出现的词项仍在词表中，取消标记即可
+                self._stale_terms.discard(term)
+            else:
+                bisect.insort(self._recent_terms, term)
+            self.vocabulary_trigrams.add(term)
+        if len(self._recent_terms) > self._compact_threshold():
+            self._compact()
+
+    def remove_document(self, template_id: str):
+        """移除单个模板
+
+        Args:
+            template_id: 模板ID
+        """
+        terms = self.doc_terms.pop(template_id, None)
+        if terms is None:
+            return
+
+        for field_name, length in self.field_lengths.pop(template_id, {}).items():
+            self.total_field_lengths[field_name] -= length
+
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(template_id, None)
+            if not postings:
+                del self.postings[term]
+                self._stale_terms.add(term)
+                self.vocabulary_trigrams.remove(term)
+
+        if len(self._stale_terms) > self._compact_threshold():
+            self._compact()
+
+    def expand_prefix(self, prefix: str) -> List[str]:
+        """返回以 prefix 开头的全部词项
+
+        Args:
+            prefix: 前缀
+
+        Returns:
+            词项列表
+        """
+        ranges = []
+        for terms in (self._sorted_terms, self._recent_terms):
+            start = bisect.bisect_left(terms, prefix)
+            end = bisect.bisect_left(terms, prefix + "\uffff")
+            ranges.append(terms[start:end])
+        return [term for term in heapq.merge(*ranges) if term not in self._stale_terms]
+
+    def similar_terms(self, term: str, limit: int = 5, cutoff: float = 0.6) -> List[str]:
+        """查找拼写相近的索引词项 (三元组索引)
+
+        Args:
+            term: 查询词
+            limit: 返回数量
+            cutoff: 相似度下限
+
+        Returns:
+            词项列表
+        """
+        return [candidate for candidate, _ in self.vocabulary_trigrams.similar(term, limit=limit, cutoff=cutoff)]
+
+    def substring_matches(self, query_text: str) -> Optional[Dict[str, List[str]]]:
+        """查找可能包含查询原文子串的模板
+
+        原文中出现查询串的模板，必然对每个查询词都有一个包含该词的索引
+        词项 (中文双字/单字本身就是索引词项)，因此对每个查询词取"包含
+        该词的词项"的倒排表再求交集，得到的是子串匹配的超集，调用方
+        需要再按原文校验。
+
+        Args:
+            query_text: 查询文本
+
+        Returns:
+            模板ID -> 命中的索引词项列表；查询中没有可索引的词 (如纯标点)
+            时返回 None，调用方需退回线性扫描
+        """
+        query_terms = tokenize_query(query_text)
+        if not query_terms:
+            return None
+
+        matched: Optional[Dict[str, List[str]]] = None
+        for query_term in query_terms:
+            term_hits: Dict[str, List[str]] = defaultdict(list)
+            for term in self.vocabulary_trigrams.containing(query_term):
+                for template_id in self.postings.get(term, ()):
+                    term_hits[template_id].append(term)
+
+            if matched is None:
+                matched = dict(term_hits)
+            else:
+                matched = {tid: terms + term_hits[tid] for tid, terms in matched.items() if tid in term_hits}
+            if not matched:
+                return {}
+
+        return matched
+
+    def match(self, query_text: str, require_all: bool = True, extra_terms: Optional[Dict[str, List[str]]] = None) -> Dict[str, List[str]]:
+        """匹配查询
+
+        完整的查询词直接查倒排表，最后一个词和不完整的词按前缀展开
+        (最多 max_prefix_expansions 个词项)；require_all 为 True 时
+        要求模板命中全部查询词 (AND)，否则命中任一即可 (OR)。
+
+        Args:
+            query_text: 查询文本
+            require_all: 是否要求全部查询词命中
+            extra_terms: 额外的查询词展开 (如模糊匹配得到的近似词)
+
+        Returns:
+            模板ID -> 命中的索引词项列表
+        """
+        query_terms = tokenize_query(query_text)
+        if not query_terms:
+            return {}
+
+        matched: Optional[Dict[str, List[str]]] = None
+        for position, query_term in enumerate(query_terms):
+            # 完整词项直接命中；最后一个词 (正在输入) 或不完整的词按前缀展开
+            if query_term in self.postings and position < len(query_terms) - 1:
+                expansions = [query_term]
+            else:
+                expansions = self.expand_prefix(query_term)[:self.max_prefix_expansions]
+                if query_term in self.postings and query_term not in expansions:
+                    expansions.insert(0, query_term)
+            if extra_terms:
+                expansions = list(dict.fromkeys(expansions + extra_terms.get(query_term, [])))
+
+            term_hits: Dict[str, List[str]] = defaultdict(list)
+            for term in expansions:
+                for template_id in self.postings.get(term, ()):
+                    term_hits[template_id].append(term)
+
+            if matched is None:
+                matched = dict(term_hits)
+            elif require_all:
+                matched = {tid: terms + term_hits[tid] for tid, terms in matched.items() if tid in term_hits}
+            else:
+                for template_id, terms in term_hits.items():
+                    matched.setdefault(template_id, []).extend(terms)
+
+            if require_all and not matched:
+                return {}
+
+        return matched or {}
+
+    def score(self, matches: Dict[str, List[str]]) -> Dict[str, float]:
+        """BM25F 打分
+
+        各字段词频按字段权重和字段长度归一化后合并，再套用 BM25 饱和函数。
+
+        Args:
+            matches: match() 的返回值
+
+        Returns:
+            模板ID -> 相关性分数
+        """
+        total_docs = len(self.doc_terms)
+        if not total_docs:
+            return {}
+
+        avg_lengths = {
+            field_name: (self.total_field_lengths[field_name] / total_docs) or 1.0
+            for field_name in self.field_boosts
+        }
+        idf_cache: Dict[str, float] = {}
+        scores: Dict[str, float] = {}
+
+        for template_id, terms in matches.items():
+            lengths = self.field_lengths.get(template_id, {})
+            score = 0.0
+            for term in set(terms):
+                postings = self.postings.get(term)
+                if not postings or template_id not in postings:
+                    continue
+
+                idf = idf_cache.get(term)
+                if idf is None:
+                    df = len(postings)
+                    idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                    idf_cache[term] = idf
+
+                weighted_tf = 0.0
+                for field_name, tf in postings[template_id].items():
+                    norm = 1 - self.b + self.b * lengths.get(field_name, 0) / avg_lengths[field_name]
+                    weighted_tf += self.field_boosts[field_name] * tf / norm
+
+                score += idf * weighted_tf * (self.k1 + 1) / (weighted_tf + self.k1)
+            scores[template_id] = score
+
+        return scores
+
+    def _compact_threshold(self) -> int:
+        """缓冲区 / 删除标记的合并阈值"""
+        return max(64, math.isqrt(len(self._sorted_terms)))
+
+    def _compact(self):
+        """把新增缓冲区合并进主词表并清除已删除的词项"""
+        if not self._recent_terms and not self._stale_terms:
+            return
+        self._sorted_terms = [
+            term for term in heapq.merge(self._sorted_terms, self._recent_terms)
+            if term not in self._stale_terms
+        ]
+        self._recent_terms = []
+        self._stale_terms = set()
+
+    def _add(self, template_id: str, entry: Dict) -> Tuple[Set[str], Set[str]]:
+        """写入倒排表，返回 (该模板的词项集合, 新出现的词项集合)"""
+        terms: Set[str] = set()
+        new_terms: Set[str] = set()
+        lengths: Dict[str, int] = {}
+
+        for field_name, field_text in self._field_texts(entry):
+            field_tokens = tokenize(field_text)
+            lengths[field_name] = len(field_tokens)
+            self.total_field_lengths[field_name] += len(field_tokens)
+
+            for token in field_tokens:
+                if token not in self.postings:
+                    new_terms.add(token)
+                field_tf = self.postings[token].setdefault(template_id, {})
+                field_tf[field_name] = field_tf.get(field_name, 0) + 1
+                terms.add(token)
+
+        self.doc_terms[template_id] = terms
+        self.field_lengths[template_id] = lengths
+        return terms, new_terms
+
+    def _field_texts(self, entry: Dict) -> Iterable[Tuple[str, str]]:
+        """取出参与索引的字段文本"""
+        for field_name in self.field_boosts:
+            value = entry.get(field_name, '')
+            if isinstance(value, (list, tuple)):
+                value = ' '.join(str(item) for item in value)
+            yield field_name, str(value or '')
@@ -5,7 +5,7 @@
 import os
 import json
 import math
-from typing import Dict, List, Tuple, Optional, Set
+from typing import Any, Dict, List, Tuple, Optional, Set
 from dataclasses import dataclass
 from pathlib import Path
 
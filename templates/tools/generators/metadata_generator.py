@@ -4,7 +4,10 @@
 
 import os
 import json
+import hashlib
 import colorsys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 from PIL import Image, ImageStat
@@ -20,11 +23,72 @@ from ..models.metadata import (
 )
 
 
+# 分析算法版本：像素统计方式变化时递增，旧缓存自动失效
+IMAGE_ANALYSIS_VERSION = 1
+
+# 降分辨率解码的目标边长 (仅 reduced_decode 模式)
+REDUCED_DECODE_SIZE = 512
+
+# 待分析图片少于该数量时不启动进程池
+MIN_PARALLEL_IMAGES = 4
+
+# 分析结果缓存有效期 (按内容哈希索引，内容不变结果就不变)
+ANALYSIS_CACHE_TTL = 30 * 24 * 3600
+
+# 只由文件名决定的字段，缓存命中后按实际路径重新计算
+_PATH_DERIVED_FIELDS = ('has_text', 'has_faces', 'has_products')
+
+
+def hash_image_file(image_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    计算图片文件内容哈希
+    
+    Args:
+        image_path: 图片文件路径
+        chunk_size: 分块读取大小
+        
+    Returns:
+        str: BLAKE2b 十六进制摘要
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(image_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# 进程池工作进程内复用的生成器实例
+_worker_generator: Optional["MetadataGenerator"] = None
+
+
+def _analyze_image_task(image_path: str, reduced_decode: bool) -> ImageAnalysis:
+    """进程池任务：分析单张图片 (模块级函数以便 pickle)"""
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = MetadataGenerator()
+    return _worker_generator.analyze_image(image_path, reduced_decode=reduced_decode)
+
+
 class MetadataGenerator:
     """元数据生成器 - 分析图片并生成模板元数据"""
     
-    def __init__(self):
-        """初始化元数据生成器"""
+    def __init__(self, cache_dir: Optional[str] = None, max_workers: Optional[int] = None):
+        """
+        初始化元数据生成器
+        
+        Args:
+            cache_dir: 图片分析结果的持久缓存目录 (为空时只在内存中缓存)
+            max_workers: 批量分析的进程数 (默认 CPU 核数，1 表示串行)
+        """
+        self.max_workers = max_workers
+        
+        # (分析模式, 内容哈希) -> 像素统计结果
+        self._analysis_cache: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._persistent_cache = None
+        if cache_dir:
+            from ..performance.performance_optimizer import CacheManager
+            self._persistent_cache = CacheManager(Path(cache_dir))
+        
         # 预定义的分类映射
         self.category_keywords = {
             "electronics": ["科技", "数码", "电子", "智能", "现代", "蓝色", "黑色", "简约"],
@@ -50,12 +114,15 @@ class MetadataGenerator:
             "professional": ["专业", "商务", "正式", "严谨", "可靠"]
         }
     
-    def analyze_image(self, image_path: str) -> ImageAnalysis:
+    def analyze_image(self, image_path: str, reduced_decode: bool = False) -> ImageAnalysis:
         """
         分析单张图片
         
         Args:
             image_path: 图片文件路径
+            reduced_decode: 是否降分辨率解码后再做像素统计。
+                尺寸、格式、文件大小和压缩质量不受影响；亮度、对比度、
+                饱和度等统计为近似值，锐度和噪声随分辨率变化较大。
             
         Returns:
             ImageAnalysis: 图片分析结果
@@ -63,12 +130,15 @@ class MetadataGenerator:
         try:
             # 打开图片
             with Image.open(image_path) as img:
-                # 基本信息
+                # 基本信息 (取自文件头，解码前读取)
                 width, height = img.size
                 format_name = img.format or "UNKNOWN"
                 file_size = os.path.getsize(image_path)
                 color_mode = img.mode
                 
+                if reduced_decode:
+                    img = self._reduce_for_analysis(img)
+                
                 # 创建分析对象
                 analysis = ImageAnalysis(
                     width=width,
@@ -100,6 +170,122 @@ class MetadataGenerator:
                 color_mode="UNKNOWN"
             )
     
+    def _reduce_for_analysis(self, img: Image.Image) -> Image.Image:
+        """降分辨率解码：JPEG 用 draft 在 DCT 阶段缩放，其它格式用整数倍 reduce"""
+        if img.format == 'JPEG':
+            img.draft(None, (REDUCED_DECODE_SIZE, REDUCED_DECODE_SIZE))
+        
+        factor = min(img.size) // REDUCED_DECODE_SIZE
+        if factor >= 2:
+            if img.mode not in ('L', 'RGB', 'RGBA', 'LA', 'I', 'F'):
+                img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+            img = img.reduce(factor)
+        return img
+    
+    def analyze_images(self, image_paths: List[str], max_workers: Optional[int] = None,
+                       reduced_decode: bool = False) -> Dict[str, ImageAnalysis]:
+        """
+        批量分析图片
+        
+        按内容哈希缓存像素统计结果，相同内容的图片只解码一次；
+        未命中的图片分发到进程池并行分析，结果与逐张调用 analyze_image 相同。
+        
+        Args:
+            image_paths: 图片文件路径列表
+            max_workers: 进程数 (默认使用初始化参数，1 表示串行)
+            reduced_decode: 是否降分辨率解码 (见 analyze_image)
+            
+        Returns:
+            Dict[str, ImageAnalysis]: 图片路径 -> 分析结果
+        """
+        mode = 'reduced' if reduced_decode else 'full'
+        results: Dict[str, ImageAnalysis] = {}
+        path_hashes: Dict[str, str] = {}
+        pending: Dict[str, str] = {}  # 内容哈希 -> 代表路径
+        
+        for image_path in image_paths:
+            try:
+                content_hash = hash_image_file(image_path)
+            except OSError:
+                # 无法读取的文件走常规流程 (返回默认结果)
+                results[image_path] = self.analyze_image(image_path, reduced_decode=reduced_decode)
+                continue
+            path_hashes[image_path] = content_hash
+            if self._get_cached_analysis(mode, content_hash) is None:
+                pending.setdefault(content_hash, image_path)
+        
+        if pending:
+            for content_hash, analysis in self._run_analysis(pending, max_workers, reduced_decode):
+                # 解码失败的结果不缓存
+                if analysis.color_mode != "UNKNOWN":
+                    self._store_cached_analysis(mode, content_hash, analysis)
+        
+        for image_path, content_hash in path_hashes.items():
+            cached = self._get_cached_analysis(mode, content_hash)
+            if cached is None:
+                results[image_path] = self.analyze_image(image_path, reduced_decode=reduced_decode)
+                continue
+            analysis = ImageAnalysis(**cached)
+            self._analyze_content(image_path, analysis)
+            results[image_path] = analysis
+        
+        if self._persistent_cache is not None:
+            self._persistent_cache.flush()
+        
+        return {image_path: results[image_path] for image_path in image_paths}
+    
+    def _run_analysis(self, pending: Dict[str, str], max_workers: Optional[int], reduced_decode: bool):
+        """分析未命中缓存的图片，产出 (内容哈希, 分析结果)"""
+        workers = max_workers if max_workers is not None else self.max_workers
+        workers = min(workers or os.cpu_count() or 1, len(pending))
+        
+        if workers <= 1 or len(pending) < MIN_PARALLEL_IMAGES:
+            for content_hash, image_path in pending.items():
+                yield content_hash, self.analyze_image(image_path, reduced_decode=reduced_decode)
+            return
+        
+        content_hashes = list(pending)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            analyses = executor.map(
+                _analyze_image_task,
+                [pending[content_hash] for content_hash in content_hashes],
+                [reduced_decode] * len(content_hashes),
+                chunksize=max(1, len(content_hashes) // (workers * 4))
+            )
+            yield from zip(content_hashes, analyses)
+    
+    def _get_cached_analysis(self, mode: str, content_hash: str) -> Optional[Dict[str, Any]]:
+        """读取缓存的像素统计结果 (先内存后磁盘)"""
+        cached = self._analysis_cache.get((mode, content_hash))
+        if cached is None and self._persistent_cache is not None:
+            cached = self._persistent_cache.get(self._cache_key(mode, content_hash))
+            if cached is not None:
+                self._analysis_cache[(mode, content_hash)] = cached
+        return cached
+    
+    def _store_cached_analysis(self, mode: str, content_hash: str, analysis: ImageAnalysis):
+        """缓存像素统计结果 (文件名推断的字段不入缓存)"""
+        cached = asdict(analysis)
+        for field_name in _PATH_DERIVED_FIELDS:
+            cached.pop(field_name, None)
+        for field_name, value in cached.items():
+            # numpy 标量转为内置类型，便于 JSON 序列化
+            if isinstance(value, np.generic):
+                cached[field_name] = value.item()
+        self._analysis_cache[(mode, content_hash)] = cached
+        if self._persistent_cache is not None:
+            self._persistent_cache.set(self._cache_key(mode, content_hash), cached, ttl=ANALYSIS_CACHE_TTL)
+    
+    def _cache_key(self, mode: str, content_hash: str) -> str:
+        """持久缓存键"""
+        return f"image_analysis:v{IMAGE_ANALYSIS_VERSION}:{mode}:{content_hash}"
+    
+    def clear_analysis_cache(self):
+        """清空图片分析缓存"""
+        self._analysis_cache.clear()
+        if self._persistent_cache is not None:
+            self._persistent_cache.clear()
+    
     def _analyze_colors(self, img: Image.Image, analysis: ImageAnalysis):
         """分析图片色彩"""
         try:
@@ -470,12 +656,16 @@ class MetadataGenerator:
         # 去重并返回
         return list(set(keywords))
     
-    def generate_template_metadata(self, template_path: str) -> TemplateMetadata:
+    def generate_template_metadata(self, template_path: str,
+                                   image_analyses: Optional[Dict[str, ImageAnalysis]] = None,
+                                   reduced_decode: bool = False) -> TemplateMetadata:
         """
         生成完整的模板元数据
         
         Args:
             template_path: 模板目录路径
+            image_analyses: 预先批量分析好的结果 (图片绝对路径 -> 分析结果)，缺失的图片在此补做
+            reduced_decode: 是否降分辨率解码 (见 analyze_image)
             
         Returns:
             TemplateMetadata: 完整的模板元数据
@@ -485,10 +675,14 @@ class MetadataGenerator:
         
         # 分析所有图片
         image_files = self._find_image_files(template_path)
+        image_paths = [os.path.join(template_path, image_file) for image_file in image_files]
+        
+        analyses = image_analyses or {}
+        missing_paths = [image_path for image_path in image_paths if image_path not in analyses]
+        missing = self.analyze_images(missing_paths, reduced_decode=reduced_decode) if missing_paths else {}
         
-        for image_file in image_files:
-            image_path = os.path.join(template_path, image_file)
-            analysis = self.analyze_image(image_path)
+        for image_file, image_path in zip(image_files, image_paths):
+            analysis = analyses[image_path] if image_path in analyses else missing[image_path]
             metadata.add_image_analysis(image_file, analysis)
         
         # 提取设计特征
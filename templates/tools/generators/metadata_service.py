@@ -15,29 +15,36 @@ from ..models.metadata import TemplateMetadata, DesignFeatures, ImageAnalysis
 class MetadataService:
     """元数据服务 - 提供完整的模板元数据生成和分析功能"""
     
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(self, config_path: Optional[str] = None, cache_dir: Optional[str] = None):
         """
         初始化元数据服务
         
         Args:
             config_path: 配置文件路径
+            cache_dir: 图片分析结果的持久缓存目录（可选）
         """
-        self.metadata_generator = MetadataGenerator()
+        self.metadata_generator = MetadataGenerator(cache_dir=cache_dir)
         self.classification_engine = ClassificationEngine(config_path)
     
-    def analyze_template(self, template_path: str, save_metadata: bool = True) -> Dict[str, Any]:
+    def analyze_template(self, template_path: str, save_metadata: bool = True,
+                         image_analyses: Optional[Dict[str, ImageAnalysis]] = None,
+                         reduced_decode: bool = False) -> Dict[str, Any]:
         """
         完整分析模板
         
         Args:
             template_path: 模板目录路径
             save_metadata: 是否保存元数据到文件
+            image_analyses: 预先批量分析好的图片结果（可选）
+            reduced_decode: 是否降分辨率解码图片（统计值为近似值）
             
         Returns:
             Dict: 完整的分析结果
         """
         # 1. 生成基础元数据
-        metadata = self.metadata_generator.generate_template_metadata(template_path)
+        metadata = self.metadata_generator.generate_template_metadata(
+            template_path, image_analyses=image_analyses, reduced_decode=reduced_decode
+        )
         
         # 2. 智能分类
         category_scores = self.classification_engine.classify_template(
@@ -221,13 +228,20 @@ class MetadataService:
             json.dump(result["analysis_summary"], f, ensure_ascii=False, indent=2)
     
     def batch_analyze_templates(self, templates_dir: str, 
-                              template_filter: Optional[str] = None) -> Dict[str, Any]:
+                              template_filter: Optional[str] = None,
+                              max_workers: Optional[int] = None,
+                              reduced_decode: bool = False) -> Dict[str, Any]:
         """
         批量分析模板
         
+        先收集所有模板的图片，一次性分发到进程池分析（按内容哈希缓存），
+        再逐个模板汇总分类、标签和关键词。
+        
         Args:
             templates_dir: 模板根目录
             template_filter: 模板过滤条件（可选）
+            max_workers: 图片分析进程数（默认 CPU 核数，1 表示串行）
+            reduced_decode: 是否降分辨率解码图片（统计值为近似值）
             
         Returns:
             Dict: 批量分析结果
@@ -238,12 +252,25 @@ class MetadataService:
         # 查找所有模板目录
         template_paths = self._find_template_directories(templates_dir, template_filter)
         
+        # 批量分析全部图片（嵌套的模板目录会共享同一批结果）
+        image_paths = []
+        for template_path in template_paths:
+            image_paths.extend(
+                os.path.join(template_path, image_file)
+                for image_file in self.metadata_generator._find_image_files(template_path)
+            )
+        image_analyses = self.metadata_generator.analyze_images(
+            list(dict.fromkeys(image_paths)), max_workers=max_workers, reduced_decode=reduced_decode
+        )
+        
         for template_path in template_paths:
             try:
                 template_id = os.path.basename(template_path)
                 print(f"正在分析模板: {template_id}")
                 
-                result = self.analyze_template(template_path, save_metadata=True)
+                result = self.analyze_template(template_path, save_metadata=True,
+                                               image_analyses=image_analyses,
+                                               reduced_decode=reduced_decode)
                 results[template_id] = result["analysis_summary"]
                 
             except Exception as e:
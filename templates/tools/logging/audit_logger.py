@@ -5,9 +5,11 @@ Audit Logging System - Create detailed operation logs and audit tracking
 """
 
 import json
+import bisect
 import logging
 import threading
-from typing import Dict, Any, Optional, List
+from collections import Counter, defaultdict
+from typing import Dict, Any, Iterator, Optional, List
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 from enum import Enum
@@ -15,6 +17,15 @@ from pathlib import Path
 import hashlib
 import uuid
 
+# 内存中至少保留的最近事件数 (热窗口)
+DEFAULT_HOT_WINDOW_EVENTS = 10000
+
+# 单个分段覆盖的时长 (分钟)
+DEFAULT_SEGMENT_MINUTES = 60
+
+# 单个分段的事件上限，超出后提前切分，控制淘汰粒度
+DEFAULT_MAX_SEGMENT_EVENTS = 1024
+
 class AuditEventType(Enum):
     """审计事件类型"""
     TEMPLATE_CREATE = "template_create"
@@ -54,17 +65,168 @@ class AuditEvent:
         data['timestamp'] = self.timestamp.isoformat()
         return data
 
+class AuditSegment:
+    """按时间分段的只追加事件存储
+    
+    events 按时间戳有序，timestamps 与之一一对应，用于二分定位时间范围；
+    resource / user_id / event_type 各维护一份有序的位置索引，
+    同时累计统计计数，整段落在统计区间内时无需逐条扫描。
+    """
+    
+    def __init__(self, start_time: datetime, end_time: datetime, max_events: int):
+        self.start_time = start_time
+        self.end_time = end_time  # 分段时间上界 (不含)
+        self.max_events = max_events
+        
+        self.events: List[AuditEvent] = []
+        self.timestamps: List[datetime] = []
+        self._reset_indexes()
+    
+    def __len__(self) -> int:
+        return len(self.events)
+    
+    def _reset_indexes(self):
+        """清空索引和统计计数"""
+        self.by_resource: Dict[str, List[int]] = defaultdict(list)
+        self.by_user: Dict[str, List[int]] = defaultdict(list)
+        self.by_event_type: Dict[AuditEventType, List[int]] = defaultdict(list)
+        
+        self.event_type_counts: Counter = Counter()
+        self.result_counts: Counter = Counter()
+        self.user_counts: Counter = Counter()
+        self.daily_counts: Counter = Counter()
+        self.performance_count = 0
+        self.performance_duration_sum = 0.0
+        self.performance_duration_count = 0
+    
+    def accepts(self, timestamp: datetime) -> bool:
+        """事件是否可以写入本分段"""
+        return len(self.events) < self.max_events and timestamp < self.end_time
+    
+    def append(self, event: AuditEvent):
+        """追加事件 (时间戳早于段内最新事件时按序插入并重建索引)"""
+        if self.timestamps and event.timestamp < self.timestamps[-1]:
+            position = bisect.bisect_right(self.timestamps, event.timestamp)
+            self.timestamps.insert(position, event.timestamp)
+            self.events.insert(position, event)
+            self.start_time = min(self.start_time, event.timestamp)
+            self._rebuild()
+            return
+        
+        self.timestamps.append(event.timestamp)
+        self.events.append(event)
+        self._index(len(self.events) - 1, event)
+    
+    def drop_before(self, cutoff_time: datetime):
+        """丢弃早于 cutoff_time 的事件"""
+        position = bisect.bisect_left(self.timestamps, cutoff_time)
+        if position:
+            del self.events[:position]
+            del self.timestamps[:position]
+            if self.timestamps:
+                self.start_time = self.timestamps[0]
+            self._rebuild()
+    
+    def _rebuild(self):
+        """重建位置索引和统计计数"""
+        self._reset_indexes()
+        for position, event in enumerate(self.events):
+            self._index(position, event)
+    
+    def _index(self, position: int, event: AuditEvent):
+        """把事件写入索引并累计统计"""
+        if event.resource:
+            self.by_resource[event.resource].append(position)
+        if event.user_id:
+            self.by_user[event.user_id].append(position)
+        self.by_event_type[event.event_type].append(position)
+        
+        self.event_type_counts[event.event_type.value] += 1
+        self.result_counts[event.result] += 1
+        self.user_counts[event.user_id or 'unknown'] += 1
+        self.daily_counts[event.timestamp.date().isoformat()] += 1
+        if event.event_type == AuditEventType.PERFORMANCE_METRIC:
+            self.performance_count += 1
+            if event.duration_ms:
+                self.performance_duration_sum += event.duration_ms
+                self.performance_duration_count += 1
+    
+    def query(self, resource: str = None, user_id: str = None,
+              event_type: AuditEventType = None,
+              start_time: datetime = None, end_time: datetime = None) -> Iterator[AuditEvent]:
+        """按时间倒序产出匹配的事件
+        
+        先二分确定时间范围，再从最短的索引位置表出发，
+        其余条件逐条校验，调用方取够数量即可停止迭代。
+        """
+        low = bisect.bisect_left(self.timestamps, start_time) if start_time else 0
+        high = bisect.bisect_right(self.timestamps, end_time) if end_time else len(self.timestamps)
+        if low >= high:
+            return
+        
+        candidates = []
+        if user_id:
+            candidates.append(self.by_user.get(user_id, []))
+        if event_type:
+            candidates.append(self.by_event_type.get(event_type, []))
+        if resource:
+            # resource 为子串匹配：在不同的资源名上匹配，再合并位置表
+            matched = [positions for name, positions in self.by_resource.items() if resource in name]
+            if len(matched) == 1:
+                candidates.append(matched[0])
+            else:
+                candidates.append(sorted(position for positions in matched for position in positions))
+        
+        if not candidates:
+            for position in range(high - 1, low - 1, -1):
+                yield self.events[position]
+            return
+        
+        positions = min(candidates, key=len)
+        first = bisect.bisect_left(positions, low)
+        last = bisect.bisect_left(positions, high)
+        for index in range(last - 1, first - 1, -1):
+            event = self.events[positions[index]]
+            if user_id and event.user_id != user_id:
+                continue
+            if event_type and event.event_type != event_type:
+                continue
+            if resource and not (event.resource and resource in event.resource):
+                continue
+            yield event
+
 class AuditLogger:
     """审计日志记录器"""
     
-    def __init__(self, log_dir: Path = None, max_log_size_mb: int = 100):
+    def __init__(self, log_dir: Path = None, max_log_size_mb: int = 100,
+                 hot_window_events: int = DEFAULT_HOT_WINDOW_EVENTS,
+                 hot_window_hours: Optional[float] = None,
+                 segment_minutes: int = DEFAULT_SEGMENT_MINUTES,
+                 max_segment_events: int = DEFAULT_MAX_SEGMENT_EVENTS):
+        """
+        Args:
+            log_dir: 日志目录
+            max_log_size_mb: 日志文件大小上限 (MB)
+            hot_window_events: 内存中至少保留的最近事件数，
+                超出后按分段整体淘汰 (最多多保留一个分段)
+            hot_window_hours: 内存中保留的时间范围 (小时)，为空时不按时间淘汰
+            segment_minutes: 单个分段覆盖的时长
+            max_segment_events: 单个分段的事件上限
+        """
         self.log_dir = log_dir or Path('logs/audit')
         self.log_dir.mkdir(parents=True, exist_ok=True)
         
         self.max_log_size_bytes = max_log_size_mb * 1024 * 1024
         self.current_session_id = str(uuid.uuid4())
         
-        self.audit_events = []
+        self.hot_window_events = hot_window_events
+        self.hot_window = timedelta(hours=hot_window_hours) if hot_window_hours else None
+        self.segment_span = timedelta(minutes=segment_minutes)
+        self.max_segment_events = max_segment_events
+        
+        # 按时间顺序排列的分段，最后一个为当前写入的分段
+        self._segments: List[AuditSegment] = []
+        self._event_count = 0
         self._lock = threading.RLock()
         
         # 设置日志记录器
@@ -106,33 +268,73 @@ class AuditLogger:
                   user_id: str = None, ip_address: str = None) -> str:
         """记录审计事件"""
         
-        event = AuditEvent(
-            event_id=self._generate_event_id(),
-            event_type=event_type,
-            timestamp=datetime.now(),
-            user_id=user_id or "system",
-            session_id=self.current_session_id,
-            operation=operation,
-            resource=resource,
-            details=details or {},
-            result=result,
-            duration_ms=duration_ms,
-            ip_address=ip_address
-        )
-        
+        # 时间戳在锁内生成，保证事件按时间顺序追加到分段
         with self._lock:
-            # 添加到内存缓存
-            self.audit_events.append(event)
+            event = AuditEvent(
+                event_id=self._generate_event_id(),
+                event_type=event_type,
+                timestamp=datetime.now(),
+                user_id=user_id or "system",
+                session_id=self.current_session_id,
+                operation=operation,
+                resource=resource,
+                details=details or {},
+                result=result,
+                duration_ms=duration_ms,
+                ip_address=ip_address
+            )
             
-            # 只保留最近10000条事件
-            if len(self.audit_events) > 10000:
-                self.audit_events = self.audit_events[-10000:]
+            # 添加到内存分段
+            self._append_event(event)
             
             # 写入日志文件
             self.logger.info(json.dumps(event.to_dict(), ensure_ascii=False))
         
         return event.event_id
     
+    @property
+    def audit_events(self) -> List[AuditEvent]:
+        """内存中的全部事件 (按时间顺序)"""
+        with self._lock:
+            return [event for segment in self._segments for event in segment.events]
+    
+    def _append_event(self, event: AuditEvent):
+        """写入当前分段，必要时切分新分段并淘汰热窗口之外的旧分段"""
+        segment = self._segments[-1] if self._segments else None
+        if segment is None or not segment.accepts(event.timestamp):
+            segment = AuditSegment(event.timestamp, self._segment_end(event.timestamp), self.max_segment_events)
+            self._segments.append(segment)
+        
+        segment.append(event)
+        self._event_count += 1
+        
+        # 按事件数淘汰：保证至少保留 hot_window_events 条
+        while len(self._segments) > 1 and self._event_count - len(self._segments[0]) >= self.hot_window_events:
+            self._event_count -= len(self._segments.pop(0))
+        
+        # 按时间淘汰
+        if self.hot_window is not None:
+            self._drop_segments_before(event.timestamp - self.hot_window)
+    
+    def _segment_end(self, timestamp: datetime) -> datetime:
+        """时间戳所在分区的结束时间 (按 segment_span 对齐)"""
+        day_start = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+        span_seconds = self.segment_span.total_seconds()
+        elapsed = (timestamp - day_start).total_seconds()
+        end = day_start + timedelta(seconds=(int(elapsed // span_seconds) + 1) * span_seconds)
+        return min(end, day_start + timedelta(days=1))
+    
+    def _drop_segments_before(self, cutoff_time: datetime):
+        """丢弃早于 cutoff_time 的事件 (整段丢弃，边界分段截断)"""
+        while self._segments and self._segments[0].timestamps[-1] < cutoff_time:
+            self._event_count -= len(self._segments.pop(0))
+        
+        if self._segments and self._segments[0].timestamps[0] < cutoff_time:
+            segment = self._segments[0]
+            before = len(segment)
+            segment.drop_before(cutoff_time)
+            self._event_count -= before - len(segment)
+    
     def log_template_operation(self, operation: str, template_id: str, 
                              details: Dict[str, Any] = None, result: str = "success",
                              duration_ms: float = None, user_id: str = None) -> str:
@@ -276,95 +478,92 @@ class AuditLogger:
                        event_type: AuditEventType = None, 
                        start_time: datetime = None, end_time: datetime = None,
                        limit: int = 100) -> List[AuditEvent]:
-        """获取审计跟踪"""
-        
-        with self._lock:
-            filtered_events = self.audit_events.copy()
+        """获取审计跟踪
         
-        # 应用过滤条件
-        if resource:
-            filtered_events = [e for e in filtered_events if e.resource and resource in e.resource]
+        从最新的分段开始倒序查找，段内二分定位时间范围并借助索引过滤，
+        取满 limit 条即停止 (limit 为 None 时返回全部)。
+        """
         
-        if user_id:
-            filtered_events = [e for e in filtered_events if e.user_id == user_id]
+        results = []
+        if limit is not None and limit <= 0:
+            return results
         
-        if event_type:
-            filtered_events = [e for e in filtered_events if e.event_type == event_type]
-        
-        if start_time:
-            filtered_events = [e for e in filtered_events if e.timestamp >= start_time]
-        
-        if end_time:
-            filtered_events = [e for e in filtered_events if e.timestamp <= end_time]
-        
-        # 按时间倒序排列
-        filtered_events.sort(key=lambda x: x.timestamp, reverse=True)
+        with self._lock:
+            for segment in reversed(self._segments):
+                if not segment.events:
+                    continue
+                if start_time and segment.timestamps[-1] < start_time:
+                    continue
+                if end_time and segment.timestamps[0] > end_time:
+                    continue
+                
+                for event in segment.query(resource, user_id, event_type, start_time, end_time):
+                    results.append(event)
+                    if limit is not None and len(results) >= limit:
+                        return results
         
-        # 应用限制
-        return filtered_events[:limit]
+        return results
     
     def get_audit_statistics(self, days: int = 7) -> Dict[str, Any]:
         """获取审计统计"""
         
         cutoff_time = datetime.now() - timedelta(days=days)
         
-        with self._lock:
-            recent_events = [e for e in self.audit_events if e.timestamp >= cutoff_time]
+        event_type_stats = Counter()
+        result_stats = Counter()
+        user_stats = Counter()
+        daily_stats = Counter()
+        total_events = 0
+        performance_events = 0
+        duration_sum = 0.0
+        duration_count = 0
         
-        if not recent_events:
+        with self._lock:
+            for segment in self._segments:
+                if not segment.events or segment.timestamps[-1] < cutoff_time:
+                    continue
+                
+                if segment.timestamps[0] >= cutoff_time:
+                    # 整段都在统计区间内，直接合并预先累计的计数
+                    event_type_stats.update(segment.event_type_counts)
+                    result_stats.update(segment.result_counts)
+                    user_stats.update(segment.user_counts)
+                    daily_stats.update(segment.daily_counts)
+                    total_events += len(segment)
+                    performance_events += segment.performance_count
+                    duration_sum += segment.performance_duration_sum
+                    duration_count += segment.performance_duration_count
+                    continue
+                
+                # 边界分段：从区间起点开始逐条统计
+                start = bisect.bisect_left(segment.timestamps, cutoff_time)
+                for event in segment.events[start:]:
+                    event_type_stats[event.event_type.value] += 1
+                    result_stats[event.result] += 1
+                    user_stats[event.user_id or 'unknown'] += 1
+                    daily_stats[event.timestamp.date().isoformat()] += 1
+                    total_events += 1
+                    if event.event_type == AuditEventType.PERFORMANCE_METRIC:
+                        performance_events += 1
+                        if event.duration_ms:
+                            duration_sum += event.duration_ms
+                            duration_count += 1
+        
+        if not total_events:
             return {'message': f'最近{days}天无审计记录'}
         
-        # 按事件类型统计
-        event_type_stats = {}
-        result_stats = {}
-        user_stats = {}
-        daily_stats = {}
-        
-        for event in recent_events:
-            # 事件类型统计
-            event_type = event.event_type.value
-            if event_type not in event_type_stats:
-                event_type_stats[event_type] = 0
-            event_type_stats[event_type] += 1
-            
-            # 结果统计
-            result = event.result
-            if result not in result_stats:
-                result_stats[result] = 0
-            result_stats[result] += 1
-            
-            # 用户统计
-            user = event.user_id or 'unknown'
-            if user not in user_stats:
-                user_stats[user] = 0
-            user_stats[user] += 1
-            
-            # 每日统计
-            day = event.timestamp.strftime('%Y-%m-%d')
-            if day not in daily_stats:
-                daily_stats[day] = 0
-            daily_stats[day] += 1
-        
-        # 性能统计
-        performance_events = [e for e in recent_events 
-                            if e.event_type == AuditEventType.PERFORMANCE_METRIC]
-        
-        avg_duration = None
-        if performance_events:
-            durations = [e.duration_ms for e in performance_events if e.duration_ms]
-            if durations:
-                avg_duration = sum(durations) / len(durations)
+        avg_duration = duration_sum / duration_count if duration_count else None
         
         return {
             'period_days': days,
-            'total_events': len(recent_events),
-            'event_type_distribution': event_type_stats,
-            'result_distribution': result_stats,
-            'user_activity': user_stats,
-            'daily_activity': daily_stats,
+            'total_events': total_events,
+            'event_type_distribution': dict(event_type_stats),
+            'result_distribution': dict(result_stats),
+            'user_activity': dict(user_stats),
+            'daily_activity': dict(daily_stats),
             'performance': {
                 'avg_duration_ms': avg_duration,
-                'performance_events_count': len(performance_events)
+                'performance_events_count': performance_events
             }
         }
     
@@ -423,10 +622,7 @@ class AuditLogger:
         
         # 清理内存中的旧事件
         with self._lock:
-            self.audit_events = [
-                e for e in self.audit_events 
-                if e.timestamp >= cutoff_date
-            ]
+            self._drop_segments_before(cutoff_date)
 
 # 全局审计日志记录器实例
 _audit_logger = None
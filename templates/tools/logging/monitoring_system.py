@@ -14,6 +14,8 @@ from enum import Enum
 from pathlib import Path
 import psutil
 
+from ..performance.metrics_registry import MetricsRegistry, get_metrics_registry, start_metrics_server
+
 class AlertLevel(Enum):
     """告警级别"""
     INFO = "info"
@@ -80,67 +82,96 @@ class Threshold:
     enabled: bool = True
 
 class MetricCollector:
-    """指标收集器"""
-    
-    def __init__(self):
-        self.metrics = {}
-        self._lock = threading.RLock()
+    """指标收集器
+
+    指标存放在 MetricsRegistry 中：计数器/仪表盘按序列保存当前值，
+    计时器写入固定桶直方图，可查询 p50/p95/p99 并导出为 Prometheus 文本格式。
+    注册表可与其他组件共用，因此同名指标只能是一种类型：以另一种类型记录
+    已注册的指标名会抛出 ValueError，而不是覆盖原有指标。
+    """
+    
+    _METRIC_TYPES = {
+        "counter": MetricType.COUNTER,
+        "gauge": MetricType.GAUGE,
+        "histogram": MetricType.TIMER,
+    }
+    
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        """
+        Args:
+            registry: 指标注册表 (默认新建独立的注册表)
+        """
+        self.registry = registry or MetricsRegistry()
+        # 本收集器记录过的指标名，clear_metrics 只清除这些，不影响共用注册表中的其他指标
+        self._names = set()
+        self._names_lock = threading.Lock()
     
     def record_counter(self, name: str, value: float = 1, labels: Dict[str, str] = None):
-        """记录计数器指标"""
-        with self._lock:
-            key = f"{name}:{json.dumps(labels or {}, sort_keys=True)}"
-            if key in self.metrics:
-                self.metrics[key].value += value
-                self.metrics[key].timestamp = datetime.now()
-            else:
-                self.metrics[key] = Metric(
-                    name=name,
-                    type=MetricType.COUNTER,
-                    value=value,
-                    timestamp=datetime.now(),
-                    labels=labels or {}
-                )
+        """记录计数器指标 (指标名已注册为其他类型时抛出 ValueError)"""
+        self.registry.inc(name, value, labels)
+        self._track(name)
     
     def record_gauge(self, name: str, value: float, labels: Dict[str, str] = None):
-        """记录仪表盘指标"""
-        with self._lock:
-            key = f"{name}:{json.dumps(labels or {}, sort_keys=True)}"
-            self.metrics[key] = Metric(
-                name=name,
-                type=MetricType.GAUGE,
-                value=value,
-                timestamp=datetime.now(),
-                labels=labels or {}
-            )
+        """记录仪表盘指标 (指标名已注册为其他类型时抛出 ValueError)"""
+        self.registry.set_gauge(name, value, labels)
+        self._track(name)
     
     def record_timer(self, name: str, duration_ms: float, labels: Dict[str, str] = None):
-        """记录计时器指标"""
-        with self._lock:
-            key = f"{name}:{json.dumps(labels or {}, sort_keys=True)}"
-            self.metrics[key] = Metric(
-                name=name,
-                type=MetricType.TIMER,
-                value=duration_ms,
-                timestamp=datetime.now(),
-                labels=labels or {}
-            )
+        """记录计时器指标，写入直方图 (指标名已注册为其他类型时抛出 ValueError)"""
+        self.registry.observe(name, duration_ms, labels)
+        self._track(name)
+    
+    def _track(self, name: str):
+        if name not in self._names:
+            with self._names_lock:
+                self._names.add(name)
     
     def get_metrics(self) -> List[Metric]:
-        """获取所有指标"""
-        with self._lock:
-            return list(self.metrics.values())
+        """获取所有指标 (计时器取最近一次的值)"""
+        return [self._to_metric(sample) for sample in self.registry.collect()]
     
     def get_metric(self, name: str, labels: Dict[str, str] = None) -> Optional[Metric]:
         """获取特定指标"""
-        with self._lock:
-            key = f"{name}:{json.dumps(labels or {}, sort_keys=True)}"
-            return self.metrics.get(key)
+        key = sorted((labels or {}).items())
+        for sample in self.registry.collect(name):
+            if sorted(sample['labels'].items()) == key:
+                return self._to_metric(sample)
+        return None
+    
+    def get_timer_percentiles(self, name: str, labels: Dict[str, str] = None,
+                              percentiles=(50, 95, 99)) -> Dict[str, Optional[float]]:
+        """获取计时器的百分位数
+
+        Args:
+            name: 指标名
+            labels: 标签
+            percentiles: 百分位 (0~100)
+
+        Returns:
+            {"p50": ..., "p95": ..., "p99": ...}，没有样本时值为 None
+        """
+        return self.registry.percentiles(name, labels, percentiles)
+    
+    def render_prometheus(self) -> str:
+        """导出 Prometheus 文本格式"""
+        return self.registry.render_prometheus()
     
     def clear_metrics(self):
-        """清空指标"""
-        with self._lock:
-            self.metrics.clear()
+        """清空本收集器记录过的指标 (共用注册表中的其他指标保留)"""
+        with self._names_lock:
+            names, self._names = self._names, set()
+        for name in names:
+            self.registry.clear(name)
+    
+    def _to_metric(self, sample: Dict[str, Any]) -> Metric:
+        return Metric(
+            name=sample['name'],
+            type=self._METRIC_TYPES[sample['kind']],
+            value=sample['value'],
+            timestamp=datetime.fromtimestamp(sample['updated']),
+            labels=sample['labels'],
+            description=self.registry.get_description(sample['name'])
+        )
 
 class SystemMonitor:
     """系统监控器"""
@@ -397,11 +428,13 @@ class AlertManager:
 class MonitoringSystem:
     """监控系统主类"""
     
-    def __init__(self, log_dir: Path = None):
+    def __init__(self, log_dir: Path = None, registry: Optional[MetricsRegistry] = None):
         self.log_dir = log_dir or Path('logs/monitoring')
         self.log_dir.mkdir(parents=True, exist_ok=True)
         
-        self.collector = MetricCollector()
+        # 默认使用全局注册表，与 PerformanceOptimizer / BatchEngine 的指标共用一个导出端点
+        self.collector = MetricCollector(registry or get_metrics_registry())
+        self._metrics_server = None
         self.system_monitor = SystemMonitor(self.collector)
         self.alert_manager = AlertManager(self.log_dir / 'alerts')
         
@@ -487,12 +520,49 @@ class MonitoringSystem:
         self.system_monitor.stop_monitoring()
     
     def record_business_metric(self, name: str, value: float, labels: Dict[str, str] = None):
-        """记录业务指标"""
-        self.collector.record_gauge(name, value, labels)
+        """记录业务指标 (指标名已被其他类型占用时跳过并打印警告)"""
+        self._record(self.collector.record_gauge, name, value, labels)
     
     def record_operation_time(self, operation: str, duration_ms: float, labels: Dict[str, str] = None):
         """记录操作时间"""
-        self.collector.record_timer(f"operation_duration_{operation}", duration_ms, labels)
+        self._record(self.collector.record_timer, f"operation_duration_{operation}", duration_ms, labels)
+    
+    def record_operation_result(self, operation: str, success: bool):
+        """记录操作成功/失败次数"""
+        outcome = "success" if success else "failure"
+        self._record(self.collector.record_counter, f"operation_{outcome}_{operation}")
+    
+    def _record(self, record: Callable, name: str, *args):
+        """记录指标；类型冲突 (ValueError) 不应影响被监控的业务代码"""
+        try:
+            record(name, *args)
+        except ValueError as e:
+            print(f"⚠️ 指标 {name} 未记录: {e}")
+    
+    def get_prometheus_metrics(self) -> str:
+        """导出 Prometheus 文本格式的全部指标"""
+        return self.collector.render_prometheus()
+    
+    def start_metrics_endpoint(self, port: int = 9464, host: str = '127.0.0.1'):
+        """启动 /metrics 文本导出端点 (后台线程)
+
+        Args:
+            port: 监听端口
+            host: 监听地址
+
+        Returns:
+            HTTP 服务器实例
+        """
+        if self._metrics_server is None:
+            self._metrics_server = start_metrics_server(port, host, self.collector.registry)
+        return self._metrics_server
+    
+    def stop_metrics_endpoint(self):
+        """停止 /metrics 导出端点"""
+        if self._metrics_server is not None:
+            self._metrics_server.shutdown()
+            self._metrics_server.server_close()
+            self._metrics_server = None
     
     def get_monitoring_dashboard(self) -> Dict[str, Any]:
         """获取监控仪表板数据"""
@@ -519,6 +589,10 @@ class MonitoringSystem:
                     'type': metric.type.value,
                     'labels': metric.labels
                 }
+                if metric.type == MetricType.TIMER:
+                    business_metrics[metric.name]['percentiles'] = self.collector.get_timer_percentiles(
+                        metric.name, metric.labels
+                    )
         
         return {
             'system_metrics': system_metrics,
@@ -550,7 +624,7 @@ def monitor_decorator(operation_name: str):
                 # 记录成功操作
                 duration_ms = (time.time() - start_time) * 1000
                 get_monitoring_system().record_operation_time(operation_name, duration_ms)
-                get_monitoring_system().collector.record_counter(f"operation_success_{operation_name}")
+                get_monitoring_system().record_operation_result(operation_name, True)
                 
                 return result
                 
@@ -558,7 +632,7 @@ def monitor_decorator(operation_name: str):
                 # 记录失败操作
                 duration_ms = (time.time() - start_time) * 1000
                 get_monitoring_system().record_operation_time(f"{operation_name}_failed", duration_ms)
-                get_monitoring_system().collector.record_counter(f"operation_failure_{operation_name}")
+                get_monitoring_system().record_operation_result(operation_name, False)
                 
                 raise e
         
@@ -7,7 +7,7 @@
 import json
 import yaml
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Set, Tuple
+from typing import Dict, FrozenSet, Iterable, List, Optional, Any, Set, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 import logging
@@ -53,11 +53,130 @@ class CategoryNode:
             self.updated_at = datetime.now()
 
 
+class CategoryTreeIndex:
+    """分类树的 Euler 序 (先序区间) 索引
+
+    先序遍历 children 链接，每个节点记录进入/离开位置，子树即 order[enter:exit]：
+    祖先/后代判断 O(1)，列出子树 O(k)。根路径沿 parent_id 计算并缓存。
+    子树模板数按模板ID去重：同时引用分类和其子分类的模板在祖先上只计一次。
+    只在分类树结构变化后重建 (CategoryTree.invalidate)。
+    """
+
+    __slots__ = ("order", "enter", "exit", "tour_parent", "paths", "cyclic", "subtree_counts")
+
+    def __init__(self, nodes: Dict[str, CategoryNode], category_templates: Dict[str, FrozenSet[str]]):
+        self.order: List[str] = []
+        self.enter: Dict[str, int] = {}
+        self.exit: Dict[str, int] = {}
+        self.tour_parent: Dict[str, Optional[str]] = {}
+        self.paths: Dict[str, Tuple[str, ...]] = {}
+        self.cyclic: Set[str] = set()
+        self._build_tour(nodes)
+        self._build_paths(nodes)
+        self.subtree_counts = self._sum_subtrees(category_templates)
+
+    def descendants(self, node_id: str) -> List[str]:
+        """后代节点 (先序)"""
+        return self.order[self.enter[node_id] + 1:self.exit[node_id]]
+
+    def is_descendant(self, node_id: str, ancestor_id: str) -> bool:
+        """node_id 是否在 ancestor_id 的子树中 (不含自身)"""
+        if node_id not in self.enter or ancestor_id not in self.enter:
+            return False
+        return self.enter[ancestor_id] < self.enter[node_id] < self.exit[ancestor_id]
+
+    def _build_tour(self, nodes: Dict[str, CategoryNode]):
+        # 不是任何节点子节点的先遍历；剩余 (只在环中出现的) 节点随后补上，每个节点只访问一次
+        child_ids = {child_id for node in nodes.values() for child_id in node.children}
+        starts = [node_id for node_id in nodes if node_id not in child_ids] + list(nodes)
+
+        for start_id in starts:
+            if start_id in self.enter:
+                continue
+            self.enter[start_id] = len(self.order)
+            self.tour_parent[start_id] = None
+            self.order.append(start_id)
+            stack = [(start_id, iter(nodes[start_id].children))]
+            while stack:
+                node_id, children = stack[-1]
+                for child_id in children:
+                    if child_id in nodes and child_id not in self.enter:
+                        self.enter[child_id] = len(self.order)
+                        self.tour_parent[child_id] = node_id
+                        self.order.append(child_id)
+                        stack.append((child_id, iter(nodes[child_id].children)))
+                        break
+                else:
+                    stack.pop()
+                    self.exit[node_id] = len(self.order)
+
+    def _build_paths(self, nodes: Dict[str, CategoryNode]):
+        for node_id in nodes:
+            chain = []
+            seen = set()
+            current_id = node_id
+            while current_id and current_id in nodes and current_id not in self.paths and current_id not in seen:
+                seen.add(current_id)
+                chain.append(current_id)
+                current_id = nodes[current_id].parent_id
+
+            if current_id in seen:
+                # parent_id 链成环：路径以重复出现的节点开头，链上节点全部标记为循环引用
+                self.cyclic.update(chain)
+                for position in range(len(chain)):
+                    self.paths[chain[position]] = (current_id,) + tuple(reversed(chain[position:]))
+                continue
+
+            path = self.paths.get(current_id, ())
+            if current_id in self.cyclic:
+                self.cyclic.update(chain)
+            for chain_id in reversed(chain):
+                path = path + (chain_id,)
+                self.paths[chain_id] = path
+
+    def _sum_subtrees(self, category_templates: Dict[str, FrozenSet[str]]) -> Dict[str, int]:
+        # 子树模板数 = 子树内各分类模板集合的并集大小；
+        # 逐个模板沿遍历树向上计数，已计过的祖先链不再重复
+        nodes_by_template: Dict[str, List[str]] = {}
+        for node_id, template_ids in category_templates.items():
+            if node_id in self.enter:
+                for template_id in template_ids:
+                    nodes_by_template.setdefault(template_id, []).append(node_id)
+
+        counts = dict.fromkeys(self.order, 0)
+        for node_ids in nodes_by_template.values():
+            counted = set()
+            for node_id in node_ids:
+                while node_id is not None and node_id not in counted:
+                    counted.add(node_id)
+                    counts[node_id] += 1
+                    node_id = self.tour_parent[node_id]
+        return counts
+
+
 @dataclass
 class CategoryTree:
-    """分类树结构"""
+    """分类树结构
+
+    路径、后代和结构校验查询基于 CategoryTreeIndex，首次查询时构建并缓存；
+    add_node/remove_node 会使索引失效，直接修改节点的 parent_id/children 后需调用 invalidate()。
+    """
     nodes: Dict[str, CategoryNode] = field(default_factory=dict)
     root_categories: List[str] = field(default_factory=list)
+    _index: Optional[CategoryTreeIndex] = field(default=None, init=False, repr=False, compare=False)
+    _category_templates: Dict[str, FrozenSet[str]] = field(default_factory=dict, init=False, repr=False,
+                                                           compare=False)
+    
+    def invalidate(self):
+        """分类结构变化后使索引失效"""
+        self._index = None
+    
+    @property
+    def index(self) -> CategoryTreeIndex:
+        """分类树索引 (按需重建)"""
+        if self._index is None:
+            self._index = CategoryTreeIndex(self.nodes, self._category_templates)
+        return self._index
     
     def add_node(self, node: CategoryNode):
         """添加节点"""
@@ -65,6 +184,7 @@ class CategoryTree:
         if not node.parent_id:
             if node.id not in self.root_categories:
                 self.root_categories.append(node.id)
+        self.invalidate()
     
     def remove_node(self, node_id: str) -> bool:
         """移除节点"""
@@ -93,44 +213,70 @@ class CategoryTree:
         
         # 删除节点
         del self.nodes[node_id]
+        self.invalidate()
         return True
     
     def get_path(self, node_id: str) -> List[str]:
         """获取节点路径"""
-        path = []
-        current_id = node_id
-        
-        while current_id and current_id in self.nodes:
-            path.insert(0, current_id)
-            current_id = self.nodes[current_id].parent_id
-        
-        return path
+        return list(self.index.paths.get(node_id, ()))
+    
+    def get_depth(self, node_id: str) -> int:
+        """节点深度 (根分类为 1，不存在时为 0)"""
+        return len(self.index.paths.get(node_id, ()))
     
     def get_descendants(self, node_id: str) -> List[str]:
-        """获取所有后代节点"""
+        """获取所有后代节点 (先序)"""
         if node_id not in self.nodes:
             return []
+        return self.index.descendants(node_id)
+    
+    def is_descendant(self, node_id: str, ancestor_id: str) -> bool:
+        """node_id 是否是 ancestor_id 的后代 (O(1))"""
+        return self.index.is_descendant(node_id, ancestor_id)
+    
+    def set_category_templates(self, category_templates: Dict[str, Iterable[str]]):
+        """设置各分类直接引用的模板，子树合计 (按模板ID去重) 随索引一起预计算
         
-        descendants = []
-        queue = [node_id]
-        
-        while queue:
-            current_id = queue.pop(0)
-            if current_id in self.nodes:
-                children = self.nodes[current_id].children
-                descendants.extend(children)
-                queue.extend(children)
+        Args:
+            category_templates: 分类ID -> 模板ID集合
+        """
+        self._category_templates = {
+            node_id: frozenset(template_ids) for node_id, template_ids in category_templates.items()
+        }
+        self.invalidate()
+    
+    @property
+    def category_templates(self) -> Dict[str, FrozenSet[str]]:
+        """各分类直接引用的模板ID"""
+        return dict(self._category_templates)
+    
+    @property
+    def template_counts(self) -> Dict[str, int]:
+        """各分类直接包含的模板数"""
+        return {node_id: len(template_ids) for node_id, template_ids in self._category_templates.items()}
+    
+    def get_template_count(self, node_id: str, include_descendants: bool = True) -> int:
+        """获取分类的模板数
         
-        return descendants
+        Args:
+            node_id: 分类ID
+            include_descendants: 是否包含所有后代分类的模板
+            
+        Returns:
+            模板数
+        """
+        if not include_descendants:
+            return len(self._category_templates.get(node_id, ()))
+        return self.index.subtree_counts.get(node_id, 0)
     
     def validate_structure(self) -> Tuple[bool, List[str]]:
         """验证树结构的完整性"""
         errors = []
         
         # 检查循环引用
+        cyclic = self.index.cyclic
         for node_id in self.nodes:
-            path = self.get_path(node_id)
-            if len(path) != len(set(path)):
+            if node_id in cyclic:
                 errors.append(f"检测到循环引用: {node_id}")
         
         # 检查孤儿节点
@@ -304,6 +450,7 @@ class CategoryOrganizer:
         # 更新父节点
         if parent_id and parent_id in self.category_tree.nodes:
             self.category_tree.nodes[parent_id].add_child(category_id)
+        self.category_tree.invalidate()
         
         logger.info(f"创建分类成功: {category_id}")
         return True
@@ -356,6 +503,7 @@ class CategoryOrganizer:
             node.metadata.update(metadata)
         
         node.updated_at = datetime.now()
+        self.category_tree.invalidate()
         
         logger.info(f"更新分类成功: {category_id}")
         return True
@@ -426,6 +574,38 @@ class CategoryOrganizer:
         """
         return self.category_tree.get_path(category_id)
     
+    def is_descendant(self, category_id: str, ancestor_id: str) -> bool:
+        """判断分类是否位于另一个分类的子树中
+        
+        Args:
+            category_id: 分类ID
+            ancestor_id: 祖先分类ID
+            
+        Returns:
+            是否为后代 (不含自身)
+        """
+        return self.category_tree.is_descendant(category_id, ancestor_id)
+    
+    def set_category_templates(self, category_templates: Dict[str, Iterable[str]]):
+        """设置各分类直接引用的模板 (由 ReferenceManager 等根据引用索引提供)
+        
+        Args:
+            category_templates: 分类ID -> 模板ID集合
+        """
+        self.category_tree.set_category_templates(category_templates)
+    
+    def get_template_count(self, category_id: str, include_descendants: bool = True) -> int:
+        """获取分类的模板数
+        
+        Args:
+            category_id: 分类ID
+            include_descendants: 是否包含所有后代分类的模板
+            
+        Returns:
+            模板数
+        """
+        return self.category_tree.get_template_count(category_id, include_descendants)
+    
     def get_category_hierarchy(self, category_id: str) -> Dict[str, Any]:
         """获取分类层级结构
         
@@ -475,10 +655,9 @@ class CategoryOrganizer:
             logger.error(f"新父分类不存在: {new_parent_id}")
             return False
         
-        # 检查是否会造成循环引用
+        # 检查是否会造成循环引用 (新父分类是自身或自身的后代)
         if new_parent_id:
-            descendants = self.category_tree.get_descendants(category_id)
-            if new_parent_id in descendants:
+            if new_parent_id == category_id or self.category_tree.is_descendant(new_parent_id, category_id):
                 logger.error(f"移动会造成循环引用: {category_id} -> {new_parent_id}")
                 return False
         
@@ -502,6 +681,7 @@ class CategoryOrganizer:
             # 移动到根级别
             if category_id not in self.category_tree.root_categories:
                 self.category_tree.root_categories.append(category_id)
+        self.category_tree.invalidate()
         
         logger.info(f"移动分类成功: {category_id} -> {new_parent_id}")
         return True
@@ -565,10 +745,7 @@ class CategoryOrganizer:
         root_categories = len(self.category_tree.root_categories)
         
         # 计算层级深度
-        max_depth = 0
-        for node_id in self.category_tree.nodes:
-            path = self.category_tree.get_path(node_id)
-            max_depth = max(max_depth, len(path))
+        max_depth = max((self.category_tree.get_depth(node_id) for node_id in self.category_tree.nodes), default=0)
         
         # 计算子分类数量分布
         subcategory_counts = {}
@@ -581,7 +758,11 @@ class CategoryOrganizer:
             'root_categories': root_categories,
             'max_depth': max_depth,
             'subcategory_distribution': subcategory_counts,
-            'tree_valid': self.category_tree.validate_structure()[0]
+            'tree_valid': self.category_tree.validate_structure()[0],
+            'template_counts': {
+                node_id: self.category_tree.get_template_count(node_id)
+                for node_id in self.category_tree.nodes
+            }
         }
     
     def export_categories(self, format_type: str = 'yaml') -> str:
@@ -643,8 +824,10 @@ class CategoryOrganizer:
             categories = data.get('categories', {})
             
             if merge_mode == 'replace':
-                # 完全替换
+                # 完全替换 (保留已设置的模板引用)
+                category_templates = self.category_tree.category_templates
                 self.category_tree = CategoryTree()
+                self.category_tree.set_category_templates(category_templates)
             
             # 导入分类
             for category_id, category_data in categories.items():
@@ -4,12 +4,15 @@
 负责模板库导入导出、跨环境迁移和数据完整性验证
 """
 
+import os
 import json
 import shutil
 import zipfile
 import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 from typing import Dict, List, Optional, Any, Set, Tuple
 from dataclasses import dataclass, field, asdict
 from enum import Enum
@@ -22,6 +25,27 @@ from ..models.operations import (
 )
 from .config_manager import ConfigManager
 from .version_controller import VersionController
+from .object_store import HASH_ALGORITHM, READ_CHUNK_SIZE, hash_file, new_hasher
+
+
+# 迁移清单文件名
+MANIFEST_NAME = "migration_manifest.json"
+
+# 版本对象在导出包中的目录 (versions/.objects/<哈希>)
+OBJECTS_ARCHIVE_DIR = ".objects"
+
+# 已压缩的格式：写入归档时直接存储，不再重复 DEFLATE
+STORED_SUFFIXES = {
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.heic',
+    '.zip', '.gz', '.bz2', '.xz', '.7z',
+    '.mp3', '.mp4', '.mov', '.webm', '.woff', '.woff2', '.pdf'
+}
+
+# 不超过该大小的文本文件由线程池预读并计算哈希，较大的文件在写入时流式处理
+PREFETCH_MAX_BYTES = 4 * 1024 * 1024
+
+# DEFLATE 压缩级别
+DEFAULT_COMPRESS_LEVEL = 6
 
 
 class MigrationMode(Enum):
@@ -75,6 +99,10 @@ class MigrationManifest:
     created_by: str = ""
     description: str = ""
     
+    # 文件清单 (导出包内路径 -> {"hash", "size"})，导入时逐文件校验
+    files: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    hash_algorithm: str = HASH_ALGORITHM
+    
     def __post_init__(self):
         if isinstance(self.export_timestamp, str):
             self.export_timestamp = datetime.fromisoformat(self.export_timestamp)
@@ -82,6 +110,117 @@ class MigrationManifest:
             self.migration_mode = MigrationMode(self.migration_mode)
 
 
+def _is_stored_file(file_path: Path) -> bool:
+    """是否为已压缩格式 (写入归档时不再压缩)"""
+    return file_path.suffix.lower() in STORED_SUFFIXES
+
+
+def _prefetch_file(file_path: Path) -> Optional[Tuple[bytes, str]]:
+    """预读小文件并计算哈希，文件过大时返回 None (由写入方流式处理)"""
+    if file_path.stat().st_size > PREFETCH_MAX_BYTES:
+        return None
+    data = file_path.read_bytes()
+    hasher = new_hasher()
+    hasher.update(data)
+    return data, hasher.hexdigest()
+
+
+def _export_template_name(arcname: str) -> Optional[str]:
+    """导出包内路径所属的模板名 (templates/<模板名>/...)，其他条目返回 None"""
+    parts = arcname.split('/')
+    if parts[0] == "templates" and len(parts) >= 3:
+        return parts[1]
+    return None
+
+
+def _safe_relative_path(arcname: str) -> Optional[PurePosixPath]:
+    """校验导出包内路径，拒绝绝对路径和 .. (防止解压到目标目录之外)"""
+    member_path = PurePosixPath(arcname)
+    if member_path.is_absolute() or not member_path.parts or '..' in member_path.parts or ':' in member_path.parts[0]:
+        return None
+    return member_path
+
+
+class _ArchiveExportWriter:
+    """导出到 zip：图片等已压缩文件直接存储，文本文件 DEFLATE，写入时同步计算哈希"""
+    
+    def __init__(self, target_path: Path, compresslevel: int = DEFAULT_COMPRESS_LEVEL):
+        self.target_path = target_path
+        self.zipf = zipfile.ZipFile(target_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+    
+    def write_file(self, source_path: Path, arcname: str,
+                   prefetched: Optional[Tuple[bytes, str]] = None) -> Dict[str, Any]:
+        """写入单个文件，返回 {"hash", "size"}"""
+        zinfo = zipfile.ZipInfo.from_file(source_path, arcname)
+        zinfo.compress_type = zipfile.ZIP_STORED if _is_stored_file(source_path) else zipfile.ZIP_DEFLATED
+        
+        if prefetched is not None:
+            data, file_hash = prefetched
+            with self.zipf.open(zinfo, 'w') as target:
+                target.write(data)
+            return {"hash": file_hash, "size": len(data)}
+        
+        hasher = new_hasher()
+        size = 0
+        with open(source_path, 'rb') as source, self.zipf.open(zinfo, 'w') as target:
+            for chunk in iter(lambda: source.read(READ_CHUNK_SIZE), b''):
+                hasher.update(chunk)
+                target.write(chunk)
+                size += len(chunk)
+        return {"hash": hasher.hexdigest(), "size": size}
+    
+    def write_bytes(self, arcname: str, data: bytes):
+        """写入生成的内容 (如迁移清单)"""
+        self.zipf.writestr(arcname, data)
+    
+    def discard(self, prefix: str):
+        """放弃已写入的条目：zip 条目无法删除，未列入清单的条目在导入时被忽略"""
+    
+    def close(self):
+        self.zipf.close()
+
+
+class _DirectoryExportWriter:
+    """导出到目录：逐个文件复制到目标位置，复制时同步计算哈希"""
+    
+    def __init__(self, target_path: Path):
+        self.target_path = target_path
+        self.target_path.mkdir(parents=True, exist_ok=True)
+    
+    def write_file(self, source_path: Path, arcname: str,
+                   prefetched: Optional[Tuple[bytes, str]] = None) -> Dict[str, Any]:
+        """写入单个文件，返回 {"hash", "size"}"""
+        target_file = self.target_path / arcname
+        target_file.parent.mkdir(parents=True, exist_ok=True)
+        
+        if prefetched is not None:
+            data, file_hash = prefetched
+            target_file.write_bytes(data)
+            shutil.copystat(source_path, target_file)
+            return {"hash": file_hash, "size": len(data)}
+        
+        hasher = new_hasher()
+        size = 0
+        with open(source_path, 'rb') as source, open(target_file, 'wb') as target:
+            for chunk in iter(lambda: source.read(READ_CHUNK_SIZE), b''):
+                hasher.update(chunk)
+                target.write(chunk)
+                size += len(chunk)
+        shutil.copystat(source_path, target_file)
+        return {"hash": hasher.hexdigest(), "size": size}
+    
+    def write_bytes(self, arcname: str, data: bytes):
+        """写入生成的内容 (如迁移清单)"""
+        (self.target_path / arcname).write_bytes(data)
+    
+    def discard(self, prefix: str):
+        """删除已写入的条目 (跳过的模板目录)"""
+        shutil.rmtree(self.target_path / prefix, ignore_errors=True)
+    
+    def close(self):
+        pass
+
+
 class MigrationTool:
     """迁移工具"""
     
@@ -112,16 +251,21 @@ class MigrationTool:
         migration_filter: Optional[MigrationFilter] = None,
         migration_mode: MigrationMode = MigrationMode.FULL,
         include_versions: bool = False,
-        compress: bool = True
+        compress: bool = True,
+        max_workers: Optional[int] = None
     ) -> ExportResult:
         """导出模板库
         
+        模板文件直接流式写入导出包 (不经过临时目录)，写入时同步计算
+        每个文件的哈希并记录到迁移清单；压缩时图片等已压缩格式直接存储。
+        
         Args:
             export_path: 导出路径
             migration_filter: 迁移过滤器
             migration_mode: 迁移模式
             include_versions: 是否包含版本历史
             compress: 是否压缩
+            max_workers: 预读文件的线程数 (默认 min(8, CPU 核数))
             
         Returns:
             导出结果
@@ -141,61 +285,66 @@ class MigrationTool:
                 result.mark_completed(False, "没有找到符合条件的模板")
                 return result
             
-            # 创建临时导出目录
-            temp_export_dir = self.temp_dir / export_id
-            temp_export_dir.mkdir(parents=True, exist_ok=True)
-            
-            # 导出模板
-            exported_templates = []
-            total_size = 0
-            
-            for template_path in templates_to_export:
-                try:
-                    # 复制模板文件
-                    template_name = template_path.name
-                    target_dir = temp_export_dir / "templates" / template_name
-                    
-                    shutil.copytree(template_path, target_dir)
-                    
-                    # 计算大小
-                    template_size = self._calculate_directory_size(target_dir)
-                    total_size += template_size
-                    
-                    exported_templates.append(template_name)
-                    result.add_template(template_name)
-                    
-                except Exception as e:
-                    result.add_error(f"导出模板 {template_path.name} 失败: {str(e)}")
-                    continue
+            # 收集导出条目 (源文件, 导出包内路径)
+            entries, exported_templates, template_stats = self._collect_export_entries(
+                templates_to_export, result
+            )
             
             # 导出版本历史（如果需要）
             if include_versions:
-                self._export_version_history(temp_export_dir, exported_templates)
+                entries.extend(self._version_history_entries(exported_templates))
             
             # 导出配置文件
-            self._export_global_configs(temp_export_dir)
+            entries.extend(self._global_config_entries())
             
-            # 创建迁移清单
-            manifest = self._create_migration_manifest(
-                export_id, migration_mode, exported_templates, migration_filter
-            )
-            self._save_migration_manifest(temp_export_dir, manifest)
-            
-            # 压缩或复制到目标位置
+            # 写入临时文件，完成后再替换到目标位置
             if compress:
-                final_path = self._compress_export(temp_export_dir, export_path)
+                final_path = export_path if export_path.suffix else export_path.with_suffix('.zip')
             else:
                 final_path = export_path
-                if final_path.exists():
-                    shutil.rmtree(final_path)
-                shutil.copytree(temp_export_dir, final_path)
+            if final_path.is_dir() and (compress or not self._is_export_directory(final_path)):
+                # 只替换空目录或上一次的目录导出，不删除无关目录
+                result.mark_completed(False, f"导出路径已存在且不是导出目录: {final_path}")
+                return result
+            partial_path = final_path.with_name(f".{final_path.name}.{export_id}.partial")
+            partial_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # 清理临时目录
-            shutil.rmtree(temp_export_dir)
+            writer = _ArchiveExportWriter(partial_path) if compress else _DirectoryExportWriter(partial_path)
+            try:
+                files_manifest, skipped_templates = self._write_export_entries(
+                    writer, entries, result, max_workers
+                )
+                for template_name in skipped_templates:
+                    exported_templates.remove(template_name)
+                    template_stats.pop(template_name, None)
+                    result.exported_templates.remove(template_name)
+                if not exported_templates:
+                    raise ValueError("所有模板都导出失败")
+                
+                # 创建迁移清单 (最后写入，包含全部文件哈希)
+                manifest = self._create_migration_manifest(
+                    export_id, migration_mode, exported_templates, migration_filter, template_stats
+                )
+                manifest.files = files_manifest
+                writer.write_bytes(MANIFEST_NAME, self._serialize_migration_manifest(manifest))
+            except Exception:
+                writer.close()
+                if partial_path.is_dir():
+                    shutil.rmtree(partial_path, ignore_errors=True)
+                elif partial_path.exists():
+                    partial_path.unlink()
+                raise
+            writer.close()
+            
+            if not compress and final_path.is_dir():
+                shutil.rmtree(final_path)
+            os.replace(partial_path, final_path)
             
             # 更新结果
+            total_size = sum(stats["size_bytes"] for stats in template_stats.values())
             result.export_path = str(final_path)
             result.total_templates = len(exported_templates)
+            result.total_files = len(files_manifest)
             result.total_size_mb = round(total_size / 1024 / 1024, 2)
             result.file_size_mb = round(self._get_file_size(final_path) / 1024 / 1024, 2)
             
@@ -206,6 +355,103 @@ class MigrationTool:
         
         return result
     
+    def _collect_export_entries(
+        self,
+        template_paths: List[Path],
+        result: ExportResult
+    ) -> Tuple[List[Tuple[Path, str]], List[str], Dict[str, Dict[str, int]]]:
+        """收集模板文件的导出条目
+        
+        Returns:
+            (导出条目列表, 导出的模板名列表, 模板名 -> {"size_bytes", "file_count"})
+        """
+        entries = []
+        exported_templates = []
+        template_stats = {}
+        
+        for template_path in template_paths:
+            template_name = template_path.name
+            try:
+                template_entries = []
+                template_size = 0
+                for file_path in sorted(template_path.rglob("*")):
+                    if file_path.is_file():
+                        relative_path = file_path.relative_to(template_path).as_posix()
+                        template_entries.append((file_path, f"templates/{template_name}/{relative_path}"))
+                        template_size += file_path.stat().st_size
+            except OSError as e:
+                result.add_error(f"导出模板 {template_name} 失败: {str(e)}")
+                continue
+            
+            entries.extend(template_entries)
+            exported_templates.append(template_name)
+            template_stats[template_name] = {"size_bytes": template_size, "file_count": len(template_entries)}
+            result.add_template(template_name)
+        
+        return entries, exported_templates, template_stats
+    
+    def _write_export_entries(
+        self,
+        writer,
+        entries: List[Tuple[Path, str]],
+        result: ExportResult,
+        max_workers: Optional[int] = None
+    ) -> Tuple[Dict[str, Dict[str, Any]], Set[str]]:
+        """按顺序写入导出条目
+        
+        文本文件由线程池提前读取并计算哈希 (有界预读窗口)，
+        与写入线程中的压缩和大文件流式复制重叠进行。
+        某个模板的文件读取失败时跳过整个模板 (其条目不写入清单) 并记录错误，
+        其余模板继续导出；全局配置或版本文件失败时只跳过该文件。
+        
+        Returns:
+            (导出包内路径 -> {"hash", "size"}, 跳过的模板名集合)
+        """
+        workers = max_workers or min(8, os.cpu_count() or 1)
+        window = workers * 4
+        files_manifest = {}
+        skipped_templates: Set[str] = set()
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            entry_iter = iter(entries)
+            
+            def submit_next() -> bool:
+                for source_path, arcname in entry_iter:
+                    future = None if _is_stored_file(source_path) else executor.submit(_prefetch_file, source_path)
+                    pending.append((source_path, arcname, future))
+                    return True
+                return False
+            
+            while len(pending) < window and submit_next():
+                pass
+            
+            while pending:
+                source_path, arcname, future = pending.popleft()
+                submit_next()
+                template_name = _export_template_name(arcname)
+                if template_name in skipped_templates:
+                    continue
+                try:
+                    prefetched = future.result() if future is not None else None
+                    files_manifest[arcname] = writer.write_file(source_path, arcname, prefetched)
+                except OSError as e:
+                    if template_name is None:
+                        result.add_error(f"导出文件 {arcname} 失败: {str(e)}")
+                        continue
+                    prefix = f"templates/{template_name}/"
+                    for written in [name for name in files_manifest if name.startswith(prefix)]:
+                        del files_manifest[written]
+                    writer.discard(prefix)
+                    skipped_templates.add(template_name)
+                    result.add_error(f"导出模板 {template_name} 失败: {str(e)}")
+        
+        return files_manifest, skipped_templates
+    
+    def _is_export_directory(self, directory: Path) -> bool:
+        """目录是否为空或是上一次的目录导出 (可被新的导出替换)"""
+        return (directory / MANIFEST_NAME).is_file() or not any(directory.iterdir())
+    
     def _get_filtered_templates(self, migration_filter: Optional[MigrationFilter]) -> List[Path]:
         """获取过滤后的模板列表"""
         all_templates = []
@@ -312,42 +558,61 @@ class MigrationTool:
         except (OSError, FileNotFoundError):
             return 0
     
-    def _export_version_history(self, export_dir: Path, template_names: List[str]):
-        """导出版本历史"""
-        versions_dir = export_dir / "versions"
-        versions_dir.mkdir(parents=True, exist_ok=True)
+    def _version_history_entries(self, template_names: List[str]) -> List[Tuple[Path, str]]:
+        """版本历史的导出条目 (快照文件及其引用的对象)"""
+        entries = []
+        referenced_objects = set()
         
         for template_name in template_names:
             try:
-                # 复制版本历史
                 source_version_dir = self.version_controller.versions_root / template_name
-                if source_version_dir.exists():
-                    target_version_dir = versions_dir / template_name
-                    shutil.copytree(source_version_dir, target_version_dir)
+                if not source_version_dir.exists():
+                    continue
+                
+                for file_path in sorted(source_version_dir.rglob("*")):
+                    if file_path.is_file():
+                        relative_path = file_path.relative_to(source_version_dir).as_posix()
+                        entries.append((file_path, f"versions/{template_name}/{relative_path}"))
+                
+                for snapshot in self.version_controller.get_version_history(template_name).versions:
+                    if snapshot.hash_algorithm == HASH_ALGORITHM:
+                        referenced_objects.update(snapshot.files.values())
             except Exception as e:
                 print(f"导出版本历史失败 {template_name}: {e}")
+        
+        object_store = self.version_controller.object_store
+        for object_hash in sorted(referenced_objects):
+            if object_store.has_object(object_hash):
+                entries.append((object_store.object_path(object_hash), f"versions/{OBJECTS_ARCHIVE_DIR}/{object_hash}"))
+        
+        return entries
     
-    def _export_global_configs(self, export_dir: Path):
-        """导出全局配置"""
-        config_dir = export_dir / "config"
-        config_dir.mkdir(parents=True, exist_ok=True)
+    def _global_config_entries(self) -> List[Tuple[Path, str]]:
+        """全局配置的导出条目"""
+        entries = []
         
-        # 复制配置文件
         source_config_dir = self.templates_root / "config"
         if source_config_dir.exists():
-            for config_file in source_config_dir.glob("*.yaml"):
-                shutil.copy2(config_file, config_dir)
-            for config_file in source_config_dir.glob("*.json"):
-                shutil.copy2(config_file, config_dir)
+            for pattern in ("*.yaml", "*.json"):
+                for config_file in sorted(source_config_dir.glob(pattern)):
+                    if config_file.is_file():
+                        entries.append((config_file, f"config/{config_file.name}"))
+        
+        return entries
     
     def _create_migration_manifest(
         self,
         export_id: str,
         migration_mode: MigrationMode,
         template_names: List[str],
-        migration_filter: Optional[MigrationFilter]
+        migration_filter: Optional[MigrationFilter],
+        template_stats: Optional[Dict[str, Dict[str, int]]] = None
     ) -> MigrationManifest:
-        """创建迁移清单"""
+        """创建迁移清单
+        
+        Args:
+            template_stats: 导出时已统计的模板大小和文件数 (缺省时重新扫描目录)
+        """
         # 收集模板信息
         templates_info = []
         total_size = 0
@@ -362,7 +627,13 @@ class MigrationTool:
                     config_data = json.load(f)
                 
                 # 计算大小
-                template_size = self._calculate_directory_size(template_path)
+                stats = (template_stats or {}).get(template_name)
+                if stats is not None:
+                    template_size = stats["size_bytes"]
+                    file_count = stats["file_count"]
+                else:
+                    template_size = self._calculate_directory_size(template_path)
+                    file_count = len(list(template_path.rglob("*")))
                 total_size += template_size
                 
                 template_info = {
@@ -373,7 +644,7 @@ class MigrationTool:
                     "status": config_data.get("status", ""),
                     "version": config_data.get("version", "1.0.0"),
                     "size_bytes": template_size,
-                    "file_count": len(list(template_path.rglob("*")))
+                    "file_count": file_count
                 }
                 
                 templates_info.append(template_info)
@@ -393,10 +664,8 @@ class MigrationTool:
             created_by="migration_tool"
         )
     
-    def _save_migration_manifest(self, export_dir: Path, manifest: MigrationManifest):
-        """保存迁移清单"""
-        manifest_path = export_dir / "migration_manifest.json"
-        
+    def _serialize_migration_manifest(self, manifest: MigrationManifest) -> bytes:
+        """序列化迁移清单"""
         # 转换为字典
         manifest_data = asdict(manifest)
         manifest_data["export_timestamp"] = manifest.export_timestamp.isoformat()
@@ -410,21 +679,7 @@ class MigrationTool:
                 filter_data["date_range"] = [start_date.isoformat(), end_date.isoformat()]
             manifest_data["filter_criteria"] = filter_data
         
-        with open(manifest_path, 'w', encoding='utf-8') as f:
-            json.dump(manifest_data, f, ensure_ascii=False, indent=2)
-    
-    def _compress_export(self, source_dir: Path, target_path: Path) -> Path:
-        """压缩导出文件"""
-        if not target_path.suffix:
-            target_path = target_path.with_suffix('.zip')
-        
-        with zipfile.ZipFile(target_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_path in source_dir.rglob("*"):
-                if file_path.is_file():
-                    arcname = file_path.relative_to(source_dir)
-                    zipf.write(file_path, arcname)
-        
-        return target_path
+        return json.dumps(manifest_data, ensure_ascii=False, indent=2).encode('utf-8')
     
     def import_templates(
         self,
@@ -435,6 +690,10 @@ class MigrationTool:
     ) -> ImportResult:
         """导入模板库
         
+        zip 导入包先全部流式解压到模板库旁的暂存目录，解压时按清单校验
+        文件哈希并检查模板配置；全部通过后才移动到目标位置，任何一项失败
+        都不导入 (模板库保持不变)。目录导入直接从源目录复制。
+        
         Args:
             import_path: 导入路径
             conflict_resolution: 冲突解决策略
@@ -454,63 +713,18 @@ class MigrationTool:
         )
         
         try:
-            # 解压或复制到临时目录
-            temp_import_dir = self.temp_dir / import_id
-            temp_import_dir.mkdir(parents=True, exist_ok=True)
-            
             if import_path.suffix == '.zip':
-                self._extract_import(import_path, temp_import_dir)
+                with zipfile.ZipFile(import_path, 'r') as zipf:
+                    completed = self._import_from_archive(
+                        zipf, import_id, result, conflict_resolution, validate_integrity, create_backup
+                    )
             else:
-                shutil.copytree(import_path, temp_import_dir, dirs_exist_ok=True)
-            
-            # 加载迁移清单
-            manifest = self._load_migration_manifest(temp_import_dir)
-            if manifest:
-                result.total_templates = manifest.total_templates
-            
-            # 验证完整性
-            if validate_integrity:
-                integrity_check = self._validate_import_integrity(temp_import_dir, manifest)
-                if not integrity_check["valid"]:
-                    result.add_error(f"完整性验证失败: {integrity_check['error']}")
-                    result.mark_completed(False, "导入验证失败")
-                    return result
-            
-            # 创建备份
-            if create_backup:
-                self._create_import_backup()
+                completed = self._import_from_directory(
+                    import_path, result, conflict_resolution, validate_integrity, create_backup
+                )
             
-            # 导入模板
-            templates_dir = temp_import_dir / "templates"
-            if templates_dir.exists():
-                for template_dir in templates_dir.iterdir():
-                    if template_dir.is_dir():
-                        import_result = self._import_single_template(
-                            template_dir, conflict_resolution
-                        )
-                        
-                        if import_result["success"]:
-                            result.add_imported_template(template_dir.name)
-                        else:
-                            result.add_failed_template(template_dir.name)
-                            result.add_error(f"{template_dir.name}: {import_result['error']}")
-                        
-                        # 处理冲突
-                        if "conflict" in import_result:
-                            result.add_conflict(
-                                template_dir.name,
-                                import_result["conflict"]["type"],
-                                import_result["conflict"]["details"]
-                            )
-            
-            # 导入全局配置
-            self._import_global_configs(temp_import_dir)
-            
-            # 导入版本历史
-            self._import_version_history(temp_import_dir)
-            
-            # 清理临时目录
-            shutil.rmtree(temp_import_dir)
+            if not completed:
+                return result
             
             # 更新结果
             success_rate = (result.successful_imports / result.total_templates * 100) if result.total_templates > 0 else 0
@@ -528,14 +742,198 @@ class MigrationTool:
         
         return result
     
-    def _extract_import(self, zip_path: Path, target_dir: Path):
-        """解压导入文件"""
-        with zipfile.ZipFile(zip_path, 'r') as zipf:
-            zipf.extractall(target_dir)
+    def _import_from_directory(
+        self,
+        import_dir: Path,
+        result: ImportResult,
+        conflict_resolution: ConflictResolution,
+        validate_integrity: bool,
+        create_backup: bool
+    ) -> bool:
+        """从导出目录导入，验证失败时返回 False"""
+        # 加载迁移清单
+        manifest = self._load_migration_manifest(import_dir)
+        if manifest:
+            result.total_templates = manifest.total_templates
+        
+        # 验证完整性
+        if validate_integrity:
+            integrity_check = self._validate_import_integrity(import_dir, manifest)
+            if not integrity_check["valid"]:
+                result.add_error(f"完整性验证失败: {integrity_check['error']}")
+                result.mark_completed(False, "导入验证失败")
+                return False
+        
+        # 创建备份
+        if create_backup:
+            self._create_import_backup()
+        
+        # 导入模板
+        templates_dir = import_dir / "templates"
+        if templates_dir.exists():
+            for template_dir in templates_dir.iterdir():
+                if template_dir.is_dir():
+                    import_result = self._import_single_template(template_dir, conflict_resolution)
+                    self._record_import_result(result, template_dir.name, import_result)
+        
+        # 导入全局配置
+        self._import_global_configs(import_dir)
+        
+        # 导入版本历史
+        self._import_version_history(import_dir)
+        
+        return True
+    
+    def _import_from_archive(
+        self,
+        zipf: zipfile.ZipFile,
+        import_id: str,
+        result: ImportResult,
+        conflict_resolution: ConflictResolution,
+        validate_integrity: bool,
+        create_backup: bool
+    ) -> bool:
+        """从 zip 导入包流式导入，先暂存并校验全部内容再提交，验证失败时返回 False"""
+        # 加载迁移清单
+        manifest = self._read_archive_manifest(zipf)
+        if manifest:
+            result.total_templates = manifest.total_templates
+        
+        template_members, shared_members = self._group_archive_members(zipf, manifest)
+        
+        # 验证完整性 (只检查目录结构，文件哈希在解压时校验)
+        if validate_integrity:
+            integrity_check = self._validate_archive_integrity(zipf, template_members, manifest)
+            if not integrity_check["valid"]:
+                result.add_error(f"完整性验证失败: {integrity_check['error']}")
+                result.mark_completed(False, "导入验证失败")
+                return False
+        
+        expected_files = {}
+        if validate_integrity and manifest and manifest.hash_algorithm == HASH_ALGORITHM:
+            expected_files = manifest.files
+        
+        # 暂存目录与模板库在同一文件系统，解压后可直接重命名到目标位置
+        staging_dir = self.templates_root / f".{import_id}"
+        try:
+            # 1. 暂存：解压全部条目并校验哈希
+            try:
+                for members in template_members.values():
+                    self._extract_archive_members(zipf, members, staging_dir, expected_files)
+                self._extract_archive_members(zipf, shared_members, staging_dir, expected_files)
+            except (ValueError, OSError, zipfile.BadZipFile) as e:
+                result.add_error(f"解压失败: {str(e)}")
+                result.mark_completed(False, "导入验证失败，未导入任何模板")
+                return False
+            
+            # 2. 检查全部模板配置
+            invalid_templates = {}
+            for template_name in template_members:
+                validation_result = self._validate_imported_template(staging_dir / "templates" / template_name)
+                if not validation_result["valid"]:
+                    invalid_templates[template_name] = validation_result["error"]
+            if invalid_templates:
+                for template_name, error in invalid_templates.items():
+                    result.add_failed_template(template_name)
+                    result.add_error(f"{template_name}: 模板验证失败: {error}")
+                result.mark_completed(False, "导入验证失败，未导入任何模板")
+                return False
+            
+            # 3. 提交：全部通过后才修改模板库
+            if create_backup:
+                self._create_import_backup()
+            
+            for template_name in template_members:
+                template_dir = staging_dir / "templates" / template_name
+                import_result = self._import_single_template(template_dir, conflict_resolution, move=True)
+                self._record_import_result(result, template_name, import_result)
+            
+            # 全局配置和版本历史
+            self._import_global_configs(staging_dir)
+            self._import_version_history(staging_dir)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        
+        return True
+    
+    def _record_import_result(self, result: ImportResult, template_name: str, import_result: Dict[str, Any]):
+        """记录单个模板的导入结果"""
+        if import_result["success"]:
+            result.add_imported_template(template_name)
+        else:
+            result.add_failed_template(template_name)
+            result.add_error(f"{template_name}: {import_result['error']}")
+        
+        # 处理冲突
+        if "conflict" in import_result:
+            result.add_conflict(
+                template_name,
+                import_result["conflict"]["type"],
+                import_result["conflict"]["details"]
+            )
+    
+    def _group_archive_members(
+        self,
+        zipf: zipfile.ZipFile,
+        manifest: Optional[MigrationManifest] = None
+    ) -> Tuple[Dict[str, List[zipfile.ZipInfo]], List[zipfile.ZipInfo]]:
+        """按模板分组导入包条目
+        
+        清单带有文件列表时只取列出的条目 (导出时跳过的模板可能在包中留下未列出的条目)。
+        
+        Returns:
+            (模板名 -> 条目列表, 全局配置和版本历史条目列表)
+        """
+        template_members: Dict[str, List[zipfile.ZipInfo]] = {}
+        shared_members: List[zipfile.ZipInfo] = []
+        listed_files = manifest.files if manifest else None
+        
+        for member in zipf.infolist():
+            if member.is_dir() or member.filename == MANIFEST_NAME:
+                continue
+            if listed_files and member.filename not in listed_files:
+                continue
+            parts = member.filename.split('/')
+            if parts[0] == "templates" and len(parts) >= 3:
+                template_members.setdefault(parts[1], []).append(member)
+            elif parts[0] in ("config", "versions"):
+                shared_members.append(member)
+        
+        return template_members, shared_members
+    
+    def _extract_archive_members(
+        self,
+        zipf: zipfile.ZipFile,
+        members: List[zipfile.ZipInfo],
+        target_dir: Path,
+        expected_files: Dict[str, Dict[str, Any]]
+    ):
+        """流式解压条目并校验哈希
+        
+        Raises:
+            ValueError: 路径非法或哈希与清单不一致
+        """
+        for member in members:
+            relative_path = _safe_relative_path(member.filename)
+            if relative_path is None:
+                raise ValueError(f"非法的文件路径: {member.filename}")
+            
+            target_file = target_dir.joinpath(*relative_path.parts)
+            target_file.parent.mkdir(parents=True, exist_ok=True)
+            
+            hasher = new_hasher()
+            with zipf.open(member) as source, open(target_file, 'wb') as target:
+                for chunk in iter(lambda: source.read(READ_CHUNK_SIZE), b''):
+                    hasher.update(chunk)
+                    target.write(chunk)
+            
+            expected = expected_files.get(member.filename)
+            if expected and hasher.hexdigest() != expected.get("hash"):
+                raise ValueError(f"文件校验失败: {member.filename}")
     
     def _load_migration_manifest(self, import_dir: Path) -> Optional[MigrationManifest]:
         """加载迁移清单"""
-        manifest_path = import_dir / "migration_manifest.json"
+        manifest_path = import_dir / MANIFEST_NAME
         
         if not manifest_path.exists():
             return None
@@ -543,7 +941,27 @@ class MigrationTool:
         try:
             with open(manifest_path, 'r', encoding='utf-8') as f:
                 manifest_data = json.load(f)
-            
+        except Exception as e:
+            print(f"加载迁移清单失败: {e}")
+            return None
+        
+        return self._parse_migration_manifest(manifest_data)
+    
+    def _read_archive_manifest(self, zipf: zipfile.ZipFile) -> Optional[MigrationManifest]:
+        """从导入包读取迁移清单"""
+        try:
+            manifest_data = json.loads(zipf.read(MANIFEST_NAME).decode('utf-8'))
+        except KeyError:
+            return None
+        except Exception as e:
+            print(f"加载迁移清单失败: {e}")
+            return None
+        
+        return self._parse_migration_manifest(manifest_data)
+    
+    def _parse_migration_manifest(self, manifest_data: Dict[str, Any]) -> Optional[MigrationManifest]:
+        """解析迁移清单"""
+        try:
             # 处理日期时间
             if "export_timestamp" in manifest_data:
                 manifest_data["export_timestamp"] = datetime.fromisoformat(
@@ -606,6 +1024,57 @@ class MigrationTool:
             if not config_path.exists():
                 return {"valid": False, "error": f"模板配置文件不存在: {template_name}"}
         
+        # 校验文件哈希
+        if manifest.files and manifest.hash_algorithm == HASH_ALGORITHM:
+            for arcname, file_info in manifest.files.items():
+                file_path = import_dir / arcname
+                if not file_path.is_file():
+                    return {"valid": False, "error": f"文件缺失: {arcname}"}
+                if hash_file(file_path) != file_info.get("hash"):
+                    return {"valid": False, "error": f"文件校验失败: {arcname}"}
+        
+        return {"valid": True}
+    
+    def _validate_archive_integrity(
+        self,
+        zipf: zipfile.ZipFile,
+        template_members: Dict[str, List[zipfile.ZipInfo]],
+        manifest: Optional[MigrationManifest]
+    ) -> Dict[str, Any]:
+        """验证导入包完整性 (结构检查，与目录导入的检查项一致)"""
+        if not manifest:
+            return {"valid": False, "error": "缺少迁移清单"}
+        
+        # 检查模板文件
+        if not template_members:
+            return {"valid": False, "error": "缺少模板目录"}
+        
+        # 验证模板数量
+        if len(template_members) != manifest.total_templates:
+            return {
+                "valid": False,
+                "error": f"模板数量不匹配，期望 {manifest.total_templates}，实际 {len(template_members)}"
+            }
+        
+        # 验证每个模板
+        for template_info in manifest.templates:
+            template_name = template_info["name"]
+            members = template_members.get(template_name)
+            
+            if not members:
+                return {"valid": False, "error": f"模板目录不存在: {template_name}"}
+            
+            # 检查配置文件
+            config_name = f"templates/{template_name}/template.json"
+            if not any(member.filename == config_name for member in members):
+                return {"valid": False, "error": f"模板配置文件不存在: {template_name}"}
+        
+        # 检查清单中的文件是否都在导入包中
+        archive_names = set(zipf.namelist())
+        for arcname in manifest.files:
+            if arcname not in archive_names:
+                return {"valid": False, "error": f"文件缺失: {arcname}"}
+        
         return {"valid": True}
     
     def _create_import_backup(self):
@@ -631,9 +1100,16 @@ class MigrationTool:
     def _import_single_template(
         self,
         template_dir: Path,
-        conflict_resolution: ConflictResolution
+        conflict_resolution: ConflictResolution,
+        move: bool = False
     ) -> Dict[str, Any]:
-        """导入单个模板"""
+        """导入单个模板
+        
+        Args:
+            template_dir: 待导入的模板目录
+            conflict_resolution: 冲突解决策略
+            move: 源目录为临时解压目录时，目标不存在则直接移动而不复制
+        """
         template_name = template_dir.name
         target_path = self.templates_root / "templates" / template_name
         
@@ -684,7 +1160,10 @@ class MigrationTool:
             
             # 复制模板文件
             target_path.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copytree(template_dir, target_path, dirs_exist_ok=True)
+            if move and not target_path.exists():
+                shutil.move(str(template_dir), str(target_path))
+            else:
+                shutil.copytree(template_dir, target_path, dirs_exist_ok=True)
             
             # 验证导入的模板
             validation_result = self._validate_imported_template(target_path)
@@ -797,15 +1276,24 @@ class MigrationTool:
             print(f"导入全局配置失败: {e}")
     
     def _import_version_history(self, import_dir: Path):
-        """导入版本历史"""
+        """导入版本历史
+        
+        Args:
+            import_dir: 导入目录
+        """
         source_versions_dir = import_dir / "versions"
         
         if not source_versions_dir.exists():
             return
         
         try:
+            # 快照引用的对象
+            objects_dir = source_versions_dir / OBJECTS_ARCHIVE_DIR
+            if objects_dir.is_dir():
+                self._import_version_objects(objects_dir)
+            
             for template_version_dir in source_versions_dir.iterdir():
-                if template_version_dir.is_dir():
+                if template_version_dir.is_dir() and not template_version_dir.name.startswith("."):
                     template_name = template_version_dir.name
                     target_version_dir = self.version_controller.versions_root / template_name
                     
@@ -823,6 +1311,22 @@ class MigrationTool:
         except Exception as e:
             print(f"导入版本历史失败: {e}")
     
+    def _import_version_objects(self, objects_dir: Path):
+        """把导入的版本对象加入对象存储 (已存在的跳过)
+        
+        通过 ObjectStore.add_file 写入：先写临时对象再原子重命名，对象按实际内容的
+        哈希命名。内容与文件名不符的对象不会被任何快照引用，由对象清理回收。
+        """
+        object_store = self.version_controller.object_store
+        
+        for object_file in objects_dir.iterdir():
+            object_hash = object_file.name
+            if not object_file.is_file() or object_store.has_object(object_hash):
+                continue
+            
+            if object_store.add_file(object_file) != object_hash:
+                print(f"版本对象校验失败: {object_hash}")
+    
     def migrate_between_environments(
         self,
         source_env: str,
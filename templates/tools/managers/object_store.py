@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+内容寻址对象存储
+为版本快照提供按内容哈希去重的文件块存储，以及基于 (mtime, size, inode) 的哈希缓存
+"""
+
+import errno
+import hashlib
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows：不加进程间锁，只依靠清理宽限期
+    fcntl = None
+
+# 对象哈希算法 (blake2b 在 64 位平台上比 MD5 更快)
+HASH_ALGORITHM = "blake2b"
+HASH_DIGEST_SIZE = 20
+
+# 读取块大小
+READ_CHUNK_SIZE = 1024 * 1024
+
+# 文件修改时间距今小于该值时不写入哈希缓存，避免同一时间戳内的二次修改被漏检
+RACY_WINDOW_NS = 2 * 1000 * 1000 * 1000
+
+# 恢复模式 (hardlink 需显式指定：恢复出的文件与对象共享 inode 且为只读)
+RESTORE_MODES = ("auto", "reflink", "hardlink", "copy")
+
+# 清理未引用对象时的宽限期：清理开始前这段时间内写入或复用过的对象一律保留，
+# 避免删掉并发快照刚写入、但快照文件尚未保存的对象
+GC_GRACE_SECONDS = 15 * 60
+
+# Linux FICLONE ioctl
+_FICLONE = 0x40049409
+
+
+def new_hasher():
+    """创建对象哈希器"""
+    return hashlib.blake2b(digest_size=HASH_DIGEST_SIZE)
+
+
+def hash_file(file_path: Path) -> str:
+    """计算文件的对象哈希
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        十六进制哈希值
+    """
+    hasher = new_hasher()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class StatCache:
+    """文件哈希缓存
+
+    以绝对路径为键记录 (mtime_ns, size, inode, hash)，
+    stat 信息未变化的文件直接复用缓存的哈希，不再读取内容。
+    """
+
+    VERSION = 1
+
+    def __init__(self, cache_path: Path):
+        """初始化哈希缓存
+
+        Args:
+            cache_path: 缓存文件路径
+        """
+        self.cache_path = Path(cache_path)
+        self._entries: Dict[str, Tuple[int, int, int, str]] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        """加载缓存文件"""
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+
+        if data.get("version") != self.VERSION or data.get("algorithm") != HASH_ALGORITHM:
+            return
+        self._entries = {path: tuple(entry) for path, entry in data.get("entries", {}).items()}
+
+    def get(self, file_path: str, stat_result: os.stat_result) -> Optional[str]:
+        """stat 信息一致时返回缓存的哈希
+
+        Args:
+            file_path: 文件绝对路径
+            stat_result: 文件当前的 stat 结果
+
+        Returns:
+            哈希值，未命中时返回 None
+        """
+        entry = self._entries.get(file_path)
+        if entry is None:
+            return None
+        mtime_ns, size, inode, file_hash = entry
+        if (mtime_ns != stat_result.st_mtime_ns or size != stat_result.st_size or
+                inode != stat_result.st_ino):
+            return None
+        return file_hash
+
+    def put(self, file_path: str, stat_result: os.stat_result, file_hash: str):
+        """记录文件哈希
+
+        Args:
+            file_path: 文件绝对路径
+            stat_result: 计算哈希前的 stat 结果
+            file_hash: 哈希值
+        """
+        if time.time_ns() - stat_result.st_mtime_ns < RACY_WINDOW_NS:
+            # 刚修改过的文件可能在同一时间戳内再次变化
+            self._entries.pop(file_path, None)
+        else:
+            self._entries[file_path] = (stat_result.st_mtime_ns, stat_result.st_size,
+                                        stat_result.st_ino, file_hash)
+        self._dirty = True
+
+    def discard_missing(self, prefix: str, seen: Iterable[str]):
+        """删除 prefix 目录下已不存在的条目
+
+        Args:
+            prefix: 目录绝对路径
+            seen: 本次扫描到的文件绝对路径
+        """
+        seen = set(seen)
+        prefix = prefix.rstrip(os.sep) + os.sep
+        stale = [path for path in self._entries if path.startswith(prefix) and path not in seen]
+        for path in stale:
+            del self._entries[path]
+        if stale:
+            self._dirty = True
+
+    def save(self):
+        """写回缓存文件 (原子替换)"""
+        if not self._dirty:
+            return
+
+        data = {
+            "version": self.VERSION,
+            "algorithm": HASH_ALGORITHM,
+            "entries": self._entries
+        }
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.cache_path)
+            self._dirty = False
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+class ObjectStore:
+    """内容寻址的文件块存储
+
+    对象按哈希存放在 objects/<前2位>/<其余位>，相同内容只保存一份。
+    对象写入后设为只读；恢复时默认 reflink (不支持时复制)，硬链接需显式指定。
+
+    写入对象时持有存储的共享锁并刷新对象的修改时间，清理未引用对象时
+    持有排他锁，并跳过宽限期内写入或复用过的对象。
+    """
+
+    def __init__(self, root: Path):
+        """初始化对象存储
+
+        Args:
+            root: 存储根目录
+        """
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.lock_path = self.root / "store.lock"
+        self.stat_cache = StatCache(self.root / "stat_cache.json")
+
+    @contextmanager
+    def lock(self, exclusive: bool = False):
+        """存储锁 (进程间 flock；写入对象用共享锁，清理用排他锁)
+
+        Args:
+            exclusive: 是否排他
+        """
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def object_path(self, object_hash: str) -> Path:
+        """对象文件路径"""
+        return self.objects_dir / object_hash[:2] / object_hash[2:]
+
+    def has_object(self, object_hash: str) -> bool:
+        """对象是否存在"""
+        return bool(object_hash) and self.object_path(object_hash).is_file()
+
+    def hash_file(self, file_path: Path, stat_result: Optional[os.stat_result] = None) -> str:
+        """计算文件哈希 (优先使用哈希缓存)
+
+        Args:
+            file_path: 文件路径
+            stat_result: 已有的 stat 结果
+
+        Returns:
+            哈希值，读取失败时返回空字符串
+        """
+        key = os.path.abspath(file_path)
+        try:
+            stat_result = stat_result or os.stat(key)
+            file_hash = self.stat_cache.get(key, stat_result)
+            if file_hash is None:
+                file_hash = hash_file(Path(key))
+                self.stat_cache.put(key, stat_result, file_hash)
+        except OSError:
+            return ""
+        return file_hash
+
+    def add_file(self, file_path: Path, stat_result: Optional[os.stat_result] = None) -> str:
+        """把文件写入对象存储
+
+        哈希缓存命中且对象已存在时不读取文件；否则在一次读取中同时
+        计算哈希并写入临时对象，内容已存在时丢弃临时文件。复用已有对象时
+        刷新其修改时间，使并发的清理把它视为新对象。
+
+        Args:
+            file_path: 文件路径
+            stat_result: 已有的 stat 结果
+
+        Returns:
+            哈希值，读取失败时返回空字符串
+        """
+        key = os.path.abspath(file_path)
+        try:
+            stat_result = stat_result or os.stat(key)
+        except OSError:
+            return ""
+
+        with self.lock():
+            cached_hash = self.stat_cache.get(key, stat_result)
+            if cached_hash is not None and self._touch(cached_hash):
+                return cached_hash
+
+            tmp_path = self.objects_dir / f".tmp.{os.getpid()}.{time.time_ns()}"
+            hasher = new_hasher()
+            try:
+                with open(key, "rb") as source, open(tmp_path, "wb") as target:
+                    for chunk in iter(lambda: source.read(READ_CHUNK_SIZE), b""):
+                        hasher.update(chunk)
+                        target.write(chunk)
+                file_hash = hasher.hexdigest()
+
+                if self._touch(file_hash):
+                    tmp_path.unlink()
+                else:
+                    object_path = self.object_path(file_hash)
+                    object_path.parent.mkdir(parents=True, exist_ok=True)
+                    os.chmod(tmp_path, 0o444)
+                    os.replace(tmp_path, object_path)
+            except OSError:
+                try:
+                    tmp_path.unlink()
+                except OSError:
+                    pass
+                return ""
+
+        self.stat_cache.put(key, stat_result, file_hash)
+        return file_hash
+
+    def restore_file(self, object_hash: str, target_path: Path, mode: str = "auto") -> str:
+        """把对象恢复到目标路径
+
+        默认得到与对象互相独立的可写文件；hardlink 只在显式指定时使用，
+        恢复出的文件与对象共享 inode 且为只读，就地修改会损坏对象。
+
+        Args:
+            object_hash: 对象哈希
+            target_path: 目标文件路径
+            mode: auto (reflink 失败时复制) / reflink / copy / hardlink
+
+        Returns:
+            实际使用的方式 (reflink / hardlink / copy)
+        """
+        if mode not in RESTORE_MODES:
+            raise ValueError(f"不支持的恢复模式: {mode}")
+
+        object_path = self.object_path(object_hash)
+        if not object_path.is_file():
+            raise FileNotFoundError(f"对象不存在: {object_hash}")
+
+        target_path = Path(target_path)
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        if target_path.exists() or target_path.is_symlink():
+            target_path.unlink()
+
+        if mode == "hardlink":
+            # 硬链接与对象共享 inode，只读权限防止就地修改损坏对象
+            os.link(object_path, target_path)
+            return "hardlink"
+
+        if mode in ("auto", "reflink"):
+            try:
+                _reflink(object_path, target_path)
+                return "reflink"
+            except OSError:
+                if mode == "reflink":
+                    raise
+
+        shutil.copyfile(object_path, target_path)
+        return "copy"
+
+    def remove_unreferenced(self, referenced: Iterable[str], scan_start: Optional[float] = None) -> int:
+        """删除未被引用的对象
+
+        持有排他锁，期间不会有新对象写入；修改时间晚于
+        scan_start - GC_GRACE_SECONDS 的对象可能属于尚未保存的并发快照，跳过不删。
+
+        Args:
+            referenced: 仍被引用的对象哈希
+            scan_start: 开始收集引用的时间 (默认为当前时间)
+
+        Returns:
+            删除的对象数
+        """
+        referenced = set(referenced)
+        cutoff = (time.time() if scan_start is None else scan_start) - GC_GRACE_SECONDS
+        removed = 0
+        with self.lock(exclusive=True):
+            for bucket in self.objects_dir.iterdir():
+                if not bucket.is_dir():
+                    continue
+                for object_path in bucket.iterdir():
+                    if bucket.name + object_path.name in referenced:
+                        continue
+                    try:
+                        if object_path.stat().st_mtime >= cutoff:
+                            continue
+                        object_path.unlink()
+                        removed += 1
+                    except OSError:
+                        pass
+        return removed
+
+    def save(self):
+        """保存哈希缓存"""
+        self.stat_cache.save()
+
+    def _touch(self, object_hash: str) -> bool:
+        """对象存在时刷新其修改时间
+
+        Returns:
+            对象是否存在
+        """
+        if not object_hash:
+            return False
+        try:
+            os.utime(self.object_path(object_hash))
+        except OSError:
+            return False
+        return True
+
+
+def _reflink(source: Path, target: Path):
+    """写时复制克隆 (Linux FICLONE)；不支持时抛出 OSError"""
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "reflink 不受支持")
+
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.unlink(target)
+            raise
@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+模板分类引用索引
+持久化维护 模板 -> 分类 与 分类 -> 模板 的双向索引，
+按配置文件的 stat 信息增量同步，并可由文件监听或批量操作回调实时更新
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# 索引格式版本：结构变化时递增，旧索引自动失效
+REFERENCE_INDEX_VERSION = 1
+
+# 默认索引文件名 (位于模板库根目录)
+INDEX_FILE_NAME = ".reference_index.json"
+
+CONFIG_FILE_NAME = "template.json"
+
+
+def extract_reference_fields(config_data: Dict[str, Any]) -> Tuple[Set[str], Set[str]]:
+    """从模板配置中提取分类引用
+
+    Args:
+        config_data: 模板配置数据
+
+    Returns:
+        (显式分类引用, 标签)；标签是否算作分类引用取决于分类是否存在，查询时再判断
+    """
+    references = set()
+
+    # 主分类、子分类
+    for key in ('category', 'subcategory'):
+        if key in config_data:
+            references.add(config_data[key])
+
+    # 分类信息中的主分类与次要分类
+    classification = config_data.get('classification', {})
+    if 'primary_category' in classification:
+        references.add(classification['primary_category'])
+    for category in classification.get('secondary_categories', ()):
+        references.add(category)
+
+    return references, set(config_data.get('tags', []))
+
+
+class ReferenceIndexEntry:
+    """单个模板配置文件的索引条目"""
+
+    __slots__ = ("template_id", "mtime_ns", "size", "references", "tags")
+
+    def __init__(self, template_id: str, mtime_ns: int, size: int,
+                 references: Iterable[str], tags: Iterable[str]):
+        self.template_id = template_id
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.references = frozenset(references)
+        self.tags = frozenset(tags)
+
+
+class ReferenceIndex:
+    """分类引用索引
+
+    以模板配置文件的相对路径为键 (同一模板ID 可能对应多个目录)，维护:
+    - entries: 配置路径 -> 索引条目 (模板ID、stat 信息、分类引用、标签)
+    - 模板ID -> 配置路径集合
+    - 分类 -> 配置路径集合 (显式引用)
+    - 标签 -> 配置路径集合 (标签恰好是分类名时视为引用)
+
+    sync() 只 stat 配置文件，mtime 或大小变化的才重新读取；
+    handle_file_event() / handle_template_event() 供文件监听和批量操作回调单独更新。
+    """
+
+    def __init__(self, templates_root: Path, index_path: Optional[Path] = None, persist: bool = True):
+        """初始化引用索引
+
+        Args:
+            templates_root: 模板库根目录
+            index_path: 索引文件路径 (默认 templates_root/.reference_index.json)
+            persist: 是否写回索引文件；关闭时仍读取已有索引，但只在内存中更新
+        """
+        self.templates_root = Path(templates_root)
+        self.index_path = Path(index_path) if index_path else self.templates_root / INDEX_FILE_NAME
+        self.persist = persist
+
+        self.lock = threading.RLock()
+        self.dirty = False
+
+        self.entries: Dict[str, ReferenceIndexEntry] = {}
+        self._by_template: Dict[str, Set[str]] = {}
+        self._by_reference: Dict[str, Set[str]] = {}
+        self._by_tag: Dict[str, Set[str]] = {}
+
+        self._observer = None
+
+        self._load()
+
+    # ---- 查询 ----
+
+    def __len__(self) -> int:
+        return len(self._by_template)
+
+    def template_ids(self) -> List[str]:
+        """全部模板ID (排序)"""
+        with self.lock:
+            return sorted(self._by_template)
+
+    def template_path(self, template_id: str) -> Optional[Path]:
+        """模板目录 (同一ID有多个目录时取路径排序后的第一个)"""
+        with self.lock:
+            config_paths = self._by_template.get(template_id)
+            if not config_paths:
+                return None
+            return (self.templates_root / min(config_paths)).parent
+
+    def references(self, template_id: str, is_category: Callable[[str], bool]) -> Set[str]:
+        """模板引用的分类集合
+
+        Args:
+            template_id: 模板ID
+            is_category: 判断名称是否为现有分类 (用于筛选标签)
+
+        Returns:
+            分类引用集合
+        """
+        with self.lock:
+            references = set()
+            for config_path in self._by_template.get(template_id, ()):
+                entry = self.entries[config_path]
+                references |= entry.references
+                references.update(tag for tag in entry.tags if is_category(tag))
+            return references
+
+    def templates_for(self, category_id: str, is_category: Callable[[str], bool]) -> List[str]:
+        """引用了指定分类的模板ID (排序)
+
+        Args:
+            category_id: 分类ID
+            is_category: 判断名称是否为现有分类 (用于筛选标签)
+
+        Returns:
+            模板ID列表
+        """
+        with self.lock:
+            config_paths = set(self._by_reference.get(category_id, ()))
+            if category_id in self._by_tag and is_category(category_id):
+                config_paths |= self._by_tag[category_id]
+            return sorted({self.entries[config_path].template_id for config_path in config_paths})
+
+    def referenced_categories(self, is_category: Callable[[str], bool]) -> List[str]:
+        """被至少一个模板引用的分类名 (含作为标签出现的现有分类)"""
+        with self.lock:
+            categories = set(self._by_reference)
+            categories.update(tag for tag in self._by_tag if is_category(tag))
+            return sorted(categories)
+
+    def explicit_references(self) -> List[str]:
+        """显式引用 (category/subcategory/classification) 中出现过的全部名称"""
+        with self.lock:
+            return sorted(self._by_reference)
+
+    # ---- 同步 ----
+
+    def sync(self, full: bool = False) -> Dict[str, int]:
+        """与磁盘同步
+
+        遍历模板库 (跳过隐藏目录)，只 stat 配置文件；新增或 mtime/大小变化的配置才重新读取，
+        已删除的配置移出索引。
+
+        Args:
+            full: 是否忽略 stat 信息重新读取全部配置
+
+        Returns:
+            {"added": 新增数, "updated": 更新数, "removed": 移除数}
+        """
+        stats = {"added": 0, "updated": 0, "removed": 0}
+        with self.lock:
+            seen = set()
+            for key, config_path, stat_result in self._iter_config_files(self.templates_root):
+                seen.add(key)
+                entry = self.entries.get(key)
+                if (not full and entry is not None and entry.mtime_ns == stat_result.st_mtime_ns
+                        and entry.size == stat_result.st_size):
+                    continue
+                if self._index_config(key, config_path, stat_result):
+                    stats["updated" if entry is not None else "added"] += 1
+
+            for key in [key for key in self.entries if key not in seen]:
+                self._remove_entry(key)
+                stats["removed"] += 1
+
+            self.save()
+        return stats
+
+    def update_config(self, config_path: Path) -> bool:
+        """重新索引单个配置文件 (文件不存在时移出索引)
+
+        Args:
+            config_path: template.json 路径
+
+        Returns:
+            配置是否仍在索引中
+        """
+        config_path = Path(config_path)
+        with self.lock:
+            try:
+                stat_result = config_path.stat()
+            except OSError:
+                self.remove_config(config_path)
+                return False
+            return self._index_config(self._relative(config_path), config_path, stat_result)
+
+    def remove_config(self, config_path: Path):
+        """移除单个配置文件的索引"""
+        with self.lock:
+            self._remove_entry(self._relative(Path(config_path)))
+
+    def update_tree(self, directory: Path):
+        """重新索引目录下的全部配置 (新建、复制或移入的模板目录)"""
+        directory = Path(directory)
+        with self.lock:
+            self.remove_tree(directory)
+            for key, config_path, stat_result in self._iter_config_files(directory):
+                self._index_config(key, config_path, stat_result)
+
+    def remove_tree(self, directory: Path):
+        """移除目录下的全部配置索引 (删除或移走的模板目录)"""
+        prefix = self._relative(Path(directory)).rstrip("/") + "/"
+        with self.lock:
+            for key in [key for key in self.entries if key.startswith(prefix)]:
+                self._remove_entry(key)
+
+    def handle_template_event(self, event_type: str, template_path: Path):
+        """批量操作回调：模板目录被创建/修改/删除
+
+        Args:
+            event_type: 'created'、'modified' 或 'deleted'
+            template_path: 模板目录
+        """
+        if event_type == 'deleted':
+            self.remove_tree(template_path)
+        else:
+            self.update_tree(template_path)
+
+    def handle_file_event(self, event_type: str, src_path: str, dest_path: Optional[str] = None,
+                          is_directory: bool = False):
+        """文件监听回调
+
+        Args:
+            event_type: watchdog 事件类型 (created/modified/deleted/moved/closed)
+            src_path: 源路径
+            dest_path: 目标路径 (仅 moved)
+            is_directory: 是否为目录事件
+        """
+        paths = [path for path in (src_path, dest_path) if path]
+        if all(self._is_hidden(Path(path)) for path in paths):
+            return
+
+        if is_directory:
+            if event_type in ('deleted', 'moved'):
+                self.remove_tree(Path(src_path))
+            if event_type == 'moved' and dest_path:
+                self.update_tree(Path(dest_path))
+            elif event_type == 'created':
+                self.update_tree(Path(src_path))
+            return
+
+        if Path(src_path).name == CONFIG_FILE_NAME:
+            if event_type in ('deleted', 'moved'):
+                self.remove_config(Path(src_path))
+            elif event_type in ('created', 'modified', 'closed'):
+                self.update_config(Path(src_path))
+        if event_type == 'moved' and dest_path and Path(dest_path).name == CONFIG_FILE_NAME:
+            # 原子写入 (临时文件改名为 template.json) 也走这里
+            self.update_config(Path(dest_path))
+
+    # ---- 文件监听 ----
+
+    def start_watching(self):
+        """用 watchdog 监听模板库，配置变化时实时更新索引"""
+        try:
+            from watchdog.observers import Observer
+        except ImportError as e:
+            raise ImportError(f"监听模板库需要安装 watchdog: {e}")
+
+        with self.lock:
+            if self._observer is not None:
+                return
+            observer = Observer()
+            observer.schedule(_ReferenceIndexEventHandler(self), str(self.templates_root), recursive=True)
+            observer.daemon = True
+            observer.start()
+            self._observer = observer
+
+    def stop_watching(self):
+        """停止监听并保存索引"""
+        with self.lock:
+            observer, self._observer = self._observer, None
+        if observer is not None:
+            observer.stop()
+            observer.join()
+        self.save()
+
+    @property
+    def watching(self) -> bool:
+        return self._observer is not None
+
+    # ---- 持久化 ----
+
+    def save(self):
+        """写回索引文件 (原子替换)"""
+        with self.lock:
+            if not self.dirty or not self.persist:
+                return
+            payload = {
+                "version": REFERENCE_INDEX_VERSION,
+                "templates_root": str(self.templates_root.resolve()),
+                "entries": {
+                    key: [entry.template_id, entry.mtime_ns, entry.size,
+                          sorted(entry.references), sorted(entry.tags)]
+                    for key, entry in self.entries.items()
+                }
+            }
+            tmp_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(payload, f, ensure_ascii=False)
+                os.replace(tmp_path, self.index_path)
+                self.dirty = False
+            except (OSError, TypeError, ValueError):
+                # 只读目录等情况下仅使用内存索引
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def _load(self):
+        """加载索引文件；缺失、损坏、版本或根目录不一致时从空索引开始"""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return
+        if (not isinstance(payload, dict) or
+                payload.get("version") != REFERENCE_INDEX_VERSION or
+                payload.get("templates_root") != str(self.templates_root.resolve())):
+            return
+        try:
+            for key, (template_id, mtime_ns, size, references, tags) in payload.get("entries", {}).items():
+                self._add_entry(key, ReferenceIndexEntry(template_id, mtime_ns, size, references, tags))
+        except (AttributeError, TypeError, ValueError):
+            # 条目结构不符时丢弃已加载部分，下次 sync 全量重建
+            self._clear()
+        self.dirty = False
+
+    # ---- 内部 ----
+
+    def _index_config(self, key: str, config_path: Path, stat_result: os.stat_result) -> bool:
+        """读取配置并写入索引；读取失败时移出索引"""
+        config_path = Path(config_path)
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                config_data = json.load(f)
+            references, tags = extract_reference_fields(config_data)
+        except Exception as e:
+            print(f"索引模板配置失败 {config_path}: {e}")
+            self._remove_entry(key)
+            return False
+
+        template_id = config_data.get('id', config_path.parent.name)
+        self._remove_entry(key)
+        self._add_entry(key, ReferenceIndexEntry(template_id, stat_result.st_mtime_ns, stat_result.st_size,
+                                                 references, tags))
+        return True
+
+    def _clear(self):
+        self.entries.clear()
+        self._by_template.clear()
+        self._by_reference.clear()
+        self._by_tag.clear()
+
+    def _add_entry(self, key: str, entry: ReferenceIndexEntry):
+        self.entries[key] = entry
+        self._by_template.setdefault(entry.template_id, set()).add(key)
+        for reference in entry.references:
+            self._by_reference.setdefault(reference, set()).add(key)
+        for tag in entry.tags:
+            self._by_tag.setdefault(tag, set()).add(key)
+        self.dirty = True
+
+    def _remove_entry(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self._discard(self._by_template, entry.template_id, key)
+        for reference in entry.references:
+            self._discard(self._by_reference, reference, key)
+        for tag in entry.tags:
+            self._discard(self._by_tag, tag, key)
+        self.dirty = True
+
+    @staticmethod
+    def _discard(mapping: Dict[str, Set[str]], name: str, key: str):
+        keys = mapping.get(name)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del mapping[name]
+
+    def _iter_config_files(self, directory: Path):
+        """遍历目录下的 template.json (跳过隐藏目录)，产出 (索引键, 路径, stat)
+
+        只做字符串拼接和 os.stat，大模板库上无变化的同步主要耗时在目录遍历本身。
+        """
+        directory = os.path.abspath(directory)
+        prefix = self._relative(Path(directory))
+        prefix = "" if prefix == "." else prefix + "/"
+        for dir_path, dir_names, file_names in os.walk(directory):
+            dir_names[:] = [name for name in dir_names if not name.startswith(".")]
+            if CONFIG_FILE_NAME not in file_names:
+                continue
+            config_path = os.path.join(dir_path, CONFIG_FILE_NAME)
+            try:
+                stat_result = os.stat(config_path)
+            except OSError:
+                continue
+            rel_dir = os.path.relpath(dir_path, directory)
+            rel_dir = "" if rel_dir == "." else rel_dir.replace(os.sep, "/") + "/"
+            yield f"{prefix}{rel_dir}{CONFIG_FILE_NAME}", config_path, stat_result
+
+    def _relative(self, path: Path) -> str:
+        try:
+            return Path(os.path.abspath(path)).relative_to(os.path.abspath(self.templates_root)).as_posix()
+        except ValueError:
+            return Path(path).as_posix()
+
+    def _is_hidden(self, path: Path) -> bool:
+        return any(part.startswith(".") for part in Path(self._relative(path)).parts)
+
+
+class _ReferenceIndexEventHandler:
+    """watchdog 事件处理器 (Observer 只调用 dispatch)"""
+
+    def __init__(self, index: ReferenceIndex):
+        self.index = index
+
+    def dispatch(self, event):
+        try:
+            self.index.handle_file_event(
+                event.event_type,
+                os.fsdecode(event.src_path),
+                os.fsdecode(event.dest_path) if getattr(event, "dest_path", "") else None,
+                event.is_directory
+            )
+        except Exception as e:
+            print(f"处理文件事件失败 {event.src_path}: {e}")
@@ -10,9 +10,9 @@ from typing import Dict, List, Optional, Set, Tuple, Any
 from dataclasses import dataclass, field
 from datetime import datetime
 import logging
-import glob
 
 from .category_organizer import CategoryOrganizer
+from .reference_index import ReferenceIndex, extract_reference_fields
 from ..models.template import Template, TemplateConfig
 
 logger = logging.getLogger(__name__)
@@ -48,57 +48,81 @@ class ImpactAnalysis:
 class ReferenceManager:
     """引用管理器"""
     
-    def __init__(self, templates_root: Path, config_root: Path):
+    def __init__(self, templates_root: Path, config_root: Path, index_path: Optional[Path] = None,
+                 watch: bool = False, persist_index: bool = True):
         """初始化引用管理器
         
         Args:
             templates_root: 模板根目录
             config_root: 配置根目录
+            index_path: 引用索引文件路径 (默认 templates_root/.reference_index.json)
+            watch: 是否用 watchdog 监听模板库并实时更新索引
+            persist_index: 是否把同步后的引用索引写回磁盘 (只读查询可关闭)
         """
         self.templates_root = Path(templates_root)
         self.config_root = Path(config_root)
         self.category_organizer = CategoryOrganizer(config_root)
         
-        # 引用缓存
-        self._reference_cache: Dict[str, Set[str]] = {}
+        # 持久化的双向引用索引 (模板 <-> 分类)
+        self.reference_index = ReferenceIndex(self.templates_root, index_path, persist=persist_index)
         self._last_scan_time: Optional[datetime] = None
         
-        # 扫描模板引用
+        # 同步模板引用 (只重新读取发生变化的配置)
         self._scan_template_references()
+        
+        if watch:
+            self.start_watching()
     
-    def _scan_template_references(self):
-        """扫描所有模板的分类引用"""
-        logger.info("开始扫描模板分类引用...")
+    def _scan_template_references(self, full: bool = False):
+        """同步所有模板的分类引用
         
-        self._reference_cache.clear()
-        template_count = 0
+        Args:
+            full: 是否重新读取全部模板配置
+        """
+        logger.info("开始同步模板分类引用...")
         
-        # 查找所有模板配置文件
-        config_pattern = str(self.templates_root / "**" / "template.json")
-        config_files = glob.glob(config_pattern, recursive=True)
-        
-        for config_file in config_files:
-            try:
-                config_path = Path(config_file)
-                template_path = config_path.parent
-                
-                # 读取配置文件
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config_data = json.load(f)
-                
-                template_id = config_data.get('id', template_path.name)
-                
-                # 提取分类引用
-                references = self._extract_category_references(config_data)
-                self._reference_cache[template_id] = references
-                
-                template_count += 1
-                
-            except Exception as e:
-                logger.warning(f"扫描模板配置失败 {config_file}: {e}")
+        stats = self.reference_index.sync(full=full)
         
         self._last_scan_time = datetime.now()
-        logger.info(f"扫描完成，共处理 {template_count} 个模板")
+        self.refresh_template_counts()
+        logger.info(
+            f"同步完成，共 {len(self.reference_index)} 个模板 "
+            f"(新增 {stats['added']}，更新 {stats['updated']}，移除 {stats['removed']})"
+        )
+    
+    def refresh_template_counts(self):
+        """把各分类引用的模板写入分类树 (子树合计由分类树索引按模板去重预计算)"""
+        self.category_organizer.set_category_templates({
+            category_id: self.reference_index.templates_for(category_id, self._is_category)
+            for category_id in self.reference_index.referenced_categories(self._is_category)
+        })
+    
+    def _is_category(self, name: str) -> bool:
+        """名称是否为现有分类 (标签只有是分类名时才算作引用)"""
+        return self.category_organizer.get_category(name) is not None
+    
+    def _template_references(self, template_id: str) -> Set[str]:
+        """模板引用的分类集合"""
+        return self.reference_index.references(template_id, self._is_category)
+    
+    def start_watching(self):
+        """监听模板库文件变化，实时更新引用索引 (需要 watchdog)"""
+        self.reference_index.start_watching()
+    
+    def stop_watching(self):
+        """停止监听并保存引用索引"""
+        self.reference_index.stop_watching()
+    
+    def on_template_changed(self, event_type: str, template_path: Path):
+        """批量操作回调：模板目录被创建/修改/删除后更新引用索引
+        
+        可直接注册为 BatchEngine.add_change_listener 的监听器。
+        
+        Args:
+            event_type: 'created'、'modified' 或 'deleted'
+            template_path: 模板目录
+        """
+        self.reference_index.handle_template_event(event_type, template_path)
     
     def _extract_category_references(self, config_data: Dict[str, Any]) -> Set[str]:
         """从配置数据中提取分类引用
@@ -109,31 +133,10 @@ class ReferenceManager:
         Returns:
             分类引用集合
         """
-        references = set()
-        
-        # 主分类
-        if 'category' in config_data:
-            references.add(config_data['category'])
-        
-        # 子分类
-        if 'subcategory' in config_data:
-            references.add(config_data['subcategory'])
-        
-        # 分类信息中的次要分类
-        classification = config_data.get('classification', {})
-        if 'primary_category' in classification:
-            references.add(classification['primary_category'])
-        
-        if 'secondary_categories' in classification:
-            for cat in classification['secondary_categories']:
-                references.add(cat)
+        references, tags = extract_reference_fields(config_data)
         
         # 标签中的分类引用
-        tags = config_data.get('tags', [])
-        for tag in tags:
-            # 检查标签是否是分类名称
-            if self.category_organizer.get_category(tag):
-                references.add(tag)
+        references.update(tag for tag in tags if self._is_category(tag))
         
         return references
     
@@ -160,29 +163,28 @@ class ReferenceManager:
         broken_references = []
         warnings = []
         
-        # 查找受影响的模板
-        for template_id, references in self._reference_cache.items():
-            if old_category_id in references:
-                affected_templates.append(template_id)
-                
-                # 分析引用变更
-                if operation == 'rename' and new_category_id:
-                    # 重命名操作
-                    template_path = self._find_template_path(template_id)
-                    if template_path:
-                        ref_info = ReferenceInfo(
-                            template_id=template_id,
-                            template_path=template_path,
-                            old_category=old_category_id,
-                            new_category=new_category_id,
-                            reference_type='primary'  # 简化处理
-                        )
-                        reference_changes.append(ref_info)
-                
-                elif operation == 'delete':
-                    # 删除操作 - 标记为损坏引用
-                    broken_references.append(template_id)
-                    warnings.append(f"模板 {template_id} 引用了将被删除的分类 {old_category_id}")
+        # 查找受影响的模板 (反向索引查询)
+        for template_id in self.reference_index.templates_for(old_category_id, self._is_category):
+            affected_templates.append(template_id)
+            
+            # 分析引用变更
+            if operation == 'rename' and new_category_id:
+                # 重命名操作
+                template_path = self._find_template_path(template_id)
+                if template_path:
+                    ref_info = ReferenceInfo(
+                        template_id=template_id,
+                        template_path=template_path,
+                        old_category=old_category_id,
+                        new_category=new_category_id,
+                        reference_type='primary'  # 简化处理
+                    )
+                    reference_changes.append(ref_info)
+            
+            elif operation == 'delete':
+                # 删除操作 - 标记为损坏引用
+                broken_references.append(template_id)
+                warnings.append(f"模板 {template_id} 引用了将被删除的分类 {old_category_id}")
         
         # 检查子分类影响
         category_node = self.category_organizer.get_category(old_category_id)
@@ -209,22 +211,7 @@ class ReferenceManager:
         Returns:
             模板路径或None
         """
-        # 在缓存的扫描结果中查找
-        config_pattern = str(self.templates_root / "**" / "template.json")
-        config_files = glob.glob(config_pattern, recursive=True)
-        
-        for config_file in config_files:
-            try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config_data = json.load(f)
-                
-                if config_data.get('id') == template_id:
-                    return Path(config_file).parent
-                    
-            except Exception:
-                continue
-        
-        return None
+        return self.reference_index.template_path(template_id)
     
     def update_category_references(
         self,
@@ -269,8 +256,9 @@ class ReferenceManager:
             except Exception as e:
                 errors.append(f"更新模板 {template_id} 时发生错误: {e}")
         
-        # 更新缓存
-        self._update_reference_cache(old_category_id, new_category_id)
+        # 已写回的配置在 _update_template_category_reference 中逐个重新索引
+        self.reference_index.save()
+        self.refresh_template_counts()
         
         logger.info(f"分类引用更新完成：成功 {updated_count} 个，失败 {len(errors)} 个")
         
@@ -344,6 +332,7 @@ class ReferenceManager:
                 # 保存配置
                 with open(config_path, 'w', encoding='utf-8') as f:
                     json.dump(config_data, f, ensure_ascii=False, indent=2)
+                self.reference_index.update_config(config_path)
                 
                 logger.debug(f"更新模板配置成功: {template_id}")
             
@@ -353,18 +342,6 @@ class ReferenceManager:
             logger.error(f"更新模板配置失败 {template_id}: {e}")
             return False
     
-    def _update_reference_cache(self, old_category_id: str, new_category_id: str):
-        """更新引用缓存
-        
-        Args:
-            old_category_id: 旧分类ID
-            new_category_id: 新分类ID
-        """
-        for template_id, references in self._reference_cache.items():
-            if old_category_id in references:
-                references.remove(old_category_id)
-                references.add(new_category_id)
-    
     def batch_update_references(
         self,
         category_mappings: Dict[str, str],
@@ -401,16 +378,11 @@ class ReferenceManager:
         """
         logger.info("验证分类引用有效性...")
         
-        invalid_references = []
-        
-        # 获取所有有效分类
-        valid_categories = set(self.category_organizer.category_tree.nodes.keys())
-        
-        # 检查每个模板的引用
-        for template_id, references in self._reference_cache.items():
-            for ref in references:
-                if ref not in valid_categories:
-                    invalid_references.append(f"{template_id}: {ref}")
+        invalid_references = [
+            f"{template_id}: {ref}"
+            for template_id, refs in self._invalid_references_by_template().items()
+            for ref in sorted(refs)
+        ]
         
         is_valid = len(invalid_references) == 0
         
@@ -421,20 +393,36 @@ class ReferenceManager:
         
         return is_valid, invalid_references
     
+    def _invalid_references_by_template(self) -> Dict[str, Set[str]]:
+        """按模板分组的无效分类引用
+        
+        只检查索引中出现过的分类名，而不是逐个模板遍历；
+        标签只有是现有分类时才算引用，因此不会产生无效引用。
+        
+        Returns:
+            模板ID -> 无效引用集合 (按模板ID排序)
+        """
+        invalid: Dict[str, Set[str]] = {}
+        for ref in self.reference_index.explicit_references():
+            if self._is_category(ref):
+                continue
+            for template_id in self.reference_index.templates_for(ref, self._is_category):
+                invalid.setdefault(template_id, set()).add(ref)
+        return dict(sorted(invalid.items()))
+    
     def get_reference_statistics(self) -> Dict[str, Any]:
         """获取引用统计信息
         
         Returns:
             统计信息字典
         """
-        # 统计每个分类的引用次数
-        category_usage = {}
-        total_references = 0
-        
-        for template_id, references in self._reference_cache.items():
-            for ref in references:
-                category_usage[ref] = category_usage.get(ref, 0) + 1
-                total_references += 1
+        # 统计每个分类的引用次数 (引用该分类的模板数)
+        category_usage = {
+            ref: len(self.reference_index.templates_for(ref, self._is_category))
+            for ref in self.reference_index.referenced_categories(self._is_category)
+        }
+        total_references = sum(category_usage.values())
+        total_templates = len(self.reference_index)
         
         # 找出未使用的分类
         all_categories = set(self.category_organizer.category_tree.nodes.keys())
@@ -444,12 +432,12 @@ class ReferenceManager:
         most_used = sorted(category_usage.items(), key=lambda x: x[1], reverse=True)[:10]
         
         return {
-            'total_templates': len(self._reference_cache),
+            'total_templates': total_templates,
             'total_references': total_references,
             'unique_categories_used': len(category_usage),
             'unused_categories': list(unused_categories),
             'most_used_categories': most_used,
-            'average_references_per_template': total_references / len(self._reference_cache) if self._reference_cache else 0,
+            'average_references_per_template': total_references / total_templates if total_templates else 0,
             'last_scan_time': self._last_scan_time.isoformat() if self._last_scan_time else None
         }
     
@@ -462,13 +450,7 @@ class ReferenceManager:
         Returns:
             模板ID列表
         """
-        templates = []
-        
-        for template_id, references in self._reference_cache.items():
-            if category_id in references:
-                templates.append(template_id)
-        
-        return templates
+        return self.reference_index.templates_for(category_id, self._is_category)
     
     def cleanup_broken_references(self, dry_run: bool = False) -> Tuple[int, List[str]]:
         """清理损坏的分类引用
@@ -491,30 +473,26 @@ class ReferenceManager:
         errors = []
         cleaned_count = 0
         
-        # 获取有效分类集合
-        valid_categories = set(self.category_organizer.category_tree.nodes.keys())
-        
         if dry_run:
             logger.info(f"试运行模式：将清理 {len(invalid_refs)} 个损坏引用")
             return len(invalid_refs), []
         
-        # 处理每个模板
-        for template_id, references in self._reference_cache.items():
-            invalid_refs_in_template = references - valid_categories
-            
+        # 只处理含无效引用的模板 (写回的配置在 _remove_invalid_references 中重新索引)
+        for template_id, invalid_refs_in_template in self._invalid_references_by_template().items():
             if invalid_refs_in_template:
                 try:
                     success = self._remove_invalid_references(template_id, invalid_refs_in_template)
                     if success:
                         cleaned_count += len(invalid_refs_in_template)
-                        # 更新缓存
-                        self._reference_cache[template_id] = references - invalid_refs_in_template
                     else:
                         errors.append(f"清理模板 {template_id} 的引用失败")
                         
                 except Exception as e:
                     errors.append(f"清理模板 {template_id} 时发生错误: {e}")
         
+        self.reference_index.save()
+        self.refresh_template_counts()
+        
         logger.info(f"清理完成：成功 {cleaned_count} 个，失败 {len(errors)} 个")
         
         return cleaned_count, errors
@@ -579,6 +557,7 @@ class ReferenceManager:
                 
                 with open(config_path, 'w', encoding='utf-8') as f:
                     json.dump(config_data, f, ensure_ascii=False, indent=2)
+                self.reference_index.update_config(config_path)
             
             return True
             
@@ -586,7 +565,11 @@ class ReferenceManager:
             logger.error(f"移除无效引用失败 {template_id}: {e}")
             return False
     
-    def refresh_cache(self):
-        """刷新引用缓存"""
+    def refresh_cache(self, full: bool = False):
+        """刷新引用缓存
+        
+        Args:
+            full: 是否重新读取全部模板配置 (默认只读取 mtime/大小变化的配置)
+        """
         logger.info("刷新分类引用缓存...")
-        self._scan_template_references()
\ No newline at end of file
+        self._scan_template_references(full=full)
\ No newline at end of file
@@ -6,7 +6,9 @@
 
 import json
 import hashlib
+import os
 import shutil
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
@@ -15,6 +17,7 @@ from enum import Enum
 
 from ..models.template import Template, TemplateConfig
 from ..models.operations import OperationResult, OperationType, OperationStatus
+from .object_store import ObjectStore, HASH_ALGORITHM, RESTORE_MODES
 
 
 class ChangeType(Enum):
@@ -63,6 +66,9 @@ class VersionSnapshot:
     total_files: int = 0
     total_size_bytes: int = 0
     
+    # files 中哈希的算法 (旧快照为 md5，且没有存储文件内容)
+    hash_algorithm: str = "md5"
+    
     def __post_init__(self):
         if isinstance(self.timestamp, str):
             self.timestamp = datetime.fromisoformat(self.timestamp)
@@ -103,19 +109,28 @@ class VersionHistory:
 class VersionController:
     """版本控制器"""
     
-    def __init__(self, templates_root: Path, versions_root: Optional[Path] = None):
+    def __init__(self, templates_root: Path, versions_root: Optional[Path] = None,
+                 restore_mode: str = "auto"):
         """初始化版本控制器
         
         Args:
             templates_root: 模板根目录
             versions_root: 版本存储根目录
+            restore_mode: 回滚时恢复文件的方式 (auto/reflink/copy；hardlink 需显式指定，
+                恢复出的文件与存储对象共享 inode 且为只读)
         """
+        if restore_mode not in RESTORE_MODES:
+            raise ValueError(f"不支持的恢复模式: {restore_mode}")
         self.templates_root = Path(templates_root)
         self.versions_root = Path(versions_root) if versions_root else self.templates_root / ".versions"
+        self.restore_mode = restore_mode
         
         # 确保版本目录存在
         self.versions_root.mkdir(parents=True, exist_ok=True)
         
+        # 内容寻址对象存储 (所有模板共享，相同内容只存一份)
+        self.object_store = ObjectStore(self.versions_root / ".objects")
+        
         # 版本历史缓存
         self._history_cache: Dict[str, VersionHistory] = {}
     
@@ -128,24 +143,34 @@ class VersionController:
         Returns:
             变更列表
         """
-        changes = []
-        
         if not template_path.exists():
-            return changes
-        
-        template_id = template_path.name
+            return []
         
         # 获取当前文件状态
-        current_files = self._scan_template_files(template_path)
+        current_entries = self._scan_template_entries(template_path)
+        self.object_store.save()
+        
+        return self._diff_entries(template_path, current_entries)
+    
+    def _diff_entries(self, template_path: Path, current_entries: Dict[str, Tuple[str, int]]) -> List[FileChange]:
+        """比较当前文件与最后一个版本
+        
+        Args:
+            template_path: 模板路径
+            current_entries: 文件路径到 (哈希, 大小) 的映射
+            
+        Returns:
+            变更列表
+        """
+        changes = []
         
         # 获取最后一个版本的文件状态
-        history = self.get_version_history(template_id)
+        history = self.get_version_history(template_path.name)
         latest_version = history.get_latest_version()
         
         if latest_version is None:
             # 首次检测，所有文件都是新创建的
-            for file_path, file_hash in current_files.items():
-                file_size = self._get_file_size(template_path / file_path)
+            for file_path, (file_hash, file_size) in current_entries.items():
                 changes.append(FileChange(
                     file_path=file_path,
                     change_type=ChangeType.CREATED,
@@ -155,10 +180,13 @@ class VersionController:
         else:
             # 比较与上一版本的差异
             previous_files = latest_version.files
+            legacy_hashes = latest_version.hash_algorithm != HASH_ALGORITHM
             
             # 检查新增和修改的文件
-            for file_path, file_hash in current_files.items():
-                file_size = self._get_file_size(template_path / file_path)
+            for file_path, (file_hash, file_size) in current_entries.items():
+                if legacy_hashes and file_path in previous_files:
+                    # 旧快照使用 MD5，需按同一算法比较
+                    file_hash = self._calculate_file_hash(template_path / file_path)
                 
                 if file_path not in previous_files:
                     # 新增文件
@@ -180,7 +208,7 @@ class VersionController:
             
             # 检查删除的文件
             for file_path in previous_files:
-                if file_path not in current_files:
+                if file_path not in current_entries:
                     changes.append(FileChange(
                         file_path=file_path,
                         change_type=ChangeType.DELETED,
@@ -198,21 +226,50 @@ class VersionController:
         Returns:
             文件路径到哈希的映射
         """
-        files = {}
+        files = {
+            rel_path: file_hash
+            for rel_path, (file_hash, _) in self._scan_template_entries(template_path).items()
+        }
+        self.object_store.save()
+        return files
+    
+    def _scan_template_entries(self, template_path: Path, store_objects: bool = False) -> Dict[str, Tuple[str, int]]:
+        """扫描模板文件，返回哈希和大小
+        
+        stat 信息 (mtime, size, inode) 未变化的文件直接使用缓存的哈希，不读取内容。
+        
+        Args:
+            template_path: 模板路径
+            store_objects: 是否同时把文件内容写入对象存储
+            
+        Returns:
+            文件路径到 (哈希, 大小) 的映射
+        """
+        entries = {}
         
         if not template_path.exists():
-            return files
+            return entries
+        
+        root = os.path.abspath(template_path)
+        seen = []
+        add = self.object_store.add_file if store_objects else self.object_store.hash_file
         
         # 扫描所有文件
-        for file_path in template_path.rglob("*"):
-            if file_path.is_file():
+        for dir_path, dir_names, file_names in os.walk(root):
+            dir_names.sort()
+            for file_name in sorted(file_names):
+                file_path = os.path.join(dir_path, file_name)
+                try:
+                    stat_result = os.stat(file_path)
+                except OSError:
+                    continue
+                seen.append(file_path)
                 # 计算相对路径
-                rel_path = file_path.relative_to(template_path)
-                # 计算文件哈希
-                file_hash = self._calculate_file_hash(file_path)
-                files[str(rel_path)] = file_hash
+                rel_path = str(Path(os.path.relpath(file_path, root)))
+                entries[rel_path] = (add(file_path, stat_result), stat_result.st_size)
         
-        return files
+        self.object_store.stat_cache.discard_missing(root, seen)
+        return entries
     
     def _calculate_file_hash(self, file_path: Path) -> str:
         """计算文件哈希
@@ -269,11 +326,13 @@ class VersionController:
         """
         template_id = template_path.name
         
-        # 检测变更
-        changes = self.detect_changes(template_path)
+        # 扫描当前文件 (只有变化过的文件会被读取并写入对象存储)
+        current_entries = self._scan_template_entries(template_path, store_objects=True)
+        self.object_store.save()
+        current_files = {rel_path: file_hash for rel_path, (file_hash, _) in current_entries.items()}
         
-        # 扫描当前文件
-        current_files = self._scan_template_files(template_path)
+        # 检测变更
+        changes = self._diff_entries(template_path, current_entries)
         
         # 加载配置快照
         config_snapshot = {}
@@ -286,8 +345,7 @@ class VersionController:
                 pass
         
         # 计算统计信息
-        total_size = sum(self._get_file_size(template_path / rel_path) 
-                        for rel_path in current_files.keys())
+        total_size = sum(file_size for _, file_size in current_entries.values())
         
         # 获取父版本
         history = self.get_version_history(template_id)
@@ -307,7 +365,8 @@ class VersionController:
             changes=changes,
             parent_version=parent_version,
             total_files=len(current_files),
-            total_size_bytes=total_size
+            total_size_bytes=total_size,
+            hash_algorithm=HASH_ALGORITHM
         )
         
         return snapshot
@@ -400,6 +459,8 @@ class VersionController:
         if version_dir.exists():
             # 加载所有版本快照
             for snapshot_file in version_dir.glob("*.json"):
+                if snapshot_file.name == "history.json":
+                    continue
                 try:
                     with open(snapshot_file, 'r', encoding='utf-8') as f:
                         snapshot_data = json.load(f)
@@ -534,15 +595,20 @@ class VersionController:
             # 重新创建目录
             template_path.mkdir(parents=True, exist_ok=True)
             
+            # 从对象存储恢复全部文件 (旧快照没有存储文件内容，只能恢复配置文件)
+            restored = set()
+            if snapshot.hash_algorithm == HASH_ALGORITHM:
+                for rel_path, file_hash in snapshot.files.items():
+                    if self.object_store.has_object(file_hash):
+                        self.object_store.restore_file(file_hash, template_path / rel_path, self.restore_mode)
+                        restored.add(rel_path)
+            
             # 恢复配置文件
-            if snapshot.config_snapshot:
+            if snapshot.config_snapshot and "template.json" not in restored:
                 config_path = template_path / "template.json"
                 with open(config_path, 'w', encoding='utf-8') as f:
                     json.dump(snapshot.config_snapshot, f, ensure_ascii=False, indent=2)
             
-            # 注意：这里只能恢复配置文件，因为我们没有存储完整的文件内容
-            # 在实际实现中，可能需要使用Git或其他版本控制系统来存储完整的文件历史
-            
             return True
             
         except Exception as e:
@@ -760,15 +826,33 @@ class VersionController:
             history.versions = [v for v in history.versions if v.version in versions_to_keep]
             self._save_version_history(history)
             
+            # 删除不再被任何版本引用的文件对象
+            removed_objects = 0
+            if deleted_versions:
+                scan_start = time.time()
+                removed_objects = self.object_store.remove_unreferenced(self._referenced_objects(), scan_start)
+            
             result.mark_success(
                 f"清理完成，删除了 {len(deleted_versions)} 个旧版本",
                 {
                     "deleted_versions": deleted_versions,
-                    "remaining_versions": len(history.versions)
+                    "remaining_versions": len(history.versions),
+                    "removed_objects": removed_objects
                 }
             )
             
         except Exception as e:
             result.mark_failed(f"清理过程中发生错误: {str(e)}")
         
-        return result
\ No newline at end of file
+        return result
+    
+    def _referenced_objects(self) -> set:
+        """收集所有模板的版本快照引用的对象哈希"""
+        referenced = set()
+        for version_dir in self.versions_root.iterdir():
+            if not version_dir.is_dir() or version_dir.name.startswith("."):
+                continue
+            for snapshot in self.get_version_history(version_dir.name).versions:
+                if snapshot.hash_algorithm == HASH_ALGORITHM:
+                    referenced.update(snapshot.files.values())
+        return referenced
\ No newline at end of file
@@ -237,7 +237,7 @@ class CommonValidators:
             ))
         
         # 检查格式
-        pattern = r'^[a-z][a-z0-9_]*[a-z0-9]$'$'
+        pattern = r'^[a-z][a-z0-9_]*[a-z0-9]$'
         if not re.match(pattern, name):
             errors.append(ValidationError(
                 level=ValidationLevel.ERROR,
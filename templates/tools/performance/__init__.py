@@ -12,6 +12,17 @@ from .performance_optimizer import (
     get_performance_optimizer,
     benchmark_system_performance
 )
+from .cache_backends import (
+    CacheBackend,
+    SQLiteCacheBackend,
+    JSONFileCacheBackend,
+    create_cache_backend
+)
+from .metrics_registry import (
+    MetricsRegistry,
+    get_metrics_registry,
+    start_metrics_server
+)
 
 __all__ = [
     'PerformanceOptimizer',
@@ -20,5 +31,12 @@ __all__ = [
     'FileIOOptimizer',
     'PerformanceMetrics',
     'get_performance_optimizer',
-    'benchmark_system_performance'
+    'benchmark_system_performance',
+    'CacheBackend',
+    'SQLiteCacheBackend',
+    'JSONFileCacheBackend',
+    'create_cache_backend',
+    'MetricsRegistry',
+    'get_metrics_registry',
+    'start_metrics_server'
 ]
\ No newline at end of file
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+缓存存储后端 - CacheManager 的可插拔存储实现
+Cache Backends - Pluggable storage for CacheManager
+"""
+
+import atexit
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict
+
+# 哨兵值：区分"未命中"与"缓存值为 None"
+MISSING = object()
+
+
+class CacheBackend(ABC):
+    """缓存后端基类"""
+
+    def __init__(self, cache_dir: Path, max_size_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.RLock()
+
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        """读取缓存值，未命中返回 MISSING"""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: int = 3600):
+        """写入缓存值"""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        """删除缓存条目"""
+        pass
+
+    @abstractmethod
+    def clear(self):
+        """清空缓存"""
+        pass
+
+    def flush(self):
+        """把缓冲中的改动写入磁盘"""
+
+    def close(self):
+        """关闭后端"""
+        self.flush()
+
+    @abstractmethod
+    def entry_count(self) -> int:
+        """缓存条目数"""
+        pass
+
+    @abstractmethod
+    def total_size(self) -> int:
+        """缓存总字节数"""
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """命中/未命中/淘汰统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': type(self).__name__,
+                'entries': self.entry_count(),
+                'size_bytes': self.total_size(),
+                'max_size_bytes': self.max_size_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """单文件 SQLite 缓存
+
+    - 条目、访问时间和总大小 (由触发器维护) 都保存在数据库中，多个进程共用
+      同一缓存目录时，淘汰和大小统计对所有进程写入的条目都生效
+    - 每个写操作是一个独立的短事务 (BEGIN IMMEDIATE ... COMMIT)，调用之间不持有写锁
+    - 命中时的访问时间先记在内存中，随下一次写操作 (或 flush/close) 在同一事务中写回
+    - 每次写入借助 expires_at 索引删除已过期的条目；读取时遇到过期条目当场删除
+    - close() 之后再次调用会重新打开连接
+    """
+
+    DB_NAME = 'cache.db'
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS cache_entries ('
+        'key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, '
+        'expires_at REAL NOT NULL, last_accessed REAL NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS idx_cache_last_accessed ON cache_entries (last_accessed)',
+        'CREATE INDEX IF NOT EXISTS idx_cache_expires_at ON cache_entries (expires_at)',
+        'CREATE TABLE IF NOT EXISTS cache_meta (id INTEGER PRIMARY KEY CHECK (id = 0), total_size INTEGER NOT NULL)',
+        'INSERT OR IGNORE INTO cache_meta (id, total_size) SELECT 0, COALESCE(SUM(size), 0) FROM cache_entries',
+        'CREATE TRIGGER IF NOT EXISTS cache_entries_insert AFTER INSERT ON cache_entries '
+        'BEGIN UPDATE cache_meta SET total_size = total_size + NEW.size; END',
+        'CREATE TRIGGER IF NOT EXISTS cache_entries_delete AFTER DELETE ON cache_entries '
+        'BEGIN UPDATE cache_meta SET total_size = total_size - OLD.size; END',
+        'CREATE TRIGGER IF NOT EXISTS cache_entries_resize AFTER UPDATE OF size ON cache_entries '
+        'BEGIN UPDATE cache_meta SET total_size = total_size - OLD.size + NEW.size; END',
+    )
+
+    def __init__(self, cache_dir: Path, max_size_bytes: int):
+        super().__init__(cache_dir, max_size_bytes)
+        self.db_path = self.cache_dir / self.DB_NAME
+        self._conn = None
+        # 待写回的访问时间
+        self._pending_access: Dict[str, float] = {}
+
+        self._db()
+
+        # 进程退出时写回访问时间并关闭连接 (弱引用，不延长对象生命周期)
+        atexit.register(_close_backend, weakref.ref(self))
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            try:
+                row = self._db().execute(
+                    'SELECT value, expires_at FROM cache_entries WHERE key = ?', (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return MISSING
+
+                current_time = time.time()
+                if current_time > row[1]:
+                    self._delete_key(key)
+                    self.expirations += 1
+                    self.misses += 1
+                    return MISSING
+
+                try:
+                    value = json.loads(row[0])
+                except ValueError:
+                    self._delete_key(key)
+                    self.misses += 1
+                    return MISSING
+            except sqlite3.Error:
+                self.misses += 1
+                return MISSING
+
+            self._pending_access[key] = current_time
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: int = 3600):
+        payload = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+        size = len(payload.encode('utf-8'))
+        current_time = time.time()
+
+        with self._lock, self._transaction() as conn:
+            # UPSERT 而不是 INSERT OR REPLACE：REPLACE 的隐式删除不会触发删除触发器
+            conn.execute(
+                'INSERT INTO cache_entries (key, value, size, expires_at, last_accessed) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, '
+                'expires_at = excluded.expires_at, last_accessed = excluded.last_accessed',
+                (key, payload, size, current_time + ttl, current_time)
+            )
+            self._pending_access.pop(key, None)
+
+            expired = conn.execute('DELETE FROM cache_entries WHERE expires_at < ?', (current_time,))
+            self.expirations += max(expired.rowcount, 0)
+            self._enforce_size_limit(conn)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._pending_access.pop(key, None)
+            self._delete_key(key)
+
+    def clear(self):
+        with self._lock, self._transaction() as conn:
+            conn.execute('DELETE FROM cache_entries')
+            self._pending_access.clear()
+
+    def flush(self):
+        with self._lock:
+            if self._pending_access:
+                with self._transaction():
+                    pass
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self.flush()
+            finally:
+                self._conn.close()
+                self._conn = None
+
+    def entry_count(self) -> int:
+        with self._lock:
+            return self._db().execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+
+    def total_size(self) -> int:
+        with self._lock:
+            return self._db().execute('SELECT total_size FROM cache_meta').fetchone()[0]
+
+    def _db(self) -> sqlite3.Connection:
+        """返回连接，首次使用或 close() 之后重新打开"""
+        if self._conn is None:
+            conn = sqlite3.connect(str(self.db_path), isolation_level=None, check_same_thread=False)
+            try:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+                conn.execute('BEGIN IMMEDIATE')
+                for statement in self.SCHEMA:
+                    conn.execute(statement)
+                conn.execute('COMMIT')
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _transaction(self):
+        """写事务：先写回待处理的访问时间，结束时提交，出错时回滚"""
+        conn = self._db()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if self._pending_access:
+                conn.executemany(
+                    'UPDATE cache_entries SET last_accessed = ? WHERE key = ?',
+                    [(accessed, key) for key, accessed in self._pending_access.items()]
+                )
+            yield conn
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        self._pending_access.clear()
+
+    def _delete_key(self, key: str):
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+
+    def _enforce_size_limit(self, conn: sqlite3.Connection):
+        """从最久未访问的一端淘汰，直到总大小回到上限以内"""
+        excess = conn.execute('SELECT total_size FROM cache_meta').fetchone()[0] - self.max_size_bytes
+        if excess <= 0:
+            return
+
+        victims = []
+        for key, size in conn.execute('SELECT key, size FROM cache_entries ORDER BY last_accessed'):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany('DELETE FROM cache_entries WHERE key = ?', victims)
+        self.evictions += len(victims)
+
+
+class JSONFileCacheBackend(CacheBackend):
+    """每个条目一个 JSON 文件的旧版缓存 (兼容已有缓存目录)
+
+    每次写入都会扫描过期条目、重新统计大小并重写 cache_index.json。
+    """
+
+    def __init__(self, cache_dir: Path, max_size_bytes: int):
+        super().__init__(cache_dir, max_size_bytes)
+        self._cache_index = {}
+        self._load_cache_index()
+
+    def _load_cache_index(self):
+        """加载缓存索引"""
+        index_file = self.cache_dir / 'cache_index.json'
+        if index_file.exists():
+            try:
+                with open(index_file, 'r', encoding='utf-8') as f:
+                    self._cache_index = json.load(f)
+            except Exception:
+                self._cache_index = {}
+
+    def _save_cache_index(self):
+        """保存缓存索引"""
+        index_file = self.cache_dir / 'cache_index.json'
+        try:
+            with open(index_file, 'w', encoding='utf-8') as f:
+                json.dump(self._cache_index, f, indent=2)
+        except Exception:
+            pass
+
+    def _get_cache_key(self, key: str) -> str:
+        """生成缓存键"""
+        return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+    def _cleanup_cache(self):
+        """清理过期缓存"""
+        current_time = time.time()
+        expired_keys = []
+
+        for cache_key, info in self._cache_index.items():
+            if current_time - info.get('created_at', 0) > info.get('ttl', 3600):
+                expired_keys.append(cache_key)
+
+        for cache_key in expired_keys:
+            self._remove_cache_entry(cache_key)
+            self.expirations += 1
+
+    def _remove_cache_entry(self, cache_key: str):
+        """删除缓存条目"""
+        if cache_key in self._cache_index:
+            cache_file = self.cache_dir / f"{cache_key}.json"
+            if cache_file.exists():
+                cache_file.unlink()
+            del self._cache_index[cache_key]
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            cache_key = self._get_cache_key(key)
+
+            if cache_key not in self._cache_index:
+                self.misses += 1
+                return MISSING
+
+            cache_info = self._cache_index[cache_key]
+            current_time = time.time()
+
+            # 检查是否过期
+            if current_time - cache_info.get('created_at', 0) > cache_info.get('ttl', 3600):
+                self._remove_cache_entry(cache_key)
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+
+            # 读取缓存文件
+            cache_file = self.cache_dir / f"{cache_key}.json"
+            if not cache_file.exists():
+                self._remove_cache_entry(cache_key)
+                self.misses += 1
+                return MISSING
+
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+
+                # 更新访问时间
+                self._cache_index[cache_key]['last_accessed'] = current_time
+                self.hits += 1
+                return data
+            except Exception:
+                self._remove_cache_entry(cache_key)
+                self.misses += 1
+                return MISSING
+
+    def set(self, key: str, value: Any, ttl: int = 3600):
+        with self._lock:
+            cache_key = self._get_cache_key(key)
+            cache_file = self.cache_dir / f"{cache_key}.json"
+
+            try:
+                # 写入缓存文件
+                with open(cache_file, 'w', encoding='utf-8') as f:
+                    json.dump(value, f, ensure_ascii=False, indent=2)
+
+                # 更新索引
+                current_time = time.time()
+                self._cache_index[cache_key] = {
+                    'key': key,
+                    'created_at': current_time,
+                    'last_accessed': current_time,
+                    'ttl': ttl,
+                    'size': cache_file.stat().st_size
+                }
+
+                # 清理过期缓存
+                self._cleanup_cache()
+
+                # 检查缓存大小限制
+                self._enforce_size_limit()
+
+                # 保存索引
+                self._save_cache_index()
+
+            except Exception:
+                if cache_file.exists():
+                    cache_file.unlink()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remove_cache_entry(self._get_cache_key(key))
+            self._save_cache_index()
+
+    def _enforce_size_limit(self):
+        """强制执行缓存大小限制"""
+        total_size = self.total_size()
+
+        if total_size <= self.max_size_bytes:
+            return
+
+        # 按最后访问时间排序，删除最旧的条目
+        sorted_entries = sorted(
+            self._cache_index.items(),
+            key=lambda x: x[1].get('last_accessed', 0)
+        )
+
+        for cache_key, _ in sorted_entries:
+            if total_size <= self.max_size_bytes:
+                break
+
+            entry_size = self._cache_index[cache_key].get('size', 0)
+            self._remove_cache_entry(cache_key)
+            self.evictions += 1
+            total_size -= entry_size
+
+    def clear(self):
+        with self._lock:
+            for cache_key in list(self._cache_index.keys()):
+                self._remove_cache_entry(cache_key)
+            self._save_cache_index()
+
+    def entry_count(self) -> int:
+        return len(self._cache_index)
+
+    def total_size(self) -> int:
+        return sum(info.get('size', 0) for info in self._cache_index.values())
+
+
+CACHE_BACKENDS = {
+    'sqlite': SQLiteCacheBackend,
+    'json': JSONFileCacheBackend
+}
+
+
+def create_cache_backend(name: str, cache_dir: Path, max_size_bytes: int, **options) -> CacheBackend:
+    """按名称创建缓存后端"""
+    if name not in CACHE_BACKENDS:
+        raise ValueError(f"未知的缓存后端: {name}，可选: {', '.join(CACHE_BACKENDS)}")
+    return CACHE_BACKENDS[name](cache_dir, max_size_bytes, **options)
+
+
+def _close_backend(backend_ref):
+    backend = backend_ref()
+    if backend is not None:
+        try:
+            backend.close()
+        except Exception:
+            pass
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+指标注册表 - 低开销的计数器、仪表盘和直方图，支持分位数查询与 Prometheus 文本格式导出
+Metrics Registry - Low-overhead counters, gauges and histograms with quantiles and Prometheus exposition
+"""
+
+import bisect
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 序列锁的分段数：序列按键哈希共享一组锁，避免每个序列一把锁
+LOCK_STRIPES = 16
+
+# Prometheus 文本格式的 Content-Type
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_:]")
+_INVALID_LABEL_CHARS = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def log_linear_buckets(lowest: float, highest: float, sub_buckets: int = 4) -> Tuple[float, ...]:
+    """生成 HDR 风格的对数-线性桶边界
+
+    每个 2 的幂区间再等分为 sub_buckets 份，相对误差约为 1/sub_buckets，
+    桶数量只随量程的对数增长。
+
+    Args:
+        lowest: 第一个桶的上界
+        highest: 需要覆盖的最大值
+        sub_buckets: 每个 2 倍区间内的桶数
+
+    Returns:
+        递增的桶上界
+    """
+    bounds = []
+    base = float(lowest)
+    while base < highest:
+        step = base / sub_buckets
+        bounds.extend(round(base + step * index, 6) for index in range(sub_buckets))
+        base *= 2
+    bounds.append(round(base, 6))
+    return tuple(bounds)
+
+
+# 计时器默认桶 (毫秒)：0.01ms ~ 168s，每个 2 倍区间 4 个桶 (相对误差约 25%)
+DEFAULT_TIMER_BUCKETS_MS = log_linear_buckets(0.01, 120000, sub_buckets=4)
+
+
+class CounterSeries:
+    """计数器 / 仪表盘序列"""
+
+    __slots__ = ("kind", "value", "updated", "lock")
+
+    def __init__(self, kind: str, lock: threading.Lock):
+        self.kind = kind
+        self.value = 0.0
+        self.updated = 0.0
+        self.lock = lock
+
+
+class HistogramSeries:
+    """固定桶直方图序列
+
+    counts[i] 为落入 (bounds[i-1], bounds[i]] 的样本数，最后一格为 +Inf 桶；
+    另外记录总和、最小值、最大值和最近一次样本。
+    """
+
+    __slots__ = ("kind", "bounds", "counts", "sum", "count", "min", "max", "last", "updated", "lock")
+
+    def __init__(self, bounds: Sequence[float], lock: threading.Lock):
+        self.kind = "histogram"
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.last = 0.0
+        self.updated = 0.0
+        self.lock = lock
+
+    def observe(self, value: float):
+        """记录一个样本 (调用方持有锁)"""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.last = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """估算分位数
+
+        定位目标排名所在的桶后在桶内线性插值，并截断到观测到的最小/最大值。
+
+        Args:
+            q: 分位 (0~1)
+
+        Returns:
+            估算值，没有样本时返回 None
+        """
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if not bucket_count or cumulative + bucket_count < rank:
+                cumulative += bucket_count
+                continue
+
+            lower = self.bounds[index - 1] if index > 0 else min(self.min, 0.0)
+            upper = self.bounds[index] if index < len(self.bounds) else self.max
+            lower = max(lower, self.min)
+            upper = min(upper, self.max)
+            if upper <= lower:
+                return upper
+            return lower + (upper - lower) * (rank - cumulative) / bucket_count
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        """导出当前状态 (调用方持有锁)"""
+        return {
+            "counts": list(self.counts),
+            "sum": self.sum,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "last": self.last,
+        }
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> Tuple[Tuple[str, str], ...]:
+    """标签字典 -> 可哈希的有序元组"""
+    if not labels:
+        return ()
+    return tuple(sorted((str(key), str(value)) for key, value in labels.items()))
+
+
+def _sanitize_name(name: str) -> str:
+    """转换为合法的 Prometheus 指标名"""
+    name = _INVALID_NAME_CHARS.sub("_", name)
+    return f"_{name}" if name[:1].isdigit() else name
+
+
+def _sanitize_label(name: str) -> str:
+    """转换为合法的 Prometheus 标签名"""
+    name = _INVALID_LABEL_CHARS.sub("_", name)
+    return f"_{name}" if name[:1].isdigit() else name
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    """Prometheus 数值格式"""
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(label_key: Tuple[Tuple[str, str], ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = label_key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{_sanitize_label(key)}="{_escape_label_value(value)}"' for key, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """指标注册表
+
+    每个 (名称, 标签) 组合对应一个序列。查找已有序列不加锁 (dict 读取是原子的)，
+    只有新建序列时才获取注册锁；更新序列时使用按键哈希分配的分段锁，
+    不同序列之间基本没有锁竞争。计时器写入固定桶直方图，内存占用与样本数无关。
+    """
+
+    def __init__(self, lock_stripes: int = LOCK_STRIPES,
+                 default_buckets: Sequence[float] = DEFAULT_TIMER_BUCKETS_MS):
+        """
+        Args:
+            lock_stripes: 分段锁数量
+            default_buckets: 直方图默认桶上界
+        """
+        self.default_buckets = tuple(default_buckets)
+        self._series: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Any] = {}
+        self._kinds: Dict[str, str] = {}
+        self._help: Dict[str, str] = {}
+        self._register_lock = threading.Lock()
+        self._locks = [threading.Lock() for _ in range(max(1, lock_stripes))]
+
+    def describe(self, name: str, help_text: str):
+        """设置指标说明 (导出为 # HELP)"""
+        self._help[name] = help_text
+
+    def get_description(self, name: str) -> str:
+        """获取指标说明"""
+        return self._help.get(name, "")
+
+    def _get_series(self, kind: str, name: str, labels: Optional[Dict[str, str]],
+                    buckets: Optional[Sequence[float]] = None):
+        key = (name, _label_key(labels))
+        series = self._series.get(key)
+        if series is None:
+            with self._register_lock:
+                series = self._series.get(key)
+                if series is None:
+                    registered = self._kinds.setdefault(name, kind)
+                    if registered != kind:
+                        raise ValueError(f"指标 {name} 已注册为 {registered}，不能作为 {kind} 使用")
+                    lock = self._locks[hash(key) % len(self._locks)]
+                    if kind == "histogram":
+                        series = HistogramSeries(buckets or self.default_buckets, lock)
+                    else:
+                        series = CounterSeries(kind, lock)
+                    self._series[key] = series
+        if series.kind != kind:
+            raise ValueError(f"指标 {name} 已注册为 {series.kind}，不能作为 {kind} 使用")
+        return series
+
+    def inc(self, name: str, value: float = 1, labels: Optional[Dict[str, str]] = None):
+        """计数器累加"""
+        series = self._get_series("counter", name, labels)
+        with series.lock:
+            series.value += value
+            series.updated = time.time()
+
+    def set_gauge(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
+        """设置仪表盘值"""
+        series = self._get_series("gauge", name, labels)
+        with series.lock:
+            series.value = value
+            series.updated = time.time()
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None,
+                buckets: Optional[Sequence[float]] = None):
+        """记录直方图样本
+
+        Args:
+            name: 指标名
+            value: 样本值
+            labels: 标签
+            buckets: 首次创建序列时使用的桶上界 (默认 default_buckets)
+        """
+        series = self._get_series("histogram", name, labels, buckets)
+        with series.lock:
+            series.observe(value)
+            series.updated = time.time()
+
+    @contextmanager
+    def timer(self, name: str, labels: Optional[Dict[str, str]] = None) -> Iterator[None]:
+        """计时上下文：以毫秒记录代码块耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000, labels)
+
+    def get_value(self, name: str, labels: Optional[Dict[str, str]] = None) -> Optional[float]:
+        """计数器/仪表盘的当前值，直方图返回最近一次样本"""
+        series = self._series.get((name, _label_key(labels)))
+        if series is None:
+            return None
+        with series.lock:
+            return series.last if series.kind == "histogram" else series.value
+
+    def quantile(self, name: str, q: float, labels: Optional[Dict[str, str]] = None) -> Optional[float]:
+        """直方图分位数 (0~1)"""
+        series = self._series.get((name, _label_key(labels)))
+        if series is None or series.kind != "histogram":
+            return None
+        with series.lock:
+            return series.quantile(q)
+
+    def percentiles(self, name: str, labels: Optional[Dict[str, str]] = None,
+                    percentiles: Sequence[float] = (50, 95, 99)) -> Dict[str, Optional[float]]:
+        """直方图百分位数，返回 {"p50": ..., "p95": ..., "p99": ...}"""
+        series = self._series.get((name, _label_key(labels)))
+        result = {}
+        for percentile in percentiles:
+            label = f"p{percentile:g}".replace(".", "_")
+            if series is None or series.kind != "histogram":
+                result[label] = None
+                continue
+            with series.lock:
+                result[label] = series.quantile(percentile / 100.0)
+        return result
+
+    def collect(self, name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """导出序列快照
+
+        Args:
+            name: 只导出该指标 (默认全部)
+
+        Returns:
+            [{"name", "kind", "labels", "value", "updated", ...}]，直方图附带桶计数等字段
+        """
+        samples = []
+        for (series_name, label_key), series in list(self._series.items()):
+            if name is not None and series_name != name:
+                continue
+            with series.lock:
+                if series.kind == "histogram":
+                    sample = series.snapshot()
+                    sample["bounds"] = series.bounds
+                    sample["value"] = series.last
+                else:
+                    sample = {"value": series.value}
+                sample["updated"] = series.updated
+            sample.update(name=series_name, kind=series.kind, labels=dict(label_key))
+            samples.append(sample)
+        return samples
+
+    def clear(self, name: Optional[str] = None):
+        """清空指标 (默认全部)"""
+        with self._register_lock:
+            if name is None:
+                self._series.clear()
+                self._kinds.clear()
+                return
+            for key in [key for key in self._series if key[0] == name]:
+                del self._series[key]
+            self._kinds.pop(name, None)
+
+    def render_prometheus(self) -> str:
+        """按 Prometheus 文本格式 (0.0.4) 导出全部指标"""
+        families: Dict[str, List[Tuple[Tuple[Tuple[str, str], ...], Any]]] = {}
+        for (name, label_key), series in list(self._series.items()):
+            families.setdefault(name, []).append((label_key, series))
+
+        lines = []
+        for name in sorted(families):
+            metric_name = _sanitize_name(name)
+            members = sorted(families[name], key=lambda member: member[0])
+            kind = members[0][1].kind
+            if name in self._help:
+                help_text = self._help[name].replace("\\", "\\\\").replace("\n", "\\n")
+                lines.append(f"# HELP {metric_name} {help_text}")
+            lines.append(f"# TYPE {metric_name} {kind}")
+
+            for label_key, series in members:
+                with series.lock:
+                    if kind != "histogram":
+                        lines.append(f"{metric_name}{_format_labels(label_key)} {_format_value(series.value)}")
+                        continue
+                    counts = list(series.counts)
+                    total, count = series.sum, series.count
+
+                cumulative = 0
+                for bound, bucket_count in zip(series.bounds, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(label_key, (("le", _format_value(bound)),))
+                    lines.append(f"{metric_name}_bucket{labels} {cumulative}")
+                labels = _format_labels(label_key, (("le", "+Inf"),))
+                lines.append(f"{metric_name}_bucket{labels} {count}")
+                lines.append(f"{metric_name}_sum{_format_labels(label_key)} {_format_value(total)}")
+                lines.append(f"{metric_name}_count{_format_labels(label_key)} {count}")
+
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def start_metrics_server(port: int = 9464, host: str = "127.0.0.1",
+                         registry: Optional[MetricsRegistry] = None) -> ThreadingHTTPServer:
+    """在后台线程中提供 /metrics 文本导出接口
+
+    Args:
+        port: 监听端口 (0 表示随机端口)
+        host: 监听地址
+        registry: 指标注册表 (默认全局注册表)
+
+    Returns:
+        HTTP 服务器，调用 shutdown() 停止
+    """
+    registry = registry or get_metrics_registry()
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# 全局指标注册表
+_metrics_registry = None
+_metrics_registry_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """获取全局指标注册表"""
+    global _metrics_registry
+    if _metrics_registry is None:
+        with _metrics_registry_lock:
+            if _metrics_registry is None:
+                _metrics_registry = MetricsRegistry()
+    return _metrics_registry
@@ -7,7 +7,6 @@ Performance Optimizer - Optimize file I/O, image processing, caching and indexin
 import os
 import json
 import time
-import hashlib
 import threading
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
@@ -15,6 +14,12 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
+from .cache_backends import MISSING, create_cache_backend
+from .metrics_registry import MetricsRegistry, get_metrics_registry
+
+# measure_performance 记录的直方图指标名 (按 operation 标签区分)
+OPERATION_DURATION_METRIC = "template_tools_operation_duration_ms"
+
 @dataclass
 class PerformanceMetrics:
     """性能指标"""
@@ -33,151 +38,50 @@ class PerformanceMetrics:
 class CacheManager:
     """缓存管理器"""
     
-    def __init__(self, cache_dir: Path, max_size_mb: int = 100):
+    def __init__(self, cache_dir: Path, max_size_mb: int = 100, backend: str = 'sqlite', **backend_options):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_size_mb: 缓存大小上限 (MB)
+            backend: 存储后端 ('sqlite' 单文件数据库 / 'json' 旧版每条目一个文件)
+            backend_options: 传给后端的其它参数
+        """
         self.cache_dir = Path(cache_dir)
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.max_size_bytes = max_size_mb * 1024 * 1024
-        self._cache_index = {}
-        self._lock = threading.RLock()
-        self._load_cache_index()
-    
-    def _load_cache_index(self):
-        """加载缓存索引"""
-        index_file = self.cache_dir / 'cache_index.json'
-        if index_file.exists():
-            try:
-                with open(index_file, 'r', encoding='utf-8') as f:
-                    self._cache_index = json.load(f)
-            except Exception:
-                self._cache_index = {}
-    
-    def _save_cache_index(self):
-        """保存缓存索引"""
-        index_file = self.cache_dir / 'cache_index.json'
-        try:
-            with open(index_file, 'w', encoding='utf-8') as f:
-                json.dump(self._cache_index, f, indent=2)
-        except Exception:
-            pass
-    
-    def _get_cache_key(self, key: str) -> str:
-        """生成缓存键"""
-        return hashlib.md5(key.encode('utf-8')).hexdigest()
-    
-    def _cleanup_cache(self):
-        """清理过期缓存"""
-        current_time = time.time()
-        expired_keys = []
-        
-        for cache_key, info in self._cache_index.items():
-            if current_time - info.get('created_at', 0) > info.get('ttl', 3600):
-                expired_keys.append(cache_key)
-        
-        for cache_key in expired_keys:
-            self._remove_cache_entry(cache_key)
-    
-    def _remove_cache_entry(self, cache_key: str):
-        """删除缓存条目"""
-        if cache_key in self._cache_index:
-            cache_file = self.cache_dir / f"{cache_key}.json"
-            if cache_file.exists():
-                cache_file.unlink()
-            del self._cache_index[cache_key]
+        self.backend = create_cache_backend(backend, self.cache_dir, self.max_size_bytes, **backend_options)
     
     def get(self, key: str) -> Optional[Any]:
         """获取缓存值"""
-        with self._lock:
-            cache_key = self._get_cache_key(key)
-            
-            if cache_key not in self._cache_index:
-                return None
-            
-            cache_info = self._cache_index[cache_key]
-            current_time = time.time()
-            
-            # 检查是否过期
-            if current_time - cache_info.get('created_at', 0) > cache_info.get('ttl', 3600):
-                self._remove_cache_entry(cache_key)
-                return None
-            
-            # 读取缓存文件
-            cache_file = self.cache_dir / f"{cache_key}.json"
-            if not cache_file.exists():
-                self._remove_cache_entry(cache_key)
-                return None
-            
-            try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # 更新访问时间
-                self._cache_index[cache_key]['last_accessed'] = current_time
-                return data
-            except Exception:
-                self._remove_cache_entry(cache_key)
-                return None
+        value = self.backend.get(key)
+        return None if value is MISSING else value
     
     def set(self, key: str, value: Any, ttl: int = 3600):
         """设置缓存值"""
-        with self._lock:
-            cache_key = self._get_cache_key(key)
-            cache_file = self.cache_dir / f"{cache_key}.json"
-            
-            try:
-                # 写入缓存文件
-                with open(cache_file, 'w', encoding='utf-8') as f:
-                    json.dump(value, f, ensure_ascii=False, indent=2)
-                
-                # 更新索引
-                current_time = time.time()
-                self._cache_index[cache_key] = {
-                    'key': key,
-                    'created_at': current_time,
-                    'last_accessed': current_time,
-                    'ttl': ttl,
-                    'size': cache_file.stat().st_size
-                }
-                
-                # 清理过期缓存
-                self._cleanup_cache()
-                
-                # 检查缓存大小限制
-                self._enforce_size_limit()
-                
-                # 保存索引
-                self._save_cache_index()
-                
-            except Exception:
-                if cache_file.exists():
-                    cache_file.unlink()
+        try:
+            self.backend.set(key, value, ttl)
+        except Exception:
+            # 无法序列化的值、数据库被锁或磁盘错误：不缓存，不影响调用方
+            pass
     
-    def _enforce_size_limit(self):
-        """强制执行缓存大小限制"""
-        total_size = sum(info.get('size', 0) for info in self._cache_index.values())
-        
-        if total_size <= self.max_size_bytes:
-            return
-        
-        # 按最后访问时间排序，删除最旧的条目
-        sorted_entries = sorted(
-            self._cache_index.items(),
-            key=lambda x: x[1].get('last_accessed', 0)
-        )
-        
-        for cache_key, _ in sorted_entries:
-            if total_size <= self.max_size_bytes:
-                break
-            
-            entry_size = self._cache_index[cache_key].get('size', 0)
-            self._remove_cache_entry(cache_key)
-            total_size -= entry_size
+    def delete(self, key: str):
+        """删除缓存值"""
+        self.backend.delete(key)
     
     def clear(self):
         """清空缓存"""
-        with self._lock:
-            for cache_key in list(self._cache_index.keys()):
-                self._remove_cache_entry(cache_key)
-            self._save_cache_index()
+        self.backend.clear()
+    
+    def flush(self):
+        """把缓冲中的改动写入磁盘"""
+        self.backend.flush()
+    
+    def close(self):
+        """关闭缓存"""
+        self.backend.close()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计 (命中、未命中、淘汰次数等)"""
+        return self.backend.get_stats()
 
 class IndexOptimizer:
     """索引优化器"""
@@ -361,7 +265,8 @@ class FileIOOptimizer:
 class PerformanceOptimizer:
     """性能优化器主类"""
     
-    def __init__(self, cache_dir: Path = None, index_dir: Path = None):
+    def __init__(self, cache_dir: Path = None, index_dir: Path = None,
+                 metrics_registry: Optional[MetricsRegistry] = None):
         self.cache_dir = cache_dir or Path('cache')
         self.index_dir = index_dir or Path('index')
         
@@ -369,80 +274,64 @@ class PerformanceOptimizer:
         self.index_optimizer = IndexOptimizer(self.index_dir)
         self.file_io_optimizer = FileIOOptimizer()
         
-        self.metrics = []
-        self._lock = threading.RLock()
+        # 操作耗时写入直方图 (固定内存)，而不是无限增长的样本列表。
+        # 默认使用独立的注册表，报告和 clear_metrics 只涉及本实例的操作；
+        # 全局实例使用全局注册表，以便从 /metrics 端点导出
+        self.metrics_registry = metrics_registry or MetricsRegistry()
+        self.metrics_registry.describe(OPERATION_DURATION_METRIC, "模板工具操作耗时 (毫秒)")
     
     def measure_performance(self, operation_name: str):
-        """性能测量装饰器"""
+        """性能测量装饰器 (失败的调用记为 <operation>_error)"""
         def decorator(func):
             def wrapper(*args, **kwargs):
-                start_time = time.time()
+                start_time = time.perf_counter()
                 
                 try:
                     result = func(*args, **kwargs)
-                    end_time = time.time()
-                    
-                    metric = PerformanceMetrics(
-                        operation_name=operation_name,
-                        start_time=start_time,
-                        end_time=end_time,
-                        duration=end_time - start_time
+                except Exception:
+                    self.metrics_registry.observe(
+                        OPERATION_DURATION_METRIC,
+                        (time.perf_counter() - start_time) * 1000,
+                        {'operation': f"{operation_name}_error"}
                     )
-                    
-                    with self._lock:
-                        self.metrics.append(metric)
-                    
-                    return result
+                    raise
                 
-                except Exception as e:
-                    end_time = time.time()
-                    
-                    metric = PerformanceMetrics(
-                        operation_name=f"{operation_name}_error",
-                        start_time=start_time,
-                        end_time=end_time,
-                        duration=end_time - start_time
-                    )
-                    
-                    with self._lock:
-                        self.metrics.append(metric)
-                    
-                    raise e
+                self.metrics_registry.observe(
+                    OPERATION_DURATION_METRIC,
+                    (time.perf_counter() - start_time) * 1000,
+                    {'operation': operation_name}
+                )
+                return result
             
             return wrapper
         return decorator
     
     def get_performance_report(self) -> Dict[str, Any]:
-        """获取性能报告"""
-        with self._lock:
-            if not self.metrics:
-                return {'message': '暂无性能数据'}
-            
-            # 按操作分组
-            operations = {}
-            for metric in self.metrics:
-                op_name = metric.operation_name
-                if op_name not in operations:
-                    operations[op_name] = []
-                operations[op_name].append(metric)
-            
-            # 计算统计信息
-            report = {
-                'total_operations': len(self.metrics),
-                'operations': {}
+        """获取性能报告 (含 p50/p95/p99)"""
+        samples = [
+            sample for sample in self.metrics_registry.collect(OPERATION_DURATION_METRIC)
+            if sample['count']
+        ]
+        if not samples:
+            return {'message': '暂无性能数据'}
+        
+        report = {
+            'total_operations': sum(sample['count'] for sample in samples),
+            'operations': {}
+        }
+        
+        for sample in samples:
+            op_name = sample['labels'].get('operation', '')
+            report['operations'][op_name] = {
+                'count': sample['count'],
+                'avg_duration_ms': sample['sum'] / sample['count'],
+                'min_duration_ms': sample['min'],
+                'max_duration_ms': sample['max'],
+                'total_duration_ms': sample['sum'],
+                **self.metrics_registry.percentiles(OPERATION_DURATION_METRIC, sample['labels'])
             }
-            
-            for op_name, op_metrics in operations.items():
-                durations = [m.duration for m in op_metrics]
-                report['operations'][op_name] = {
-                    'count': len(op_metrics),
-                    'avg_duration_ms': sum(durations) / len(durations) * 1000,
-                    'min_duration_ms': min(durations) * 1000,
-                    'max_duration_ms': max(durations) * 1000,
-                    'total_duration_ms': sum(durations) * 1000
-                }
-            
-            return report
+        
+        return report
     
     def optimize_template_creation(self, template_info: Dict[str, Any]) -> Dict[str, Any]:
         """优化模板创建性能"""
@@ -486,8 +375,7 @@ class PerformanceOptimizer:
     
     def clear_metrics(self):
         """清空性能指标"""
-        with self._lock:
-            self.metrics.clear()
+        self.metrics_registry.clear(OPERATION_DURATION_METRIC)
 
 # 全局性能优化器实例
 _performance_optimizer = None
@@ -496,7 +384,7 @@ def get_performance_optimizer() -> PerformanceOptimizer:
     """获取全局性能优化器实例"""
     global _performance_optimizer
     if _performance_optimizer is None:
-        _performance_optimizer = PerformanceOptimizer()
+        _performance_optimizer = PerformanceOptimizer(metrics_registry=get_metrics_registry())
     return _performance_optimizer
 
 def benchmark_system_performance():
@@ -6,9 +6,12 @@
 from .config_validator import ConfigValidator
 from .structure_validator import StructureValidator
 from .image_validator import ImageValidator
+from .validation_pipeline import TemplateValidationResult, ValidationPipeline
 
 __all__ = [
     "ConfigValidator",
     "StructureValidator", 
-    "ImageValidator"
+    "ImageValidator",
+    "ValidationPipeline",
+    "TemplateValidationResult"
 ]
\ No newline at end of file
@@ -14,6 +14,8 @@ import click
 from rich.console import Console
 from rich.table import Table
 
+from .image_probe import ImageProbeCache
+
 console = Console()
 
 
@@ -28,6 +30,7 @@ class ConfigValidator:
         """
         self.schema_path = schema_path or Path(__file__).parent.parent / "schemas" / "template_config_schema.json"
         self.schema = self._load_schema()
+        self._schema_validator = self._build_schema_validator()
     
     def _load_schema(self) -> Dict[str, Any]:
         """加载JSON Schema"""
@@ -41,6 +44,16 @@ class ConfigValidator:
             console.print(f"[red]错误: Schema文件格式错误: {e}[/red]")
             sys.exit(1)
     
+    def _build_schema_validator(self):
+        """检查schema并创建验证器 (jsonschema.validate 每次调用都会重新检查schema)"""
+        try:
+            validator_cls = jsonschema.validators.validator_for(self.schema)
+            validator_cls.check_schema(self.schema)
+            return validator_cls(self.schema)
+        except jsonschema.SchemaError:
+            # schema无效时保留原有行为，由 validate 在验证时报告
+            return None
+    
     def _get_default_schema(self) -> Dict[str, Any]:
         """获取默认的JSON Schema"""
         return {
@@ -73,11 +86,13 @@ class ConfigValidator:
             }
         }
     
-    def validate_config(self, config_path: Path) -> tuple[bool, List[str]]:
+    def validate_config(self, config_path: Path,
+                        image_probes: Optional[ImageProbeCache] = None) -> tuple[bool, List[str]]:
         """验证单个配置文件
         
         Args:
             config_path: 配置文件路径
+            image_probes: 模板内共享的图片探测缓存 (资源文件检查与图片验证共用，每个文件只打开一次)
             
         Returns:
             (是否有效, 错误列表)
@@ -96,12 +111,17 @@ class ConfigValidator:
             
             # JSON Schema验证
             try:
-                validate(instance=config_data, schema=self.schema)
+                if self._schema_validator is None:
+                    validate(instance=config_data, schema=self.schema)
+                else:
+                    schema_error = jsonschema.exceptions.best_match(self._schema_validator.iter_errors(config_data))
+                    if schema_error is not None:
+                        raise schema_error
             except ValidationError as e:
                 errors.append(f"Schema验证失败: {e.message}")
             
             # 自定义验证规则
-            custom_errors = self._validate_custom_rules(config_data, config_path)
+            custom_errors = self._validate_custom_rules(config_data, config_path, image_probes)
             errors.extend(custom_errors)
             
         except json.JSONDecodeError as e:
@@ -111,10 +131,16 @@ class ConfigValidator:
         
         return len(errors) == 0, errors
     
-    def _validate_custom_rules(self, config: Dict[str, Any], config_path: Path) -> List[str]:
+    def _validate_custom_rules(self, config: Dict[str, Any], config_path: Path,
+                               image_probes: Optional[ImageProbeCache] = None) -> List[str]:
         """自定义验证规则"""
         errors = []
         
+        def asset_exists(asset_path: Path) -> bool:
+            if image_probes is None:
+                return asset_path.exists()
+            return image_probes.get(asset_path).exists
+        
         # 检查资源文件是否存在
         if "assets" in config:
             template_dir = config_path.parent
@@ -123,21 +149,21 @@ class ConfigValidator:
             # 检查预览图
             if "preview" in assets:
                 preview_path = template_dir / assets["preview"]
-                if not preview_path.exists():
+                if not asset_exists(preview_path):
                     errors.append(f"预览图不存在: {preview_path}")
             
             # 检查桌面版资源
             if "desktop" in assets:
                 for section, filename in assets["desktop"].items():
                     asset_path = template_dir / filename
-                    if not asset_path.exists():
+                    if not asset_exists(asset_path):
                         errors.append(f"桌面版资源不存在: {asset_path}")
             
             # 检查移动版资源
             if "mobile" in assets:
                 for section, filename in assets["mobile"].items():
                     asset_path = template_dir / filename
-                    if not asset_path.exists():
+                    if not asset_exists(asset_path):
                         errors.append(f"移动版资源不存在: {asset_path}")
         
         # 检查ID格式
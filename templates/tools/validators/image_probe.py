@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+图片探测
+每个图片文件只打开一次，读取文件大小、格式、颜色模式、尺寸 (以及可选的空白检测)，
+供结构验证器和图片验证器共享
+"""
+
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# 尝试导入PIL进行图片探测
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+
+class ImageProbe:
+    """单个图片文件的探测结果
+
+    error 不为空表示文件无法打开；is_blank 为 None 表示未做像素解码。
+    """
+
+    __slots__ = ("path", "exists", "file_size", "format", "mode", "size", "is_blank", "error")
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.exists = False
+        self.file_size = 0
+        self.format: Optional[str] = None
+        self.mode: Optional[str] = None
+        self.size: Optional[Tuple[int, int]] = None
+        self.is_blank: Optional[bool] = None
+        self.error: Optional[str] = None
+
+
+def probe_image(image_path: Path, decode: bool = False) -> ImageProbe:
+    """打开图片一次并读取验证所需的信息
+
+    Args:
+        image_path: 图片文件路径
+        decode: 是否解码像素做空白检测 (只读头信息时不解码)
+
+    Returns:
+        探测结果
+    """
+    probe = ImageProbe(image_path)
+    try:
+        probe.file_size = image_path.stat().st_size
+    except OSError:
+        return probe
+    probe.exists = True
+
+    if not PIL_AVAILABLE:
+        probe.error = "未安装Pillow库"
+        return probe
+
+    try:
+        with Image.open(image_path) as img:
+            probe.format = img.format
+            probe.mode = img.mode
+            probe.size = img.size
+            if decode:
+                probe.is_blank = is_blank_image(img)
+    except Exception as e:
+        probe.error = str(e)
+
+    return probe
+
+
+def is_blank_image(img) -> bool:
+    """检查是否为空白图片 (所有通道的极差都不超过 10)"""
+    try:
+        # 转换为RGB模式
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+
+        # 检查是否所有通道的最小值和最大值相同（纯色图片）
+        # 逐通道计算极值，遇到有变化的通道即返回
+        img.load()
+        for band_index in range(len(img.getbands())):
+            min_val, max_val = img.getchannel(band_index).getextrema()
+            if max_val - min_val > 10:  # 允许小幅变化
+                return False
+
+        return True
+
+    except Exception:
+        return False
+
+
+class ImageProbeCache:
+    """按路径缓存探测结果 (一个模板验证过程内共享)"""
+
+    def __init__(self, decode: bool = False):
+        """
+        Args:
+            decode: 首次探测时是否同时做像素解码 (需要图片质量检查时为 True)
+        """
+        self.decode = decode
+        self._probes: Dict[Path, ImageProbe] = {}
+
+    def get(self, image_path: Path, decode: bool = False) -> ImageProbe:
+        """获取探测结果；已缓存但缺少解码信息时重新探测"""
+        probe = self._probes.get(image_path)
+        if probe is None or (decode and probe.is_blank is None and probe.error is None and probe.exists):
+            probe = probe_image(image_path, decode=decode or self.decode)
+            self._probes[image_path] = probe
+        return probe
+
+    def __len__(self) -> int:
+        return len(self._probes)
@@ -12,6 +12,8 @@ from PIL import Image
 from rich.console import Console
 from rich.table import Table
 
+from .image_probe import ImageProbe, ImageProbeCache, is_blank_image, probe_image
+
 console = Console()
 
 
@@ -28,65 +30,67 @@ class ImageValidator:
         self.max_file_size = 5 * 1024 * 1024  # 5MB
         self.min_quality_score = 70  # 最低质量分数
     
-    def validate_image(self, image_path: Path, expected_size: Optional[Tuple[int, int]] = None) -> tuple[bool, List[str]]:
+    def validate_image(self, image_path: Path, expected_size: Optional[Tuple[int, int]] = None,
+                       probe: Optional[ImageProbe] = None) -> tuple[bool, List[str]]:
         """验证单个图片文件
         
         Args:
             image_path: 图片文件路径
             expected_size: 期望的尺寸 (width, height)
+            probe: 已有的探测结果 (需包含空白检测)；为空时打开文件探测一次
             
         Returns:
             (是否有效, 错误列表)
         """
         errors = []
         
-        try:
-            # 检查文件是否存在
-            if not image_path.exists():
-                errors.append(f"图片文件不存在: {image_path}")
-                return False, errors
-            
-            # 检查文件大小
-            file_size = image_path.stat().st_size
-            if file_size > self.max_file_size:
-                errors.append(f"文件过大: {file_size / 1024 / 1024:.1f}MB (最大5MB)")
-            
-            # 打开图片
-            with Image.open(image_path) as img:
-                # 检查格式
-                if img.format not in self.allowed_formats:
-                    errors.append(f"不支持的图片格式: {img.format} (支持: {', '.join(self.allowed_formats)})")
-                
-                # 检查尺寸
-                actual_size = img.size
-                if expected_size:
-                    if actual_size != expected_size:
-                        errors.append(f"尺寸不正确: {actual_size[0]}x{actual_size[1]} (期望: {expected_size[0]}x{expected_size[1]})")
-                
-                # 检查颜色模式
-                if img.mode not in ["RGB", "RGBA"]:
-                    errors.append(f"颜色模式不正确: {img.mode} (建议: RGB或RGBA)")
-                
-                # 检查图片质量
-                quality_errors = self._check_image_quality(img, image_path)
-                errors.extend(quality_errors)
+        if probe is None or (probe.exists and probe.error is None and probe.is_blank is None):
+            probe = probe_image(image_path, decode=True)
         
-        except Exception as e:
-            errors.append(f"无法处理图片文件: {e}")
+        # 检查文件是否存在
+        if not probe.exists:
+            errors.append(f"图片文件不存在: {image_path}")
+            return False, errors
+        
+        # 检查文件大小
+        if probe.file_size > self.max_file_size:
+            errors.append(f"文件过大: {probe.file_size / 1024 / 1024:.1f}MB (最大5MB)")
+        
+        if probe.error is not None:
+            errors.append(f"无法处理图片文件: {probe.error}")
+            return False, errors
+        
+        # 检查格式
+        if probe.format not in self.allowed_formats:
+            errors.append(f"不支持的图片格式: {probe.format} (支持: {', '.join(self.allowed_formats)})")
+        
+        # 检查尺寸
+        actual_size = probe.size
+        if expected_size:
+            if actual_size != expected_size:
+                errors.append(f"尺寸不正确: {actual_size[0]}x{actual_size[1]} (期望: {expected_size[0]}x{expected_size[1]})")
+        
+        # 检查颜色模式
+        if probe.mode not in ["RGB", "RGBA"]:
+            errors.append(f"颜色模式不正确: {probe.mode} (建议: RGB或RGBA)")
+        
+        # 检查图片质量
+        quality_errors = self._check_image_quality(probe)
+        errors.extend(quality_errors)
         
         return len(errors) == 0, errors
     
-    def _check_image_quality(self, img: Image.Image, image_path: Path) -> List[str]:
+    def _check_image_quality(self, probe: ImageProbe) -> List[str]:
         """检查图片质量"""
         errors = []
         
         try:
             # 检查是否为空白图片
-            if self._is_blank_image(img):
+            if probe.is_blank:
                 errors.append("图片内容为空白")
             
             # 检查分辨率是否过低
-            width, height = img.size
+            width, height = probe.size
             if width < 100 or height < 100:
                 errors.append(f"分辨率过低: {width}x{height}")
             
@@ -102,61 +106,50 @@ class ImageValidator:
     
     def _is_blank_image(self, img: Image.Image) -> bool:
         """检查是否为空白图片"""
-        try:
-            # 转换为RGB模式
-            if img.mode != "RGB":
-                img = img.convert("RGB")
-            
-            # 获取图片的极值
-            extrema = img.getextrema()
-            
-            # 检查是否所有通道的最小值和最大值相同（纯色图片）
-            for min_val, max_val in extrema:
-                if max_val - min_val > 10:  # 允许小幅变化
-                    return False
-            
-            return True
-        
-        except Exception:
-            return False
+        return is_blank_image(img)
     
-    def validate_template_images(self, template_dir: Path) -> Dict[str, tuple[bool, List[str]]]:
+    def validate_template_images(self, template_dir: Path,
+                                 image_probes: Optional[ImageProbeCache] = None) -> Dict[str, tuple[bool, List[str]]]:
         """验证模板目录下的所有图片
         
         Args:
             template_dir: 模板目录路径
+            image_probes: 模板内共享的图片探测缓存 (与配置验证、结构验证共用时每个文件只打开一次)
             
         Returns:
             {图片路径: (是否有效, 错误列表)}
         """
         results = {}
+        if image_probes is None:
+            image_probes = ImageProbeCache(decode=True)
         
         # 验证预览图
         preview_path = template_dir / "preview.jpg"
         if preview_path.exists():
-            is_valid, errors = self.validate_image(preview_path, self.preview_size)
+            probe = image_probes.get(preview_path, decode=True)
+            is_valid, errors = self.validate_image(preview_path, self.preview_size, probe)
             results[str(preview_path)] = (is_valid, errors)
         
         # 验证桌面版图片
         desktop_dir = template_dir / "desktop"
         if desktop_dir.exists():
             for img_file in desktop_dir.glob("*.jpg"):
-                is_valid, errors = self.validate_image(img_file, self.desktop_size)
+                is_valid, errors = self.validate_image(img_file, self.desktop_size, image_probes.get(img_file, decode=True))
                 results[str(img_file)] = (is_valid, errors)
             
             for img_file in desktop_dir.glob("*.png"):
-                is_valid, errors = self.validate_image(img_file, self.desktop_size)
+                is_valid, errors = self.validate_image(img_file, self.desktop_size, image_probes.get(img_file, decode=True))
                 results[str(img_file)] = (is_valid, errors)
         
         # 验证移动版图片
         mobile_dir = template_dir / "mobile"
         if mobile_dir.exists():
             for img_file in mobile_dir.glob("*.jpg"):
-                is_valid, errors = self.validate_image(img_file, self.mobile_size)
+                is_valid, errors = self.validate_image(img_file, self.mobile_size, image_probes.get(img_file, decode=True))
                 results[str(img_file)] = (is_valid, errors)
             
             for img_file in mobile_dir.glob("*.png"):
-                is_valid, errors = self.validate_image(img_file, self.mobile_size)
+                is_valid, errors = self.validate_image(img_file, self.mobile_size, image_probes.get(img_file, decode=True))
                 results[str(img_file)] = (is_valid, errors)
         
         return results
@@ -7,12 +7,14 @@
 import sys
 import json
 from pathlib import Path
-from typing import Dict, List, Set, Optional, Tuple
+from typing import Any, Dict, List, Set, Optional, Tuple
 import click
 from rich.console import Console
 from rich.table import Table
 from rich.tree import Tree
 
+from .image_probe import ImageProbeCache
+
 # 尝试导入PIL进行图片尺寸验证
 try:
     from PIL import Image
@@ -63,13 +65,15 @@ class StructureValidator:
             "id", "name", "category", "template_type", "status", "version"
         }
     
-    def validate_template_directory(self, template_dir: Path, validate_images: bool = True, validate_config: bool = True) -> tuple[bool, List[str]]:
+    def validate_template_directory(self, template_dir: Path, validate_images: bool = True, validate_config: bool = True,
+                                    image_probes: Optional[ImageProbeCache] = None) -> tuple[bool, List[str]]:
         """验证单个模板目录结构
         
         Args:
             template_dir: 模板目录路径
             validate_images: 是否验证图片尺寸
             validate_config: 是否验证配置文件
+            image_probes: 模板内共享的图片探测缓存 (与图片验证共用时每个文件只打开一次)
             
         Returns:
             (是否有效, 错误列表)
@@ -114,7 +118,7 @@ class StructureValidator:
         
         # 验证图片尺寸
         if validate_images and PIL_AVAILABLE:
-            image_errors = self._validate_image_dimensions(template_dir)
+            image_errors = self._validate_image_dimensions(template_dir, image_probes)
             errors.extend(image_errors)
         elif validate_images and not PIL_AVAILABLE:
             errors.append("警告: 无法验证图片尺寸，请安装Pillow库")
@@ -265,15 +269,17 @@ class StructureValidator:
         
         return tree
     
-    def _validate_image_dimensions(self, template_dir: Path) -> List[str]:
-        """验证图片尺寸"""
+    def _validate_image_dimensions(self, template_dir: Path, image_probes: Optional[ImageProbeCache] = None) -> List[str]:
+        """验证图片尺寸 (只读取图片头信息)"""
         errors = []
+        if image_probes is None:
+            image_probes = ImageProbeCache()
         
         # 验证预览图
         preview_path = template_dir / "preview.jpg"
         if preview_path.exists():
             dimension_error = self._check_image_dimensions(
-                preview_path, self.image_dimensions["preview"], "预览图"
+                preview_path, self.image_dimensions["preview"], "预览图", image_probes
             )
             if dimension_error:
                 errors.append(dimension_error)
@@ -283,7 +289,7 @@ class StructureValidator:
         if desktop_dir.exists():
             for image_file in desktop_dir.glob("*.jpg"):
                 dimension_error = self._check_image_dimensions(
-                    image_file, self.image_dimensions["desktop"], f"桌面版/{image_file.name}"
+                    image_file, self.image_dimensions["desktop"], f"桌面版/{image_file.name}", image_probes
                 )
                 if dimension_error:
                     errors.append(dimension_error)
@@ -293,26 +299,31 @@ class StructureValidator:
         if mobile_dir.exists():
             for image_file in mobile_dir.glob("*.jpg"):
                 dimension_error = self._check_image_dimensions(
-                    image_file, self.image_dimensions["mobile"], f"移动版/{image_file.name}"
+                    image_file, self.image_dimensions["mobile"], f"移动版/{image_file.name}", image_probes
                 )
                 if dimension_error:
                     errors.append(dimension_error)
         
         return errors
     
-    def _check_image_dimensions(self, image_path: Path, expected_size: Tuple[int, int], image_type: str) -> Optional[str]:
+    def _check_image_dimensions(self, image_path: Path, expected_size: Tuple[int, int], image_type: str,
+                                image_probes: Optional[ImageProbeCache] = None) -> Optional[str]:
         """检查单个图片尺寸"""
-        try:
-            with Image.open(image_path) as img:
-                actual_size = img.size
-                expected_width, expected_height = expected_size
-                
-                if actual_size != expected_size:
-                    return (f"{image_type}尺寸不符合要求: "
-                           f"实际{actual_size[0]}x{actual_size[1]}, "
-                           f"期望{expected_width}x{expected_height}")
-        except Exception as e:
-            return f"{image_type}无法读取: {e}"
+        if image_probes is None:
+            image_probes = ImageProbeCache()
+        probe = image_probes.get(image_path)
+        if not probe.exists:
+            return f"{image_type}无法读取: 文件不存在"
+        if probe.error is not None:
+            return f"{image_type}无法读取: {probe.error}"
+        
+        actual_size = probe.size
+        expected_width, expected_height = expected_size
+        
+        if actual_size != expected_size:
+            return (f"{image_type}尺寸不符合要求: "
+                   f"实际{actual_size[0]}x{actual_size[1]}, "
+                   f"期望{expected_width}x{expected_height}")
         
         return None
     
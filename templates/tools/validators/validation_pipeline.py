@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+批量验证流水线
+按模板并行执行结构、配置、图片验证；同一模板内的配置验证 (资源文件检查) 和
+图片验证共享图片探测结果，每个图片文件只打开一次。结果按完成顺序逐个产出，便于控制台流式输出。
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .config_validator import ConfigValidator
+from .image_probe import ImageProbeCache
+from .image_validator import ImageValidator
+from .structure_validator import StructureValidator
+
+# 少于该数量的模板直接在当前进程验证 (进程池启动开销更大)
+MIN_PARALLEL_TEMPLATES = 4
+
+# 每个进程复用的验证器 (ConfigValidator 初始化时会加载 schema)
+_worker_validators: Optional[Tuple[StructureValidator, ConfigValidator, ImageValidator]] = None
+
+
+@dataclass
+class TemplateValidationResult:
+    """单个模板的验证结果"""
+    template_name: str
+    template_path: str
+    structure_errors: List[str] = field(default_factory=list)
+    config_errors: List[str] = field(default_factory=list)
+    image_errors: List[str] = field(default_factory=list)
+    duration_ms: float = 0.0
+
+    @property
+    def errors(self) -> List[str]:
+        """全部错误 (结构、配置、图片顺序)"""
+        return self.structure_errors + self.config_errors + self.image_errors
+
+    @property
+    def is_valid(self) -> bool:
+        """是否通过全部验证"""
+        return not (self.structure_errors or self.config_errors or self.image_errors)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {
+            "template_name": self.template_name,
+            "template_path": self.template_path,
+            "is_valid": self.is_valid,
+            "error_count": len(self.errors),
+            "errors": {
+                "structure": self.structure_errors,
+                "config": self.config_errors,
+                "images": self.image_errors
+            },
+            "duration_ms": round(self.duration_ms, 3)
+        }
+
+
+class ValidationPipeline:
+    """批量验证流水线
+
+    每个模板作为一个任务分发到进程池；任务在工作进程内复用验证器实例，
+    并为模板创建一个图片探测缓存供配置验证和图片验证共用。
+    """
+
+    def __init__(self, validate_structure: bool = True, validate_config: bool = True,
+                 validate_images: bool = True, max_workers: Optional[int] = None):
+        """初始化验证流水线
+
+        Args:
+            validate_structure: 是否验证目录结构
+            validate_config: 是否验证配置文件
+            validate_images: 是否验证图片
+            max_workers: 进程池大小 (默认 CPU 核数，1 表示串行)
+        """
+        self.options = (validate_structure, validate_config, validate_images)
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def validate_template(self, template_dir: Path) -> TemplateValidationResult:
+        """在当前进程验证单个模板"""
+        return _validate_template_task(str(template_dir), self.options)
+
+    def iter_validate(self, template_dirs: List[Path]) -> Iterator[TemplateValidationResult]:
+        """验证多个模板，按完成顺序逐个产出结果
+
+        Args:
+            template_dirs: 模板目录列表
+
+        Yields:
+            模板验证结果
+        """
+        if len(template_dirs) < MIN_PARALLEL_TEMPLATES or self.max_workers <= 1:
+            for template_dir in template_dirs:
+                yield self.validate_template(template_dir)
+            return
+
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(template_dirs))) as executor:
+            futures = {
+                executor.submit(_validate_template_task, str(template_dir), self.options): template_dir
+                for template_dir in template_dirs
+            }
+            for future in as_completed(futures):
+                template_dir = futures[future]
+                try:
+                    yield future.result()
+                except Exception as e:
+                    # 工作进程异常退出等进程池错误
+                    yield TemplateValidationResult(
+                        template_name=template_dir.name,
+                        template_path=str(template_dir),
+                        structure_errors=[f"验证时发生错误: {e}"]
+                    )
+
+    def validate_all(self, template_dirs: List[Path]) -> List[TemplateValidationResult]:
+        """验证多个模板，返回按模板路径排序的结果"""
+        return sorted(self.iter_validate(template_dirs), key=lambda result: result.template_path)
+
+
+def _get_worker_validators() -> Tuple[StructureValidator, ConfigValidator, ImageValidator]:
+    """获取当前进程的验证器实例"""
+    global _worker_validators
+    if _worker_validators is None:
+        _worker_validators = (StructureValidator(), ConfigValidator(), ImageValidator())
+    return _worker_validators
+
+
+def _validate_template_task(template_dir: str, options: Tuple[bool, bool, bool]) -> TemplateValidationResult:
+    """验证单个模板 (进程池任务)"""
+    validate_structure, validate_config, validate_images = options
+    structure_validator, config_validator, image_validator = _get_worker_validators()
+
+    template_path = Path(template_dir)
+    result = TemplateValidationResult(template_name=template_path.name, template_path=template_dir)
+    # 需要图片验证时首次探测即解码，配置验证先探测到的文件在图片验证中不再重新打开
+    image_probes = ImageProbeCache(decode=True) if validate_images else None
+    start_time = time.perf_counter()
+
+    try:
+        # 结构验证 (不读取图片)
+        if validate_structure:
+            is_valid, errors = structure_validator.validate_template_directory(
+                template_path, validate_images=False, validate_config=False
+            )
+            if not is_valid:
+                result.structure_errors.extend(errors)
+
+        # 配置验证
+        if validate_config:
+            is_valid, errors = config_validator.validate_config(template_path / "template.json", image_probes)
+            if not is_valid:
+                result.config_errors.extend(errors)
+
+        # 图片验证
+        if validate_images:
+            image_results = image_validator.validate_template_images(template_path, image_probes)
+            for img_path, (is_valid, errors) in image_results.items():
+                if not is_valid:
+                    result.image_errors.extend(errors)
+    except Exception as e:
+        result.structure_errors.append(f"验证时发生错误: {e}")
+
+    result.duration_ms = (time.perf_counter() - start_time) * 1000
+    return result
@@ -0,0 +1,124 @@
+"""
+Property-Based Tests for A+ Image Feature Extraction
+
+Tests that the vectorized image features give the same dominant colors,
+brightness and saturation distributions as the per-pixel reference
+implementations (in both resize/convert orders, for RGB, P and RGBA
+images), and that computed features are cached by image content without
+keeping the decoded image.
+"""
+
+import colorsys
+import io
+
+import numpy as np
+from hypothesis import given, strategies as st, settings
+from PIL import Image
+
+from services.aplus_studio.image_features import ImageFeatures, ImageFeatureCache
+
+
+# ============================================================================
+# Reference implementations (per-pixel loops)
+# ============================================================================
+
+def reference_dominant_colors(image, sample_size, num_colors=5, resize_first=False):
+    if resize_first:
+        pixels = list(image.resize((sample_size, sample_size)).convert('RGB').getdata())
+    else:
+        pixels = list(image.convert('RGB').resize((sample_size, sample_size)).getdata())
+    color_counts = {}
+    for pixel in pixels:
+        quantized = tuple(c // 32 * 32 for c in pixel)
+        color_counts[quantized] = color_counts.get(quantized, 0) + 1
+    sorted_colors = sorted(color_counts.items(), key=lambda x: x[1], reverse=True)
+    return [color for color, count in sorted_colors[:num_colors]]
+
+
+def reference_saturation_levels(image):
+    pixels = list(image.convert('RGB').getdata())
+    saturations = [
+        colorsys.rgb_to_hsv(pixels[i][0] / 255, pixels[i][1] / 255, pixels[i][2] / 255)[1]
+        for i in range(0, len(pixels), 100)
+    ]
+    total = len(saturations)
+    return {
+        'low': sum(1 for s in saturations if s < 0.3) / total,
+        'mid': sum(1 for s in saturations if 0.3 <= s < 0.7) / total,
+        'high': sum(1 for s in saturations if s >= 0.7) / total
+    }
+
+
+def reference_brightness_distribution(image, from_rgb=False):
+    if from_rgb:
+        image = image.convert('RGB')
+    pixels = list(image.convert('L').getdata())
+    total = len(pixels)
+    return {
+        'low': sum(1 for p in pixels if p < 85) / total,
+        'mid': sum(1 for p in pixels if 85 <= p < 170) / total,
+        'high': sum(1 for p in pixels if p >= 170) / total
+    }
+
+
+# ============================================================================
+# Helper Strategies
+# ============================================================================
+
+@st.composite
+def blocky_images(draw):
+    """Few large color blocks, so quantized colors frequently tie."""
+    rows = draw(st.integers(min_value=1, max_value=8))
+    cols = draw(st.integers(min_value=1, max_value=8))
+    seed = draw(st.integers(min_value=0, max_value=2 ** 32 - 1))
+    mode = draw(st.sampled_from(['RGB', 'P', 'RGBA']))
+    rng = np.random.default_rng(seed)
+    blocks = rng.integers(0, 256, (rows, cols, 3), dtype=np.uint8)
+    image = Image.fromarray(blocks).resize((240, 180), Image.NEAREST)
+    if mode == 'P':
+        return image.quantize(colors=16)
+    if mode == 'RGBA':
+        image.putalpha(Image.fromarray(rng.integers(0, 256, (rows, cols), dtype=np.uint8)).resize((240, 180)))
+    return image
+
+
+# ============================================================================
+# Properties
+# ============================================================================
+
+@given(image=blocky_images(), sample_size=st.sampled_from([100, 150]), resize_first=st.booleans())
+@settings(max_examples=60, deadline=None)
+def test_dominant_colors_match_reference(image, sample_size, resize_first):
+    features = ImageFeatures(image)
+    assert features.dominant_colors(sample_size=sample_size, resize_first=resize_first) == \
+        reference_dominant_colors(image, sample_size, resize_first=resize_first)
+
+
+@given(image=blocky_images(), from_rgb=st.booleans())
+@settings(max_examples=40, deadline=None)
+def test_distributions_match_reference(image, from_rgb):
+    features = ImageFeatures(image)
+    assert features.brightness_distribution(from_rgb=from_rgb) == \
+        reference_brightness_distribution(image, from_rgb=from_rgb)
+    assert features.saturation_levels() == reference_saturation_levels(image)
+
+
+def test_features_cached_by_content():
+    image = Image.new('RGB', (60, 40), (200, 30, 30))
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG')
+    image_data = buffer.getvalue()
+
+    cache = ImageFeatureCache(max_entries=2)
+    first = cache.get(image_data)
+    assert first.dominant_colors(sample_size=100) == [(192, 0, 0)]
+
+    # Same content: the computed value is reused and nothing is decoded again
+    second = cache.get(bytes(image_data))
+    assert second.dominant_colors(sample_size=100) == [(192, 0, 0)]
+    assert second._image is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # The cache holds feature values only, never decoded images
+    for memo, _ in cache._entries.values():
+        assert not any(isinstance(value, Image.Image) for value in memo.values())
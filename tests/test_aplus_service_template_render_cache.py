@@ -0,0 +1,108 @@
+"""
+Tests for the A+ TemplateEngine render caches
+
+Tests that cached renders are pixel-identical to uncached ones (including
+re-renders after a text edit that reuse a canvas snapshot), that snapshot
+reuse is not counted as a render cache hit, and that product image cache
+keys follow the image content for bytes, in-memory images and file paths.
+"""
+
+import io
+import os
+
+import pytest
+from PIL import Image
+
+pytest.importorskip("services.aplus_studio.text_service")
+
+from services.aplus_studio.models import MaterialSet, MaterialType, ModuleType, UploadedFile
+from services.aplus_studio.template_engine import TemplateEngine
+
+MODULE_TYPES = (ModuleType.PRODUCT_OVERVIEW, ModuleType.FEATURE_ANALYSIS, ModuleType.INSTALLATION_GUIDE)
+
+TEXT_INPUTS = [
+    "Premium Kitchen Knife Set",
+    "Durable stainless steel construction built to last for years of daily use",
+    "Ergonomic handle with a soft grip that stays comfortable during long sessions",
+    "Dishwasher safe parts make cleanup quick and easy after every single use",
+]
+
+
+def png_bytes(color, size=(320, 240)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def uploaded(content):
+    size = len(content) if isinstance(content, bytes) else 0
+    return UploadedFile(filename="product.png", file_type=MaterialType.IMAGE, file_size=size, content=content)
+
+
+def materials(title, content):
+    return MaterialSet(images=[uploaded(content)], text_inputs=[title] + TEXT_INPUTS[1:])
+
+
+def pixels(image_data):
+    with Image.open(io.BytesIO(image_data)) as image:
+        return image.convert('RGB').tobytes()
+
+
+def test_cached_renders_match_uncached():
+    cached = TemplateEngine(enable_cache=True)
+    uncached = TemplateEngine(enable_cache=False)
+    image = png_bytes((40, 120, 200))
+
+    for title in ("Premium Kitchen Knife Set", "Premium Kitchen Knife Set v2", "Premium Kitchen Knife Set"):
+        for module_type in MODULE_TYPES:
+            expected = uncached.render_module(module_type, materials(title, image)).image_data
+            actual = cached.render_module(module_type, materials(title, image)).image_data
+            assert pixels(actual) == pixels(expected)
+
+
+def test_snapshot_reuse_is_not_a_cache_hit():
+    engine = TemplateEngine(enable_cache=True)
+    image = png_bytes((40, 120, 200))
+    module_type = ModuleType.PRODUCT_OVERVIEW
+
+    engine.render_module(module_type, materials("Title", image))
+    engine.render_module(module_type, materials("Title", image))
+    stats = engine.get_render_statistics()
+    assert (stats['cache_hits'], stats['cache_misses']) == (1, 1)
+
+    engine.render_module(module_type, materials("Edited title", image))
+    stats = engine.get_render_statistics()
+    assert (stats['cache_hits'], stats['cache_misses']) == (1, 2)
+    assert stats['canvas_reuses'] == 1
+
+
+def test_in_memory_images_keyed_by_content():
+    engine = TemplateEngine(enable_cache=True)
+
+    red = engine._get_resized_image(uploaded(Image.new('RGB', (64, 64), (255, 0, 0))), (16, 16))
+    # A new object (possibly reusing the old id) with other pixels must not hit the red entry
+    blue = engine._get_resized_image(uploaded(Image.new('RGB', (64, 64), (0, 0, 255))), (16, 16))
+
+    assert red.getpixel((0, 0)) == (255, 0, 0)
+    assert blue.getpixel((0, 0)) == (0, 0, 255)
+    again = engine._get_resized_image(uploaded(Image.new('RGB', (64, 64), (255, 0, 0))), (16, 16))
+    assert again is red
+
+
+def test_path_images_are_closed_and_refreshed(tmp_path):
+    engine = TemplateEngine(enable_cache=True)
+    path = tmp_path / "product.png"
+    path.write_bytes(png_bytes((255, 0, 0)))
+
+    first = engine._get_resized_image(uploaded(str(path)), (16, 16))
+    assert first.getpixel((0, 0)) == (255, 0, 0)
+    if os.path.isdir("/proc/self/fd"):
+        open_files = [os.path.realpath(os.path.join("/proc/self/fd", fd)) for fd in os.listdir("/proc/self/fd")]
+        assert str(path.resolve()) not in open_files
+
+    # Replacing the file invalidates the cached resize
+    path.write_bytes(png_bytes((0, 255, 0), size=(300, 200)))
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    second = engine._get_resized_image(uploaded(str(path)), (16, 16))
+    assert second.getpixel((0, 0)) == (0, 255, 0)
@@ -0,0 +1,128 @@
+"""
+Property-Based Tests for FBA Batch Calculation Consistency
+
+Tests that the vectorized FBABatchCalculator produces exactly the same size
+tier, billable weight and fee columns as the scalar FBACalculator, including
+rows whose rate path is missing from the configuration.
+"""
+
+import io
+
+import numpy as np
+from hypothesis import given, strategies as st, settings
+
+from services.fba_logic.calculator import FBACalculator
+from services.fba_logic.rate_index import RATE_INDEX
+from services.fba_logic.batch_calculator import (
+    FBABatchCalculator,
+    calculate_catalog,
+    category_flags,
+    iter_catalog_file,
+    PRODUCT_CLASSES,
+    RESULT_COLUMNS
+)
+
+
+# ============================================================================
+# Helper Strategies
+# ============================================================================
+
+dimension = st.floats(min_value=0.1, max_value=130.0, allow_nan=False).map(lambda x: round(x, 2))
+weight = st.floats(min_value=0.01, max_value=200.0, allow_nan=False).map(lambda x: round(x, 2))
+price = st.one_of(st.none(), st.floats(min_value=0.5, max_value=150.0, allow_nan=False).map(lambda x: round(x, 2)))
+
+sku_strategy = st.tuples(
+    dimension, dimension, dimension, weight, price,
+    st.sampled_from(PRODUCT_CLASSES),
+    st.integers(min_value=0, max_value=90)
+)
+
+
+def scalar_row(l, w, h, wt, p, category, days, season):
+    calc = FBACalculator(l, w, h, wt)
+    kwargs = dict(price=p, is_apparel=category == "Apparel", is_dangerous=category == "Dangerous")
+    _, billable_weight, tier = calc.calculate_fulfillment_fee(season=season, **kwargs)
+    costs = calc.calculate_total_cost(season=season, low_inv_days=days, **kwargs)
+    return dict(costs, size_tier=tier, billable_weight=billable_weight)
+
+
+# ============================================================================
+# Property: Batch results equal scalar results
+# ============================================================================
+
+@given(
+    skus=st.lists(sku_strategy, min_size=1, max_size=60),
+    season=st.sampled_from(["Jan-Sep", "Oct-Dec"])
+)
+@settings(max_examples=100, deadline=None)
+def test_property_batch_matches_scalar(skus, season):
+    """
+    Property: For any catalog, every column of the vectorized result equals
+    the value FBACalculator computes for the same row.
+    """
+    l, w, h, wt, p, category, days = zip(*skus)
+    prices = np.array([np.nan if x is None else x for x in p], dtype=float)
+
+    is_apparel, is_dangerous = category_flags(category)
+
+    result = calculate_catalog(l, w, h, wt, price=prices, season=season, low_inv_days=np.array(days),
+                               is_apparel=is_apparel, is_dangerous=is_dangerous)
+
+    for i, sku in enumerate(skus):
+        expected = scalar_row(*sku, season=season)
+        for column in RESULT_COLUMNS:
+            assert result[column][i] == expected[column], \
+                f"row {i} column {column}: batch={result[column][i]!r} scalar={expected[column]!r}"
+
+
+def test_category_does_not_change_fees():
+    """Like FBACalculator, the category argument is recorded but the product type comes from the flags."""
+    calc = FBABatchCalculator([12.0, 12.0], [9.0, 9.0], [2.0, 2.0], [1.5, 1.5],
+                              category=np.array(["Apparel", "Dangerous"], dtype=object))
+    fees, _, tiers = calc.calculate_fulfillment_fee(price=[25.0, 25.0])
+
+    expected_fee, _, expected_tier = FBACalculator(12.0, 9.0, 2.0, 1.5, category="Apparel") \
+        .calculate_fulfillment_fee(price=25.0)
+    assert list(fees) == [expected_fee, expected_fee]
+    assert list(tiers) == [expected_tier, expected_tier]
+
+
+def test_missing_rate_path_matches_scalar(monkeypatch):
+    """A missing (season, price band, class) path gives fee 0 and the scalar's error tier, and is flagged."""
+    monkeypatch.setattr(RATE_INDEX, "rate_paths", RATE_INDEX.rate_paths - {("Off-Peak", "Under_10", "Dangerous")})
+    skus = [(12.0, 9.0, 2.0, 1.5, 5.0, True), (12.0, 9.0, 2.0, 1.5, 5.0, False), (30.0, 20.0, 15.0, 30.0, 5.0, True)]
+    l, w, h, wt, p, dangerous = zip(*skus)
+
+    result = calculate_catalog(l, w, h, wt, price=np.array(p), season="Jan-Sep", is_dangerous=np.array(dangerous))
+
+    for i, (length, width, height, weight, price, is_dangerous) in enumerate(skus):
+        calc = FBACalculator(length, width, height, weight)
+        fee, billable_weight, tier = calc.calculate_fulfillment_fee(price=price, is_dangerous=is_dangerous,
+                                                                    season="Jan-Sep")
+        costs = calc.calculate_total_cost(season="Jan-Sep", price=price, is_dangerous=is_dangerous)
+        expected = dict(costs, size_tier=tier, billable_weight=billable_weight)
+        for column in RESULT_COLUMNS:
+            assert result[column][i] == expected[column]
+        assert result["rate_missing"][i] == is_dangerous
+    assert result["size_tier"][0].startswith("未找到费率配置")
+    assert result["fulfillment_fee"][0] == 0
+
+
+def test_catalog_file_streaming_in_chunks():
+    """CSV catalogs are processed chunk by chunk with the fee columns appended."""
+    csv_text = "sku,length,width,height,weight,price,category\n" + "\n".join(
+        f"SKU{i},{10 + i % 7},{8 - i % 3},{1 + i % 4 * 0.5},{0.5 + i % 9},{5 + i * 3 % 80},{PRODUCT_CLASSES[i % 3]}"
+        for i in range(25)
+    )
+
+    chunks = list(iter_catalog_file(io.StringIO(csv_text), chunksize=10))
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    for chunk in chunks:
+        for column in RESULT_COLUMNS + ("rate_missing",):
+            assert column in chunk.columns
+        for row in chunk.itertuples():
+            expected = scalar_row(row.length, row.width, row.height, row.weight, row.price,
+                                  row.category, None, "Jan-Sep")
+            assert row.fulfillment_fee == expected["fulfillment_fee"]
+            assert row.size_tier == expected["size_tier"]
@@ -0,0 +1,86 @@
+"""
+Tests for the FBA catalog report helper
+
+Tests that CatalogReport writes the streamed result chunks to a compressed
+CSV, keeps full-catalog totals, stops writing at the size cap, and removes
+its temporary file when replaced, collected or left stale.
+"""
+
+import gc
+import gzip
+import io
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from services.fba_logic.batch_calculator import PRODUCT_CLASSES, iter_catalog_file
+from services.fba_logic.catalog_report import CatalogReport, sweep_stale_reports
+
+
+def catalog_csv(rows):
+    return "sku,length,width,height,weight,price,category\n" + "\n".join(
+        f"SKU{i},{10 + i % 7},{8 - i % 3},{1 + i % 4 * 0.5},{0.5 + i % 9},{5 + i * 3 % 80},{PRODUCT_CLASSES[i % 3]}"
+        for i in range(rows)
+    )
+
+
+def test_report_matches_streamed_chunks(tmp_path):
+    chunks = list(iter_catalog_file(io.StringIO(catalog_csv(25)), chunksize=10))
+    report = CatalogReport("inventory.csv", preview_rows=5, directory=tmp_path)
+    for chunk in chunks:
+        report.add_chunk(chunk)
+
+    with gzip.open(io.BytesIO(report.read_bytes()), "rt", encoding="utf-8-sig") as f:
+        written = pd.read_csv(f)
+
+    expected = pd.concat(chunks, ignore_index=True)
+    assert report.file_name == "inventory_fba_fees.csv.gz"
+    assert report.rows == report.written_rows == 25
+    assert not report.truncated
+    assert len(report.preview) == 5
+    assert list(written["sku"]) == list(expected["sku"])
+    assert written["total"].sum() == pytest.approx(report.fee_totals["total"])
+    assert sum(report.tier_counts.values()) == 25
+
+
+def test_report_stops_writing_at_size_cap(tmp_path):
+    report = CatalogReport("inventory.csv", max_bytes=1, directory=tmp_path)
+    for chunk in iter_catalog_file(io.StringIO(catalog_csv(30)), chunksize=10):
+        report.add_chunk(chunk)
+    report.close()
+
+    # Only the first chunk is written; the summary still covers every row
+    assert report.truncated
+    assert report.written_rows == 10
+    assert report.rows == 30
+    with gzip.open(report.path, "rt", encoding="utf-8-sig") as f:
+        assert len(pd.read_csv(f)) == 10
+
+
+def test_report_file_removed_on_replace_and_collect(tmp_path):
+    replaced = CatalogReport("a.csv", directory=tmp_path)
+    replaced.remove()
+    assert not os.path.exists(replaced.path)
+
+    collected = CatalogReport("b.csv", directory=tmp_path)
+    path = collected.path
+    del collected
+    gc.collect()
+    assert not os.path.exists(path)
+
+
+def test_sweep_removes_only_stale_reports(tmp_path):
+    stale = tmp_path / "fba_report_old.csv.gz"
+    fresh = tmp_path / "fba_report_new.csv.gz"
+    other = tmp_path / "other.csv.gz"
+    for path in (stale, fresh, other):
+        path.write_bytes(b"")
+    old = time.time() - 3600
+    os.utime(stale, (old, old))
+    os.utime(other, (old, old))
+
+    assert sweep_stale_reports(tmp_path, max_age_seconds=60) == 1
+    assert not stale.exists()
+    assert fresh.exists() and other.exists()
@@ -0,0 +1,79 @@
+"""
+Tests for the compiled FBA rate-card index
+
+Tests that the flat (season, price band, product class, tier) index gives the
+same brackets as walking FULFILLMENT_FEES, that its JSON disk cache is
+reused until config.py changes, and that an unreadable cache falls back to
+recompiling.
+"""
+
+import json
+
+import pytest
+
+from app_utils.fba_data.config import FULFILLMENT_FEES
+from services.fba_logic import rate_index
+from services.fba_logic.rate_index import RateCardIndex, compile_rate_cards
+
+
+def linear_bracket(rate_card, billable_weight):
+    """Reference lookup: first bracket whose max_weight covers the weight."""
+    for bracket in rate_card:
+        if billable_weight <= bracket["max_weight"]:
+            return bracket
+    return None
+
+
+def test_compiled_cards_match_linear_walk():
+    cards = compile_rate_cards()
+
+    for season, bands in FULFILLMENT_FEES.items():
+        for band, classes in bands.items():
+            for prod_type, tiers in classes.items():
+                for tier, brackets in tiers.items():
+                    card = cards[(season, band, prod_type, tier)]
+                    for weight in [0.01, 0.2, 0.5, 1.0, 2.75, 9.9, 20.0, 49.5, 70.0, 150.0, 400.0]:
+                        _, bracket = card.find_bracket(weight)
+                        assert bracket == linear_bracket(brackets, weight)
+
+
+def test_cache_reused_until_config_changes(tmp_path, monkeypatch):
+    cache_path = tmp_path / "rate_index.json"
+
+    first = RateCardIndex(cache_path=str(cache_path))
+    assert cache_path.exists()
+
+    # A valid cache must be loaded without recompiling
+    def fail_compile(*args, **kwargs):
+        raise AssertionError("rate cards recompiled despite a valid cache")
+
+    monkeypatch.setattr(rate_index, "compile_rate_cards", fail_compile)
+    second = RateCardIndex(cache_path=str(cache_path))
+    assert second.cards.keys() == first.cards.keys()
+    for key, card in first.cards.items():
+        assert (second.cards[key].max_weights, second.cards[key].brackets) == (card.max_weights, card.brackets)
+
+    # A changed config fingerprint invalidates the cache
+    calls = []
+    monkeypatch.setattr(rate_index, "compile_rate_cards", lambda: calls.append(1) or compile_rate_cards())
+    monkeypatch.setattr(rate_index, "_config_fingerprint", lambda: "changed")
+    RateCardIndex(cache_path=str(cache_path))
+    assert calls == [1]
+    with open(cache_path, encoding="utf-8") as f:
+        assert json.load(f)["fingerprint"] == "changed"
+
+
+@pytest.mark.parametrize("content", [
+    b"\x80\x04\x95 not json",
+    b"[]",
+    b'{"version": 1, "fingerprint": "%s", "cards": [["Off-Peak", "Under_10"]]}',
+    b'{"version": 1, "fingerprint": "%s"}',
+])
+def test_unreadable_cache_recompiles(tmp_path, content):
+    cache_path = tmp_path / "rate_index.json"
+    cache_path.write_bytes(content.replace(b"%s", rate_index._config_fingerprint().encode()))
+
+    index = RateCardIndex(cache_path=str(cache_path))
+    assert index.cards.keys() == compile_rate_cards().keys()
+    with open(cache_path, encoding="utf-8") as f:
+        assert len(json.load(f)["cards"]) == len(index.cards)
@@ -0,0 +1,175 @@
+"""
+Tests for the segmented AuditLogger store
+
+Tests that time-partitioned, indexed segments answer get_audit_trail and
+get_audit_statistics exactly like a linear scan of the same events, that
+memory stays within the configured hot window, and that concurrent writers
+append events in timestamp order.
+"""
+
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+
+from hypothesis import given, settings, strategies as st
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.path.join(ROOT_DIR, "templates")
+if TEMPLATES_DIR not in sys.path:
+    sys.path.insert(0, TEMPLATES_DIR)
+
+from tools.logging.audit_logger import AuditEvent, AuditEventType, AuditLogger, AuditSegment
+
+BASE_TIME = datetime.now().replace(microsecond=0) - timedelta(days=3)
+USERS = ["alice", "bob", None]
+RESOURCES = ["template:t1", "template:t2", "config:categories.yaml", None]
+EVENT_TYPES = [AuditEventType.TEMPLATE_UPDATE, AuditEventType.PERFORMANCE_METRIC, AuditEventType.CONFIG_CHANGE]
+
+event_specs = st.lists(
+    st.tuples(
+        st.integers(min_value=1, max_value=90),  # minutes after the previous event
+        st.sampled_from(USERS),
+        st.sampled_from(RESOURCES),
+        st.sampled_from(EVENT_TYPES),
+        st.sampled_from(["success", "failure"]),
+        st.sampled_from([None, 0.0, 12.5]),
+    ),
+    max_size=120,
+)
+
+
+def build_events(specs):
+    events = []
+    timestamp = BASE_TIME
+    for index, (gap, user, resource, event_type, result, duration) in enumerate(specs):
+        timestamp += timedelta(minutes=gap)
+        events.append(AuditEvent(
+            event_id=f"AUD_{index}",
+            event_type=event_type,
+            timestamp=timestamp,
+            user_id=user,
+            session_id="s",
+            operation="op",
+            resource=resource,
+            details={},
+            result=result,
+            duration_ms=duration,
+        ))
+    return events
+
+
+def make_logger(tmp_path, events, **kwargs):
+    logger = AuditLogger(log_dir=tmp_path, max_segment_events=8, **kwargs)
+    with logger._lock:
+        logger._segments.clear()
+        logger._event_count = 0
+        for event in events:
+            logger._append_event(event)
+    return logger
+
+
+def linear_trail(events, resource=None, user_id=None, event_type=None,
+                 start_time=None, end_time=None, limit=100):
+    matched = [
+        e for e in events
+        if (not resource or (e.resource and resource in e.resource))
+        and (not user_id or e.user_id == user_id)
+        and (not event_type or e.event_type == event_type)
+        and (not start_time or e.timestamp >= start_time)
+        and (not end_time or e.timestamp <= end_time)
+    ]
+    matched.sort(key=lambda e: e.timestamp, reverse=True)
+    return matched if limit is None else matched[:limit]
+
+
+@settings(max_examples=60, deadline=None)
+@given(
+    specs=event_specs,
+    resource=st.sampled_from([None, "template", "t2", "yaml"]),
+    user_id=st.sampled_from([None, "alice", "bob"]),
+    event_type=st.sampled_from([None] + EVENT_TYPES),
+    window=st.one_of(st.none(), st.tuples(st.integers(0, 3000), st.integers(0, 3000))),
+    limit=st.sampled_from([None, 1, 5, 100]),
+)
+def test_trail_matches_linear_scan(tmp_path_factory, specs, resource, user_id, event_type, window, limit):
+    events = build_events(specs)
+    logger = make_logger(tmp_path_factory.mktemp("audit"), events, hot_window_events=len(events) + 1)
+
+    start_time = end_time = None
+    if window:
+        start_time = BASE_TIME + timedelta(minutes=min(window))
+        end_time = BASE_TIME + timedelta(minutes=max(window))
+
+    trail = logger.get_audit_trail(resource=resource, user_id=user_id, event_type=event_type,
+                                   start_time=start_time, end_time=end_time, limit=limit)
+    expected = linear_trail(events, resource, user_id, event_type, start_time, end_time, limit)
+    assert [e.event_id for e in trail] == [e.event_id for e in expected]
+
+
+@settings(max_examples=40, deadline=None)
+@given(specs=event_specs, days=st.integers(min_value=1, max_value=5))
+def test_statistics_match_linear_scan(tmp_path_factory, specs, days):
+    events = build_events(specs)
+    logger = make_logger(tmp_path_factory.mktemp("audit"), events, hot_window_events=len(events) + 1)
+
+    stats = logger.get_audit_statistics(days=days)
+
+    cutoff = datetime.now() - timedelta(days=days)
+    recent = [e for e in events if e.timestamp >= cutoff]
+    if not recent:
+        assert "message" in stats
+        return
+
+    assert stats["total_events"] == len(recent)
+    assert stats["user_activity"] == {
+        user: sum(1 for e in recent if (e.user_id or "unknown") == user)
+        for user in {e.user_id or "unknown" for e in recent}
+    }
+    assert stats["daily_activity"] == {
+        day: sum(1 for e in recent if e.timestamp.strftime("%Y-%m-%d") == day)
+        for day in {e.timestamp.strftime("%Y-%m-%d") for e in recent}
+    }
+    performance = [e for e in recent if e.event_type == AuditEventType.PERFORMANCE_METRIC]
+    durations = [e.duration_ms for e in performance if e.duration_ms]
+    assert stats["performance"]["performance_events_count"] == len(performance)
+    assert stats["performance"]["avg_duration_ms"] == (sum(durations) / len(durations) if durations else None)
+
+
+def test_hot_window_bounds_memory(tmp_path):
+    events = build_events([(1, "alice", "template:t1", AuditEventType.TEMPLATE_UPDATE, "success", None)] * 200)
+    logger = make_logger(tmp_path, events, hot_window_events=50)
+
+    kept = logger.audit_events
+    assert 50 <= len(kept) < 50 + logger.max_segment_events
+    assert [e.event_id for e in kept] == [e.event_id for e in events[-len(kept):]]
+
+    # Time-based eviction keeps only the last 30 minutes
+    logger = make_logger(tmp_path, events, hot_window_events=1000, hot_window_hours=0.5)
+    assert [e.event_id for e in logger.audit_events] == [
+        e.event_id for e in events if e.timestamp >= events[-1].timestamp - timedelta(minutes=30)
+    ]
+
+
+def test_concurrent_writers_append_in_order(tmp_path, monkeypatch):
+    logger = AuditLogger(log_dir=tmp_path, max_segment_events=16)
+    rebuilds = []
+    original = AuditSegment._rebuild
+    monkeypatch.setattr(AuditSegment, "_rebuild", lambda segment: (rebuilds.append(1), original(segment)))
+
+    def writer(index):
+        for _ in range(200):
+            logger.log_event(AuditEventType.TEMPLATE_UPDATE, "op", resource=f"template:t{index}")
+
+    threads = [threading.Thread(target=writer, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    timestamps = [event.timestamp for event in logger.audit_events]
+    assert sum(event.operation == "op" for event in logger.audit_events) == 1600
+    assert timestamps == sorted(timestamps)
+    assert rebuilds == []
+    trail = logger.get_audit_trail(limit=10)
+    assert [event.timestamp for event in trail] == sorted(timestamps, reverse=True)[:10]
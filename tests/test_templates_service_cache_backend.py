@@ -0,0 +1,165 @@
+"""
+Tests for the template-tools SQLite cache backend
+
+Tests that CacheManager keeps its get/set/clear behaviour on the SQLite
+backend, evicts least-recently-used entries once over the size limit,
+expires entries, survives a reopen, shares eviction and size accounting
+with other connections to the same cache file, and that an incomplete
+backend cannot be constructed.
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.path.join(ROOT_DIR, "templates")
+if TEMPLATES_DIR not in sys.path:
+    sys.path.insert(0, TEMPLATES_DIR)
+
+from tools.performance.cache_backends import CacheBackend, SQLiteCacheBackend
+from tools.performance.performance_optimizer import CacheManager
+
+
+def test_get_set_clear(tmp_path):
+    cache = CacheManager(tmp_path)
+
+    cache.set("structure", {"files": ["template.json"], "count": 3})
+    assert cache.get("structure") == {"files": ["template.json"], "count": 3}
+    assert cache.get("missing") is None
+
+    cache.clear()
+    assert cache.get("structure") is None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    cache.close()
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = CacheManager(tmp_path, max_size_mb=1)
+    payload = "x" * 100_000
+
+    for i in range(10):
+        cache.set(f"key_{i}", payload)
+    # key_0 was read most recently, so key_1 is the oldest
+    assert cache.get("key_0") == payload
+    cache.set("key_10", payload)
+
+    assert cache.get("key_1") is None
+    assert cache.get("key_0") == payload
+    assert cache.get_stats()["evictions"] == 1
+    assert cache.get_stats()["size_bytes"] <= 1024 * 1024
+    cache.close()
+
+
+def test_ttl_expires_lazily(tmp_path):
+    cache = CacheManager(tmp_path)
+
+    cache.set("short", 1, ttl=0)
+    cache.set("long", 2, ttl=3600)
+    time.sleep(0.01)
+
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    assert cache.get_stats()["expirations"] == 1
+    cache.close()
+
+
+def test_entries_and_lru_order_survive_reopen(tmp_path):
+    cache = CacheManager(tmp_path, max_size_mb=1)
+    payload = "y" * 300_000
+    cache.set("a", payload)
+    cache.set("b", payload)
+    cache.set("c", payload)
+    cache.get("a")
+    cache.close()
+
+    reopened = CacheManager(tmp_path, max_size_mb=1)
+    assert reopened.get_stats()["entries"] == 3
+    # "b" is now the least recently used entry
+    reopened.set("d", payload)
+    assert reopened.get("b") is None
+    assert reopened.get("a") == payload
+    reopened.close()
+
+
+def test_connections_share_eviction_and_size(tmp_path):
+    # Two backends on one directory stand in for two processes
+    first = CacheManager(tmp_path, max_size_mb=1)
+    second = CacheManager(tmp_path, max_size_mb=1)
+    payload = "z" * 300_000
+
+    first.set("a", payload)
+    first.set("b", payload)
+    assert second.get_stats()["size_bytes"] == first.get_stats()["size_bytes"]
+
+    second.set("c", payload)
+    second.set("d", payload)
+    # "a" was written by the other connection and is still evicted first
+    assert first.get("a") is None
+    assert second.get("b") == payload
+    assert first.get_stats()["size_bytes"] <= 1024 * 1024
+    first.close()
+    second.close()
+
+
+def test_write_lock_released_between_calls(tmp_path):
+    cache = CacheManager(tmp_path)
+    cache.set("key", 1)
+    cache.get("key")
+
+    other = sqlite3.connect(str(tmp_path / SQLiteCacheBackend.DB_NAME), timeout=0, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    other.execute("ROLLBACK")
+    other.close()
+    cache.close()
+
+
+def test_expired_rows_are_deleted(tmp_path):
+    cache = CacheManager(tmp_path)
+    for i in range(5):
+        cache.set(f"old_{i}", i, ttl=0)
+    time.sleep(0.01)
+    cache.set("new", 1)
+
+    with sqlite3.connect(str(tmp_path / SQLiteCacheBackend.DB_NAME)) as conn:
+        assert [row[0] for row in conn.execute("SELECT key FROM cache_entries")] == ["new"]
+    assert cache.get_stats()["expirations"] == 5
+    cache.close()
+
+
+def test_reopens_after_close(tmp_path):
+    cache = CacheManager(tmp_path)
+    cache.set("key", "value")
+    cache.close()
+
+    assert cache.get("key") == "value"
+    cache.set("other", 2)
+    assert cache.get_stats()["entries"] == 2
+    cache.close()
+
+
+def test_set_swallows_database_errors(tmp_path, monkeypatch):
+    cache = CacheManager(tmp_path)
+
+    def locked(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(cache.backend, "_transaction", locked)
+    cache.set("key", "value")
+    assert cache.get("key") is None
+    cache.close()
+
+
+def test_incomplete_backend_fails_on_construction(tmp_path):
+    class GetOnlyBackend(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnlyBackend(tmp_path, 1024)
@@ -0,0 +1,71 @@
+"""
+Tests for category template counts
+
+Tests that subtree template counts on the category tree count each template
+once, even when it references both a category and one of its descendants,
+and that a read-only reference index does not write its index file.
+"""
+
+import json
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.path.join(ROOT_DIR, "templates")
+if TEMPLATES_DIR not in sys.path:
+    sys.path.insert(0, TEMPLATES_DIR)
+
+from tools.managers.category_organizer import CategoryNode, CategoryTree
+from tools.managers.reference_index import INDEX_FILE_NAME, ReferenceIndex
+
+
+def make_tree():
+    tree = CategoryTree()
+    tree.add_node(CategoryNode(id="electronics", name="Electronics", children=["audio", "phones"]))
+    tree.add_node(CategoryNode(id="audio", name="Audio", parent_id="electronics", children=["headphones"]))
+    tree.add_node(CategoryNode(id="headphones", name="Headphones", parent_id="audio"))
+    tree.add_node(CategoryNode(id="phones", name="Phones", parent_id="electronics"))
+    tree.add_node(CategoryNode(id="home", name="Home"))
+    return tree
+
+
+def test_subtree_counts_distinct_templates():
+    tree = make_tree()
+    tree.set_category_templates({
+        "electronics": {"t1"},
+        "audio": {"t1", "t2"},
+        "headphones": {"t2", "t3"},
+        "phones": {"t3", "t4"},
+        "home": {"t1"},
+    })
+
+    assert tree.get_template_count("electronics") == 4
+    assert tree.get_template_count("audio") == 3
+    assert tree.get_template_count("headphones") == 2
+    assert tree.get_template_count("home") == 1
+    assert tree.get_template_count("audio", include_descendants=False) == 2
+    assert tree.template_counts["electronics"] == 1
+
+
+def test_subtree_counts_match_set_union():
+    tree = make_tree()
+    category_templates = {node_id: {f"t{(i * 7 + j) % 9}" for j in range(i + 1)}
+                          for i, node_id in enumerate(sorted(tree.nodes))}
+    tree.set_category_templates(category_templates)
+
+    for node_id in tree.nodes:
+        subtree = [node_id] + tree.get_descendants(node_id)
+        expected = set().union(*(category_templates[member] for member in subtree))
+        assert tree.get_template_count(node_id) == len(expected)
+
+
+def test_read_only_index_is_not_written(tmp_path):
+    template_dir = tmp_path / "electronics" / "modern"
+    template_dir.mkdir(parents=True)
+    (template_dir / "template.json").write_text(json.dumps({"id": "tpl-modern", "category": "electronics"}),
+                                                encoding="utf-8")
+
+    index = ReferenceIndex(tmp_path, persist=False)
+    index.sync()
+    assert index.template_ids() == ["tpl-modern"]
+    assert not (tmp_path / INDEX_FILE_NAME).exists()
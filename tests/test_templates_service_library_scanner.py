@@ -0,0 +1,74 @@
+"""
+Tests for the cached template library scanner
+
+Tests that scan results are cached as JSON next to the library, that cached
+quality reports and statistics rebuild into the same dataclasses as freshly
+computed ones, and that changed templates are recomputed.
+"""
+
+import json
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.path.join(ROOT_DIR, "templates")
+if TEMPLATES_DIR not in sys.path:
+    sys.path.insert(0, TEMPLATES_DIR)
+
+from tools.checkers.quality_checker import QualityChecker, QualityReport
+from tools.checkers.statistics_reporter import StatisticsReporter, TemplateStats
+
+
+def make_library(root, count=2):
+    for i in range(count):
+        template_dir = root / "electronics" / f"template-{i}"
+        template_dir.mkdir(parents=True)
+        (template_dir / "template.json").write_text(json.dumps({
+            "id": f"tpl-{i}",
+            "name": f"Template {i}",
+            "category": "electronics",
+            "metadata": {"updated_at": "2024-01-01T00:00:00"}
+        }), encoding="utf-8")
+        (template_dir / "README.md").write_text("# Template\n", encoding="utf-8")
+    return root
+
+
+def test_statistics_cache_is_json(tmp_path):
+    library = make_library(tmp_path)
+    reporter = StatisticsReporter(max_workers=1)
+
+    fresh = reporter.collect_templates_statistics(library)
+    cache_path = library / ".statistics_scan_cache.json"
+    payload = json.loads(cache_path.read_text(encoding="utf-8"))
+    assert set(payload["entries"]) == set(fresh)
+    assert not list(library.glob("*.pkl"))
+
+    cached = reporter.collect_templates_statistics(library)
+    assert all(isinstance(stats, TemplateStats) for stats in cached.values())
+    assert cached == fresh
+    assert all(stats.days_since_update > 0 for stats in cached.values())
+
+
+def test_cached_quality_reports_match_fresh(tmp_path):
+    library = make_library(tmp_path)
+    checker = QualityChecker()
+
+    fresh = checker.check_templates_batch(library, max_workers=1)
+    cached = checker.check_templates_batch(library, max_workers=1)
+    assert set(cached) == set(fresh)
+    for path, report in cached.items():
+        assert isinstance(report, QualityReport)
+        assert report.to_dict() == fresh[path].to_dict()
+        assert report.validation_result.errors == fresh[path].validation_result.errors
+        assert report.fix_suggestions == fresh[path].fix_suggestions
+
+
+def test_changed_template_is_recomputed(tmp_path):
+    library = make_library(tmp_path)
+    reporter = StatisticsReporter(max_workers=1)
+    reporter.collect_templates_statistics(library)
+
+    (library / "electronics" / "template-1" / "notes.md").write_text("notes", encoding="utf-8")
+    results = reporter.collect_templates_statistics(library)
+    assert results[str(library / "electronics" / "template-1")].total_files == 3
+    assert results[str(library / "electronics" / "template-0")].total_files == 2
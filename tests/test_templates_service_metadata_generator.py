@@ -0,0 +1,96 @@
+"""
+Tests for batch image analysis in MetadataGenerator
+
+Tests that analyze_images caches pixel statistics by file content (copies
+of one image are decoded once, edited files are re-analysed, results survive
+in the persistent cache) while filename-derived fields follow each path, and
+that the process pool returns the same results as serial analysis.
+"""
+
+import os
+import shutil
+import sys
+from dataclasses import asdict
+
+import numpy as np
+from PIL import Image
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.path.join(ROOT_DIR, "templates")
+if TEMPLATES_DIR not in sys.path:
+    sys.path.insert(0, TEMPLATES_DIR)
+
+from tools.generators import metadata_generator
+from tools.generators.metadata_generator import MIN_PARALLEL_IMAGES, MetadataGenerator
+
+
+def write_image(path, seed, size=(96, 64), format="PNG"):
+    pixels = np.random.default_rng(seed).integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(path, format=format)
+    return str(path)
+
+
+def count_analyses(generator, monkeypatch):
+    analysed = []
+    original = generator.analyze_image
+    monkeypatch.setattr(generator, "analyze_image",
+                        lambda image_path, **kwargs: (analysed.append(image_path), original(image_path, **kwargs))[1])
+    return analysed
+
+
+def test_cache_hits_by_content(tmp_path, monkeypatch):
+    first = write_image(tmp_path / "hero.png", 1)
+    copy = str(tmp_path / "product_text.png")
+    shutil.copyfile(first, copy)
+    generator = MetadataGenerator(max_workers=1)
+    analysed = count_analyses(generator, monkeypatch)
+
+    results = generator.analyze_images([first, copy])
+    assert analysed == [first]
+    assert results[first].brightness == results[copy].brightness
+    assert (results[first].has_text, results[first].has_products) == (False, False)
+    assert (results[copy].has_text, results[copy].has_products) == (True, True)
+
+    # Same paths, one file edited: only the new content is analysed
+    write_image(first, 2)
+    results = generator.analyze_images([first, copy])
+    assert analysed == [first, first]
+    assert results[first].brightness != results[copy].brightness
+
+    # Reduced decode is cached separately from full decode
+    generator.analyze_images([copy], reduced_decode=True)
+    assert analysed == [first, first, copy]
+
+
+def test_persistent_cache_survives_restart(tmp_path, monkeypatch):
+    image = write_image(tmp_path / "hero.png", 3)
+    expected = MetadataGenerator(cache_dir=str(tmp_path / "cache"), max_workers=1).analyze_images([image])
+
+    reopened = MetadataGenerator(cache_dir=str(tmp_path / "cache"), max_workers=1)
+    analysed = count_analyses(reopened, monkeypatch)
+    assert asdict(reopened.analyze_images([image])[image]) == asdict(expected[image])
+    assert analysed == []
+
+
+def test_pool_results_match_serial(tmp_path, monkeypatch):
+    pools = []
+
+    class RecordingPool(metadata_generator.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(kwargs)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(metadata_generator, "ProcessPoolExecutor", RecordingPool)
+    paths = [write_image(tmp_path / f"item_{i}.png", i, size=(96 + 8 * i, 64)) for i in range(MIN_PARALLEL_IMAGES)]
+    paths.append(write_image(tmp_path / "title.jpg", 99, format="JPEG"))
+    paths.append(paths[0])
+
+    for reduced_decode in (False, True):
+        serial = MetadataGenerator(max_workers=1).analyze_images(paths, reduced_decode=reduced_decode)
+        pooled = MetadataGenerator(max_workers=2).analyze_images(paths, reduced_decode=reduced_decode)
+        single = MetadataGenerator()
+        for path in paths:
+            assert asdict(pooled[path]) == asdict(serial[path])
+            assert asdict(serial[path]) == asdict(single.analyze_image(path, reduced_decode=reduced_decode))
+
+    assert pools == [{"max_workers": 2}, {"max_workers": 2}]
@@ -0,0 +1,138 @@
+"""
+Tests for the MetricsRegistry metrics core
+
+Tests that histogram quantiles stay within bucket resolution of exact
+percentiles, that striped counters are exact under concurrent updates, that
+the Prometheus text exposition is well formed, and that a MetricCollector on a
+shared registry and each PerformanceOptimizer only report and clear their own
+metrics.
+"""
+
+import os
+import re
+import sys
+import threading
+
+import numpy as np
+import pytest
+from hypothesis import given, settings, strategies as st
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.path.join(ROOT_DIR, "templates")
+if TEMPLATES_DIR not in sys.path:
+    sys.path.insert(0, TEMPLATES_DIR)
+
+from tools.logging.monitoring_system import MetricCollector, MonitoringSystem
+from tools.performance.metrics_registry import DEFAULT_TIMER_BUCKETS_MS, MetricsRegistry, get_metrics_registry
+from tools.performance.performance_optimizer import OPERATION_DURATION_METRIC, PerformanceOptimizer
+
+SAMPLE_LINE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="(\\.|[^"\\])*",?)*\})? \S+$')
+
+
+@settings(max_examples=50, deadline=None)
+@given(values=st.lists(st.floats(min_value=0.02, max_value=100000), min_size=1, max_size=300))
+def test_quantiles_within_bucket_resolution(values):
+    registry = MetricsRegistry()
+    for value in values:
+        registry.observe("latency_ms", value)
+
+    for q in (0.5, 0.95, 0.99):
+        estimate = registry.quantile("latency_ms", q)
+        exact_low = np.percentile(values, q * 100, method="lower")
+        exact_high = np.percentile(values, q * 100, method="higher")
+        # 估算值与真实排名处的样本落在同一个或相邻的桶内 (相对误差 <= 1/4 + 1/4)
+        assert min(values) <= estimate <= max(values)
+        assert exact_low / 1.5 <= estimate <= exact_high * 1.5
+
+
+def test_concurrent_counters_and_histograms_are_exact():
+    registry = MetricsRegistry(lock_stripes=4)
+
+    def worker(index):
+        for _ in range(2000):
+            registry.inc("items_total", labels={"worker": str(index % 3)})
+            registry.observe("item_ms", 1.0)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    totals = {sample["labels"]["worker"]: sample["value"] for sample in registry.collect("items_total")}
+    assert totals == {"0": 6000, "1": 6000, "2": 4000}
+    assert registry.collect("item_ms")[0]["count"] == 16000
+
+
+def test_prometheus_exposition_format():
+    registry = MetricsRegistry()
+    registry.describe("batch_ms", "batch duration")
+    registry.observe("batch_ms", 3.0, {"operation": "copy"})
+    registry.observe("batch_ms", 250.0, {"operation": "copy"})
+    registry.inc("requests-total", 2, {"path": 'a"b\\c'})
+    registry.set_gauge("queue_depth", 1.5)
+
+    text = registry.render_prometheus()
+    lines = text.splitlines()
+    assert text.endswith("\n")
+    assert "# HELP batch_ms batch duration" in lines
+    assert "# TYPE batch_ms histogram" in lines
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{path="a\\"b\\\\c"} 2' in lines
+    assert "queue_depth 1.5" in lines
+    assert 'batch_ms_bucket{operation="copy",le="+Inf"} 2' in lines
+    assert 'batch_ms_count{operation="copy"} 2' in lines
+    assert 'batch_ms_sum{operation="copy"} 253' in lines
+
+    buckets = [int(line.rsplit(" ", 1)[1]) for line in lines if line.startswith("batch_ms_bucket")]
+    assert len(buckets) == len(DEFAULT_TIMER_BUCKETS_MS) + 1
+    assert buckets == sorted(buckets)
+    for line in lines:
+        assert line.startswith("#") or SAMPLE_LINE.match(line), line
+
+
+def test_type_conflict_rejected():
+    registry = MetricsRegistry()
+    registry.inc("operations")
+    with pytest.raises(ValueError):
+        registry.observe("operations", 1.0)
+
+
+def test_collector_clears_only_its_own_metrics():
+    registry = MetricsRegistry()
+    registry.observe("template_operation_ms", 5.0, {"operation": "load"})
+    collector = MetricCollector(registry)
+    collector.record_counter("uploads_total")
+    collector.record_timer("render_ms", 12.0)
+
+    collector.clear_metrics()
+    assert registry.collect("uploads_total") == []
+    assert registry.collect("render_ms") == []
+    assert registry.collect("template_operation_ms")[0]["count"] == 1
+
+
+def test_monitoring_skips_conflicting_metric_kinds(tmp_path):
+    registry = MetricsRegistry()
+    registry.inc("queue_depth")
+    monitoring = MonitoringSystem(tmp_path, registry=registry)
+
+    with pytest.raises(ValueError):
+        monitoring.collector.record_gauge("queue_depth", 3.0)
+    monitoring.record_business_metric("queue_depth", 3.0)
+    assert registry.collect("queue_depth")[0]["value"] == 1
+
+
+def test_optimizers_keep_their_own_metrics(tmp_path):
+    first = PerformanceOptimizer(tmp_path / "cache_a", tmp_path / "index_a")
+    second = PerformanceOptimizer(tmp_path / "cache_b", tmp_path / "index_b")
+    global_count = len(get_metrics_registry().collect(OPERATION_DURATION_METRIC))
+
+    first.measure_performance("load")(lambda: None)()
+    second.measure_performance("save")(lambda: None)()
+    assert list(first.get_performance_report()["operations"]) == ["load"]
+    assert list(second.get_performance_report()["operations"]) == ["save"]
+
+    first.clear_metrics()
+    assert first.get_performance_report() == {"message": "暂无性能数据"}
+    assert second.get_performance_report()["total_operations"] == 1
+    assert len(get_metrics_registry().collect(OPERATION_DURATION_METRIC)) == global_count
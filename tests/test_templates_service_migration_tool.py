@@ -0,0 +1,165 @@
+"""
+Tests for template library export and import
+
+Tests that MigrationTool round-trips templates through a zip export, that an
+archive import either verifies everything or changes nothing, that a template
+failing to export is skipped and reported without aborting the export, that
+exports never replace unrelated directories, and that imported version
+objects go through the object store.
+"""
+
+import json
+import os
+import sys
+import zipfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.path.join(ROOT_DIR, "templates")
+if TEMPLATES_DIR not in sys.path:
+    sys.path.insert(0, TEMPLATES_DIR)
+
+from tools.managers import migration_tool
+from tools.managers.migration_tool import MANIFEST_NAME, MigrationTool
+from tools.managers.object_store import hash_file
+
+
+def make_template(root, name, category="electronics"):
+    template_dir = root / "templates" / name
+    template_dir.mkdir(parents=True)
+    (template_dir / "template.json").write_text(json.dumps({
+        "id": f"tpl-{name}", "name": name, "category": category,
+        "template_type": "standard", "status": "draft", "version": "1.0.0"
+    }), encoding="utf-8")
+    (template_dir / "README.md").write_text(f"# {name}\n", encoding="utf-8")
+    (template_dir / "preview.png").write_bytes(b"\x89PNG" + name.encode() * 64)
+    return template_dir
+
+
+def export_library(tmp_path, names=("alpha", "beta")):
+    source = tmp_path / "source"
+    for name in names:
+        make_template(source, name)
+    result = MigrationTool(source).export_templates(tmp_path / "export.zip")
+    return result
+
+
+def rewrite_archive(archive_path, replacements):
+    with zipfile.ZipFile(archive_path) as zipf:
+        members = {info.filename: zipf.read(info) for info in zipf.infolist()}
+    members.update(replacements)
+    with zipfile.ZipFile(archive_path, "w") as zipf:
+        for name, data in members.items():
+            zipf.writestr(name, data)
+
+
+def test_zip_round_trip(tmp_path):
+    export_result = export_library(tmp_path)
+    assert export_result.success, export_result.errors
+
+    target = tmp_path / "target"
+    import_result = MigrationTool(target).import_templates(tmp_path / "export.zip", create_backup=False)
+    assert import_result.success, import_result.errors
+    assert sorted(import_result.imported_templates) == ["alpha", "beta"]
+    assert (target / "templates" / "beta" / "preview.png").read_bytes() == \
+        (tmp_path / "source" / "templates" / "beta" / "preview.png").read_bytes()
+    assert not [path for path in target.iterdir() if path.name.startswith(".import_")]
+
+
+def test_corrupt_archive_imports_nothing(tmp_path):
+    export_library(tmp_path)
+    rewrite_archive(tmp_path / "export.zip", {"templates/beta/README.md": b"tampered"})
+
+    target = tmp_path / "target"
+    make_template(target, "existing")
+    result = MigrationTool(target).import_templates(tmp_path / "export.zip", create_backup=False)
+
+    assert not result.success
+    assert result.imported_templates == []
+    assert sorted(path.name for path in (target / "templates").iterdir()) == ["existing"]
+
+
+def test_invalid_template_config_imports_nothing(tmp_path):
+    export_library(tmp_path)
+    with zipfile.ZipFile(tmp_path / "export.zip") as zipf:
+        manifest = json.loads(zipf.read(MANIFEST_NAME))
+    # The manifest is rewritten without hashes so only config validation catches the change
+    manifest["files"] = {}
+    rewrite_archive(tmp_path / "export.zip", {
+        "templates/beta/template.json": json.dumps({"id": "tpl-beta"}).encode(),
+        MANIFEST_NAME: json.dumps(manifest).encode()
+    })
+
+    target = tmp_path / "target"
+    result = MigrationTool(target).import_templates(tmp_path / "export.zip", create_backup=False)
+    assert not result.success
+    assert result.failed_templates == ["beta"]
+    assert not (target / "templates" / "alpha").exists()
+
+
+def test_unreadable_template_is_skipped(tmp_path, monkeypatch):
+    original = migration_tool._prefetch_file
+
+    def failing_prefetch(file_path):
+        if file_path.parent.name == "beta" and file_path.name == "template.json":
+            raise PermissionError(f"cannot read {file_path}")
+        return original(file_path)
+
+    monkeypatch.setattr(migration_tool, "_prefetch_file", failing_prefetch)
+    result = export_library(tmp_path, names=("alpha", "beta", "gamma"))
+    monkeypatch.undo()
+
+    assert result.success
+    assert sorted(result.exported_templates) == ["alpha", "gamma"]
+    assert any("beta" in error for error in result.errors)
+    with zipfile.ZipFile(tmp_path / "export.zip") as zipf:
+        manifest = json.loads(zipf.read(MANIFEST_NAME))
+    assert sorted(template["name"] for template in manifest["templates"]) == ["alpha", "gamma"]
+    assert not [name for name in manifest["files"] if name.startswith("templates/beta/")]
+
+    target = tmp_path / "target"
+    import_result = MigrationTool(target).import_templates(tmp_path / "export.zip", create_backup=False)
+    assert import_result.success, import_result.errors
+    assert sorted(path.name for path in (target / "templates").iterdir()) == ["alpha", "gamma"]
+
+
+def test_export_does_not_replace_unrelated_directory(tmp_path):
+    source = tmp_path / "source"
+    make_template(source, "alpha")
+    tool = MigrationTool(source)
+
+    occupied = tmp_path / "occupied.zip"
+    occupied.mkdir()
+    (occupied / "keep.txt").write_text("keep", encoding="utf-8")
+    assert not tool.export_templates(occupied).success
+    assert (occupied / "keep.txt").exists()
+
+    unrelated = tmp_path / "documents"
+    unrelated.mkdir()
+    (unrelated / "keep.txt").write_text("keep", encoding="utf-8")
+    assert not tool.export_templates(unrelated, compress=False).success
+    assert (unrelated / "keep.txt").exists()
+
+    # A previous directory export is replaced
+    previous = tmp_path / "previous"
+    assert tool.export_templates(previous, compress=False).success
+    assert tool.export_templates(previous, compress=False).success
+    assert (previous / MANIFEST_NAME).exists()
+
+
+def test_version_objects_are_added_through_object_store(tmp_path):
+    tool = MigrationTool(tmp_path / "target")
+    objects_dir = tmp_path / "import" / "versions" / ".objects"
+    objects_dir.mkdir(parents=True)
+    valid = objects_dir / "placeholder"
+    valid.write_bytes(b"object content")
+    object_hash = hash_file(valid)
+    valid = valid.rename(objects_dir / object_hash)
+    misnamed = objects_dir / ("0" * len(object_hash))
+    misnamed.write_bytes(b"other content")
+
+    tool._import_version_objects(objects_dir)
+    store = tool.version_controller.object_store
+    assert store.has_object(object_hash)
+    assert store.object_path(object_hash).read_bytes() == b"object content"
+    assert not store.has_object(misnamed.name)
+    assert not list(store.objects_dir.glob(".tmp.*"))
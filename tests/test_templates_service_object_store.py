@@ -0,0 +1,95 @@
+"""
+Tests for the content-addressed template object store
+
+Tests that ObjectStore deduplicates file contents, reuses cached hashes for
+unchanged files, restores independent writable copies unless hardlinks are
+requested, and that removing unreferenced objects never deletes objects
+written or reused within the grace period.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.path.join(ROOT_DIR, "templates")
+if TEMPLATES_DIR not in sys.path:
+    sys.path.insert(0, TEMPLATES_DIR)
+
+from tools.managers import object_store
+from tools.managers.object_store import GC_GRACE_SECONDS, ObjectStore
+
+
+def write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+
+def age(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_add_file_deduplicates(tmp_path):
+    store = ObjectStore(tmp_path / "store")
+    first = write(tmp_path / "a" / "template.json", b'{"id": "t1"}')
+    second = write(tmp_path / "b" / "template.json", b'{"id": "t1"}')
+
+    object_hash = store.add_file(first)
+    assert store.add_file(second) == object_hash
+    assert store.object_path(object_hash).read_bytes() == b'{"id": "t1"}'
+    assert sum(1 for path in store.objects_dir.rglob("*") if path.is_file()) == 1
+
+
+def test_unchanged_files_are_not_rehashed(tmp_path, monkeypatch):
+    store = ObjectStore(tmp_path / "store")
+    path = write(tmp_path / "template" / "README.md", b"readme")
+    age(path, 60)
+    object_hash = store.hash_file(path)
+    store.save()
+
+    reads = []
+    monkeypatch.setattr(object_store, "hash_file", lambda file_path: reads.append(file_path))
+    reopened = ObjectStore(tmp_path / "store")
+    assert reopened.hash_file(path) == object_hash
+    assert reads == []
+
+
+def test_restore_defaults_to_independent_copy(tmp_path):
+    store = ObjectStore(tmp_path / "store")
+    object_hash = store.add_file(write(tmp_path / "source.txt", b"original"))
+    target = tmp_path / "restored" / "source.txt"
+
+    assert store.restore_file(object_hash, target) in ("reflink", "copy")
+    assert target.stat().st_ino != store.object_path(object_hash).stat().st_ino
+    target.write_bytes(b"edited")
+    assert store.object_path(object_hash).read_bytes() == b"original"
+
+    linked = tmp_path / "linked" / "source.txt"
+    assert store.restore_file(object_hash, linked, mode="hardlink") == "hardlink"
+    assert linked.stat().st_ino == store.object_path(object_hash).stat().st_ino
+
+    with pytest.raises(ValueError):
+        store.restore_file(object_hash, target, mode="symlink")
+
+
+def test_remove_unreferenced_respects_grace_period(tmp_path):
+    store = ObjectStore(tmp_path / "store")
+    kept = store.add_file(write(tmp_path / "kept.txt", b"kept"))
+    stale = store.add_file(write(tmp_path / "stale.txt", b"stale"))
+    fresh = store.add_file(write(tmp_path / "fresh.txt", b"fresh"))
+    reused = store.add_file(write(tmp_path / "reused.txt", b"reused"))
+    for object_hash in (kept, stale, reused):
+        age(store.object_path(object_hash), GC_GRACE_SECONDS + 60)
+
+    # A concurrent snapshot re-adds existing content before it saves its version file
+    store.add_file(write(tmp_path / "other" / "reused.txt", b"reused"))
+
+    assert store.remove_unreferenced({kept}) == 1
+    assert not store.has_object(stale)
+    assert store.has_object(kept)
+    assert store.has_object(fresh)
+    assert store.has_object(reused)
@@ -0,0 +1,104 @@
+"""
+Tests for the template path index
+
+Tests that TemplatePathIndex resolves templates by ID and directory name,
+picks up directories added outside the process, answers unknown IDs without
+rescanning, and merges its entries into the registry instead of replacing it.
+"""
+
+import json
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.path.join(ROOT_DIR, "templates")
+if TEMPLATES_DIR not in sys.path:
+    sys.path.insert(0, TEMPLATES_DIR)
+
+from tools.engines.path_index import TemplatePathIndex
+
+
+def make_template(root, category, dir_name, template_id=None):
+    template_dir = root / "by_category" / category / dir_name
+    template_dir.mkdir(parents=True)
+    if template_id:
+        (template_dir / "template.json").write_text(json.dumps({"id": template_id}), encoding="utf-8")
+    return template_dir
+
+
+def count_scans(index, monkeypatch):
+    scans = []
+    original = index._scan_category
+    monkeypatch.setattr(index, "_scan_category", lambda category: (scans.append(category), original(category)))
+    return scans
+
+
+def test_resolves_by_id_and_directory_name(tmp_path):
+    modern = make_template(tmp_path, "electronics", "modern", "tpl-modern")
+    plain = make_template(tmp_path, "home", "plain")
+    index = TemplatePathIndex(tmp_path, tmp_path / "index" / "template_registry.json")
+
+    assert index.resolve("tpl-modern") == modern
+    assert index.resolve("modern") == modern
+    assert index.resolve("plain") == plain
+
+
+def test_unknown_id_does_not_rescan(tmp_path, monkeypatch):
+    make_template(tmp_path, "electronics", "modern", "tpl-modern")
+    index = TemplatePathIndex(tmp_path, tmp_path / "registry.json")
+    index.refresh()
+    scans = count_scans(index, monkeypatch)
+
+    for _ in range(3):
+        assert index.resolve("missing") is None
+    assert scans == []
+
+
+def test_external_changes_are_picked_up(tmp_path, monkeypatch):
+    make_template(tmp_path, "electronics", "modern", "tpl-modern")
+    make_template(tmp_path, "home", "plain")
+    index = TemplatePathIndex(tmp_path, tmp_path / "registry.json")
+    index.refresh()
+    scans = count_scans(index, monkeypatch)
+
+    added = make_template(tmp_path, "electronics", "retro", "tpl-retro")
+    assert index.resolve("tpl-retro") == added
+    # Only the changed category is rescanned
+    assert scans == ["electronics"]
+
+
+def test_save_merges_into_registry(tmp_path):
+    registry_path = tmp_path / "registry.json"
+    registry_path.write_text(json.dumps({
+        "version": "1.0.0",
+        "templates": {
+            "tpl-modern": {"path": "by_category/electronics/modern", "category": "electronics", "status": "published"},
+            "tpl-gone": {"path": "by_category/home/gone", "category": "home"},
+        },
+        "metadata": {"index_type": "registry"}
+    }), encoding="utf-8")
+    modern = make_template(tmp_path, "electronics", "modern", "tpl-modern")
+    gone = make_template(tmp_path, "home", "gone", "tpl-gone")
+
+    index = TemplatePathIndex(tmp_path, registry_path)
+    index.unregister(gone)
+    index.register(make_template(tmp_path, "home", "plain", "tpl-plain"))
+
+    # Another writer registers a template between our load and save
+    registry = json.loads(registry_path.read_text(encoding="utf-8"))
+    registry["templates"]["tpl-other"] = {"category": "beauty", "owner": "import"}
+    registry_path.write_text(json.dumps(registry), encoding="utf-8")
+
+    index.save()
+    saved = json.loads(registry_path.read_text(encoding="utf-8"))
+
+    assert set(saved["templates"]) == {"tpl-modern", "tpl-plain", "tpl-other"}
+    assert saved["templates"]["tpl-modern"]["status"] == "published"
+    assert saved["templates"]["tpl-other"] == {"category": "beauty", "owner": "import"}
+    assert saved["metadata"] == {"index_type": "registry"}
+    assert saved["total_templates"] == 3
+    assert saved["statistics"]["by_category"] == {"electronics": 1, "home": 1, "beauty": 1}
+
+    reloaded = TemplatePathIndex(tmp_path, registry_path)
+    assert reloaded.resolve("tpl-modern") == modern
+    assert reloaded.resolve("tpl-gone") is None
@@ -0,0 +1,118 @@
+"""
+Tests for the template category reference index
+
+Tests that ReferenceIndex builds the template <-> category mappings from the
+template configs, re-reads only configs whose stat information changed,
+applies file watcher events, and persists itself as JSON that a new index
+over the same library loads without re-reading unchanged configs.
+"""
+
+import json
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.path.join(ROOT_DIR, "templates")
+if TEMPLATES_DIR not in sys.path:
+    sys.path.insert(0, TEMPLATES_DIR)
+
+from tools.managers.reference_index import INDEX_FILE_NAME, ReferenceIndex
+
+CATEGORIES = {"electronics", "home", "audio", "minimal"}
+
+
+def is_category(name):
+    return name in CATEGORIES
+
+
+def write_config(root, rel_dir, **config):
+    template_dir = root / rel_dir
+    template_dir.mkdir(parents=True, exist_ok=True)
+    config_path = template_dir / "template.json"
+    config_path.write_text(json.dumps(config), encoding="utf-8")
+    return config_path
+
+
+def count_reads(index, monkeypatch):
+    reads = []
+    original = index._index_config
+    monkeypatch.setattr(index, "_index_config",
+                        lambda key, path, stat_result: (reads.append(key), original(key, path, stat_result))[1])
+    return reads
+
+
+def make_library(root):
+    write_config(root, "electronics/modern", id="tpl-modern", category="electronics", subcategory="audio",
+                 tags=["minimal", "blue"])
+    write_config(root, "home/plain", id="tpl-plain", category="home",
+                 classification={"primary_category": "home", "secondary_categories": ["electronics"]})
+    return root
+
+
+def test_build_indexes_references_and_tags(tmp_path):
+    index = ReferenceIndex(make_library(tmp_path))
+    assert index.sync() == {"added": 2, "updated": 0, "removed": 0}
+
+    assert index.template_ids() == ["tpl-modern", "tpl-plain"]
+    assert index.references("tpl-modern", is_category) == {"electronics", "audio", "minimal"}
+    assert index.templates_for("electronics", is_category) == ["tpl-modern", "tpl-plain"]
+    assert index.templates_for("minimal", is_category) == ["tpl-modern"]
+    assert index.templates_for("blue", is_category) == []
+    assert index.template_path("tpl-plain") == tmp_path / "home" / "plain"
+
+
+def test_sync_rereads_only_changed_configs(tmp_path, monkeypatch):
+    index = ReferenceIndex(make_library(tmp_path))
+    index.sync()
+    reads = count_reads(index, monkeypatch)
+
+    config_path = write_config(tmp_path, "home/plain", id="tpl-plain", category="audio")
+    stat = config_path.stat()
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    (tmp_path / "electronics" / "modern" / "template.json").unlink()
+
+    assert index.sync() == {"added": 0, "updated": 1, "removed": 1}
+    assert reads == ["home/plain/template.json"]
+    assert index.template_ids() == ["tpl-plain"]
+    assert index.templates_for("audio", is_category) == ["tpl-plain"]
+    assert index.templates_for("home", is_category) == []
+
+
+def test_file_events_update_index(tmp_path):
+    index = ReferenceIndex(make_library(tmp_path))
+    index.sync()
+
+    # Atomic write: a temporary file renamed to template.json
+    staged = tmp_path / "home" / "plain" / "template.json.tmp"
+    staged.write_text(json.dumps({"id": "tpl-plain", "category": "electronics"}), encoding="utf-8")
+    os.replace(staged, tmp_path / "home" / "plain" / "template.json")
+    index.handle_file_event("moved", str(staged), str(tmp_path / "home" / "plain" / "template.json"))
+    assert index.templates_for("home", is_category) == []
+
+    os.rename(tmp_path / "electronics" / "modern", tmp_path / "home" / "modern")
+    index.handle_file_event("moved", str(tmp_path / "electronics" / "modern"), str(tmp_path / "home" / "modern"),
+                            is_directory=True)
+    assert index.template_path("tpl-modern") == tmp_path / "home" / "modern"
+
+    index.handle_file_event("deleted", str(tmp_path / "home" / "modern"), is_directory=True)
+    assert index.template_ids() == ["tpl-plain"]
+
+
+def test_index_persists_as_json(tmp_path, monkeypatch):
+    index = ReferenceIndex(make_library(tmp_path))
+    index.sync()
+    index_path = tmp_path / INDEX_FILE_NAME
+    payload = json.loads(index_path.read_text(encoding="utf-8"))
+    assert set(payload["entries"]) == {"electronics/modern/template.json", "home/plain/template.json"}
+
+    reloaded = ReferenceIndex(tmp_path)
+    reads = count_reads(reloaded, monkeypatch)
+    assert reloaded.sync() == {"added": 0, "updated": 0, "removed": 0}
+    assert reads == []
+    assert reloaded.references("tpl-modern", is_category) == index.references("tpl-modern", is_category)
+
+    # A corrupt index is ignored and rebuilt
+    index_path.write_text("{not json", encoding="utf-8")
+    rebuilt = ReferenceIndex(tmp_path)
+    assert len(rebuilt) == 0
+    assert rebuilt.sync()["added"] == 2
@@ -0,0 +1,129 @@
+"""
+Tests for the indexed template text search
+
+Tests that exact search on top of the inverted index returns the same
+templates as the original linear substring scan (cross-word and partial-word
+substrings, CJK, punctuation-only and case-sensitive queries), that the
+buffered vocabulary stays sorted through inserts, removals and compaction,
+and that search suggestions fall back to substring matches after prefix ones.
+"""
+
+import os
+import sys
+
+from hypothesis import given, settings, strategies as st
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.path.join(ROOT_DIR, "templates")
+if TEMPLATES_DIR not in sys.path:
+    sys.path.insert(0, TEMPLATES_DIR)
+
+from tools.engines.search_engine import SearchEngine
+from tools.engines.text_index import InvertedIndex
+from tools.models.search import SearchQuery
+
+WORDS = ["Modern", "modern", "tech", "Tech-Pro", "blue", "现代风格", "科技", "a.b", "x"]
+
+TEMPLATES = {
+    "t1": {"name": "Modern Tech", "description": "Clean layout", "tags": ["blue", "Tech-Pro"],
+           "keywords": ["saas"], "category": "electronics"},
+    "t2": {"name": "现代风格", "description": "适合科技产品", "tags": ["科技"],
+           "keywords": [], "category": "home"},
+    "t3": {"name": "Retro", "description": "v1.0 (beta)", "tags": [],
+           "keywords": ["vintage", "tech"], "category": "beauty"},
+}
+
+
+def linear_search(engine, text, case_sensitive):
+    """Original exact text search: substring of the joined searchable fields"""
+    search_text = text if case_sensitive else text.lower()
+    matches = []
+    for template_id, template_data in engine.search_index.templates.items():
+        content = ' '.join([
+            template_data.get('name', ''),
+            template_data.get('description', ''),
+            ' '.join(template_data.get('tags', [])),
+            ' '.join(template_data.get('keywords', []))
+        ])
+        if not case_sensitive:
+            content = content.lower()
+        if search_text in content:
+            matches.append(template_id)
+    return set(matches)
+
+
+def make_engine(tmp_path, templates):
+    engine = SearchEngine(tmp_path / "templates", tmp_path / "index")
+    for template_id, data in templates.items():
+        engine.update_template_index(template_id, dict(data, id=template_id))
+    return engine
+
+
+def test_exact_search_matches_linear_scan(tmp_path):
+    engine = make_engine(tmp_path, TEMPLATES)
+    queries = ["modern tech", "ern te", "dern", "Tech", "tech", "ue tec", "现代", "代风格", "品",
+               "(beta)", "v1.0", ".", "  ", "electronics", "saas vintage", "blue Tech-Pro saas"]
+    for text in queries:
+        for case_sensitive in (False, True):
+            expected = linear_search(engine, text, case_sensitive)
+            assert set(engine._match_text(text, False, case_sensitive)) == expected, (text, case_sensitive)
+
+    # Category is not part of the searched text
+    assert not engine._match_text("electronics", False)
+
+
+def test_search_returns_exact_matches(tmp_path):
+    engine = make_engine(tmp_path, TEMPLATES)
+    results = engine.search(SearchQuery(query_text="ern te", fuzzy_search=False))
+    assert [result.template_id for result in results.results] == ["t1"]
+
+
+@settings(max_examples=40, deadline=None)
+@given(
+    documents=st.lists(
+        st.tuples(st.lists(st.sampled_from(WORDS), max_size=4), st.lists(st.sampled_from(WORDS), max_size=3)),
+        min_size=1, max_size=8
+    ),
+    query=st.text(alphabet="modernTech-现代风格科技a.b x", min_size=1, max_size=6),
+    case_sensitive=st.booleans()
+)
+def test_exact_search_property(tmp_path_factory, documents, query, case_sensitive):
+    templates = {
+        f"p{i}": {"name": " ".join(name), "description": "", "tags": tags, "keywords": [], "category": ""}
+        for i, (name, tags) in enumerate(documents)
+    }
+    engine = make_engine(tmp_path_factory.mktemp("search"), templates)
+    assert set(engine._match_text(query, False, case_sensitive)) == linear_search(engine, query, case_sensitive)
+
+
+def test_vocabulary_stays_sorted_through_updates():
+    index = InvertedIndex()
+    live = {}
+    for i in range(400):
+        template_id = f"t{i % 150}"
+        if i % 7 == 3 and template_id in live:
+            index.remove_document(template_id)
+            del live[template_id]
+            continue
+        live[template_id] = {"name": f"word{i} common{i % 11}", "description": f"desc{i * 37 % 101}"}
+        index.add_document(template_id, live[template_id])
+
+    expected = InvertedIndex()
+    expected.build(live)
+    assert index.vocabulary == expected.vocabulary
+    assert index.expand_prefix("common") == expected.expand_prefix("common")
+    assert index.expand_prefix("word1") == sorted(t for t in expected.vocabulary if t.startswith("word1"))
+
+
+def test_suggestions_fall_back_to_substrings(tmp_path):
+    engine = make_engine(tmp_path, {
+        "s1": {"name": "Lab", "tags": ["Biotech", "tech-blue"], "keywords": ["fintech"], "category": "hitech"},
+        "s2": {"name": "Shop", "tags": ["retail"], "keywords": ["Technology"], "category": "electronics"},
+    })
+
+    assert engine._generate_suggestions("tech") == ["tech-blue", "Technology", "Biotech", "fintech", "hitech"]
+    # Autocomplete stays prefix-only
+    assert engine.get_autocomplete("tech") == ["tech-blue", "Technology"]
+
+    engine.remove_template_from_index("s1")
+    assert engine._generate_suggestions("tech") == ["Technology"]
@@ -0,0 +1,96 @@
+"""
+Tests for the template validation pipeline
+
+Tests that the pipeline reports the same errors as running the validators
+one by one, and that the config validator's asset checks and the image
+validator share one probe per image, so each image file is opened once per
+template.
+"""
+
+import json
+import os
+import sys
+from collections import Counter
+
+from PIL import Image
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.path.join(ROOT_DIR, "templates")
+TOOLS_DIR = os.path.join(TEMPLATES_DIR, "tools")
+for path in (TEMPLATES_DIR, TOOLS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from validators import image_probe
+from validators.config_validator import ConfigValidator
+from validators.image_validator import ImageValidator
+from validators.structure_validator import StructureValidator
+from validators.validation_pipeline import ValidationPipeline
+
+
+def make_template(root, name="modern-tech"):
+    template_dir = root / "electronics" / name
+    (template_dir / "desktop").mkdir(parents=True)
+    (template_dir / "mobile").mkdir()
+    Image.new("RGB", (300, 200), (200, 40, 40)).save(template_dir / "preview.jpg")
+    Image.new("RGB", (1464, 600), (40, 200, 40)).save(template_dir / "desktop" / "header.png")
+    # Wrong size and blank, so the image validator reports errors
+    Image.new("RGB", (500, 450), (255, 255, 255)).save(template_dir / "mobile" / "header.png")
+    (template_dir / "template.json").write_text(json.dumps({
+        "id": name, "name": "Modern Tech", "category": "electronics", "template_type": "standard",
+        "status": "draft", "version": "1.0.0",
+        "assets": {
+            "preview": "preview.jpg",
+            "desktop": {"header": "desktop/header.png"},
+            "mobile": {"header": "mobile/header.png", "footer": "mobile/footer.png"}
+        }
+    }), encoding="utf-8")
+    return template_dir
+
+
+def count_opens(monkeypatch):
+    opens = Counter()
+    original = image_probe.Image.open
+
+    def counting_open(path, *args, **kwargs):
+        opens[os.path.basename(os.path.dirname(path)) + "/" + os.path.basename(path)] += 1
+        return original(path, *args, **kwargs)
+
+    monkeypatch.setattr(image_probe.Image, "open", counting_open)
+    return opens
+
+
+def test_each_image_is_opened_once(tmp_path, monkeypatch):
+    template_dir = make_template(tmp_path)
+    opens = count_opens(monkeypatch)
+
+    result = ValidationPipeline(max_workers=1).validate_template(template_dir)
+
+    assert opens == {"modern-tech/preview.jpg": 1, "desktop/header.png": 1, "mobile/header.png": 1}
+    assert any("mobile/footer.png" in error for error in result.config_errors)
+    assert result.image_errors
+
+
+def test_pipeline_matches_individual_validators(tmp_path):
+    template_dir = make_template(tmp_path)
+
+    result = ValidationPipeline(max_workers=1).validate_template(template_dir)
+
+    _, structure_errors = StructureValidator().validate_template_directory(
+        template_dir, validate_images=False, validate_config=False
+    )
+    _, config_errors = ConfigValidator().validate_config(template_dir / "template.json")
+    image_errors = [error for _, (_, errors) in ImageValidator().validate_template_images(template_dir).items()
+                    for error in errors]
+    assert result.structure_errors == structure_errors
+    assert result.config_errors == config_errors
+    assert result.image_errors == image_errors
+
+
+def test_config_only_does_not_open_images(tmp_path, monkeypatch):
+    template_dir = make_template(tmp_path)
+    opens = count_opens(monkeypatch)
+
+    result = ValidationPipeline(validate_images=False, max_workers=1).validate_template(template_dir)
+    assert not opens
+    assert any("mobile/footer.png" in error for error in result.config_errors)
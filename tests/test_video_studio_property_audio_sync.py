@@ -0,0 +1,141 @@
+"""
+Property-based test for Video Studio audio sync analysis.
+
+Tests that sliding-window cross-correlation of onset envelopes recovers a
+known offset and drift, that mixing a track with its measured offset
+curve removed brings it back in sync with the reference, that the sync
+tolerance comes from the quality control settings, and that the output gets
+the same track mix whether or not a correction was needed.
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from hypothesis import given, strategies as st, settings
+from pydub import AudioSegment
+
+from app_utils.video_studio import render_pipeline
+from app_utils.video_studio.audio_sync import (
+    ANALYSIS_SAMPLE_RATE, AlignedTrack, analyze_track_sync, estimate_sync, onset_envelope,
+    reference_envelope, render_aligned_mix
+)
+from app_utils.video_studio.render_pipeline import (
+    AudioSyncMethod, AudioSyncResult, AudioTrack, RenderPipeline
+)
+from app_utils.video_studio.segment_encoder import MediaInfo
+
+
+def click_track(seed, duration, rate=ANALYSIS_SAMPLE_RATE):
+    """Decaying noise bursts at irregular intervals over a quiet noise floor"""
+    rng = np.random.default_rng(seed)
+    signal = rng.normal(0, 0.01, int(duration * rate)).astype(np.float32)
+    burst = int(0.03 * rate)
+    decay = np.exp(-np.arange(burst) / (0.008 * rate))
+    time = 0.1
+    while time < duration - 0.1:
+        start = int(time * rate)
+        signal[start:start + burst] += rng.normal(0, 0.5, burst) * decay
+        time += rng.uniform(0.15, 0.6)
+    return signal
+
+
+def shifted(signal, offset_ms, drift_ms_per_minute, rate=ANALYSIS_SAMPLE_RATE):
+    """The signal played late by offset_ms, growing by drift_ms_per_minute"""
+    time = np.arange(len(signal)) / rate
+    delay = (offset_ms + drift_ms_per_minute * time / 60) / 1000
+    return np.interp(time - delay, time, signal, left=0, right=0).astype(np.float32)
+
+
+def write_wav(path, signal, rate=ANALYSIS_SAMPLE_RATE):
+    pcm = (np.clip(signal, -1, 1) * 32767).astype(np.int16)
+    AudioSegment(data=pcm.tobytes(), sample_width=2, frame_rate=rate, channels=1).export(path, format="wav")
+
+
+@settings(max_examples=20, deadline=None)
+@given(
+    seed=st.integers(min_value=0, max_value=2 ** 32 - 1),
+    offset_ms=st.floats(min_value=-500, max_value=500),
+    drift=st.floats(min_value=-30, max_value=30)
+)
+def test_estimate_recovers_offset_and_drift(seed, offset_ms, drift):
+    reference = click_track(seed, 30)
+    track = shifted(reference, offset_ms, drift)
+
+    estimate = estimate_sync(onset_envelope(reference), onset_envelope(track), 0.0)
+
+    assert estimate is not None
+    assert estimate.confidence > 0.5
+    assert abs(estimate.drift_ms_per_minute - drift) < 3
+    for time, measured, _ in estimate.curve:
+        assert abs(measured - (offset_ms + drift * time / 60)) < 3
+
+
+def test_aligned_mix_restores_sync():
+    temp_dir = tempfile.mkdtemp(prefix="audio_sync_test_")
+    try:
+        reference_path = os.path.join(temp_dir, "reference.wav")
+        track_path = os.path.join(temp_dir, "track.wav")
+        mix_path = os.path.join(temp_dir, "mix.wav")
+        reference = click_track(3, 20)
+        write_wav(reference_path, reference)
+        write_wav(track_path, shifted(reference, 180, 25))
+
+        before = analyze_track_sync(reference_envelope(reference_path), track_path, 0.0, 20.0)
+        assert abs(before.offset_ms - (180 + 25 * 10 / 60)) < 5
+
+        render_aligned_mix(
+            [AlignedTrack(track_path, 0.0, 20.0, offset_curve=[(t, o) for t, o, _ in before.curve])],
+            20.0, mix_path
+        )
+        after = analyze_track_sync(reference_envelope(reference_path), mix_path, 0.0, 20.0)
+        assert all(abs(offset) < 2 for _, offset, _ in after.curve)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def test_sync_tolerance_follows_settings():
+    pipeline = RenderPipeline()
+    tracks = [AudioTrack("voice", "voice.wav", 0.0, 5.0, sync_offset=0.05)]
+
+    def analyze(tolerance_ms):
+        return asyncio.run(pipeline.analyze_audio_sync(
+            "video.mp4", tracks, AudioSyncMethod.MANUAL_OFFSET, tolerance_ms
+        ))[0].is_synchronized
+
+    assert not analyze(None)
+    assert analyze(60)
+
+
+def test_tracks_mixed_whether_or_not_corrected(monkeypatch):
+    mixes = []
+    muxes = []
+
+    async def probe(path):
+        return MediaInfo(duration=5.0)
+
+    async def mux(args):
+        muxes.append(args)
+        return True, ""
+
+    monkeypatch.setattr(render_pipeline, "probe_media", probe)
+    monkeypatch.setattr(render_pipeline, "run_ffmpeg", mux)
+    monkeypatch.setattr(render_pipeline, "render_aligned_mix", lambda tracks, duration, path: mixes.append(tracks))
+
+    pipeline = RenderPipeline()
+    tracks = [AudioTrack("voice", "voice.wav", 0.0, 5.0), AudioTrack("music", "music.wav", 1.0, 4.0)]
+    in_sync = [AudioSyncResult(True, 0.0, 0.9, AudioSyncMethod.WAVEFORM_ANALYSIS) for _ in tracks]
+    late = [AudioSyncResult(False, 120.0, 0.9, AudioSyncMethod.WAVEFORM_ANALYSIS), in_sync[1]]
+
+    for results in (in_sync, late):
+        assert asyncio.run(pipeline.correct_audio_sync("video.mp4", tracks, results, "out.mp4"))
+
+    placed, corrected = mixes
+    assert [track.file_path for track in placed] == [track.file_path for track in corrected]
+    assert [track.offset_curve for track in placed] == [[], []]
+    assert [track.offset_curve for track in corrected] == [[(0.0, 120.0)], []]
+    # The recorded audio is replaced on both paths
+    for args in muxes:
+        assert [args[i + 1] for i, arg in enumerate(args) if arg == "-map"] == ["0:v:0", "1:a:0"]
@@ -0,0 +1,112 @@
+"""
+Property-based test for Video Studio frame-sampled quality analysis.
+
+Tests that the batch metrics react to blur, 8x8 blocking and black frames,
+that sampling a video reports black and frozen stretches in proportion, and
+that assessing a still-image video reuses the pipeline's worker pool without
+failing it for being frozen.
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+
+import cv2
+import numpy as np
+from hypothesis import given, strategies as st, settings
+
+from app_utils.video_studio import render_pipeline
+from app_utils.video_studio.quality_analyzer import _batch_metrics, analyze_video_quality
+from app_utils.video_studio.render_pipeline import (
+    FROZEN_FRAME_WEIGHT, QualityControlSettings, RenderPipeline, RenderSettings, VideoQuality
+)
+from app_utils.video_studio.segment_encoder import MediaInfo
+
+
+def textured_frames(seed, count=3, size=(96, 128)):
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 256, size=(count, *size), dtype=np.uint8)
+    # Smooth noise behaves like natural texture rather than pixel noise
+    return np.stack([cv2.GaussianBlur(frame, (0, 0), 1.5) for frame in noise])
+
+
+def block_average(frame):
+    height, width = frame.shape
+    blocks = frame.reshape(height // 8, 8, width // 8, 8).mean(axis=(1, 3))
+    return np.repeat(np.repeat(blocks, 8, axis=0), 8, axis=1).astype(np.uint8)
+
+
+@settings(max_examples=30, deadline=None)
+@given(seed=st.integers(min_value=0, max_value=2 ** 32 - 1))
+def test_batch_metrics_react_to_degradation(seed):
+    frames = textured_frames(seed)
+    blurred = np.stack([cv2.GaussianBlur(frame, (0, 0), 3) for frame in frames])
+    blocky = np.stack([block_average(frame) for frame in frames])
+    black = np.full_like(frames, 12)
+
+    original = _batch_metrics(frames)
+    assert np.all(_batch_metrics(blurred)["sharpness"] < original["sharpness"])
+    assert np.all(_batch_metrics(blocky)["blockiness"] > original["blockiness"] + 0.5)
+    assert not original["black"].any()
+    assert _batch_metrics(black)["black"].all()
+
+
+def test_sampled_video_reports_black_and_frozen_stretches():
+    temp_dir = tempfile.mkdtemp(prefix="quality_analysis_test_")
+    try:
+        path = os.path.join(temp_dir, "sample.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (128, 96))
+        moving = textured_frames(7, count=40)
+        still = moving[0]
+        # 40 moving, 40 frozen, 20 black frames
+        for frame in list(moving) + [still] * 40 + [np.zeros_like(still)] * 20:
+            writer.write(cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR))
+        writer.release()
+
+        metrics = analyze_video_quality(path, sample_stride=5, batch_size=3)
+
+        assert (metrics.width, metrics.height, metrics.frame_count) == (128, 96, 100)
+        assert metrics.sampled_frames == 20
+        assert metrics.black_frame_ratio == 4 / 20
+        # The first sample of the frozen stretch still differs from the moving frame before it
+        assert metrics.frozen_frame_ratio == 7 / 20
+        assert metrics.bitrate_kbps > 0
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def test_still_image_video_assessment(monkeypatch):
+    temp_dir = tempfile.mkdtemp(prefix="quality_assessment_test_")
+    try:
+        path = os.path.join(temp_dir, "slide.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (128, 96))
+        slide = cv2.resize(textured_frames(11, count=1)[0], (128, 96))
+        for _ in range(50):
+            writer.write(cv2.cvtColor(slide, cv2.COLOR_GRAY2BGR))
+        writer.release()
+
+        async def probe(video_path):
+            return MediaInfo(duration=2.0, width=128, height=96, fps=25, has_audio=True, sample_rate=48000)
+
+        monkeypatch.setattr(render_pipeline, "probe_media", probe)
+        pipeline = RenderPipeline()
+        settings = RenderSettings(
+            quality=VideoQuality.HD_720P,
+            fps=25,
+            audio_enabled=False,
+            quality_control=QualityControlSettings(sample_stride=5)
+        )
+
+        first = asyncio.run(pipeline.assess_video_quality(path, settings))
+        executor = pipeline._quality_executor
+        second = asyncio.run(pipeline.assess_video_quality(path, settings))
+
+        assert first.metrics["frozen_frame_ratio"] > 0.8
+        assert first.picture_score >= 1.0 - FROZEN_FRAME_WEIGHT
+        assert second.picture_score == first.picture_score
+        assert executor is not None and pipeline._quality_executor is executor
+        pipeline._shutdown_quality_executor()
+        pipeline.cleanup_temp_files()
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
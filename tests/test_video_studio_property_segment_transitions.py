@@ -0,0 +1,127 @@
+"""
+Property-based test for Video Studio segment transitions and parallel encoding.
+
+Tests that transition windows never consume more than a segment has, that
+the encoded pieces add up to the planned timeline, and that concurrent
+renders all produce the expected number of frames.
+"""
+
+import asyncio
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+
+import pytest
+from hypothesis import given, strategies as st, settings
+
+from app_utils.video_studio.render_pipeline import (
+    RenderPipeline, RenderSettings, VideoSegment, VideoFormat, VideoQuality,
+    CompressionLevel, QualityControlSettings, TransitionType, plan_transitions
+)
+from app_utils.video_studio.segment_encoder import find_ffmpeg, probe_media
+
+FPS = 25
+
+segment_specs = st.lists(
+    st.tuples(
+        st.floats(min_value=0.04, max_value=5.0),       # duration
+        st.floats(min_value=-1.0, max_value=1.0),       # offset from the previous segment's end
+        st.sampled_from(list(TransitionType)),          # transition_out
+        st.floats(min_value=0.0, max_value=2.0),        # transition_duration
+    ),
+    min_size=1,
+    max_size=8
+)
+
+
+def build_segments(specs):
+    segments = []
+    start = 0.0
+    for index, (duration, offset, transition_out, transition_duration) in enumerate(specs):
+        if segments:
+            start = max(0.0, start + segments[-1].duration + offset)
+        segments.append(VideoSegment(
+            segment_id=f"seg_{index}",
+            file_path=f"/nonexistent/seg_{index}.mp4",
+            start_time=start,
+            duration=duration,
+            transition_out=transition_out,
+            transition_duration=transition_duration
+        ))
+    return segments
+
+
+@settings(max_examples=200, deadline=None)
+@given(specs=segment_specs)
+def test_transition_windows_fit_segments(specs):
+    segments = build_segments(specs)
+    lengths = [max(1, int(segment.duration * FPS)) for segment in segments]
+
+    plans = plan_transitions(segments, lengths, FPS)
+
+    assert len(plans) == len(segments) - 1
+    for index, length in enumerate(lengths):
+        head = plans[index - 1][1] if index > 0 else 0
+        tail = plans[index][1] if index < len(plans) else 0
+        assert head >= 0 and tail >= 0
+        assert head + tail <= length
+    for transition, frames in plans:
+        assert (transition == TransitionType.NONE) == (frames == 0)
+
+
+def make_source(path, size, with_audio):
+    inputs = ["-f", "lavfi", "-i", f"testsrc=size={size}:rate=30:duration=2"]
+    if with_audio:
+        inputs += ["-f", "lavfi", "-i", "sine=frequency=440:duration=2", "-shortest"]
+    subprocess.run([find_ffmpeg(), "-loglevel", "error", "-y", *inputs, path], check=True)
+
+
+def count_frames(path):
+    result = subprocess.run(
+        [find_ffmpeg(), "-hide_banner", "-i", path, "-map", "0:v", "-f", "null", "-"],
+        capture_output=True, text=True
+    )
+    return int(re.findall(r"frame=\s*(\d+)", result.stderr)[-1])
+
+
+@pytest.mark.skipif(find_ffmpeg() is None, reason="ffmpeg not available")
+def test_concurrent_renders_produce_planned_timeline():
+    temp_dir = tempfile.mkdtemp(prefix="segment_encode_test_")
+    try:
+        with_audio = os.path.join(temp_dir, "with_audio.mp4")
+        without_audio = os.path.join(temp_dir, "without_audio.mp4")
+        make_source(with_audio, "320x240", True)
+        make_source(without_audio, "160x160", False)
+
+        segments = [
+            VideoSegment("a", with_audio, 0.0, 2.0, transition_out=TransitionType.FADE),
+            VideoSegment("b", without_audio, 1.6, 2.0, transition_out=TransitionType.SLIDE_LEFT, transition_duration=0.4),
+            VideoSegment("c", with_audio, 3.6, 1.0),
+        ]
+        render_settings = RenderSettings(
+            output_format=VideoFormat.MP4,
+            quality=VideoQuality.HD_720P,
+            fps=FPS,
+            compression=CompressionLevel.LOW,
+            quality_control=QualityControlSettings(enable_quality_check=False)
+        )
+        pipeline = RenderPipeline()
+        outputs = [os.path.join(temp_dir, f"out_{i}.mp4") for i in range(3)]
+
+        async def render_all():
+            return await asyncio.gather(*(
+                pipeline.compose_video_segments(segments, output, render_settings) for output in outputs
+            ))
+
+        assert asyncio.run(render_all()) == [True, True, True]
+        assert pipeline.active_render_count == 0
+
+        # 50 + 50 + 25 frames less a 0.4s overlap and a 0.4s slide
+        for output in outputs:
+            info = asyncio.run(probe_media(output))
+            assert (info.width, info.height, info.video_codec, info.has_audio) == (1280, 720, "h264", True)
+            assert count_frames(output) == 105
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
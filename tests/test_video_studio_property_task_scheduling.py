@@ -0,0 +1,197 @@
+"""
+Property-based test for Video Studio task scheduling.
+
+Tests that each scheduling strategy dispatches queued tasks in its documented
+order, that cancelled tasks are dropped lazily and compacted without
+disturbing the queue counters, that parked dependents are queued when their
+dependencies complete or are cancelled, and that resources are released so
+tasks held back for lack of resources run next.
+"""
+
+import asyncio
+
+from hypothesis import given, strategies as st, settings
+
+from app_utils.video_studio.models import TaskPriority
+from app_utils.video_studio.task_scheduler import ResourceManager, SchedulingStrategy, TaskScheduler
+
+PRIORITY_ORDER = list(TaskPriority)
+
+task_specs = st.lists(
+    st.tuples(
+        st.sampled_from(PRIORITY_ORDER),
+        st.one_of(st.none(), st.floats(min_value=0.1, max_value=100.0))  # estimated_duration
+    ),
+    min_size=1,
+    max_size=30
+)
+
+
+def make_scheduler(strategy=SchedulingStrategy.PRIORITY, max_concurrent_tasks=1, resource_manager=None):
+    scheduler = TaskScheduler(max_concurrent_tasks, strategy, resource_manager)
+    started = []
+
+    async def processor(task_id, scheduled_task):
+        started.append(task_id)
+        await asyncio.sleep(0)
+
+    scheduler.add_task_processor(processor)
+    return scheduler, started
+
+
+async def drain(scheduler):
+    """Let queued, parked and running tasks finish."""
+    while scheduler._active_tasks or scheduler._queued_tasks or scheduler._blocked_tasks:
+        await asyncio.sleep(0)
+
+
+async def dispatch(scheduler, specs):
+    """Queue every task while paused, then run them one at a time."""
+    scheduler.max_concurrent_tasks = 0
+    for index, (priority, duration) in enumerate(specs):
+        assert await scheduler.schedule_task(f"t{index}", priority, estimated_duration=duration)
+    scheduler.max_concurrent_tasks = 1
+    await scheduler._start_available_tasks()
+    await drain(scheduler)
+
+
+def expected_order(strategy, specs):
+    """Reference dispatch order for tasks that are all queued before the first starts."""
+    tasks = [(f"t{index}", priority, duration, index) for index, (priority, duration) in enumerate(specs)]
+    by_priority = sorted(tasks, key=lambda task: (-task[1].value, task[3]))
+
+    if strategy == SchedulingStrategy.FIFO:
+        return [task[0] for task in tasks]
+    if strategy == SchedulingStrategy.PRIORITY:
+        return [task[0] for task in by_priority]
+    if strategy == SchedulingStrategy.SHORTEST_JOB_FIRST:
+        timed = sorted((task for task in tasks if task[2] is not None), key=lambda task: (task[2], task[3]))
+        return [task[0] for task in timed] + [task[0] for task in by_priority if task[2] is None]
+
+    # Round robin: one task per non-empty priority level, cycling from the lowest
+    queues = {priority: [task[0] for task in tasks if task[1] == priority] for priority in PRIORITY_ORDER}
+    order = []
+    index = 0
+    while any(queues.values()):
+        priority = PRIORITY_ORDER[index]
+        index = (index + 1) % len(PRIORITY_ORDER)
+        if queues[priority]:
+            order.append(queues[priority].pop(0))
+    return order
+
+
+@settings(max_examples=40, deadline=None)
+@given(specs=task_specs, strategy=st.sampled_from(list(SchedulingStrategy)))
+def test_dispatch_order_follows_strategy(specs, strategy):
+    scheduler, started = make_scheduler(strategy)
+
+    asyncio.run(dispatch(scheduler, specs))
+
+    assert started == expected_order(strategy, specs)
+
+
+def test_lazy_cancellation_and_compaction():
+    scheduler, started = make_scheduler()
+    priorities = {f"t{index}": PRIORITY_ORDER[index % len(PRIORITY_ORDER)] for index in range(1500)}
+    cancelled = [f"t{index}" for index in range(1500) if index % 4 != 3][:1100]
+
+    async def scenario():
+        scheduler.max_concurrent_tasks = 0
+        for task_id, priority in priorities.items():
+            await scheduler.schedule_task(task_id, priority)
+
+        # A duplicate ID is rejected instead of corrupting the counters
+        assert not await scheduler.schedule_task("t0", TaskPriority.URGENT)
+
+        for task_id in cancelled:
+            assert await scheduler.cancel_task(task_id)
+        assert not await scheduler.cancel_task(cancelled[0])
+
+        # Compaction ran once stale entries reached 1024 and outnumbered live ones
+        status = await scheduler.get_queue_status()
+        assert status['total_queued'] == 400
+        assert scheduler._stale_entries == 1100 - 1024
+        queued_entries = sum(len(queue) for queue in scheduler._priority_queues.values())
+        assert queued_entries == 400 + scheduler._stale_entries
+
+        scheduler.max_concurrent_tasks = 1
+        await scheduler._start_available_tasks()
+        await drain(scheduler)
+
+        status = await scheduler.get_queue_status()
+        assert status['total_queued'] == 0
+        assert scheduler._stale_entries == 0
+
+    asyncio.run(scenario())
+
+    live = [task_id for task_id in priorities if task_id not in set(cancelled)]
+    assert started == sorted(live, key=lambda task_id: -priorities[task_id].value)
+
+
+def test_dependents_wake_on_completion_and_cancel():
+    scheduler, started = make_scheduler(max_concurrent_tasks=2)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def hold(task_id, scheduled_task):
+            if task_id == "slow":
+                await release.wait()
+
+        scheduler.add_task_processor(hold)
+
+        # Completion: a chain runs in dependency order
+        await scheduler.schedule_task("a")
+        await scheduler.schedule_task("b", dependencies={"a"})
+        await scheduler.schedule_task("c", dependencies={"a", "b"})
+        assert (await scheduler.get_queue_status())['blocked_tasks'] == 2
+        await drain(scheduler)
+        assert started == ["a", "b", "c"]
+
+        # Cancelling a queued dependency queues its dependent
+        scheduler.max_concurrent_tasks = 0
+        await scheduler.schedule_task("queued")
+        await scheduler.schedule_task("after_queued", dependencies={"queued"})
+        assert await scheduler.cancel_task("queued")
+        status = await scheduler.get_queue_status()
+        assert (status['blocked_tasks'], status['total_queued']) == (0, 1)
+
+        # Cancelling a running dependency queues its dependent
+        scheduler.max_concurrent_tasks = 2
+        await scheduler.schedule_task("slow")
+        await scheduler.schedule_task("after_slow", dependencies={"slow"})
+        while "slow" not in started:
+            await asyncio.sleep(0)
+        assert await scheduler.cancel_task("slow")
+        await drain(scheduler)
+        assert (await scheduler.get_queue_status())['blocked_tasks'] == 0
+
+    asyncio.run(scenario())
+
+    assert started[3:] == ["after_queued", "slow", "after_slow"]
+
+
+def test_resources_released_and_retried_first():
+    resources = ResourceManager(max_memory_mb=1024)
+    scheduler, started = make_scheduler(max_concurrent_tasks=5, resource_manager=resources)
+    peak = []
+
+    async def record_usage(task_id, scheduled_task):
+        peak.append(resources.allocated_memory_mb)
+
+    scheduler.add_task_processor(record_usage)
+
+    async def scenario():
+        await scheduler.schedule_task("big_1", TaskPriority.HIGH, resource_requirements={'memory_mb': 600})
+        await scheduler.schedule_task("big_2", TaskPriority.HIGH, resource_requirements={'memory_mb': 600})
+        await scheduler.schedule_task("small", TaskPriority.NORMAL, resource_requirements={'memory_mb': 100})
+        # big_2 does not fit next to big_1 and stays at the head of its queue
+        status = await scheduler.get_queue_status()
+        assert (status['active_tasks'], status['total_queued']) == (1, 2)
+        await drain(scheduler)
+
+    asyncio.run(scenario())
+
+    assert started == ["big_1", "big_2", "small"]
+    assert max(peak) <= 1024
+    assert resources.allocated_memory_mb == 0
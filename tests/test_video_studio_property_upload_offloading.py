@@ -0,0 +1,108 @@
+"""
+Property-based test for Video Studio asset upload offloading.
+
+Tests that uploads are hashed while they are written (matching the checksum
+of the stored file), and that image processing runs off the event loop so
+other coroutines keep running during large uploads.
+"""
+
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from io import BytesIO
+
+import numpy as np
+from hypothesis import given, strategies as st, settings
+from PIL import Image
+
+from app_utils.video_studio.asset_manager import UPLOAD_CHUNK_SIZE, AssetManager
+from app_utils.video_studio.config import StorageConfig
+
+
+def make_manager(temp_dir, workers=2):
+    return AssetManager(StorageConfig(
+        base_path=os.path.join(temp_dir, "assets"),
+        temp_path=os.path.join(temp_dir, "temp"),
+        processing_workers=workers
+    ))
+
+
+@settings(max_examples=20, deadline=None)
+@given(
+    data=st.binary(min_size=1, max_size=4096),
+    chunks=st.integers(min_value=0, max_value=3),
+    as_stream=st.booleans()
+)
+def test_checksum_matches_written_file(data, chunks, as_stream):
+    temp_dir = tempfile.mkdtemp(prefix="upload_test_")
+    try:
+        manager = make_manager(temp_dir)
+        # Cross chunk boundaries as well as small payloads
+        payload = data * (chunks * UPLOAD_CHUNK_SIZE // len(data) + 1)
+        path = manager.base_path / "images" / "upload.bin"
+
+        checksum = manager._write_file(BytesIO(payload) if as_stream else payload, path)
+
+        assert path.read_bytes() == payload
+        assert checksum == hashlib.md5(payload).hexdigest() == manager._calculate_checksum(path)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def record_thread(func, threads):
+    def wrapper(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def test_uploads_do_not_block_event_loop():
+    temp_dir = tempfile.mkdtemp(prefix="upload_test_")
+    try:
+        manager = make_manager(temp_dir, workers=1)
+        threads = []
+        manager._write_file = record_thread(manager._write_file, threads)
+        manager._process_image_file = record_thread(manager._process_image_file, threads)
+        pixels = np.random.default_rng(0).integers(0, 256, (2000, 2000, 3), dtype=np.uint8)
+        buffer = BytesIO()
+        Image.fromarray(pixels).save(buffer, format="PNG", compress_level=1)
+        data = buffer.getvalue()
+
+        async def scenario():
+            max_stall = 0.0
+            done = asyncio.Event()
+
+            async def ticker():
+                nonlocal max_stall
+                while not done.is_set():
+                    start = time.perf_counter()
+                    await asyncio.sleep(0.005)
+                    max_stall = max(max_stall, time.perf_counter() - start - 0.005)
+
+            tick_task = asyncio.create_task(ticker())
+            asset_ids = await asyncio.gather(*[
+                manager.upload_image(data, f"image_{i}.png") for i in range(4)
+            ])
+            done.set()
+            await tick_task
+            return asset_ids, max_stall
+
+        asset_ids, max_stall = asyncio.run(scenario())
+        manager.close()
+
+        # Writing and image processing ran on the worker pool, not the event loop thread
+        assert len(threads) == 8
+        assert all(name.startswith("asset_processing") for name in threads)
+        # The loop kept ticking; the bound is loose so slow or loaded machines do not flake
+        assert max_stall < 0.5
+        for asset_id in asset_ids:
+            metadata = manager.get_asset_metadata(asset_id)
+            assert metadata.checksum == hashlib.md5(data).hexdigest()
+            assert (metadata.width, metadata.height) == (2000, 2000)
+            assert os.path.exists(metadata.thumbnail_path)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)